@@ -0,0 +1,118 @@
+"""Benchmark: DuckDB columnar fast path vs. pandas.read_sql_query
+
+1,000,000行の合成NL_SEをDuckDBに作成し、以下を比較する。
+
+- legacy: pd.read_sql_query(DBAPI接続) + DataFrame.to_dict(orient="records")
+- fast:   DatabaseConnection.execute_query_arrays()（fetchnumpy）+ arrays_to_records()
+
+Usage:
+    python scripts/bench_duckdb_fast_path.py [--rows 1000000] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jvlink_mcp_server.database.connection import DatabaseConnection  # noqa: E402
+from jvlink_mcp_server.database.serialization import arrays_to_records  # noqa: E402
+
+warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+
+QUERIES = {
+    # 人気×競馬場×年の集計（小さな結果）
+    "aggregate": """
+        SELECT Ninki, JyoCD, Year, COUNT(*) AS total,
+            SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) AS wins,
+            SUM(CASE WHEN KakuteiJyuni <= 3 THEN 1 ELSE 0 END) AS places_3
+        FROM NL_SE
+        WHERE KakuteiJyuni > 0
+        GROUP BY Ninki, JyoCD, Year
+    """,
+    # 馬ごとの集計（大きな結果）
+    "aggregate_by_horse": """
+        SELECT KettoNum, COUNT(*) AS runs, AVG(Odds) AS avg_odds,
+            MIN(KakuteiJyuni) AS best
+        FROM NL_SE
+        GROUP BY KettoNum
+    """,
+}
+
+
+def build_database(path: str, rows: int) -> None:
+    conn = duckdb.connect(path)
+    conn.execute(f"""
+        CREATE TABLE NL_SE AS
+        SELECT
+            (1986 + i % 39)::INTEGER AS Year,
+            lpad(((i % 12) + 1)::VARCHAR, 2, '0') || '01' AS MonthDay,
+            lpad(((i % 10) + 1)::VARCHAR, 2, '0') AS JyoCD,
+            (i % 12 + 1)::INTEGER AS RaceNum,
+            (i % 18 + 1)::INTEGER AS Umaban,
+            (i % 8 + 1)::INTEGER AS Wakuban,
+            lpad((i % 200000)::VARCHAR, 10, '0') AS KettoNum,
+            'ホース' || (i % 200000)::VARCHAR AS Bamei,
+            'キシュ' || (i % 300)::VARCHAR AS KisyuRyakusyo,
+            (i * 7 % 18)::INTEGER AS KakuteiJyuni,
+            (i * 11 % 18 + 1)::INTEGER AS Ninki,
+            CASE WHEN i % 50 = 0 THEN NULL ELSE (i % 500) / 10.0 + 1.0 END AS Odds
+        FROM range({rows}) t(i)
+    """)
+    conn.close()
+
+
+def legacy(path: str, sql: str):
+    conn = duckdb.connect(path, read_only=True)
+    try:
+        df = pd.read_sql_query(sql, conn)
+        return len(df), df.to_dict(orient="records")
+    finally:
+        conn.close()
+
+
+def fast(db: DatabaseConnection, sql: str):
+    arrays = db.execute_query_arrays(sql)
+    return len(next(iter(arrays.values()))), arrays_to_records(arrays)
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.duckdb")
+        print(f"Building NL_SE with {args.rows:,} rows...")
+        build_database(path, args.rows)
+
+        os.environ.update({"DB_TYPE": "duckdb", "DB_PATH": path, "DB_QUERY_TIMEOUT": "0"})
+        with DatabaseConnection() as db:
+            print(f"{'query':<20} {'rows':>9} {'legacy (s)':>11} {'fast (s)':>9} {'speedup':>8}")
+            for name, sql in QUERIES.items():
+                rows, _ = fast(db, sql)
+                t_legacy = measure(lambda: legacy(path, sql), args.repeat)
+                t_fast = measure(lambda: fast(db, sql), args.repeat)
+                print(f"{name:<20} {rows:>9,} {t_legacy:>11.3f} {t_fast:>9.3f} {t_legacy / t_fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark: favorite_performance from the aggregate cube vs. live SQL
+
+合成のNL_SE / NL_RAをDuckDBに作成し、get_favorite_performance の応答時間を比較する。
+
+- live: 毎回NL_SEを集計（条件によってはNL_RAと結合）。結果キャッシュは無効
+- cube: 集約キューブ（aggregate_cube）のロールアップ
+
+キューブの作成時間（初回のみ。以降はサイドカーファイルから読む）も表示する。
+
+Usage:
+    python scripts/bench_favorite_cube.py [--races 50000] [--repeat 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jvlink_mcp_server.database.aggregate_cube import (  # noqa: E402
+    clear_cubes,
+    cube_stats,
+    refresh_cubes,
+)
+from jvlink_mcp_server.database.connection import DatabaseConnection  # noqa: E402
+from jvlink_mcp_server.database.high_level_api import get_favorite_performance  # noqa: E402
+
+CASES = {
+    "ninki": {"ninki": 1},
+    "venue+year": {"ninki": 1, "venue": "東京", "year_from": "2015"},
+    "grade+distance": {"ninki": 2, "grade": "G1", "distance": 1600},
+    "track+venue": {"ninki": 1, "venue": "中山", "track": "ダート"},
+}
+
+
+def build_database(path: str, races: int) -> None:
+    conn = duckdb.connect(path)
+    conn.execute(f"""
+        CREATE TABLE NL_RA AS
+        SELECT
+            (1986 + i % 39)::INTEGER AS Year,
+            lpad(((i // 39) % 12 + 1)::VARCHAR, 2, '0') || '01' AS MonthDay,
+            lpad((i % 10 + 1)::VARCHAR, 2, '0') AS JyoCD,
+            '01' AS Kaiji, '01' AS Nichiji,
+            lpad((i // 468)::VARCHAR, 6, '0') AS RaceNum,
+            ([1200, 1400, 1600, 1800, 2000, 2400, 3000])[i % 7 + 1]::INTEGER AS Kyori,
+            (['A', 'B', 'C', 'E', ' '])[i % 5 + 1] AS GradeCD,
+            (['11', '17', '23', '24', '51'])[i % 5 + 1] AS TrackCD
+        FROM range({races}) t(i)
+    """)
+    conn.execute("""
+        CREATE TABLE NL_SE AS
+        SELECT r.Year, r.MonthDay, r.JyoCD, r.Kaiji, r.Nichiji, r.RaceNum,
+            u.u::INTEGER AS Umaban,
+            ((u.u + hash(r.RaceNum)) % 16 + 1)::INTEGER AS Ninki,
+            ((u.u * 7 + hash(r.RaceNum)) % 16 + 1)::INTEGER AS KakuteiJyuni
+        FROM NL_RA r, range(1, 17) u(u)
+    """)
+    conn.close()
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--races", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.duckdb")
+        print(f"Building {args.races:,} races ({args.races * 16:,} NL_SE rows)...")
+        build_database(path, args.races)
+        os.environ.update({"DB_TYPE": "duckdb", "DB_PATH": path, "DB_QUERY_TIMEOUT": "0",
+                           "DB_RESULT_CACHE": "0"})
+
+        with DatabaseConnection() as db:
+            start = time.perf_counter()
+            refresh_cubes(db)
+            print(f"cube build: {time.perf_counter() - start:.2f}s, "
+                  f"{next(iter(cube_stats().values()))['favorite_cube_jra']['cells']:,} cells")
+            clear_cubes()
+            start = time.perf_counter()
+            get_favorite_performance(db, ninki=1)
+            print(f"cube load from sidecar: {time.perf_counter() - start:.3f}s")
+
+            print(f"{'case':<16} {'live (ms)':>10} {'cube (ms)':>10} {'speedup':>9}")
+            for name, kwargs in CASES.items():
+                os.environ["DB_FAVORITE_CUBE"] = "0"
+                t_live = measure(lambda: get_favorite_performance(db, **kwargs), args.repeat)
+                os.environ["DB_FAVORITE_CUBE"] = "1"
+                t_cube = measure(lambda: get_favorite_performance(db, **kwargs), args.repeat)
+                print(f"{name:<16} {t_live * 1e3:>10.2f} {t_cube * 1e3:>10.3f} "
+                      f"{t_live / t_cube:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark: get_database_overview with statistics vs. exact COUNT(*)
+
+合成のNL_SE / NL_RA / NL_UMをSQLiteに作成し、get_data_snapshot の応答時間を比較する。
+キャッシュは使わない（毎回DBに問い合わせる）。
+
+- exact: 全テーブルを COUNT(*)、期間は MIN/MAX(Year || '-' || MonthDay) の全件走査
+- fast: sqlite_stat1（--analyze 指定時）または MAX(rowid) と、MIN/MAX(Year) からの期間
+
+Usage:
+    python scripts/bench_overview.py [--rows 2000000] [--repeat 5] [--analyze]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jvlink_mcp_server.database.connection import DatabaseConnection  # noqa: E402
+from jvlink_mcp_server.database.sample_data_provider import get_data_snapshot  # noqa: E402
+
+
+def build_database(path: str, rows: int, analyze: bool) -> None:
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE NL_SE (Year INTEGER, MonthDay TEXT, JyoCD TEXT, RaceNum INTEGER,
+                            Umaban INTEGER, KettoNum TEXT, KakuteiJyuni INTEGER)
+    """)
+    conn.execute("""
+        INSERT INTO NL_SE
+        WITH RECURSIVE t(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM t WHERE i + 1 < ?)
+        SELECT 1986 + i % 39, printf('%02d%02d', i / 39 % 12 + 1, i % 28 + 1),
+               printf('%02d', i % 10 + 1), i / 16 % 12 + 1, i % 16 + 1,
+               printf('%010d', i % 200000), i % 16 + 1
+        FROM t
+    """, (rows,))
+    conn.execute("CREATE INDEX idx_se_year ON NL_SE (Year, MonthDay)")
+    conn.execute("""
+        CREATE TABLE NL_RA AS
+        SELECT DISTINCT Year, MonthDay, JyoCD, RaceNum FROM NL_SE
+    """)
+    conn.execute("CREATE TABLE NL_UM AS SELECT DISTINCT KettoNum FROM NL_SE")
+    if analyze:
+        conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--analyze", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        print(f"Building {args.rows:,} NL_SE rows...")
+        build_database(path, args.rows, args.analyze)
+        os.environ.update({"DB_TYPE": "sqlite", "DB_PATH": path, "DB_QUERY_TIMEOUT": "0",
+                           "DB_RESULT_CACHE": "0"})
+
+        with DatabaseConnection() as db:
+            fast = get_data_snapshot(db, use_cache=False)
+            exact = get_data_snapshot(db, exact=True, use_cache=False)
+            for name, info in fast["tables"].items():
+                if "error" not in info:
+                    print(f"{name:<8} {info['count_method']:<14} {info['record_count']:>10,} "
+                          f"(exact {exact['tables'][name]['record_count']:,})")
+            print(f"period   fast {fast['data_period']}  exact {exact['data_period']}")
+
+            t_exact = measure(lambda: get_data_snapshot(db, exact=True, use_cache=False), args.repeat)
+            t_fast = measure(lambda: get_data_snapshot(db, use_cache=False), args.repeat)
+            print(f"exact: {t_exact * 1e3:.1f} ms  fast: {t_fast * 1e3:.1f} ms  "
+                  f"speedup: {t_exact / t_fast:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Benchmark: per-query overhead of QueryCorrector
+
+LLMが生成する程度の大きさのクエリで、keiba_data_search の前段
+（自動修正＋安全性チェック）にかかるコストを比較する。
+
+- legacy: 修正のたびにカラムごとの正規表現を組み立てる旧実装と、
+          危険キーワードごとの正規表現ループ
+- cold:   字句解析1回＋ルール表による1回走査（字句解析キャッシュ・メモともに空）
+- memo:   同じSQLの2回目以降（メモ・字句解析キャッシュがヒット）
+
+Usage:
+    python scripts/bench_query_corrector.py [--repeat 2000]
+"""
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jvlink_mcp_server.database.query_corrector import (  # noqa: E402
+    QueryCorrector,
+    clear_memo,
+    correct_query,
+)
+from jvlink_mcp_server.database.sql_lexer import clear_lex_cache, lex  # noqa: E402
+
+QUERIES = {
+    "simple": "SELECT * FROM NL_SE WHERE JyoCD = '5' AND Ninki = '1'",
+    "favorite_stats": """
+        SELECT s.Ninki, COUNT(*) AS total,
+            SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) AS wins,
+            ROUND(100.0 * SUM(CASE WHEN s.KakuteiJyuni <= 3 THEN 1 ELSE 0 END) / COUNT(*), 1)
+                AS place_rate
+        FROM NL_SE s
+        JOIN NL_RA r ON s.Year = r.Year AND s.MonthDay = r.MonthDay AND s.JyoCD = r.JyoCD
+            AND s.Kaiji = r.Kaiji AND s.Nichiji = r.Nichiji AND s.RaceNum = r.RaceNum
+        WHERE r.JyoCD IN ('5', '6', '9') AND r.Kyori = '1600' AND r.Year >= '2015'
+            AND s.KakuteiJyuni > 0 AND r.TrackCD LIKE '1%'
+        GROUP BY s.Ninki
+        ORDER BY s.Ninki
+    """,
+    "horse_history": """
+        WITH recent AS (
+            SELECT s.KettoNum, s.Bamei, s.Year, s.MonthDay, s.JyoCD, s.Umaban, s.Wakuban,
+                s.Ninki, s.KakuteiJyuni, s.Odds, s.Barei, r.Hondai, r.Kyori, r.GradeCD
+            FROM NL_SE s
+            JOIN NL_RA r ON s.Year = r.Year AND s.MonthDay = r.MonthDay
+                AND s.JyoCD = r.JyoCD AND s.Kaiji = r.Kaiji
+                AND s.Nichiji = r.Nichiji AND s.RaceNum = r.RaceNum
+            WHERE s.Bamei = 'ドウデュース' AND s.Year BETWEEN 2021 AND 2024
+        )
+        SELECT * FROM recent WHERE Wakuban = '8' OR Umaban = '1'
+        ORDER BY Year DESC, MonthDay DESC
+        LIMIT 50
+    """,
+}
+
+
+class LegacyQueryCorrector:
+    """旧実装（呼び出しごとにカラム別の正規表現を組み立てて適用）"""
+
+    def __init__(self):
+        self.corrections = []
+
+    def correct_query(self, sql):
+        self.corrections = []
+        for column_name, padding_length in QueryCorrector.ZERO_PADDING_COLUMNS.items():
+            sql = self._apply_zero_padding(sql, column_name, padding_length)
+        for column_name in QueryCorrector.INTEGER_COLUMNS:
+            sql = self._convert_string_to_int(sql, column_name)
+        return sql, self.corrections
+
+    def _note(self, message):
+        if message not in self.corrections:
+            self.corrections.append(message)
+
+    def _convert_string_to_int(self, sql, column_name):
+        def replacer(match):
+            self._note(f"{column_name}: '{match.group(2)}' → {match.group(2)} (INTEGER型)")
+            return f"{match.group(1)}{match.group(2)}"
+        return re.sub(rf"({column_name}\s*=\s*)'(\d+)'", replacer, sql, flags=re.IGNORECASE)
+
+    def _apply_zero_padding(self, sql, column_name, padding_length):
+        def pad(match):
+            value = match.group(2)
+            if len(value) < padding_length:
+                padded = value.zfill(padding_length)
+                self._note(f"{column_name}: '{value}' → '{padded}'")
+                return f"{match.group(1)}{padded}{match.group(3)}"
+            return match.group(0)
+        sql = re.sub(rf"({column_name}\s*=\s*')(\d+)(')", pad, sql, flags=re.IGNORECASE)
+
+        def pad_in(match):
+            def pad_value(value_match):
+                value = value_match.group(1)
+                if len(value) < padding_length:
+                    padded = value.zfill(padding_length)
+                    self._note(f"{column_name} IN句内: '{value}' → '{padded}'")
+                    return f"'{padded}'"
+                return value_match.group(0)
+            values = re.sub(r"'(\d+)'", pad_value, match.group(1))
+            return f"{column_name} IN ({values})"
+        return re.sub(rf"{column_name}\s+IN\s*\((.*?)\)", pad_in, sql, flags=re.IGNORECASE)
+
+
+LEGACY_DANGEROUS = [
+    "DROP", "DELETE", "UPDATE", "INSERT", "CREATE", "ALTER",
+    "TRUNCATE", "REPLACE", "MERGE", "GRANT", "REVOKE"
+]
+
+
+def legacy(sql):
+    corrected, _ = LegacyQueryCorrector().correct_query(sql)
+    query_upper = corrected.upper()
+    for keyword in LEGACY_DANGEROUS:
+        re.search(r'\b' + keyword + r'\b', query_upper)
+    return corrected
+
+
+def current(sql):
+    corrected, _ = correct_query(sql)
+    lexed = lex(corrected)
+    return lexed.statement_count, lexed.dangerous_keywords
+
+
+def cold(sql):
+    clear_memo()
+    clear_lex_cache()
+    return current(sql)
+
+
+def measure(fn, sql, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(sql)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'query':<16} {'chars':>6} {'legacy (us)':>12} {'cold (us)':>10} {'memo (us)':>10}")
+    for name, sql in QUERIES.items():
+        t_legacy = measure(legacy, sql, args.repeat)
+        t_cold = measure(cold, sql, args.repeat)
+        current(sql)
+        t_memo = measure(current, sql, args.repeat)
+        print(f"{name:<16} {len(sql):>6} {t_legacy:>12.1f} {t_cold:>10.1f} {t_memo:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
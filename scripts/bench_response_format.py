@@ -0,0 +1,105 @@
+"""Benchmark: records vs. columnar tool responses
+
+NL_SE相当の列の多い結果（整数・NaNを含む実数・文字列・日時）を合成し、
+ツール応答の組み立てとJSON化にかかる時間と、JSONのサイズを比較する。
+
+- to_dict: 従来の ``df.to_dict(orient="records")``
+- records: response_format="records"（カラム配列から行ごとのdict）
+- columnar: response_format="columnar"（カラムごとの配列、日時はISO文字列）
+
+JSON化はFastMCPがツールの戻り値（dict）をテキストにするのと同じ
+``pydantic_core.to_json(..., fallback=str, indent=2)`` で行う。
+
+Usage:
+    python scripts/bench_response_format.py [--rows 100 1000] [--columns 60] [--repeat 20]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pydantic_core
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from jvlink_mcp_server.database.serialization import (  # noqa: E402
+    encode_rows,
+    frame_to_arrays,
+)
+
+# NL_SEの実カラム名（残りは ExtraN で埋める）
+NAMES = ["Year", "MonthDay", "JyoCD", "Kaiji", "Nichiji", "RaceNum", "Wakuban", "Umaban",
+         "KettoNum", "Bamei", "SexCD", "Barei", "KisyuCode", "KisyuRyakusyo", "Futan",
+         "BaTaijyu", "ZogenSa", "KakuteiJyuni", "Time", "ChakusaCD", "Odds", "Ninki",
+         "HaronTimeL3", "MakeDate"]
+
+
+def build_frame(rows: int, columns: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    data = {}
+    for i in range(columns):
+        name = NAMES[i] if i < len(NAMES) else f"Extra{i}"
+        kind = i % 4
+        if name == "MakeDate":
+            data[name] = pd.to_datetime("2024-01-01") + pd.to_timedelta(
+                rng.integers(0, 365, rows), unit="D")
+        elif kind == 0:
+            data[name] = rng.integers(0, 3000, rows)
+        elif kind == 1:
+            values = rng.random(rows) * 100
+            values[rng.random(rows) < 0.1] = np.nan
+            data[name] = values
+        else:
+            data[name] = pd.Series(rng.integers(0, 10_000, rows)).map(lambda v: f"ウマ{v:05d}")
+    return pd.DataFrame(data)
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def payloads(df: pd.DataFrame):
+    return {
+        "to_dict": lambda: {"columns": df.columns.tolist(), "data": df.to_dict(orient="records")},
+        "records": lambda: encode_rows(frame_to_arrays(df), "records"),
+        "columnar": lambda: encode_rows(frame_to_arrays(df), "columnar"),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--columns", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'format':<9} {'build (ms)':>11} {'json (ms)':>10} "
+          f"{'total (ms)':>11} {'bytes':>11} {'size':>6} {'speedup':>8}")
+    for rows in args.rows:
+        df = build_frame(rows, args.columns)
+        baseline = None
+        for name, build in payloads(df).items():
+            payload = build()
+            text = pydantic_core.to_json(payload, fallback=str, indent=2)
+            t_build = measure(build, args.repeat)
+            t_json = measure(lambda: pydantic_core.to_json(payload, fallback=str, indent=2),
+                             args.repeat)
+            total = t_build + t_json
+            if baseline is None:
+                baseline = (total, len(text))
+            print(f"{rows:>6} {name:<9} {t_build * 1e3:>11.2f} {t_json * 1e3:>10.2f} "
+                  f"{total * 1e3:>11.2f} {len(text):>11,} "
+                  f"{len(text) / baseline[1]:>6.0%} {baseline[0] / total:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
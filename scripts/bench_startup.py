@@ -0,0 +1,141 @@
+"""Benchmark: time to first MCP ``initialize`` response
+
+サーバーをサブプロセスで起動し、MCPの initialize 要求に応答が返るまでの時間
+（プロセス起動からの経過時間）を計測する。
+
+- stdio: ``python -m jvlink_mcp_server`` の標準入力に initialize を書き込み、
+  標準出力に id=1 の応答が出るまで
+- sse: ``python -m jvlink_mcp_server.server_sse`` の /sse に接続し、
+  通知された endpoint に initialize をPOSTして、SSEに応答が出るまで
+
+環境変数はそのまま子プロセスに渡る（--env で上書きできる）。
+例えば閉域環境を想定するなら MCP_UPDATE_CHECK=0、起動時のインデックス確認を
+除くなら DB_INDEX_AUDIT=0 を指定する。
+
+Usage:
+    python scripts/bench_startup.py [--transport stdio sse] [--repeat 5] [--env KEY=VALUE ...]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+INITIALIZE = {
+    "jsonrpc": "2.0",
+    "id": 1,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {},
+        "clientInfo": {"name": "bench_startup", "version": "0"},
+    },
+}
+
+
+def child_env(overrides: dict) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    env.update(overrides)
+    return env
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_stdio(env: dict, timeout: float) -> float:
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "jvlink_mcp_server"], env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True, encoding="utf-8")
+    try:
+        proc.stdin.write(json.dumps(INITIALIZE) + "\n")
+        proc.stdin.flush()
+        for line in proc.stdout:
+            if time.perf_counter() - start > timeout:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("id") == 1:
+                return time.perf_counter() - start
+        raise RuntimeError("no initialize response on stdout")
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def _sse_events(response):
+    event, data = "message", []
+    for line in response.iter_lines():
+        if line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].strip())
+        elif not line and data:
+            yield event, "\n".join(data)
+            event, data = "message", []
+
+
+def time_sse(env: dict, timeout: float) -> float:
+    port = free_port()
+    env = {**env, "MCP_HOST": "127.0.0.1", "MCP_PORT": str(port)}
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "jvlink_mcp_server.server_sse"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            while True:
+                if time.perf_counter() - start > timeout or proc.poll() is not None:
+                    raise RuntimeError("SSE server did not start")
+                try:
+                    with client.stream("GET", f"{base}/sse") as response:
+                        events = _sse_events(response)
+                        for event, data in events:
+                            if event == "endpoint":
+                                client.post(f"{base}{data}", json=INITIALIZE)
+                            elif json.loads(data).get("id") == 1:
+                                return time.perf_counter() - start
+                except httpx.ConnectError:
+                    time.sleep(0.01)
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+TRANSPORTS = {"stdio": time_stdio, "sse": time_sse}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transport", nargs="+", choices=sorted(TRANSPORTS),
+                        default=["stdio", "sse"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--env", nargs="*", default=[], metavar="KEY=VALUE")
+    args = parser.parse_args()
+    env = child_env(dict(item.split("=", 1) for item in args.env))
+
+    print(f"{'transport':<10} {'median (ms)':>12} {'min (ms)':>10} {'max (ms)':>10}")
+    for name in args.transport:
+        timings = [TRANSPORTS[name](env, args.timeout) for _ in range(args.repeat)]
+        print(f"{name:<10} {statistics.median(timings) * 1e3:>12.0f} "
+              f"{min(timings) * 1e3:>10.0f} {max(timings) * 1e3:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,18 @@
-"""Database module for JVLink MCP Server"""
+"""Database module for JVLink MCP Server
 
-from .connection import DatabaseConnection
-from . import high_level_api
+DatabaseConnection と high_level_api は pandas を読み込むため、
+最初に参照されたときに import する（サーバーの起動を速くする）。
+"""
+
+import importlib
 
 __all__ = ["DatabaseConnection", "high_level_api"]
+
+
+def __getattr__(name):
+    if name == "DatabaseConnection":
+        from .connection import DatabaseConnection
+        return DatabaseConnection
+    if name == "high_level_api":
+        return importlib.import_module(".high_level_api", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,683 @@
+"""Precomputed favorite-performance cube
+
+favorite_performance / nar_favorite_performance の答えは数個のカウンタ
+（出走数・1着・2着以内・3着以内）だけだが、毎回NL_SE全体（グレード・距離の
+指定時はNL_RAとの6カラム結合も）を集計していた。
+
+そこで NL_SE⨝NL_RA を
+人気（Ninki）× 競馬場（JyoCD）× 年（Year）× 距離（Kyori）× グレード（GradeCD）
+× 芝/ダート/障害（TrackCD）
+の単位で一度だけ集計した集約キューブを作り、ローカルのサイドカーファイル
+（SQLite）に保存する。問い合わせはメモリ上のキューブ（人気ごとのnumpy配列）を
+条件で絞って合計するだけなので1ミリ秒未満で答えられる。
+
+- キューブはデータ世代トークンに紐づき、DBが更新されると、前回の高水位点以降に
+  追加・訂正された年だけを集計し直す（incremental。MakeDateがないDBは全体を作り直す）
+- 集計はツール呼び出しの中では行わない。キューブがない（または古い）間はSQLで答え、
+  作成はバックグラウンドスレッド・定期更新・インデックス作成コマンドがタイムアウトなしで行う
+- サイドカーの世代が一致すればサーバー再起動後も再集計しない
+- ソースにない次元（NL_RAがない等）での絞り込みは従来どおりSQLで集計する
+- 作成・保存・差分更新の仕組みは CubeSpec で定義した他の集約（sire_rollup）と共通
+
+環境変数:
+- DB_FAVORITE_CUBE: 0/false で無効化（常にSQLで集計）
+- DB_CUBE_PATH: サイドカーファイルのパス（既定: SQLite/DuckDBは ``<DB_PATH>.cube.sqlite``、
+  PostgreSQLは保存せずメモリ上だけで保持）
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .incremental import Watermark, changed_years_since, changed_years_via, read_watermarks
+from .pool import _describe_key
+from .query_control import QueryInterruptedError
+from .race_key import RACE_KEY_COLUMNS, race_join
+from .utils import validate_identifier
+
+logger = logging.getLogger(__name__)
+
+# 芝・ダート・障害の区分（TrackCDの範囲）
+TRACK_CD_RANGES: Dict[str, Tuple[int, int]] = {
+    "turf": (10, 22),
+    "dirt": (23, 29),
+    "jump": (51, 59),
+}
+
+# キューブの次元（カラム名, 元テーブル別名, 元カラム）
+DIMENSIONS: Tuple[Tuple[str, str, str], ...] = (
+    ("Ninki", "s", "Ninki"),
+    ("JyoCD", "s", "JyoCD"),
+    ("Year", "s", "Year"),
+    ("Kyori", "r", "Kyori"),
+    ("GradeCD", "r", "GradeCD"),
+    ("Track", "r", "TrackCD"),
+)
+MEASURES = ("total", "wins", "places_2", "places_3")
+
+_RACE_KEY = RACE_KEY_COLUMNS
+
+
+def cube_enabled() -> bool:
+    return os.getenv("DB_FAVORITE_CUBE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def _as_int(expr: str) -> str:
+    """数値カラム（TEXT格納・空文字を含む場合もある）を整数に揃える式"""
+    return f"CAST(NULLIF(TRIM(CAST({expr} AS VARCHAR)), '') AS INTEGER)"
+
+
+def _track_expr(expr: str) -> str:
+    code = _as_int(expr)
+    whens = " ".join(f"WHEN {code} BETWEEN {lo} AND {hi} THEN '{name}'"
+                     for name, (lo, hi) in TRACK_CD_RANGES.items())
+    return f"CASE {whens} END"
+
+
+def has_race_table(db, ra_table: str) -> bool:
+    return db.has_table(ra_table) and all(db.has_column(ra_table, c) for c in _RACE_KEY)
+
+
+def build_cube_sql(db, se_table: str, ra_table: str,
+                   years: Optional[Sequence[Any]] = None) -> Tuple[str, Tuple, Tuple[str, ...]]:
+    """キューブを集計するSQL・パラメータと、ソースで実際に使える次元
+
+    NL_RAやその一部カラムがないDBでは、その次元をNULLで埋めて集計する。
+    years を指定するとその年（DBに格納されている値）だけを集計する（差分更新用）。
+    """
+    validate_identifier(se_table, "table name")
+    validate_identifier(ra_table, "table name")
+    has_ra = has_race_table(db, ra_table)
+
+    selects = []
+    dimensions = []
+    for name, alias, column in DIMENSIONS:
+        table = se_table if alias == "s" else ra_table
+        if (alias == "r" and not has_ra) or not db.has_column(table, column):
+            selects.append(f"NULL AS {name}")
+            continue
+        dimensions.append(name)
+        source = f"{alias}.{column}"
+        if name == "Track":
+            selects.append(f"{_track_expr(source)} AS {name}")
+        elif name in ("Ninki", "Year", "Kyori"):
+            selects.append(f"{_as_int(source)} AS {name}")
+        else:
+            selects.append(f"{source} AS {name}")
+
+    source, join = se_table, ""
+    if has_ra:
+        race = race_join(db, se_table, ra_table)
+        source, join = race.se, f"LEFT JOIN {race.ra} r ON {race.on}"
+    group_by = ", ".join(str(i) for i in range(1, len(DIMENSIONS) + 1))
+    year_filter = ""
+    if years:
+        year_filter = f" AND s.Year IN ({', '.join('?' * len(years))})"
+    query = f"""
+    SELECT {', '.join(selects)},
+        COUNT(*) AS total,
+        SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) AS wins,
+        SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) AS places_2,
+        SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) AS places_3
+    FROM {source} s
+    {join}
+    WHERE s.Ninki IS NOT NULL AND s.KakuteiJyuni IS NOT NULL AND s.KakuteiJyuni > 0{year_filter}
+    GROUP BY {group_by}
+    """
+    return query, tuple(years or ()), tuple(dimensions)
+
+
+class FavoriteCube:
+    """人気別成績の集約キューブ（メモリ上）
+
+    人気ごとに行を分け、各次元を整数配列（文字列次元はカテゴリ番号）で持つ。
+
+    Args:
+        frame: 次元カラムと total/wins/places_2/places_3 を持つ集計結果
+        dimensions: ソースで実際に集計できた次元（それ以外の次元での絞り込みは不可）
+    """
+
+    def __init__(self, frame: pd.DataFrame, dimensions: Tuple[str, ...]):
+        self.dimensions = frozenset(dimensions)
+        self.rows = len(frame)
+        self._categories: Dict[str, Dict[str, int]] = {}
+        columns: Dict[str, np.ndarray] = {}
+        for name in ("JyoCD", "GradeCD", "Track"):
+            values = frame[name].astype(object).where(frame[name].notna(), None)
+            values = values.map(lambda v: None if v is None else str(v).strip())
+            categorical = pd.Categorical(values)
+            self._categories[name] = {c: i for i, c in enumerate(categorical.categories)}
+            columns[name] = categorical.codes.astype(np.int16)
+        for name in ("Year", "Kyori"):
+            columns[name] = pd.to_numeric(frame[name], errors="coerce").fillna(-1).to_numpy(np.int32)
+        for name in MEASURES:
+            columns[name] = pd.to_numeric(frame[name], errors="coerce").fillna(0).to_numpy(np.int64)
+        ninki = pd.to_numeric(frame["Ninki"], errors="coerce").fillna(-1).to_numpy(np.int32)
+
+        self._partitions: Dict[int, Dict[str, np.ndarray]] = {}
+        for value in np.unique(ninki):
+            mask = ninki == value
+            self._partitions[int(value)] = {name: array[mask] for name, array in columns.items()}
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def covers(self, **filters: Any) -> bool:
+        """指定された絞り込みをすべてキューブで扱えるか"""
+        used = {name for name, value in filters.items() if value is not None}
+        return used <= self.dimensions
+
+    def rollup(self, ninki: int, venue_code: Optional[str] = None,
+               grade_code: Optional[str] = None, year_from: Optional[int] = None,
+               distance: Optional[int] = None,
+               track: Optional[str] = None) -> Tuple[int, int, int, int]:
+        """条件に合うセルを合計した (total, wins, places_2, places_3)"""
+        part = self._partitions.get(int(ninki))
+        if part is None:
+            return 0, 0, 0, 0
+        mask = np.ones(len(part["total"]), dtype=bool)
+        for name, value in (("JyoCD", venue_code), ("GradeCD", grade_code), ("Track", track)):
+            if value is not None:
+                code = self._categories[name].get(str(value).strip())
+                if code is None:
+                    return 0, 0, 0, 0
+                mask &= part[name] == code
+        if year_from is not None:
+            mask &= part["Year"] >= int(year_from)
+        if distance is not None:
+            mask &= part["Kyori"] == int(distance)
+        return tuple(int(part[name][mask].sum()) for name in MEASURES)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cells": self.rows, "ninki_partitions": len(self._partitions),
+                "dimensions": sorted(self.dimensions)}
+
+
+# ============================================================================
+# サイドカーファイル
+# ============================================================================
+
+def sidecar_path(db) -> Optional[str]:
+    """サイドカーファイルのパス（Noneなら保存しない）"""
+    path = os.getenv("DB_CUBE_PATH")
+    if path:
+        return path
+    if db.db_type in ("sqlite", "duckdb") and db.db_path and db.db_path != ":memory:":
+        return f"{db.db_path}.cube.sqlite"
+    return None
+
+
+def _source_id(db) -> str:
+    """接続先の識別子（DB_CUBE_PATHを複数のDBで共有しても取り違えないため）"""
+    return hashlib.sha256(repr(db._pool_key()).encode()).hexdigest()[:16]
+
+
+def _cube_table(source: str) -> str:
+    return validate_identifier(f"favorite_cube_{source}", "table name")
+
+
+_META_DDL = """
+    CREATE TABLE IF NOT EXISTS cube_meta (
+        name TEXT PRIMARY KEY, source_id TEXT, source_version TEXT,
+        dimensions TEXT, rows INTEGER, built_at TEXT, watermarks TEXT
+    )
+"""
+
+
+@dataclass
+class StoredCube:
+    """集計済みキューブ（サイドカーに保存する単位）"""
+
+    frame: pd.DataFrame
+    dimensions: Tuple[str, ...]
+    version: str  # データ世代トークンのrepr
+    watermarks: Optional[Dict[str, Watermark]]  # 差分更新の起点（Noneは差分更新不可）
+
+
+def _dump_watermarks(marks: Optional[Dict[str, Watermark]]) -> Optional[str]:
+    if marks is None:
+        return None
+    return json.dumps({table: mark.to_dict() for table, mark in marks.items()})
+
+
+def _load_watermarks(text: Optional[str]) -> Optional[Dict[str, Watermark]]:
+    if not text:
+        return None
+    return {table: Watermark.from_dict(mark) for table, mark in json.loads(text).items()}
+
+
+def load_sidecar(path: str, name: str, source_id: str) -> Optional[StoredCube]:
+    """保存済みキューブを読む（データ世代は問わない。なければNone）"""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cube_meta)")}
+        if not columns:
+            return None
+        watermarks = "watermarks" if "watermarks" in columns else "NULL"
+        row = conn.execute(
+            f"SELECT dimensions, source_version, {watermarks} FROM cube_meta "
+            "WHERE name = ? AND source_id = ?", (name, source_id)
+        ).fetchone()
+        if row is None:
+            return None
+        frame = pd.read_sql_query(f"SELECT * FROM {name}", conn)
+        return StoredCube(frame, tuple(d for d in row[0].split(",") if d), row[1],
+                          _load_watermarks(row[2]))
+    except (sqlite3.Error, ValueError, pd.errors.DatabaseError) as e:
+        logger.debug(f"Failed to read cube sidecar {path}: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def save_sidecar(path: str, name: str, source_id: str, stored: StoredCube) -> None:
+    """キューブをサイドカーファイルに書く（テーブルごと置き換え）"""
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            conn.execute(_META_DDL)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(cube_meta)")}
+            if "watermarks" not in columns:
+                conn.execute("ALTER TABLE cube_meta ADD COLUMN watermarks TEXT")
+            conn.execute(f"DROP TABLE IF EXISTS {name}")
+            stored.frame.to_sql(name, conn, index=False)
+            conn.execute(
+                "INSERT OR REPLACE INTO cube_meta "
+                "(name, source_id, source_version, dimensions, rows, built_at, watermarks) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, source_id, stored.version, ",".join(stored.dimensions),
+                 len(stored.frame), datetime.now().isoformat(timespec="seconds"),
+                 _dump_watermarks(stored.watermarks)),
+            )
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# キューブの定義
+# ============================================================================
+
+@dataclass(frozen=True)
+class CubeSpec:
+    """集約キューブ1種類の定義
+
+    Args:
+        name: サイドカーのテーブル名（接続先ごとの登録キーにも使う）
+        fact_table: 年（Year）で分割して差分更新するファクトテーブル（NL_SE系）
+        race_table: 距離・グレード等を結合するレーステーブル（NL_RA系。なくてもよい）
+        lookups: ファクトに結合するマスタ (テーブル, 結合キー)。マスタの変更は
+            そのキーを持つファクト行の年を集計し直す
+        build_sql: (db, years) → (SQL, パラメータ, 使える次元)
+        factory: (集計結果, 次元) → メモリ上のキューブ
+    """
+
+    name: str
+    fact_table: str
+    race_table: str
+    build_sql: Callable[[Any, Optional[Sequence[Any]]], Tuple[str, Tuple, Tuple[str, ...]]]
+    factory: Callable[[pd.DataFrame, Tuple[str, ...]], Any]
+    lookups: Tuple[Tuple[str, str], ...] = ()
+
+
+def favorite_cube_spec(source: str, se_table: str, ra_table: str) -> CubeSpec:
+    return CubeSpec(
+        name=_cube_table(source),
+        fact_table=se_table,
+        race_table=ra_table,
+        build_sql=lambda db, years: build_cube_sql(db, se_table, ra_table, years),
+        factory=FavoriteCube,
+    )
+
+
+# 定期更新（refresh_cubes）の対象
+_registered: Dict[str, CubeSpec] = {}
+
+
+def register_cube(spec: CubeSpec) -> CubeSpec:
+    """キューブを定期更新の対象に登録する"""
+    _registered[spec.name] = spec
+    return spec
+
+
+# ============================================================================
+# 作成・差分更新
+# ============================================================================
+
+def _aggregate(db, spec: CubeSpec,
+               years: Optional[Sequence[Any]] = None) -> Tuple[pd.DataFrame, Tuple[str, ...]]:
+    query, params, dimensions = spec.build_sql(db, years)
+    frame = db.execute_query(query, params=params or None, use_cache=False)
+    if not isinstance(frame, pd.DataFrame):
+        raise TypeError("execute_query did not return a DataFrame")
+    return frame, dimensions
+
+
+def _source_tables(db, spec: CubeSpec) -> List[str]:
+    tables = [spec.fact_table]
+    if has_race_table(db, spec.race_table):
+        tables.append(spec.race_table)
+    tables.extend(table for table, _ in spec.lookups)
+    return tables
+
+
+def build_full(db, spec: CubeSpec, version: Hashable) -> StoredCube:
+    """ソース全体を集計する"""
+    # 集計より先に高水位点を読む（集計中に追記された行は次回の差分に含まれる）
+    marks = read_watermarks(db, _source_tables(db, spec))
+    frame, dimensions = _aggregate(db, spec)
+    return StoredCube(frame, dimensions, repr(version), marks)
+
+
+def _changed_years(db, spec: CubeSpec, marks: Dict[str, Watermark]) -> List[Any]:
+    lookups = dict(spec.lookups)
+    direct = {table: mark for table, mark in marks.items() if table not in lookups}
+    years = {str(year).strip(): year for year in changed_years_since(db, direct)}
+    for table, key in spec.lookups:
+        for year in changed_years_via(db, spec.fact_table, table, key, marks[table]):
+            years.setdefault(str(year).strip(), year)
+    return list(years.values())
+
+
+def refresh_incremental(db, spec: CubeSpec, version: Hashable,
+                        previous: StoredCube) -> Optional[Tuple[StoredCube, List[Any]]]:
+    """前回の高水位点以降に変更があった年だけを集計し直す
+
+    差分更新できない場合（高水位点がない、ソースの構成が変わった）はNone。
+    戻り値は (新しいキューブ, 集計し直した年)。
+    """
+    if previous.watermarks is None:
+        return None
+    tables = _source_tables(db, spec)
+    if set(previous.watermarks) != set(tables):
+        return None
+    marks = read_watermarks(db, tables)
+    if marks is None:
+        return None
+    years = _changed_years(db, spec, previous.watermarks)
+    if not years:
+        return StoredCube(previous.frame, previous.dimensions, repr(version), marks), []
+
+    delta, dimensions = _aggregate(db, spec, years)
+    if dimensions != previous.dimensions:
+        return None
+    replaced = {int(str(year).strip()) for year in years if str(year).strip().isdigit()}
+    kept = previous.frame[~pd.to_numeric(previous.frame["Year"], errors="coerce").isin(replaced)]
+    frame = pd.concat([kept, delta], ignore_index=True) if len(kept) else delta
+    return StoredCube(frame, dimensions, repr(version), marks), years
+
+
+# ============================================================================
+# 接続先・データ世代ごとのキューブ
+# ============================================================================
+
+@dataclass
+class _Entry:
+    version: Hashable
+    cube: Optional[Any]  # None は作成失敗（同じ世代では再試行しない）
+    origin: str  # "built" / "sidecar" / "incremental" / "failed"
+    seconds: float
+    stored: Optional[StoredCube] = None
+    refreshed_years: Tuple[Any, ...] = ()
+
+
+_cubes: Dict[Hashable, _Entry] = {}
+_cubes_lock = threading.Lock()
+_build_locks: Dict[Hashable, threading.Lock] = {}
+
+
+def _load_or_build(db, spec: CubeSpec, version: Hashable,
+                   previous: Optional[StoredCube]) -> _Entry:
+    path = sidecar_path(db)
+    source_id = _source_id(db)
+    start = time.perf_counter()
+
+    if previous is None and path:
+        previous = load_sidecar(path, spec.name, source_id)
+    if previous is not None and previous.version == repr(version):
+        return _Entry(version, spec.factory(previous.frame, previous.dimensions), "sidecar",
+                      time.perf_counter() - start, previous)
+
+    stored = None
+    years: List[Any] = []
+    if previous is not None:
+        try:
+            refreshed = refresh_incremental(db, spec, version, previous)
+        except Exception as e:
+            logger.info(f"Incremental refresh of {spec.name} failed, rebuilding: {e}")
+            refreshed = None
+        if refreshed is not None:
+            stored, years = refreshed
+    origin = "incremental" if stored is not None else "built"
+    if stored is None:
+        stored = build_full(db, spec, version)
+
+    cube = spec.factory(stored.frame, stored.dimensions)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Cube {spec.name} {origin}: {len(cube)} cells in {elapsed:.2f}s"
+                + (f" (years: {', '.join(map(str, years))})" if years else ""))
+    if path:
+        try:
+            save_sidecar(path, spec.name, source_id, stored)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Failed to save cube {spec.name} to {path}: {e}")
+    return _Entry(version, cube, origin, elapsed, stored, tuple(years))
+
+
+def _load_sidecar_entry(db, spec: CubeSpec, version: Hashable) -> Optional[_Entry]:
+    """データ世代が一致するサイドカーのキューブ（DBには問い合わせない）"""
+    path = sidecar_path(db)
+    if not path:
+        return None
+    start = time.perf_counter()
+    stored = load_sidecar(path, spec.name, _source_id(db))
+    if stored is None or stored.version != repr(version):
+        return None
+    return _Entry(version, spec.factory(stored.frame, stored.dimensions), "sidecar",
+                  time.perf_counter() - start, stored)
+
+
+def build_cube(db, spec: CubeSpec) -> Optional[_Entry]:
+    """キューブを現在のデータ世代に合わせて作り、登録する（呼び出し元のスレッドで集計する）
+
+    前回のキューブ（メモリ上またはサイドカー）があれば、前回の高水位点以降に変更が
+    あった年だけを集計し直す。無効化されている・データ世代が取れない場合はNone。
+
+    Raises:
+        QueryInterruptedError: 集計中にタイムアウト・キャンセルされた場合（失敗として記録しない）
+    """
+    if not cube_enabled():
+        return None
+    version = db.data_version()
+    if version is None:
+        return None
+    key = (db._pool_key(), spec.name)
+    with _cubes_lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    # 同じキューブを複数スレッドで同時に作らない
+    with build_lock:
+        with _cubes_lock:
+            entry = _cubes.get(key)
+        if entry is not None and entry.version == version:
+            return entry
+        previous = entry.stored if entry is not None else None
+        try:
+            entry = _load_or_build(db, spec, version, previous)
+        except QueryInterruptedError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cube {spec.name} unavailable: {e}")
+            entry = _Entry(version, None, "failed", 0.0, previous)
+        with _cubes_lock:
+            _cubes[key] = entry
+        return entry
+
+
+# 作成待ちのキューブ（接続先, キューブ名）→ 作成中のFuture
+_pending: Dict[Hashable, Future] = {}
+_builder: Optional[ThreadPoolExecutor] = None
+
+
+def _build_in_background(db, spec: CubeSpec, key: Hashable) -> None:
+    # ツール呼び出しのQueryControlを引き継がない（タイムアウトなしで最後まで集計する）
+    try:
+        with db:
+            build_cube(db, spec)
+    except QueryInterruptedError as e:
+        logger.info(f"Cube {spec.name} build interrupted: {e}")
+    except Exception as e:
+        logger.warning(f"Cube {spec.name} build failed: {e}")
+    finally:
+        with _cubes_lock:
+            _pending.pop(key, None)
+
+
+def _schedule_build(db, spec: CubeSpec, key: Hashable) -> None:
+    """キューブの作成をバックグラウンドスレッドに依頼する（作成中なら何もしない）"""
+    global _builder
+    with _cubes_lock:
+        if key in _pending:
+            return
+        if _builder is None:
+            _builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jvlink-cube-build")
+        _pending[key] = _builder.submit(_build_in_background, db.spawn(), spec, key)
+
+
+def wait_for_builds(timeout: Optional[float] = None) -> bool:
+    """バックグラウンドで作成中のキューブを待つ（時間内に終わればTrue）"""
+    with _cubes_lock:
+        futures = list(_pending.values())
+    done, not_done = wait(futures, timeout=timeout)
+    return not not_done
+
+
+def get_cube(db, spec: CubeSpec) -> Optional[Any]:
+    """接続先の集約キューブ（なければNoneを返し、呼び出し元はSQLで集計する）
+
+    現在のデータ世代のキューブがメモリ上かサイドカーにあればそれを返す。
+    なければ作成（差分更新を含む）をバックグラウンドスレッドに依頼してNoneを返す。
+    集計はツール呼び出しのタイムアウトの外で行うため、全履歴の集計が
+    DB_QUERY_TIMEOUT より長くかかっても呼び出しは従来どおりSQLで答えられる。
+    無効化されている・データ世代が取れない・作成に失敗した場合もNone。
+    """
+    if not cube_enabled():
+        return None
+    try:
+        version = db.data_version()
+        if version is None:
+            return None
+        key = (db._pool_key(), spec.name)
+        with _cubes_lock:
+            entry = _cubes.get(key)
+            building = key in _pending
+        if entry is not None and entry.version == version:
+            return entry.cube
+        if entry is None and not building:
+            # サーバー再起動後は、世代が一致するサイドカーをそのまま読む
+            entry = _load_sidecar_entry(db, spec, version)
+            if entry is not None:
+                with _cubes_lock:
+                    _cubes.setdefault(key, entry)
+                return entry.cube
+        _schedule_build(db, spec, key)
+        return None
+    except Exception as e:
+        logger.debug(f"Cube lookup failed: {e}")
+        return None
+
+
+def get_favorite_cube(db, source: str, se_table: str,
+                      ra_table: str) -> Optional[FavoriteCube]:
+    """接続先の人気別成績キューブ（get_cube を参照）"""
+    return get_cube(db, favorite_cube_spec(source, se_table, ra_table))
+
+
+# ソース → (NL_SE系, NL_RA系)
+CUBE_SOURCES = {
+    "jra": ("NL_SE", "NL_RA"),
+    "nar": ("NL_SE_NAR", "NL_RA_NAR"),
+}
+for _source, (_se, _ra) in CUBE_SOURCES.items():
+    register_cube(favorite_cube_spec(_source, _se, _ra))
+
+
+def refresh_cubes(db=None) -> Dict[str, str]:
+    """登録されたキューブのうちソースが存在するものを最新のデータ世代に合わせる
+
+    定期更新（RefreshScheduler）とインデックス作成コマンドから呼ばれ、
+    呼び出し元のスレッドで集計する（ツール呼び出しの外なのでタイムアウトはない）。
+
+    Returns:
+        キューブ名 → origin（"sidecar" は変更なし）
+    """
+    if db is None:
+        from .connection import DatabaseConnection
+        with DatabaseConnection() as conn:
+            return refresh_cubes(conn)
+    result = {}
+    for name, spec in list(_registered.items()):
+        if all(db.has_table(t) for t in [spec.fact_table] + [t for t, _ in spec.lookups]):
+            entry = build_cube(db, spec)
+            result[name] = entry.origin if entry is not None else "disabled"
+    return result
+
+
+def clear_cubes() -> None:
+    """作成中のキューブを待ってメモリ上のキューブを破棄する（テスト用。サイドカーファイルは残る）"""
+    wait_for_builds()
+    with _cubes_lock:
+        _cubes.clear()
+
+
+def cube_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """接続先（pool_stats と同じ表記）→ キューブ名 → 状態"""
+    with _cubes_lock:
+        items = list(_cubes.items())
+        pending = set(_pending)
+    stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for key, entry in items:
+        item = {"origin": entry.origin, "seconds": round(entry.seconds, 3)}
+        if entry.refreshed_years:
+            item["refreshed_years"] = [str(y) for y in entry.refreshed_years]
+        if entry.stored is not None and entry.stored.watermarks:
+            item["watermarks"] = {t: m.to_dict() for t, m in entry.stored.watermarks.items()}
+        if entry.cube is not None:
+            item.update(entry.cube.stats())
+        if key in pending:
+            item["building"] = True
+        stats.setdefault(_describe_key(key[0]), {})[key[1]] = item
+    for key in pending.difference(k for k, _ in items):
+        stats.setdefault(_describe_key(key[0]), {})[key[1]] = {"origin": "building"}
+    return stats
+
+
+__all__ = [
+    "TRACK_CD_RANGES",
+    "CubeSpec",
+    "FavoriteCube",
+    "build_cube_sql",
+    "favorite_cube_spec",
+    "build_cube",
+    "get_cube",
+    "get_favorite_cube",
+    "refresh_cubes",
+    "register_cube",
+    "refresh_incremental",
+    "sidecar_path",
+    "wait_for_builds",
+    "clear_cubes",
+    "cube_stats",
+]
@@ -1,18 +1,66 @@
 """Database connection manager for JVLink databases"""
 
+import hashlib
 import logging
 import os
-from typing import Any, Optional
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Hashable, Iterator, Optional, Tuple
 import warnings
 import pandas as pd
 
-from .utils import validate_identifier
+from .pagination import paginate_sql
+from .query_control import (
+    QueryControl,
+    QueryInterruptedError,
+    QueryTimeoutError,
+    current_control,
+)
+from .result_cache import (
+    PG_DEFAULT_VERSION_QUERY,
+    cache_enabled,
+    file_version,
+    get_result_cache,
+    pg_versions,
+)
+from .schema_catalog import SchemaCatalog, get_catalog
+from .serialization import ColumnArrays, frame_to_arrays
+from .sql_lexer import DANGEROUS_KEYWORD, MULTIPLE_STATEMENTS, NOT_SELECT, lex
+from .pool import ConnectionPool, get_pool, pool_enabled
+from .utils import normalize_sql, validate_identifier
 
 logger = logging.getLogger(__name__)
 
-# Suppress pandas DuckDB connection warning
+# Suppress pandas DBAPI connection warning (pg8000 is passed to read_sql_query directly)
 warnings.filterwarnings('ignore', message='pandas only supports SQLAlchemy')
 
+# SQLiteのprogress handlerを呼び出すVM命令数の間隔
+_SQLITE_PROGRESS_STEPS = 10000
+
+# PostgreSQL接続 → バックエンドPID（キャンセル要求用）
+_pg_backend_pids: "weakref.WeakKeyDictionary[Any, int]" = weakref.WeakKeyDictionary()
+
+
+def _pg_backend_pid(conn: Any) -> int:
+    """接続のバックエンドPIDを取得（接続ごとに1回だけ問い合わせる）"""
+    pid = _pg_backend_pids.get(conn)
+    if pid is None:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT pg_backend_pid()")
+            pid = int(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+        _pg_backend_pids[conn] = pid
+    return pid
+
+
+def _is_pg_statement_timeout(error: Exception) -> bool:
+    """PostgreSQLのstatement_timeoutによるエラーか（SQLSTATE 57014）"""
+    text = str(error)
+    return "57014" in text or "statement timeout" in text
+
 
 class DatabaseConnection:
     """JVLinkデータベースへの接続を管理するクラス
@@ -25,50 +73,115 @@ class DatabaseConnection:
         self.db_path = os.getenv("DB_PATH")
         self.db_connection_string = os.getenv("DB_CONNECTION_STRING")
         self.connection = None
+        self._pool: Optional[ConnectionPool] = None
+        self._catalog: Optional[SchemaCatalog] = None
 
     def connect(self) -> Any:
-        """データベースに接続"""
+        """データベースに接続
+
+        プール有効時（既定）はプロセス共有プールから接続を借りる。
+        借りた接続は close() でプールに返却される。
+        """
         if self.connection is not None:
             return self.connection
 
+        if self.db_type not in ("sqlite", "duckdb", "postgresql"):
+            raise ValueError(f"Unsupported database type: {self.db_type}. Supported: sqlite, duckdb, postgresql")
+        if self.db_type in ("sqlite", "duckdb") and not self.db_path:
+            raise ValueError(f"DB_PATH environment variable not set for {self._display_name()}")
+
+        if pool_enabled():
+            self._pool = self._shared_pool()
+            self.connection = self._pool.acquire()
+        else:
+            self.connection = self._open_connection()
+        return self.connection
+
+    def _display_name(self) -> str:
+        return {"sqlite": "SQLite", "duckdb": "DuckDB", "postgresql": "PostgreSQL"}[self.db_type]
+
+    def _pool_key(self) -> tuple:
+        """接続設定を識別するプールキー（設定が変われば別プール）"""
+        if self.db_type == "postgresql":
+            return (self.db_type, self._postgresql_params_key())
+        return (self.db_type, self.db_path)
+
+    def try_connect(self) -> bool:
+        """プールに空きがあるときだけ接続を借りる（待たない）。借りられたか"""
+        if self.connection is not None:
+            return True
+        if not pool_enabled():
+            self.connect()
+            return True
+        self._pool = self._shared_pool()
+        self.connection = self._pool.acquire(blocking=False)
+        return self.connection is not None
+
+    def _shared_pool(self) -> ConnectionPool:
+        return get_pool(
+            self._pool_key(), self._open_connection,
+            health_check=self._health_check, reset=self._reset_connection,
+        )
+
+    def spawn(self) -> "DatabaseConnection":
+        """同じ接続先を指す別インスタンス（並行実行用。接続はプールから別に借りる）"""
+        other = DatabaseConnection()
+        other.db_type = self.db_type
+        other.db_path = self.db_path
+        other.db_connection_string = self.db_connection_string
+        return other
+
+    def _open_connection(self) -> Any:
+        """新しい読み取り専用接続を開く"""
         logger.info(f"Connecting to {self.db_type} database...")
 
         if self.db_type == "sqlite":
             return self._connect_sqlite()
         elif self.db_type == "duckdb":
             return self._connect_duckdb()
-        elif self.db_type == "postgresql":
-            return self._connect_postgresql()
-        else:
-            raise ValueError(f"Unsupported database type: {self.db_type}. Supported: sqlite, duckdb, postgresql")
+        return self._connect_postgresql()
+
+    def _health_check(self, conn: Any) -> None:
+        """貸し出し前の生存確認（失敗時は例外）"""
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def _reset_connection(self, conn: Any) -> None:
+        """返却時に開いたままのトランザクションを破棄する"""
+        if self.db_type == "duckdb":
+            return
+        conn.rollback()
 
     def _connect_sqlite(self):
         """SQLiteに接続"""
         import sqlite3
         if not self.db_path:
             raise ValueError("DB_PATH environment variable not set for SQLite")
-        self.connection = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
-        return self.connection
+        # プール経由で別スレッドに貸し出されるため check_same_thread は無効化
+        # （同時に使うのは常に1スレッドのみ）
+        return sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
 
     def _connect_duckdb(self):
         """DuckDBに接続"""
         import duckdb
         if not self.db_path:
             raise ValueError("DB_PATH environment variable not set for DuckDB")
-        self.connection = duckdb.connect(self.db_path, read_only=True)
-        return self.connection
+        return duckdb.connect(self.db_path, read_only=True)
 
-    def _connect_postgresql(self):
-        """PostgreSQLに接続（pg8000を使用）"""
-        import pg8000.dbapi
-        
-        # 環境変数から接続情報を取得
+    def _postgresql_params(self) -> dict:
+        """環境変数・DB_CONNECTION_STRINGからPostgreSQL接続パラメータを組み立てる"""
         host = os.getenv("DB_HOST", "localhost")
         port = int(os.getenv("DB_PORT", "5432"))
         database = os.getenv("DB_NAME", "keiba")
         user = os.getenv("DB_USER", "postgres")
         password = os.getenv("DB_PASSWORD", os.getenv("JVLINK_DB_PASSWORD", ""))
-        
+
         # DB_CONNECTION_STRINGが設定されている場合はそちらを優先（後方互換性）
         if self.db_connection_string:
             # key=value形式のパース（セミコロン区切り対応、値にスペース含む場合も正しくパース）
@@ -83,34 +196,298 @@ class DatabaseConnection:
             database = params.get("database", params.get("dbname", database))
             user = params.get("username", params.get("user", user))
             password = params.get("password", password)
-        
-        self.connection = pg8000.dbapi.connect(
-            host=host, port=port, database=database,
-            user=user, password=password
-        )
-        # 読み取り専用モードに設定
-        cursor = self.connection.cursor()
+
+        return {"host": host, "port": port, "database": database,
+                "user": user, "password": password}
+
+    def _postgresql_params_key(self) -> tuple:
+        params = self._postgresql_params()
+        # パスワードはキーに平文で残さずハッシュ化
+        digest = hashlib.sha256(params["password"].encode("utf-8")).hexdigest()
+        return (params["host"], params["port"], params["database"], params["user"], digest)
+
+    def _connect_postgresql(self):
+        """PostgreSQLに接続（pg8000を使用）"""
+        import pg8000.dbapi
+
+        connection = pg8000.dbapi.connect(**self._postgresql_params())
+        # 読み取り専用モードに設定（セッション単位なのでプール接続でも維持される）
+        cursor = connection.cursor()
         cursor.execute("SET default_transaction_read_only = on")
-        self.connection.commit()
+        connection.commit()
         cursor.close()
-        return self.connection
+        return connection
+
+    def open_writable_connection(self) -> Any:
+        """保守作業（インデックス作成等）用の書き込み可能な接続を開く
 
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> pd.DataFrame:
+        サーバーのツールからは使わないこと。プールには入らないため、
+        呼び出し側で close() する。
+        """
+        if self.db_type == "sqlite":
+            import sqlite3
+            if not self.db_path:
+                raise ValueError("DB_PATH environment variable not set for SQLite")
+            return sqlite3.connect(self.db_path)
+        if self.db_type == "duckdb":
+            import duckdb
+            if not self.db_path:
+                raise ValueError("DB_PATH environment variable not set for DuckDB")
+            return duckdb.connect(self.db_path)
+        if self.db_type == "postgresql":
+            import pg8000.dbapi
+            return pg8000.dbapi.connect(**self._postgresql_params())
+        raise ValueError(f"Unsupported database type: {self.db_type}. Supported: sqlite, duckdb, postgresql")
+
+    def execute_query(self, query: str, params: Optional[tuple] = None,
+                      use_cache: bool = True) -> pd.DataFrame:
         """SQLクエリを実行してDataFrameで結果を返す
 
+        データ世代が変わっていなければ結果キャッシュから返す。
+
         Args:
             query: 実行するSQLクエリ
             params: クエリパラメータ
+            use_cache: Falseなら結果キャッシュを使わない（索引構築用の大きな結果等）
 
         Returns:
             pandas DataFrame with query results
         """
+        key = self._result_cache_key("frame", query, params) if use_cache else None
+        if key is not None:
+            cached = get_result_cache().get(key)
+            if cached is not None:
+                # 呼び出し側がDataFrameを加工してもキャッシュが壊れないようコピーを返す
+                return cached.copy()
+
         conn = self.connect()
+        with self._guard(conn):
+            if self.db_type == "duckdb":
+                # DuckDBは interrupt() が子カーソルに届かないため接続上で直接実行する
+                df = conn.execute(query, params or ()).fetchdf()
+            else:
+                df = pd.read_sql_query(query, conn, params=params)
+
+        if key is not None:
+            get_result_cache().put(key, df.copy())
+        return df
 
-        if self.db_type in ["sqlite", "duckdb"]:
-            return pd.read_sql_query(query, conn, params=params)
-        elif self.db_type == "postgresql":
-            return pd.read_sql_query(query, conn, params=params)
+    def execute_query_arrays(self, query: str, params: Optional[tuple] = None) -> ColumnArrays:
+        """SQLクエリを実行してカラム名→NumPy配列で結果を返す
+
+        DuckDBでは fetchnumpy() で列指向のまま受け取り、DataFrameや
+        行ごとのPythonオブジェクトを経由しない。他のDBはDataFrame経由。
+        """
+        if self.db_type != "duckdb":
+            return frame_to_arrays(self.execute_query(query, params=params))
+
+        key = self._result_cache_key("arrays", query, params)
+        if key is not None:
+            cached = get_result_cache().get(key)
+            if cached is not None:
+                return dict(cached)
+
+        conn = self.connect()
+        with self._guard(conn):
+            arrays = conn.execute(query, params or ()).fetchnumpy()
+
+        if key is not None:
+            get_result_cache().put(key, dict(arrays))
+        return arrays
+
+    def data_version(self) -> Optional[Hashable]:
+        """データ世代トークン（データが書き換わると変わる値。取得できなければNone）"""
+        if self.db_type in ("sqlite", "duckdb"):
+            return file_version(self.db_path)
+        if self.db_type == "postgresql":
+            return pg_versions.get(self._pool_key(), self._fetch_pg_version)
+        return None
+
+    def _fetch_pg_version(self) -> Optional[tuple]:
+        """PostgreSQLのウォーターマーククエリを実行してトークンを得る"""
+        query = os.getenv("DB_CACHE_VERSION_QUERY") or PG_DEFAULT_VERSION_QUERY
+        try:
+            conn = self.connect()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(query)
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.debug(f"Failed to fetch data version: {e}")
+            return None
+        return tuple(row) if row is not None else None
+
+    def _result_cache_key(self, kind: str, query: str,
+                          params: Optional[tuple]) -> Optional[Hashable]:
+        """結果キャッシュのキー（キャッシュできない場合はNone）"""
+        if not cache_enabled():
+            return None
+        version = self.data_version()
+        if version is None:
+            return None
+        key = (self._pool_key(), version, kind, normalize_sql(query),
+               tuple(params) if params else ())
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def execute_query_page(
+        self, query: str, params: Optional[tuple] = None,
+        offset: int = 0, page_size: int = 100
+    ) -> Tuple[pd.DataFrame, bool]:
+        """クエリ結果の1ページ分だけをカーソル経由で取得する
+
+        page_size + 1 行だけ fetchmany し、結果全体をメモリに載せない。
+
+        Args:
+            query: 実行するSQLクエリ
+            params: クエリパラメータ
+            offset: 読み飛ばす行数
+            page_size: 取得する行数
+
+        Returns:
+            (ページのDataFrame, 次ページがあるか) のタプル
+        """
+        conn = self.connect()
+        # DuckDBは接続自体がexecute/fetchmanyを持つ（interrupt()を届かせるため）
+        cursor = conn if self.db_type == "duckdb" else conn.cursor()
+        try:
+            with self._guard(conn):
+                cursor.execute(paginate_sql(query, offset, page_size + 1), params or ())
+                rows = cursor.fetchmany(page_size + 1)
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+        finally:
+            if cursor is not conn:
+                cursor.close()
+
+        has_more = len(rows) > page_size
+        df = pd.DataFrame.from_records(list(rows[:page_size]), columns=columns)
+        return df, has_more
+
+    @contextmanager
+    def _guard(self, conn: Any) -> Iterator[None]:
+        """実行中の文にタイムアウトとキャンセルを適用する
+
+        現在のQueryControl（ツール呼び出し単位）の期限とキャンセルを、
+        バックエンドごとのネイティブな中断手段に結び付ける。
+
+        Raises:
+            QueryTimeoutError: 制限時間を超えた場合
+            QueryCancelledError: リクエストがキャンセルされた場合
+        """
+        control = current_control()
+        error = control.interrupted_error()
+        if error is not None:
+            raise error
+        remaining = control.remaining()
+
+        try:
+            if self.db_type == "sqlite":
+                with self._sqlite_guard(conn, control):
+                    yield
+            elif self.db_type == "duckdb":
+                with self._duckdb_guard(conn, control, remaining):
+                    yield
+            else:
+                with self._postgresql_guard(conn, control, remaining):
+                    yield
+        except QueryInterruptedError:
+            raise
+        except Exception as e:
+            error = control.interrupted_error()
+            if error is None and self.db_type == "postgresql" and _is_pg_statement_timeout(e):
+                error = QueryTimeoutError(
+                    f"クエリが制限時間（{control.timeout:g}秒）を超えたため中断しました", control.timeout
+                )
+            if error is not None:
+                raise error from e
+            raise
+
+    @staticmethod
+    @contextmanager
+    def _sqlite_guard(conn: Any, control: QueryControl) -> Iterator[None]:
+        """SQLite: progress handlerで期限・キャンセルを監視（非0を返すと中断）"""
+        conn.set_progress_handler(lambda: 1 if control.should_stop() else 0,
+                                  _SQLITE_PROGRESS_STEPS)
+        try:
+            with control.register_interrupt(conn.interrupt):
+                yield
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    @staticmethod
+    @contextmanager
+    def _duckdb_guard(conn: Any, control: QueryControl, remaining: Optional[float]) -> Iterator[None]:
+        """DuckDB: 期限到達時・キャンセル時に interrupt()"""
+        lock = threading.Lock()
+        active = [True]
+
+        def interrupt():
+            with lock:
+                if active[0]:
+                    conn.interrupt()
+
+        timer = threading.Timer(remaining, interrupt) if remaining is not None else None
+        if timer is not None:
+            timer.daemon = True
+            timer.start()
+        try:
+            with control.register_interrupt(interrupt):
+                yield
+        finally:
+            with lock:
+                active[0] = False
+            if timer is not None:
+                timer.cancel()
+
+    def _postgresql_guard(self, conn: Any, control: QueryControl,
+                          remaining: Optional[float]) -> Iterator[None]:
+        """PostgreSQL: statement_timeout と pg_cancel_backend()"""
+        if remaining is not None:
+            cursor = conn.cursor()
+            try:
+                # トランザクション内のみ有効（返却時のrollbackで元に戻る）
+                cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+            finally:
+                cursor.close()
+        pid = _pg_backend_pid(conn)
+        params = self._postgresql_params()
+
+        def cancel_backend():
+            import pg8000.dbapi
+            canceller = pg8000.dbapi.connect(**params)
+            try:
+                cursor = canceller.cursor()
+                cursor.execute("SELECT pg_cancel_backend(%s)", (pid,))
+            finally:
+                canceller.close()
+
+        return control.register_interrupt(cancel_backend)
+
+    def check_query_safety(self, query: str) -> None:
+        """読み取り専用のクエリかを検証する
+
+        Raises:
+            ValueError: 危険なクエリが検出された場合
+        """
+        # 判定は validate_sql_query と共有する（LexedQuery.violation）
+        # 字句単位で判定するため、"CREATED_AT" や "Bamei LIKE '%UPDATE%'"、
+        # コメント内の語では誤検知しない
+        lexed = lex(query)
+        violation = lexed.violation
+        if violation == MULTIPLE_STATEMENTS:
+            # 複文実行をブロック（セミコロンによる複数SQL文の実行を防止）
+            raise ValueError("Multiple SQL statements are not allowed.")
+        if violation == DANGEROUS_KEYWORD:
+            found = lexed.dangerous_keywords
+            raise ValueError(f"Dangerous keyword '{found[0]}' detected in query. Only SELECT queries are allowed.")
+        if violation == NOT_SELECT:
+            # PRAGMA / EXPLAIN / SHOW / DESCRIBE / VALUES 等
+            raise ValueError("Only SELECT queries are allowed.")
 
     def execute_safe_query(self, query: str, params: Optional[tuple] = None) -> pd.DataFrame:
         """安全なクエリのみ実行（読み取り専用）
@@ -125,39 +502,78 @@ class DatabaseConnection:
         Raises:
             ValueError: 危険なクエリが検出された場合
         """
-        # 複文実行をブロック（セミコロンによる複数SQL文の実行を防止）
-        if ';' in query.strip().rstrip(';'):
-            raise ValueError("Multiple SQL statements are not allowed.")
+        self.check_query_safety(query)
+        return self.execute_query(query, params=params)
 
-        # 危険なキーワードをチェック
-        dangerous_keywords = [
-            "DROP", "DELETE", "UPDATE", "INSERT", "CREATE", "ALTER",
-            "TRUNCATE", "REPLACE", "MERGE", "GRANT", "REVOKE"
-        ]
+    def execute_safe_query_arrays(self, query: str, params: Optional[tuple] = None) -> ColumnArrays:
+        """安全なクエリのみ実行し、カラム名→NumPy配列で返す（読み取り専用）
 
-        query_upper = query.upper()
-        import re
-        for keyword in dangerous_keywords:
-            # Use word boundary matching to avoid false positives
-            # e.g. "CREATED_AT" should not trigger "CREATE", "Bamei LIKE '%UPDATE%'" should not trigger "UPDATE"
-            if re.search(r'\b' + keyword + r'\b', query_upper):
-                raise ValueError(f"Dangerous keyword '{keyword}' detected in query. Only SELECT queries are allowed.")
+        Raises:
+            ValueError: 危険なクエリが検出された場合
+        """
+        self.check_query_safety(query)
+        return self.execute_query_arrays(query, params=params)
 
-        return self.execute_query(query, params=params)
+    def execute_safe_query_page(
+        self, query: str, params: Optional[tuple] = None,
+        offset: int = 0, page_size: int = 100
+    ) -> Tuple[pd.DataFrame, bool]:
+        """安全なクエリのみ1ページ分実行（読み取り専用）
+
+        Raises:
+            ValueError: 危険なクエリが検出された場合
+        """
+        self.check_query_safety(query)
+        return self.execute_query_page(query, params=params, offset=offset, page_size=page_size)
+
+    def catalog(self) -> SchemaCatalog:
+        """スキーマカタログ（接続先・データ世代ごとに共有）
+
+        データ世代トークンが取れないDB（:memory: 等）ではこのインスタンス内だけで保持する。
+        """
+        version = self.data_version()
+        if self._catalog is not None and (version is None or self._catalog.version == version):
+            return self._catalog
+        if version is None:
+            self._catalog = SchemaCatalog(self._load_table_names())
+        else:
+            self._catalog = get_catalog(
+                self._pool_key(), version,
+                lambda: SchemaCatalog(self._load_table_names(), version),
+            )
+        return self._catalog
 
     def get_tables(self) -> list[str]:
         """データベース内のテーブル一覧を取得"""
-        conn = self.connect()
+        return list(self.catalog().table_list)
 
-        if self.db_type == "sqlite":
-            query = "SELECT name FROM sqlite_master WHERE type='table'"
-        elif self.db_type == "duckdb":
-            query = "SELECT table_name FROM information_schema.tables WHERE table_schema='main'"
-        elif self.db_type == "postgresql":
-            query = "SELECT tablename FROM pg_tables WHERE schemaname='public'"
+    def has_table(self, table_name: str) -> bool:
+        """テーブルが存在するか（カタログ上のO(1)参照）"""
+        return self.catalog().has_table(table_name)
 
-        result = self.execute_query(query)
-        return result.iloc[:, 0].tolist()
+    def get_table_columns(self, table_name: str) -> frozenset:
+        """テーブルのカラム名集合（存在しないテーブルはValueError）"""
+        self.validate_table(table_name)
+        return self.catalog().columns(table_name, self._load_table_schema)
+
+    def has_column(self, table_name: str, column_name: str) -> bool:
+        """テーブルにカラムが存在するか（カタログ上のO(1)参照）"""
+        return (self.has_table(table_name)
+                and column_name in self.catalog().columns(table_name, self._load_table_schema))
+
+    def validate_table(self, table_name: str) -> str:
+        """テーブル名を識別子・ホワイトリストの両面で検証する
+
+        Raises:
+            ValueError: 不正な識別子、または存在しないテーブルの場合
+        """
+        validate_identifier(table_name, "table name")
+        catalog = self.catalog()
+        if not catalog.has_table(table_name):
+            raise ValueError(
+                f"テーブル '{table_name}' は存在しません。有効なテーブル: {list(catalog.table_list)}"
+            )
+        return table_name
 
     def get_table_schema(self, table_name: str) -> pd.DataFrame:
         """テーブルのスキーマ情報を取得
@@ -168,14 +584,26 @@ class DatabaseConnection:
         Returns:
             カラム情報を含むDataFrame (統一フォーマット: column_name, column_type)
         """
-        validate_identifier(table_name, "table name")
-        self.connect()
+        self.validate_table(table_name)
+        return self.catalog().schema(table_name, self._load_table_schema)
+
+    def _load_table_names(self) -> list[str]:
+        """カタログ用にテーブル一覧をDBから読み込む"""
+        if self.db_type == "sqlite":
+            query = "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+        elif self.db_type == "duckdb":
+            query = "SELECT table_name FROM information_schema.tables WHERE table_schema='main'"
+        elif self.db_type == "postgresql":
+            query = ("SELECT tablename FROM pg_tables WHERE schemaname='public' "
+                     "UNION ALL SELECT viewname FROM pg_views WHERE schemaname='public'")
+        else:
+            raise ValueError(f"Unsupported database type: {self.db_type}")
 
-        # テーブル名のホワイトリスト検証
-        valid_tables = self.get_tables()
-        if table_name not in valid_tables:
-            raise ValueError(f"テーブル '{table_name}' は存在しません。有効なテーブル: {valid_tables}")
+        result = self.execute_query(query)
+        return result.iloc[:, 0].tolist()
 
+    def _load_table_schema(self, table_name: str) -> pd.DataFrame:
+        """カタログ用にテーブルのカラム情報をDBから読み込む（検証済みのテーブル名のみ）"""
         if self.db_type == "sqlite":
             query = f"PRAGMA table_info({table_name})"
             df = self.execute_query(query)
@@ -198,9 +626,13 @@ class DatabaseConnection:
         return df
 
     def close(self):
-        """データベース接続を閉じる"""
+        """データベース接続を閉じる（プールから借りた接続は返却）"""
         if self.connection:
-            self.connection.close()
+            pool = self._pool
+            if pool is not None and pool.owns(self.connection):
+                pool.release(self.connection)
+            else:
+                self.connection.close()
             self.connection = None
 
     def __enter__(self):
@@ -0,0 +1,442 @@
+"""EXPLAIN-based cost guard for free-form SQL
+
+keiba_data_search に渡されたLLM生成SQLを実行前にEXPLAINし、
+DBを長時間占有しがちなパターンを検出する。
+
+- full_scan: 大きなテーブル（NL_SE等）のインデックスを使わない全件走査
+- cartesian_product: 結合条件のない直積
+- nested_loop_join: 等価条件のない結合（不等号・OR条件等）を総当たりで比較する
+  ネステッドループ（DuckDB。範囲結合等で正当に使われるため警告のみ）
+- missing_join_key: 内側テーブルの結合キーにインデックスがなく、外側の行ごとに
+  全件走査するネステッドループ（SQLite）
+- leading_wildcard_like: ``LIKE '%...'`` （B-treeインデックスが使えない）
+
+バックエンドごとのEXPLAIN:
+- SQLite: ``EXPLAIN QUERY PLAN``（SCAN / SEARCH 行）
+- DuckDB: ``EXPLAIN (FORMAT JSON)``（CROSS_PRODUCT / NESTED_LOOP_JOIN の結合条件）。
+  列指向のDuckDBでは全件走査が通常のアクセスパスなので full_scan は報告しない
+- PostgreSQL: ``EXPLAIN (FORMAT JSON)``（Seq Scan の Plan Rows、Nested Loop）
+
+環境変数:
+- DB_COST_GUARD: off / warn（既定）/ limit / reject
+    warn: 検出内容を warnings として返すだけ
+    limit: 重大な検出があれば結果に LIMIT を付けて実行し、警告を返す
+    reject: 重大な検出があれば実行を拒否する
+- DB_COST_GUARD_LARGE_TABLES: 大きなテーブル名のカンマ区切り（SQLite/DuckDB用）
+- DB_COST_GUARD_LARGE_ROWS: PostgreSQLで大きいとみなす推定行数（既定1000000）
+- DB_COST_GUARD_MAX_FULL_SCANS: 許容する大テーブル全件走査の数（既定1、超えると重大）
+- DB_COST_GUARD_AUTO_LIMIT: limitモードで付けるLIMIT（既定1000）
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional
+
+from .sql_lexer import IDENT, KEYWORD, QUOTED_IDENT, STRING, lex
+from .utils import query_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 30年分以上蓄積される大きなテーブル（既定値）
+DEFAULT_LARGE_TABLES = frozenset({
+    "NL_SE", "NL_SE_NAR", "NL_RA", "NL_RA_NAR", "NL_UM", "NL_HR", "NL_HR_NAR",
+    "NL_O1", "NL_O2", "NL_O3", "NL_O4", "NL_O5", "NL_O6",
+    "NL_O1_NAR", "NL_O2_NAR", "NL_O3_NAR", "NL_O4_NAR", "NL_O5_NAR", "NL_O6_NAR",
+    "NL_HC", "NL_WC",
+})
+
+MODES = ("off", "warn", "limit", "reject")
+
+SEVERE = "error"
+WARNING = "warning"
+
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?([A-Za-z_][A-Za-z0-9_]*)')
+
+
+class QueryCostError(ValueError):
+    """コストガードによりクエリが拒否された"""
+
+    def __init__(self, message: str, findings: List["PlanFinding"]):
+        super().__init__(message)
+        self.findings = findings
+
+
+@dataclass(frozen=True)
+class PlanFinding:
+    """実行計画から検出した問題"""
+
+    kind: str
+    severity: str
+    table: Optional[str]
+    detail: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "severity": self.severity,
+                "table": self.table, "detail": self.detail}
+
+
+@dataclass
+class CostPolicy:
+    """コストガードの設定"""
+
+    mode: str = "warn"
+    large_tables: FrozenSet[str] = DEFAULT_LARGE_TABLES
+    large_rows: int = 1_000_000
+    max_full_scans: int = 1
+    auto_limit: int = 1000
+
+    @classmethod
+    def from_env(cls) -> "CostPolicy":
+        mode = os.getenv("DB_COST_GUARD", "warn").lower()
+        if mode not in MODES:
+            logger.warning(f"Invalid DB_COST_GUARD: {mode!r}, using 'warn'")
+            mode = "warn"
+        tables = os.getenv("DB_COST_GUARD_LARGE_TABLES")
+        large_tables = (frozenset(t.strip() for t in tables.split(",") if t.strip())
+                        if tables else DEFAULT_LARGE_TABLES)
+        return cls(
+            mode=mode,
+            large_tables=large_tables,
+            large_rows=int(os.getenv("DB_COST_GUARD_LARGE_ROWS", "1000000")),
+            max_full_scans=int(os.getenv("DB_COST_GUARD_MAX_FULL_SCANS", "1")),
+            auto_limit=int(os.getenv("DB_COST_GUARD_AUTO_LIMIT", "1000")),
+        )
+
+
+@dataclass
+class CostAssessment:
+    """プリフライトの結果"""
+
+    sql: str
+    findings: List[PlanFinding] = field(default_factory=list)
+    limited: bool = False
+
+    @property
+    def warnings(self) -> List[Dict[str, Any]]:
+        return [f.to_dict() for f in self.findings]
+
+    @property
+    def severe(self) -> List[PlanFinding]:
+        return [f for f in self.findings if f.severity == SEVERE]
+
+
+# ============================================================================
+# 実行計画の解析
+# ============================================================================
+
+def _name(token) -> Optional[str]:
+    """識別子トークンの名前（引用符付きなら引用符を外す。識別子でなければNone）"""
+    if token.kind == IDENT:
+        return token.text
+    if token.kind == QUOTED_IDENT and len(token.text) >= 2 and token.text.endswith('"'):
+        return token.text[1:-1].replace('""', '"')
+    return None
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """別名（とテーブル名自身）→テーブル名の対応
+
+    sql_lexer のトークン列から FROM / JOIN の後のテーブル参照を読むため、
+    文字列リテラルやコメント内の ``FROM x`` は拾わない。
+    """
+    lexed = lex(sql)
+    code = [lexed.tokens[i] for i in lexed.code]
+    aliases: Dict[str, str] = {}
+    for n, token in enumerate(code):
+        if token.kind != KEYWORD or token.upper not in ("FROM", "JOIN"):
+            continue
+        i = n + 1
+        while i < len(code):
+            table = _name(code[i])
+            if table is None:
+                break  # サブクエリ等
+            i += 1
+            # スキーマ修飾（main.NL_SE）は最後の名前を使う
+            while i + 1 < len(code) and code[i].text == "." and _name(code[i + 1]):
+                table = _name(code[i + 1])
+                i += 2
+            aliases[table] = table
+            if i < len(code) and code[i].kind == KEYWORD and code[i].upper == "AS":
+                i += 1
+            alias = _name(code[i]) if i < len(code) else None
+            if alias is not None:
+                aliases[alias] = table
+                i += 1
+            # FROM a x, b y のカンマ区切りの2つ目以降
+            if token.upper == "FROM" and i < len(code) and code[i].text == ",":
+                i += 1
+                continue
+            break
+    return aliases
+
+
+def analyze_sqlite_plan(rows: List[tuple], sql: str, policy: CostPolicy) -> List[PlanFinding]:
+    """EXPLAIN QUERY PLAN の (id, parent, notused, detail) 行を解析"""
+    aliases = table_aliases(sql)
+    findings: List[PlanFinding] = []
+    # 同じ親を持つ行はネステッドループの外側→内側の順に並ぶ
+    loops: Dict[Any, List[str]] = {}
+    for row in rows:
+        _, parent, _, detail = row[:4]
+        loops.setdefault(parent, []).append(str(detail))
+
+    for details in loops.values():
+        outer = None  # 直前のループ: None / "scan" / "search"
+        for detail in details:
+            match = _SQLITE_SCAN_RE.match(detail)
+            if match and not detail.startswith("SCAN CONSTANT ROW"):
+                table = aliases.get(match.group(1), match.group(1))
+                large = table in policy.large_tables
+                if outer == "scan":
+                    # 全件走査×全件走査: 結合条件が効いていない直積
+                    findings.append(PlanFinding(
+                        "cartesian_product", SEVERE, table,
+                        f"{table} を外側の行ごとに全件走査します（結合条件がありません）: {detail}",
+                    ))
+                elif outer == "search":
+                    # 外側は絞り込めているが、内側の結合キーにインデックスがない
+                    findings.append(PlanFinding(
+                        "missing_join_key", SEVERE if large else WARNING, table,
+                        f"{table} の結合キーにインデックスがなく、外側の行ごとに全件走査します: {detail}",
+                    ))
+                elif large:
+                    findings.append(PlanFinding(
+                        "full_scan", WARNING, table,
+                        f"{table} をインデックスなしで全件走査します: {detail}",
+                    ))
+                outer = "scan"
+            elif detail.startswith("SEARCH "):
+                outer = outer or "search"
+    return findings
+
+
+_DUCKDB_NL_JOINS = ("NESTED_LOOP_JOIN", "BLOCKWISE_NL_JOIN")
+
+
+def _duckdb_join_condition(node: Dict[str, Any]) -> Optional[str]:
+    """DuckDBの結合ノードの結合条件（条件がない・常に真ならNone）"""
+    info = node.get("extra_info") or {}
+    condition = info.get("Conditions", info.get("Condition"))
+    if isinstance(condition, list):
+        condition = " AND ".join(str(c) for c in condition)
+    condition = str(condition or "").strip()
+    return condition if condition and condition.lower() != "true" else None
+
+
+def analyze_duckdb_plan(plan: Any, policy: CostPolicy) -> List[PlanFinding]:
+    """DuckDBの EXPLAIN (FORMAT JSON) の結果を解析
+
+    NESTED_LOOP_JOIN / BLOCKWISE_NL_JOIN は不等号（<>）やORを含む結合条件でも使われる
+    （範囲結合等の正当なクエリ）。結合条件がないものだけを直積として扱い、
+    条件があるものは警告にとどめる。
+    """
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    findings: List[PlanFinding] = []
+
+    def visit(node: Dict[str, Any]) -> None:
+        name = node.get("name", "")
+        if name == "CROSS_PRODUCT":
+            findings.append(PlanFinding(
+                "cartesian_product", SEVERE, None, "結合条件のない直積（CROSS_PRODUCT）が含まれます",
+            ))
+        elif name in _DUCKDB_NL_JOINS:
+            condition = _duckdb_join_condition(node)
+            if condition is None:
+                findings.append(PlanFinding(
+                    "cartesian_product", SEVERE, None,
+                    f"結合条件のない結合（{name}）が含まれます。"
+                    "レースキー6カラムやKettoNumで結合してください",
+                ))
+            else:
+                findings.append(PlanFinding(
+                    "nested_loop_join", WARNING, None,
+                    f"等価条件のない結合（{name}: {condition}）は行の組み合わせを総当たりで"
+                    "比較します",
+                ))
+        for child in node.get("children", []):
+            visit(child)
+
+    for root in (plan if isinstance(plan, list) else [plan]):
+        visit(root)
+    return findings
+
+
+def analyze_postgresql_plan(plan: Any, policy: CostPolicy) -> List[PlanFinding]:
+    """EXPLAIN (FORMAT JSON) の結果を解析"""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    if isinstance(plan, list):
+        plan = plan[0]
+    root = plan.get("Plan", plan)
+    findings: List[PlanFinding] = []
+
+    def has_index_cond(node: Dict[str, Any]) -> bool:
+        if "Index Cond" in node or "Hash Cond" in node or "Merge Cond" in node:
+            return True
+        return any(has_index_cond(child) for child in node.get("Plans", []))
+
+    def visit(node: Dict[str, Any]) -> None:
+        node_type = node.get("Node Type", "")
+        if node_type == "Seq Scan":
+            table = node.get("Relation Name")
+            rows = node.get("Plan Rows", 0) or 0
+            if rows >= policy.large_rows or (rows == 0 and table in policy.large_tables):
+                findings.append(PlanFinding(
+                    "full_scan", WARNING, table,
+                    f"{table} を全件走査します（推定 {rows:,} 行）",
+                ))
+        elif node_type == "Nested Loop" and "Join Filter" not in node:
+            children = node.get("Plans", [])
+            if len(children) == 2 and not has_index_cond(children[1]):
+                findings.append(PlanFinding(
+                    "cartesian_product", SEVERE, None,
+                    "結合条件のないネステッドループ（直積）が含まれます",
+                ))
+        for child in node.get("Plans", []):
+            visit(child)
+
+    visit(root)
+    return findings
+
+
+def static_findings(sql: str, policy: CostPolicy) -> List[PlanFinding]:
+    """SQL本文から分かる問題"""
+    findings: List[PlanFinding] = []
+    lexed = lex(sql)
+    code = [lexed.tokens[i] for i in lexed.code]
+    # LIKE の直後の文字列リテラルが % で始まる（リテラル・コメント内の LIKE '%' は除く）
+    if any(token.kind == KEYWORD and token.upper == "LIKE" and following.kind == STRING
+           and (following.string_value() or "").startswith("%")
+           for token, following in zip(code, code[1:])):
+        findings.append(PlanFinding(
+            "leading_wildcard_like", WARNING, None,
+            "LIKE '%...' はインデックスを使えず全件走査になります。前方一致か完全一致を検討してください",
+        ))
+    return findings
+
+
+# ============================================================================
+# プリフライト
+# ============================================================================
+
+class PlanCache:
+    """クエリフィンガープリント→検出結果のLRU"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, List[PlanFinding]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[List[PlanFinding]]:
+        with self._lock:
+            findings = self._entries.get(key)
+            if findings is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return findings
+
+    def put(self, key: Hashable, findings: List[PlanFinding]) -> None:
+        with self._lock:
+            self._entries[key] = findings
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+plan_cache = PlanCache()
+
+
+def explain_findings(db, sql: str, policy: CostPolicy) -> List[PlanFinding]:
+    """バックエンドのEXPLAINを実行して検出結果を得る（フィンガープリント単位でキャッシュ）"""
+    key = (db._pool_key(), db.data_version(), query_fingerprint(sql))
+    cached = plan_cache.get(key)
+    if cached is not None:
+        return cached
+
+    inner = lex(sql).body
+    if db.db_type == "sqlite":
+        df = db.execute_query(f"EXPLAIN QUERY PLAN {inner}")
+        findings = analyze_sqlite_plan(list(df.itertuples(index=False, name=None)), sql, policy)
+    elif db.db_type == "duckdb":
+        df = db.execute_query(f"EXPLAIN (FORMAT JSON) {inner}")
+        findings = analyze_duckdb_plan(df.iloc[0, -1], policy)
+    elif db.db_type == "postgresql":
+        df = db.execute_query(f"EXPLAIN (FORMAT JSON) {inner}")
+        findings = analyze_postgresql_plan(df.iloc[0, 0], policy)
+    else:
+        findings = []
+
+    findings = static_findings(sql, policy) + findings
+    plan_cache.put(key, findings)
+    return findings
+
+
+def preflight(db, sql: str, policy: Optional[CostPolicy] = None) -> CostAssessment:
+    """実行前にコストを評価し、ポリシーに従って拒否・LIMIT付与・警告を行う
+
+    Returns:
+        CostAssessment（limitモードで制限した場合は sql が書き換わる）
+
+    Raises:
+        QueryCostError: rejectモードで重大な問題が検出された場合
+    """
+    policy = policy or CostPolicy.from_env()
+    assessment = CostAssessment(sql=sql)
+    if policy.mode == "off":
+        return assessment
+
+    try:
+        findings = explain_findings(db, sql, policy)
+    except Exception as e:
+        # EXPLAIN自体の失敗（構文エラー等）は本実行に任せる
+        logger.debug(f"EXPLAIN failed, skipping cost guard: {e}")
+        return assessment
+
+    full_scans = [f for f in findings if f.kind == "full_scan"]
+    if len(full_scans) > policy.max_full_scans:
+        findings = [f if f.kind != "full_scan" else
+                    PlanFinding(f.kind, SEVERE, f.table, f.detail) for f in findings]
+    assessment.findings = findings
+
+    severe = assessment.severe
+    if severe and policy.mode == "reject":
+        details = "; ".join(f.detail for f in severe)
+        raise QueryCostError(f"高コストなクエリのため実行を拒否しました: {details}", findings)
+    if severe and policy.mode == "limit":
+        inner = lex(sql).body
+        assessment.sql = f"SELECT * FROM ({inner}) AS _guarded LIMIT {int(policy.auto_limit)}"
+        assessment.limited = True
+    return assessment
+
+
+__all__ = [
+    "CostPolicy",
+    "CostAssessment",
+    "PlanFinding",
+    "QueryCostError",
+    "preflight",
+    "plan_cache",
+    "analyze_sqlite_plan",
+    "analyze_duckdb_plan",
+    "analyze_postgresql_plan",
+]
@@ -4,9 +4,14 @@
 内部でパラメータ化クエリを使用し、安全にデータベースから結果を取得します。
 """
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, NamedTuple, Sequence, Tuple
 import pandas as pd
 
+from .aggregate_cube import TRACK_CD_RANGES, get_favorite_cube
+from .name_index import Jockey, resolve_jockeys, resolve_name
+from .race_key import race_join
+from .sire_rollup import PEDIGREE_COLUMNS, get_sire_rollup
+
 
 def _validate_year(year_from: str) -> int:
     """年パラメータをバリデーションし整数で返す"""
@@ -51,13 +56,65 @@ GRADE_CODES = {
     '未勝利': 'I', '新馬': 'J',
 }
 
+# 芝・ダート・障害の指定（入力形式→区分）
+TRACK_TYPES = {
+    '芝': 'turf', 'turf': 'turf',
+    'ダート': 'dirt', 'ダ': 'dirt', 'dirt': 'dirt',
+    '障害': 'jump', 'jump': 'jump',
+}
+
 # ソース別テーブル名
 _SOURCE_TABLES = {
-    'jra': {'se': 'NL_SE', 'ra': 'NL_RA'},
-    'nar': {'se': 'NL_SE_NAR', 'ra': 'NL_RA_NAR'},
+    'jra': {'se': 'NL_SE', 'ra': 'NL_RA', 'ks': 'NL_KS'},
+    'nar': {'se': 'NL_SE_NAR', 'ra': 'NL_RA_NAR', 'ks': 'NL_KS_NAR'},
 }
 
 
+def _name_condition(
+    db_connection,
+    table: str,
+    name_column: str,
+    key_column: str,
+    alias: str,
+    name: str
+) -> Tuple[str, List]:
+    """部分一致の名前条件を組み立てる
+
+    n-gram索引で一致する名前のキーに解決できれば ``alias.key IN (...)``
+    （インデックスが効く完全一致）、できなければ ``alias.name LIKE '%name%'``。
+    """
+    match = resolve_name(db_connection, table, name_column, key_column, name)
+    if match is None:
+        return f"{alias}.{name_column} LIKE ?", ['%' + name + '%']
+    if not match.keys:
+        return "1 = 0", []
+    placeholders = ", ".join("?" * len(match.keys))
+    return f"{alias}.{key_column} IN ({placeholders})", list(match.keys)
+
+
+def _jockey_condition(
+    db_connection,
+    tables: Dict[str, str],
+    jockey_name: str
+) -> Tuple[str, List, Optional[List[Jockey]]]:
+    """騎手名の条件を組み立てる
+
+    騎手マスタで騎手コードに解決できれば ``s.KisyuCode = ?`` / ``IN (...)``
+    （解決した騎手の一覧も返す）。マスタがない・マスタに該当がない場合は
+    出走表の騎手名略称での部分一致に戻る。
+    """
+    jockeys = resolve_jockeys(db_connection, tables['ks'], tables['se'], jockey_name)
+    if not jockeys:
+        condition, params = _name_condition(
+            db_connection, tables['se'], 'KisyuRyakusyo', 'KisyuRyakusyo', 's', jockey_name
+        )
+        return condition, params, None
+    codes = [jockey.code for jockey in jockeys]
+    if len(codes) == 1:
+        return "s.KisyuCode = ?", codes, jockeys
+    return f"s.KisyuCode IN ({', '.join('?' * len(codes))})", codes, jockeys
+
+
 def _resolve_venue(venue: str, source: str = 'jra') -> str:
     """競馬場名をコードに変換（source対応）"""
     if source == 'nar':
@@ -72,6 +129,20 @@ def _resolve_venue(venue: str, source: str = 'jra') -> str:
         return code
 
 
+# 一括集計で1回に指定できる件数の上限
+MAX_BATCH_SIZE = 50
+
+
+def _validate_batch(values: Sequence, name: str) -> List:
+    """一括集計の指定をバリデーションし、重複を除いたリストで返す"""
+    if isinstance(values, (str, bytes)) or not values:
+        raise ValueError(f"{name} には1件以上のリストを指定してください")
+    unique = list(dict.fromkeys(values))
+    if len(unique) > MAX_BATCH_SIZE:
+        raise ValueError(f"{name} は{MAX_BATCH_SIZE}件までです（{len(unique)}件指定）")
+    return unique
+
+
 def _compute_rates(total, wins, places_2, places_3):
     """勝率・連対率・複勝率を計算"""
     return {
@@ -82,24 +153,53 @@ def _compute_rates(total, wins, places_2, places_3):
     }
 
 
-def _favorite_performance_impl(
-    db_connection,
+class _FavoriteFilters(NamedTuple):
+    """人気別成績の絞り込み条件（人気そのものを除く）"""
+
+    conditions: List[str]
+    params: List
+    desc: List[str]
+    venue_code: Optional[str]
+    grade_code: Optional[str]
+    year_val: Optional[int]
+    distance: Optional[int]
+    track_type: Optional[str]
+
+    @property
+    def need_join(self) -> bool:
+        return bool(self.grade_code or self.distance or self.track_type)
+
+    def cube_covers(self, cube) -> bool:
+        return cube.covers(JyoCD=self.venue_code, GradeCD=self.grade_code, Year=self.year_val,
+                           Kyori=self.distance, Track=self.track_type)
+
+    def cube_rollup(self, cube, ninki: int) -> Tuple[int, int, int, int]:
+        return cube.rollup(ninki, venue_code=self.venue_code, grade_code=self.grade_code,
+                           year_from=self.year_val, distance=self.distance,
+                           track=self.track_type)
+
+    def cube_lookup(self, source: str, ninki: Any) -> Dict[str, Any]:
+        """キューブで答えたときに 'query' の代わりに返す参照内容（SQLは実行していない）"""
+        filters = {'Ninki': ninki, 'JyoCD': self.venue_code, 'GradeCD': self.grade_code,
+                   'Year_from': self.year_val, 'Kyori': self.distance, 'Track': self.track_type}
+        return {'cube': f'favorite_cube_{source}',
+                'filters': {k: v for k, v in filters.items() if v is not None}}
+
+
+def _favorite_filters(
     venue: Optional[str] = None,
-    ninki: int = 1,
     grade: Optional[str] = None,
     year_from: Optional[str] = None,
     distance: Optional[int] = None,
-    source: str = 'jra'
-) -> Dict[str, Any]:
-    """人気別成績の共通実装（JRA/NAR兼用）"""
-    tables = _SOURCE_TABLES[source]
+    source: str = 'jra',
+    track: Optional[str] = None
+) -> _FavoriteFilters:
+    """人気別成績の絞り込み条件を組み立てる（単発・一括で共通）"""
     conditions = []
     query_params: List = []
     condition_desc = []
+    venue_code = grade_code = year_val = track_type = None
 
-    conditions.append("Ninki = ?")
-    query_params.append(ninki)
-    condition_desc.append(f"{ninki}番人気")
     if source == 'nar':
         condition_desc.append("NAR地方競馬")
 
@@ -131,32 +231,75 @@ def _favorite_performance_impl(
         query_params.append(distance)
         condition_desc.append(f"{distance}m")
 
-    where_clause = " AND ".join(conditions)
-    need_join = grade or distance
-
-    if need_join:
-        query = f"""
-        SELECT COUNT(*) as total,
+    if track:
+        track_type = TRACK_TYPES.get(track.lower())
+        if not track_type:
+            raise ValueError(f"不明なトラック: {track}. 有効な値: {list(TRACK_TYPES.keys())}")
+        low, high = TRACK_CD_RANGES[track_type]
+        conditions.append("CAST(r.TrackCD AS INTEGER) BETWEEN ? AND ?")
+        query_params.extend([low, high])
+        condition_desc.append(track)
+
+    return _FavoriteFilters(conditions, query_params, condition_desc, venue_code, grade_code,
+                            year_val, distance or None, track_type)
+
+
+def _favorite_query(db_connection, tables: Dict[str, str], filters: _FavoriteFilters,
+                    ninki_condition: str, select_ninki: str = "", group_by: str = "") -> str:
+    """人気別成績のSQL（select_ninki / group_by を指定すると人気ごとに集計する）"""
+    where_clause = " AND ".join([ninki_condition] + filters.conditions)
+    group_clause = f"\n        GROUP BY {group_by}" if group_by else ""
+
+    if filters.need_join:
+        join = race_join(db_connection, tables['se'], tables['ra'])
+        return f"""
+        SELECT {select_ninki}COUNT(*) as total,
             SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) as places_2,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) as places_3
-        FROM {tables['se']} s
-        JOIN {tables['ra']} r
-            ON s.Year = r.Year AND s.MonthDay = r.MonthDay AND s.JyoCD = r.JyoCD
-            AND s.Kaiji = r.Kaiji AND s.Nichiji = r.Nichiji AND s.RaceNum = r.RaceNum
-        WHERE {where_clause}
+        FROM {join.se} s
+        JOIN {join.ra} r ON {join.on}
+        WHERE {where_clause}{group_clause}
         """
-    else:
-        query = f"""
-        SELECT COUNT(*) as total,
+    return f"""
+        SELECT {select_ninki}COUNT(*) as total,
             SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
             SUM(CASE WHEN KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) as places_2,
             SUM(CASE WHEN KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) as places_3
         FROM {tables['se']} s
-        WHERE {where_clause}
+        WHERE {where_clause}{group_clause}
         """
 
-    df = db_connection.execute_safe_query(query, params=tuple(query_params))
+
+def _favorite_performance_impl(
+    db_connection,
+    venue: Optional[str] = None,
+    ninki: int = 1,
+    grade: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None,
+    source: str = 'jra',
+    track: Optional[str] = None
+) -> Dict[str, Any]:
+    """人気別成績の共通実装（JRA/NAR兼用）
+
+    集約キューブ（aggregate_cube）で扱える条件ならキューブから答え（'query' の代わりに
+    'cube_lookup' を返す）、扱えない場合やキューブが使えない場合はSQLで集計する。
+    """
+    tables = _SOURCE_TABLES[source]
+    filters = _favorite_filters(venue, grade, year_from, distance, source, track)
+    condition_desc = [f"{ninki}番人気"] + filters.desc
+    query = _favorite_query(db_connection, tables, filters, "Ninki = ?")
+
+    cube = get_favorite_cube(db_connection, source, tables['se'], tables['ra'])
+    if cube is not None and filters.cube_covers(cube):
+        result = _compute_rates(*filters.cube_rollup(cube, ninki))
+        result['conditions'] = ', '.join(condition_desc)
+        result['cube_lookup'] = filters.cube_lookup(source, ninki)
+        result['answered_from'] = 'aggregate_cube'
+        return result
+
+    df = db_connection.execute_safe_query(query, params=tuple([ninki] + filters.params))
 
     if df.empty or df.iloc[0]['total'] == 0:
         return {**_compute_rates(0, 0, 0, 0),
@@ -170,13 +313,56 @@ def _favorite_performance_impl(
     return result
 
 
+def _favorite_performance_batch_impl(
+    db_connection,
+    ninki_list: List[int],
+    venue: Optional[str] = None,
+    grade: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None,
+    source: str = 'jra',
+    track: Optional[str] = None
+) -> Dict[str, Any]:
+    """複数の人気の成績を1回の集計（GROUP BY Ninki）で求める共通実装"""
+    ninki_list = [int(n) for n in _validate_batch(ninki_list, 'ninki_list')]
+    tables = _SOURCE_TABLES[source]
+    filters = _favorite_filters(venue, grade, year_from, distance, source, track)
+    query = _favorite_query(
+        db_connection, tables, filters, f"Ninki IN ({', '.join('?' * len(ninki_list))})",
+        select_ninki="Ninki as ninki, ", group_by="Ninki"
+    )
+
+    cube = get_favorite_cube(db_connection, source, tables['se'], tables['ra'])
+    answered_from = None
+    if cube is not None and filters.cube_covers(cube):
+        counts = {n: filters.cube_rollup(cube, n) for n in ninki_list}
+        answered_from = 'aggregate_cube'
+        lookup = {'cube_lookup': filters.cube_lookup(source, ninki_list)}
+    else:
+        df = db_connection.execute_safe_query(query, params=tuple(ninki_list + filters.params))
+        counts = {}
+        for row in df.to_dict('records'):
+            counts[int(row['ninki'])] = (int(row['total']), int(row['wins'] or 0),
+                                         int(row['places_2'] or 0), int(row['places_3'] or 0))
+        lookup = {'query': query}
+
+    results = []
+    for n in ninki_list:
+        results.append({'ninki': n, **_compute_rates(*counts.get(n, (0, 0, 0, 0)))})
+    result = {'results': results, 'conditions': ', '.join(filters.desc), **lookup}
+    if answered_from:
+        result['answered_from'] = answered_from
+    return result
+
+
 def get_favorite_performance(
     db_connection,
     venue: Optional[str] = None,
     ninki: int = 1,
     grade: Optional[str] = None,
     year_from: Optional[str] = None,
-    distance: Optional[int] = None
+    distance: Optional[int] = None,
+    track: Optional[str] = None
 ) -> Dict[str, Any]:
     """人気別成績を取得
 
@@ -187,6 +373,7 @@ def get_favorite_performance(
         grade: グレードコード（'G1', 'G2', 'G3' または 'A', 'B', 'C'）
         year_from: 集計開始年（例: '2023'）
         distance: 距離（メートル、例: 1600）
+        track: '芝' / 'ダート' / '障害'
 
     Returns:
         dict: 勝率・連対率・複勝率等
@@ -199,31 +386,54 @@ def get_favorite_performance(
     """
     return _favorite_performance_impl(
         db_connection, venue=venue, ninki=ninki, grade=grade,
-        year_from=year_from, distance=distance, source='jra'
+        year_from=year_from, distance=distance, source='jra', track=track
     )
 
 
-def _jockey_stats_impl(
+def get_favorite_performance_batch(
     db_connection,
-    jockey_name: str,
+    ninki_list: List[int],
     venue: Optional[str] = None,
+    grade: Optional[str] = None,
     year_from: Optional[str] = None,
     distance: Optional[int] = None,
-    source: str = 'jra'
+    track: Optional[str] = None
 ) -> Dict[str, Any]:
-    """騎手成績の共通実装（JRA/NAR兼用）"""
-    tables = _SOURCE_TABLES[source]
-    conditions = []
+    """複数の人気順位の成績を一括で取得（1回の GROUP BY Ninki で集計）
+
+    絞り込みの意味は get_favorite_performance と同じ。
+
+    Returns:
+        dict: {
+            'results': [{'ninki': 人気, 'total': ..., 'win_rate': ..., ...}, ...]（指定順）,
+            'conditions': 適用した条件の説明,
+            'query': 実行したSQL
+        }
+
+    Example:
+        >>> result = get_favorite_performance_batch(db_conn, [1, 2, 3, 4, 5], venue='東京')
+        >>> for r in result['results']:
+        ...     print(f"{r['ninki']}番人気: 勝率 {r['win_rate']:.1f}%")
+    """
+    return _favorite_performance_batch_impl(
+        db_connection, ninki_list, venue=venue, grade=grade, year_from=year_from,
+        distance=distance, source='jra', track=track
+    )
+
+
+def _jockey_filters(
+    venue: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None,
+    source: str = 'jra'
+) -> Tuple[List[str], List, List[str]]:
+    """騎手成績の絞り込み条件（騎手名を除く）: (条件, パラメータ, 説明)"""
+    conditions = ["s.KakuteiJyuni IS NOT NULL", "s.KakuteiJyuni > 0"]
     query_params: List = []
-    condition_desc = [f"騎手名: {jockey_name}（部分一致）"]
+    condition_desc = []
     if source == 'nar':
         condition_desc.append("NAR地方競馬")
 
-    conditions.append("s.KisyuRyakusyo LIKE ?")
-    query_params.append('%' + jockey_name + '%')
-    conditions.append("s.KakuteiJyuni IS NOT NULL")
-    conditions.append("s.KakuteiJyuni > 0")
-
     if venue:
         venue_code = _resolve_venue(venue, source)
         conditions.append("s.JyoCD = ?")
@@ -241,47 +451,57 @@ def _jockey_stats_impl(
         query_params.append(distance)
         condition_desc.append(f"{distance}m")
 
-    where_clause = " AND ".join(conditions)
+    return conditions, query_params, condition_desc
+
 
+def _jockey_query(db_connection, tables: Dict[str, str], select_jockey: str,
+                  where_clause: str, group_by: str, distance: Optional[int]) -> str:
     if distance:
-        query = f"""
-        SELECT s.KisyuRyakusyo as jockey_name, COUNT(*) as total_rides,
+        join = race_join(db_connection, tables['se'], tables['ra'])
+        return f"""
+        SELECT {select_jockey}, COUNT(*) as total_rides,
             SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) as places_2,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) as places_3
-        FROM {tables['se']} s
-        JOIN {tables['ra']} r
-            ON s.Year = r.Year AND s.MonthDay = r.MonthDay AND s.JyoCD = r.JyoCD
-            AND s.Kaiji = r.Kaiji AND s.Nichiji = r.Nichiji AND s.RaceNum = r.RaceNum
+        FROM {join.se} s
+        JOIN {join.ra} r ON {join.on}
         WHERE {where_clause}
-        GROUP BY s.KisyuRyakusyo
+        GROUP BY {group_by}
         """
-    else:
-        query = f"""
-        SELECT s.KisyuRyakusyo as jockey_name, COUNT(*) as total_rides,
+    return f"""
+        SELECT {select_jockey}, COUNT(*) as total_rides,
             SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) as places_2,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) as places_3
         FROM {tables['se']} s
         WHERE {where_clause}
-        GROUP BY s.KisyuRyakusyo
+        GROUP BY {group_by}
         """
 
-    df = db_connection.execute_safe_query(query, params=tuple(query_params))
 
+def _jockey_result(df: pd.DataFrame, jockey_name: str, jockeys: Optional[List[Jockey]],
+                   condition_desc: List[str]) -> Dict[str, Any]:
+    """騎手（名前・コード）ごとの集計結果から騎手成績の応答を作る（queryは呼び出し側で付ける）"""
     if df.empty:
         return {
             'jockey_name': jockey_name, 'total_rides': 0, 'wins': 0,
             'places_2': 0, 'places_3': 0, 'win_rate': 0.0,
             'place_rate_2': 0.0, 'place_rate_3': 0.0,
-            'conditions': ', '.join(condition_desc), 'query': query
+            'conditions': ', '.join(condition_desc),
+            'jockeys': [], 'ambiguous': False
         }
 
+    condition_desc = list(condition_desc)
+    df = df.sort_values('total_rides', ascending=False, kind='stable')
+    breakdown = _jockey_breakdown(df, jockeys)
+    if len(breakdown) > 1:
+        condition_desc.append(f"該当騎手{len(breakdown)}名の合算（内訳はjockeys）")
+
     total_rides = int(df['total_rides'].sum())
     wins = int(df['wins'].sum())
     places_2 = int(df['places_2'].sum())
     places_3 = int(df['places_3'].sum())
-    matched_jockey = df.loc[df['total_rides'].idxmax(), 'jockey_name']
+    matched_jockey = df['jockey_name'].iloc[0]
 
     return {
         'jockey_name': matched_jockey, 'total_rides': total_rides,
@@ -290,10 +510,122 @@ def _jockey_stats_impl(
         'place_rate_2': (places_2 / total_rides * 100) if total_rides > 0 else 0.0,
         'place_rate_3': (places_3 / total_rides * 100) if total_rides > 0 else 0.0,
         'conditions': ', '.join(condition_desc),
-        'matched_jockeys': df['jockey_name'].tolist(), 'query': query
+        'matched_jockeys': df['jockey_name'].tolist(),
+        'jockeys': breakdown, 'ambiguous': len(breakdown) > 1
     }
 
 
+def _jockey_stats_impl(
+    db_connection,
+    jockey_name: str,
+    venue: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None,
+    source: str = 'jra'
+) -> Dict[str, Any]:
+    """騎手成績の共通実装（JRA/NAR兼用）"""
+    tables = _SOURCE_TABLES[source]
+    filters, filter_params, filter_desc = _jockey_filters(venue, year_from, distance, source)
+    condition_desc = [f"騎手名: {jockey_name}（部分一致）"] + filter_desc
+
+    name_condition, name_params, jockeys = _jockey_condition(
+        db_connection, tables, jockey_name
+    )
+    where_clause = " AND ".join([name_condition] + filters)
+
+    # 騎手コードに解決できた場合はコード単位で集計する（同じ略称の別騎手を混ぜない）
+    if jockeys is not None:
+        select_jockey = "s.KisyuCode as jockey_code, MAX(s.KisyuRyakusyo) as jockey_name"
+        group_by = "s.KisyuCode"
+    else:
+        select_jockey = "s.KisyuRyakusyo as jockey_name"
+        group_by = "s.KisyuRyakusyo"
+    query = _jockey_query(db_connection, tables, select_jockey, where_clause, group_by,
+                          distance)
+
+    df = db_connection.execute_safe_query(query, params=tuple(name_params + filter_params))
+    return {**_jockey_result(df, jockey_name, jockeys, condition_desc), 'query': query}
+
+
+def _jockey_stats_batch_impl(
+    db_connection,
+    jockey_names: List[str],
+    venue: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None,
+    source: str = 'jra'
+) -> Dict[str, Any]:
+    """複数の騎手の成績を1回の集計で求める共通実装
+
+    騎手ごとの条件は単発の jockey_stats と同じもの（_jockey_condition）を使い、
+    騎手コード・略称ごとに集計した行に「どの指定に一致したか」を付けて振り分ける。
+    """
+    jockey_names = _validate_batch(jockey_names, 'jockey_names')
+    tables = _SOURCE_TABLES[source]
+    filters, filter_params, filter_desc = _jockey_filters(venue, year_from, distance, source)
+
+    resolved = [_jockey_condition(db_connection, tables, name) for name in jockey_names]
+    by_code = any(jockeys is not None for _, _, jockeys in resolved)
+
+    match_columns = []
+    match_params: List = []
+    for i, (condition, params, _) in enumerate(resolved):
+        match_columns.append(f"MAX(CASE WHEN {condition} THEN 1 ELSE 0 END) as match_{i}")
+        match_params.extend(params)
+    any_condition = " OR ".join(f"({condition})" for condition, _, _ in resolved)
+    any_params = [p for _, params, _ in resolved for p in params]
+    where_clause = " AND ".join([f"({any_condition})"] + filters)
+
+    if by_code:
+        select_jockey = "s.KisyuCode as jockey_code, s.KisyuRyakusyo as jockey_name"
+        group_by = "s.KisyuCode, s.KisyuRyakusyo"
+    else:
+        select_jockey = "s.KisyuRyakusyo as jockey_name"
+        group_by = "s.KisyuRyakusyo"
+    query = _jockey_query(db_connection, tables, f"{select_jockey}, {', '.join(match_columns)}",
+                          where_clause, group_by, distance)
+    df = db_connection.execute_safe_query(
+        query, params=tuple(match_params + any_params + filter_params)
+    )
+
+    measures = ['total_rides', 'wins', 'places_2', 'places_3']
+    results = []
+    for i, (name, (_, _, jockeys)) in enumerate(zip(jockey_names, resolved)):
+        rows = df[df[f'match_{i}'] == 1] if not df.empty else df
+        if rows.empty:
+            rows = pd.DataFrame(columns=['jockey_name'] + measures)
+        elif jockeys is not None:
+            # 単発と同じく騎手コード単位にまとめる（略称は MAX と同じく最大値）
+            rows = rows.groupby('jockey_code', as_index=False, sort=False).agg(
+                jockey_name=('jockey_name', 'max'),
+                **{m: (m, 'sum') for m in measures}
+            )
+        else:
+            rows = rows.groupby('jockey_name', as_index=False, sort=False)[measures].sum()
+        condition_desc = [f"騎手名: {name}（部分一致）"] + filter_desc
+        results.append(_jockey_result(rows, name, jockeys, condition_desc))
+
+    return {'results': results, 'conditions': ', '.join(filter_desc), 'query': query}
+
+
+def _jockey_breakdown(df: pd.DataFrame, jockeys: Optional[List[Jockey]]) -> List[Dict[str, Any]]:
+    """騎手ごとの成績（騎乗数の多い順）。騎手コードに解決できた場合はコードと正式名も付ける"""
+    by_code = {jockey.code: jockey for jockey in jockeys or []}
+    breakdown = []
+    for row in df.to_dict('records'):
+        rates = _compute_rates(int(row['total_rides']), int(row['wins']),
+                               int(row['places_2']), int(row['places_3']))
+        entry = {'jockey_name': row['jockey_name'], 'total_rides': rates.pop('total'), **rates}
+        if 'jockey_code' in row:
+            code = str(row['jockey_code']).strip()
+            master = by_code.get(code)
+            entry = {'jockey_code': code,
+                     'full_name': master.name if master else None,
+                     **entry}
+        breakdown.append(entry)
+    return breakdown
+
+
 def get_jockey_stats(
     db_connection,
     jockey_name: str,
@@ -323,6 +655,33 @@ def get_jockey_stats(
     )
 
 
+def get_jockey_stats_batch(
+    db_connection,
+    jockey_names: List[str],
+    venue: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None
+) -> Dict[str, Any]:
+    """複数の騎手の成績を一括で取得（1回の集計で全騎手分を求める）
+
+    騎手名の解決と絞り込みの意味は get_jockey_stats と同じ。
+
+    Returns:
+        dict: {
+            'results': [get_jockey_stats と同じ形式（queryを除く）, ...]（指定順）,
+            'conditions': 騎手名以外の条件の説明,
+            'query': 実行したSQL
+        }
+
+    Example:
+        >>> result = get_jockey_stats_batch(db_conn, ['ルメール', '川田', '武豊'], year_from='2023')
+    """
+    return _jockey_stats_batch_impl(
+        db_connection, jockey_names, venue=venue, year_from=year_from,
+        distance=distance, source='jra'
+    )
+
+
 def get_frame_stats(
     db_connection,
     venue: Optional[str] = None,
@@ -389,6 +748,7 @@ def get_frame_stats(
 
     # 距離指定がある場合はNL_RAと結合
     if distance:
+        join = race_join(db_connection, "NL_SE", "NL_RA")
         query = f"""
         SELECT
             s.Wakuban as wakuban,
@@ -396,14 +756,8 @@ def get_frame_stats(
             SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) as places_2,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) as places_3
-        FROM NL_SE s
-        JOIN NL_RA r
-            ON s.Year = r.Year
-            AND s.MonthDay = r.MonthDay
-            AND s.JyoCD = r.JyoCD
-            AND s.Kaiji = r.Kaiji
-            AND s.Nichiji = r.Nichiji
-            AND s.RaceNum = r.RaceNum
+        FROM {join.se} s
+        JOIN {join.ra} r ON {join.on}
         WHERE {where_clause}
         GROUP BY s.Wakuban
         ORDER BY s.Wakuban
@@ -441,20 +795,6 @@ def get_frame_stats(
     return df
 
 
-def _ensure_bamei_index(db_connection, table_name: str) -> None:
-    """Bameiカラムにインデックスがなければ作成する（パフォーマンス改善）
-
-    read-onlyモードのDBでは作成できないためエラーは無視する。
-    """
-    try:
-        index_name = f"idx_{table_name.lower()}_bamei"
-        db_connection.execute_safe_query(
-            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name}(Bamei)"
-        )
-    except Exception:
-        pass  # read-only DB等ではスキップ
-
-
 def _horse_history_impl(
     db_connection,
     horse_name: str,
@@ -463,16 +803,16 @@ def _horse_history_impl(
 ) -> pd.DataFrame:
     """馬の戦績の共通実装（JRA/NAR兼用）"""
     tables = _SOURCE_TABLES[source]
-    # Bameiカラムのインデックスを自動作成（未作成の場合）
-    _ensure_bamei_index(db_connection, tables['se'])
     venue_map = ALL_VENUE_NAMES if source == 'nar' else VENUE_NAMES
 
+    name_condition, query_params = _name_condition(
+        db_connection, tables['se'], 'Bamei', 'KettoNum', 's', horse_name
+    )
     conditions = [
-        "s.Bamei LIKE ?",
+        name_condition,
         "s.KakuteiJyuni IS NOT NULL",
         "s.KakuteiJyuni > 0"
     ]
-    query_params: List = ['%' + horse_name + '%']
 
     if year_from:
         year_val = _validate_year(year_from)
@@ -480,16 +820,15 @@ def _horse_history_impl(
         query_params.append(year_val)
 
     where_clause = " AND ".join(conditions)
+    join = race_join(db_connection, tables['se'], tables['ra'])
 
     query = f"""
     SELECT s.Year || '-' || s.MonthDay as race_date, s.JyoCD as venue_code,
         r.Hondai as race_name, r.Kyori as distance,
         s.KakuteiJyuni as finish, s.Ninki as popularity,
         s.KisyuRyakusyo as jockey, s.Time as time, s.Bamei as horse_name
-    FROM {tables['se']} s
-    JOIN {tables['ra']} r
-        ON s.Year = r.Year AND s.MonthDay = r.MonthDay AND s.JyoCD = r.JyoCD
-        AND s.Kaiji = r.Kaiji AND s.Nichiji = r.Nichiji AND s.RaceNum = r.RaceNum
+    FROM {join.se} s
+    JOIN {join.ra} r ON {join.on}
     WHERE {where_clause}
     ORDER BY s.Year DESC, s.MonthDay DESC
     """
@@ -531,46 +870,28 @@ def get_horse_history(
                                year_from=year_from, source='jra')
 
 
-def get_sire_stats(
+def _sire_stats_impl(
     db_connection,
-    sire_name: str,
+    name: str,
+    role: str = 'sire',
     venue: Optional[str] = None,
     distance: Optional[int] = None,
-    year_from: Optional[str] = None
+    year_from: Optional[str] = None,
+    track: Optional[str] = None
 ) -> Dict[str, Any]:
-    """種牡馬（父馬）成績を取得
-
-    Args:
-        db_connection: DatabaseConnectionインスタンス
-        sire_name: 種牡馬名（部分一致検索）
-        venue: 競馬場名（日本語、例: '東京', '中山'）
-        distance: 距離（メートル、例: 1600）
-        year_from: 集計開始年（例: '2023'）
+    """種牡馬・母の父成績の共通実装
 
-    Returns:
-        dict: {
-            'sire_name': 種牡馬名,
-            'total_runs': 総出走数,
-            'wins': 1着回数,
-            'places_2': 2着以内回数,
-            'places_3': 3着以内回数,
-            'win_rate': 勝率（%）,
-            'place_rate_2': 連対率（%）,
-            'place_rate_3': 複勝率（%）,
-            'conditions': 適用した条件の説明
-        }
-
-    Example:
-        >>> result = get_sire_stats(db_conn, 'ディープインパクト', venue='東京', distance=1600)
-        >>> print(f"{result['sire_name']}: 勝率 {result['win_rate']:.1f}%")
+    血統名別ロールアップ（sire_rollup）で扱える条件ならロールアップから答え、
+    扱えない場合やロールアップが使えない場合はSQLで集計する。
     """
+    column = PEDIGREE_COLUMNS[role]
+    name_key = 'sire_name' if role == 'sire' else 'broodmare_sire_name'
+    matched_key = 'matched_sires' if role == 'sire' else 'matched_broodmare_sires'
+    label = '種牡馬' if role == 'sire' else '母の父'
     conditions = []
     query_params: List = []
-    condition_desc = [f"種牡馬: {sire_name}（部分一致）"]
-
-    # 種牡馬名（部分一致）- NL_UMのKetto3InfoBamei1が父馬名
-    conditions.append("u.Ketto3InfoBamei1 LIKE ?")
-    query_params.append('%' + sire_name + '%')
+    condition_desc = [f"{label}: {name}（部分一致）"]
+    venue_code = year_val = track_type = None
 
     # 確定着順がNULLでない（INTEGER型）
     conditions.append("s.KakuteiJyuni IS NOT NULL")
@@ -598,49 +919,63 @@ def get_sire_stats(
         query_params.append(distance)
         condition_desc.append(f"{distance}m")
 
-    where_clause = " AND ".join(conditions)
-
-    # NL_UMとJOINして父馬名(Ketto3InfoBamei1)を取得
-    if distance:
-        query = f"""
-        SELECT
-            u.Ketto3InfoBamei1 as sire_name,
-            COUNT(*) as total_runs,
-            SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
-            SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) as places_2,
-            SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) as places_3
-        FROM NL_SE s
-        JOIN NL_UM u ON s.KettoNum = u.KettoNum
-        JOIN NL_RA r
-            ON s.Year = r.Year
-            AND s.MonthDay = r.MonthDay
-            AND s.JyoCD = r.JyoCD
-            AND s.Kaiji = r.Kaiji
-            AND s.Nichiji = r.Nichiji
-            AND s.RaceNum = r.RaceNum
-        WHERE {where_clause}
-        GROUP BY u.Ketto3InfoBamei1
-        """
-    else:
-        query = f"""
+    if track:
+        track_type = TRACK_TYPES.get(track.lower())
+        if not track_type:
+            raise ValueError(f"不明なトラック: {track}. 有効な値: {list(TRACK_TYPES.keys())}")
+        low, high = TRACK_CD_RANGES[track_type]
+        conditions.append("CAST(r.TrackCD AS INTEGER) BETWEEN ? AND ?")
+        query_params.extend([low, high])
+        condition_desc.append(track)
+
+    def build_query(name_condition: str) -> str:
+        where_clause = " AND ".join([name_condition] + conditions)
+        # NL_UMとJOINして血統名（父: Ketto3InfoBamei1 / 母の父: Ketto3InfoBamei5）を取得
+        se_table, ra_join = "NL_SE", ""
+        if distance or track:
+            join = race_join(db_connection, "NL_SE", "NL_RA")
+            se_table, ra_join = join.se, f"\n        JOIN {join.ra} r ON {join.on}"
+        return f"""
         SELECT
-            u.Ketto3InfoBamei1 as sire_name,
+            u.{column} as sire_name,
             COUNT(*) as total_runs,
             SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) as places_2,
             SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) as places_3
-        FROM NL_SE s
-        JOIN NL_UM u ON s.KettoNum = u.KettoNum
+        FROM {se_table} s
+        JOIN NL_UM u ON s.KettoNum = u.KettoNum{ra_join}
         WHERE {where_clause}
-        GROUP BY u.Ketto3InfoBamei1
+        GROUP BY u.{column}
         """
 
-    # クエリ実行
-    df = db_connection.execute_safe_query(query, params=tuple(query_params))
+    rollup = get_sire_rollup(db_connection, role)
+    if rollup is not None and rollup.covers(JyoCD=venue_code, Year=year_val,
+                                            Kyori=distance or None, Track=track_type):
+        names = rollup.match(name)
+        # 結果と同じ集計をするSQL（名前はロールアップで解決済み）
+        if names:
+            name_condition = f"u.{column} IN ({', '.join('?' * len(names))})"
+        else:
+            name_condition = "1 = 0"
+        df = pd.DataFrame(
+            rollup.rollup(name, venue_code=venue_code, year_from=year_val,
+                          distance=distance or None, track=track_type),
+            columns=['sire_name', 'total_runs', 'wins', 'places_2', 'places_3'],
+        )
+        query = build_query(name_condition)
+        answered_from = 'aggregate_cube'
+    else:
+        # 血統名（部分一致）
+        name_condition, name_params = _name_condition(
+            db_connection, 'NL_UM', column, column, 'u', name
+        )
+        query = build_query(name_condition)
+        df = db_connection.execute_safe_query(query, params=tuple(name_params + query_params))
+        answered_from = None
 
     if df.empty:
-        return {
-            'sire_name': sire_name,
+        result = {
+            name_key: name,
             'total_runs': 0,
             'wins': 0,
             'places_2': 0,
@@ -651,29 +986,95 @@ def get_sire_stats(
             'conditions': ', '.join(condition_desc),
             'query': query
         }
+    else:
+        # 複数の血統名がマッチする可能性があるため、合計を計算
+        total_runs = int(df['total_runs'].sum())
+        wins = int(df['wins'].sum())
+        places_2 = int(df['places_2'].sum())
+        places_3 = int(df['places_3'].sum())
+
+        # マッチした血統名を取得（最も出走数が多いもの）
+        matched = df.loc[df['total_runs'].idxmax(), 'sire_name']
+
+        result = {
+            name_key: matched,
+            'total_runs': total_runs,
+            'wins': wins,
+            'places_2': places_2,
+            'places_3': places_3,
+            'win_rate': (wins / total_runs * 100) if total_runs > 0 else 0.0,
+            'place_rate_2': (places_2 / total_runs * 100) if total_runs > 0 else 0.0,
+            'place_rate_3': (places_3 / total_runs * 100) if total_runs > 0 else 0.0,
+            'conditions': ', '.join(condition_desc),
+            matched_key: df['sire_name'].tolist(),
+            'query': query
+        }
+    if answered_from:
+        result['answered_from'] = answered_from
+    return result
 
-    # 複数の種牡馬がマッチする可能性があるため、合計を計算
-    total_runs = int(df['total_runs'].sum())
-    wins = int(df['wins'].sum())
-    places_2 = int(df['places_2'].sum())
-    places_3 = int(df['places_3'].sum())
 
-    # マッチした種牡馬名を取得（最も出走数が多い種牡馬）
-    matched_sire = df.loc[df['total_runs'].idxmax(), 'sire_name'] if not df.empty else sire_name
+def get_sire_stats(
+    db_connection,
+    sire_name: str,
+    venue: Optional[str] = None,
+    distance: Optional[int] = None,
+    year_from: Optional[str] = None,
+    track: Optional[str] = None
+) -> Dict[str, Any]:
+    """種牡馬（父馬）成績を取得
 
-    return {
-        'sire_name': matched_sire,
-        'total_runs': total_runs,
-        'wins': wins,
-        'places_2': places_2,
-        'places_3': places_3,
-        'win_rate': (wins / total_runs * 100) if total_runs > 0 else 0.0,
-        'place_rate_2': (places_2 / total_runs * 100) if total_runs > 0 else 0.0,
-        'place_rate_3': (places_3 / total_runs * 100) if total_runs > 0 else 0.0,
-        'conditions': ', '.join(condition_desc),
-        'matched_sires': df['sire_name'].tolist(),
-        'query': query
-    }
+    Args:
+        db_connection: DatabaseConnectionインスタンス
+        sire_name: 種牡馬名（部分一致検索）
+        venue: 競馬場名（日本語、例: '東京', '中山'）
+        distance: 距離（メートル、例: 1600）
+        year_from: 集計開始年（例: '2023'）
+        track: '芝' / 'ダート' / '障害'
+
+    Returns:
+        dict: {
+            'sire_name': 種牡馬名,
+            'total_runs': 総出走数,
+            'wins': 1着回数,
+            'places_2': 2着以内回数,
+            'places_3': 3着以内回数,
+            'win_rate': 勝率（%）,
+            'place_rate_2': 連対率（%）,
+            'place_rate_3': 複勝率（%）,
+            'conditions': 適用した条件の説明
+        }
+
+    Example:
+        >>> result = get_sire_stats(db_conn, 'ディープインパクト', venue='東京', distance=1600)
+        >>> print(f"{result['sire_name']}: 勝率 {result['win_rate']:.1f}%")
+    """
+    return _sire_stats_impl(
+        db_connection, sire_name, role='sire', venue=venue, distance=distance,
+        year_from=year_from, track=track
+    )
+
+
+def get_broodmare_sire_stats(
+    db_connection,
+    broodmare_sire_name: str,
+    venue: Optional[str] = None,
+    distance: Optional[int] = None,
+    year_from: Optional[str] = None,
+    track: Optional[str] = None
+) -> Dict[str, Any]:
+    """母の父（NL_UM.Ketto3InfoBamei5）別の産駒成績を取得
+
+    引数・戻り値は get_sire_stats と同じ（名前のキーは 'broodmare_sire_name'、
+    一致した名前の一覧は 'matched_broodmare_sires'）。
+
+    Example:
+        >>> result = get_broodmare_sire_stats(db_conn, 'サンデーサイレンス', track='芝')
+    """
+    return _sire_stats_impl(
+        db_connection, broodmare_sire_name, role='broodmare_sire', venue=venue,
+        distance=distance, year_from=year_from, track=track
+    )
 
 
 # ============================================================================
@@ -690,12 +1091,13 @@ def get_nar_favorite_performance(
     venue: Optional[str] = None,
     ninki: int = 1,
     year_from: Optional[str] = None,
-    distance: Optional[int] = None
+    distance: Optional[int] = None,
+    track: Optional[str] = None
 ) -> Dict[str, Any]:
     """NAR地方競馬の人気別成績を取得（JRA版に委譲）"""
     return _favorite_performance_impl(
         db_connection, venue=venue, ninki=ninki, year_from=year_from,
-        distance=distance, source='nar'
+        distance=distance, source='nar', track=track
     )
 
 
@@ -0,0 +1,214 @@
+"""Incremental maintenance of derived aggregates
+
+JVLinkToSQLiteは開催週ごとに新しいレースを追記し、過去レースの訂正
+（データ区分 DataKubun の変更）も再送する。30年分以上のNL_SEから集約を
+毎回作り直すのは遅いため、派生テーブル（aggregate_cube 等）は
+ソーステーブルごとの高水位点（ウォーターマーク）を持ち、その後に追加・
+訂正された行が属する年だけを集計し直して差し替える。
+
+- ウォーターマーク: (Year, MonthDay) の最大値と MakeDate（データ作成年月日）の最大値
+- 差分の検出: ``MakeDate >= 前回の最大値`` または ``(Year, MonthDay)`` が前回より後の行
+  （訂正・削除もJV-Data上は新しいMakeDateで再送されるため検出できる）
+- マスタ（NL_UM等）の変更: 変更された行に結合するファクト行（NL_SE）の年を集計し直す
+- 差分の適用: 検出した年のセルを消し、その年だけを再集計して入れ替える
+  （年ごとの置き換えなので同じ差分を2回適用しても結果は変わらない）
+
+MakeDateカラムがないDBでは差分を検出できないため、全体を作り直す。
+
+環境変数:
+- DB_AGGREGATE_REFRESH_INTERVAL: 派生テーブルを定期的に更新する間隔（秒、既定0=しない）。
+  0でもデータ世代が変わった後の最初の利用時には差分更新される
+"""
+
+import logging
+import os
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from .utils import validate_identifier
+
+logger = logging.getLogger(__name__)
+
+# JV-Dataのレコードヘッダー（jrvltsqlのバージョンによって接頭辞 head が付く）
+MAKE_DATE_COLUMNS = ("MakeDate", "headMakeDate")
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """ソーステーブル1つの高水位点（値はDBに格納されている型のまま持つ）"""
+
+    year: Any
+    monthday: Any
+    make_date: Any
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Watermark":
+        return cls(data.get("year"), data.get("monthday"), data.get("make_date"))
+
+
+def _scalar(value: Any) -> Any:
+    """numpy型をJSONに書ける組み込み型に戻す"""
+    return value.item() if hasattr(value, "item") else value
+
+
+def make_date_column(db, table: str) -> Optional[str]:
+    """テーブルのデータ作成年月日カラム（なければNone）"""
+    for column in MAKE_DATE_COLUMNS:
+        if db.has_column(table, column):
+            return column
+    return None
+
+
+def read_watermark(db, table: str) -> Optional[Watermark]:
+    """テーブルの現在の高水位点（MakeDateカラムがない・空のテーブルはNone）
+
+    開催日のないマスタ（NL_UM等）はMakeDateだけを持つ。
+    """
+    validate_identifier(table, "table name")
+    column = make_date_column(db, table)
+    if column is None:
+        return None
+    made = db.execute_query(f"SELECT MAX({column}) AS make_date FROM {table}", use_cache=False)
+    if made.empty or made.iloc[0, 0] is None:
+        return None
+    year = monthday = None
+    if db.has_column(table, "Year") and db.has_column(table, "MonthDay"):
+        latest = db.execute_query(
+            f"SELECT Year, MonthDay FROM {table} ORDER BY Year DESC, MonthDay DESC LIMIT 1",
+            use_cache=False,
+        )
+        if not latest.empty:
+            year, monthday = _scalar(latest.iloc[0, 0]), _scalar(latest.iloc[0, 1])
+    return Watermark(year, monthday, _scalar(made.iloc[0, 0]))
+
+
+def changed_years(db, table: str, mark: Watermark) -> List[Any]:
+    """高水位点より後に追加・訂正された行の年（DBに格納されている型のまま）"""
+    validate_identifier(table, "table name")
+    column = make_date_column(db, table)
+    if column is None:
+        raise ValueError(f"{table} has no MakeDate column")
+    query = f"SELECT DISTINCT Year FROM {table} WHERE {column} >= ?"
+    params: tuple = (mark.make_date,)
+    if mark.year is not None:
+        query += " OR Year > ? OR (Year = ? AND MonthDay > ?)"
+        params += (mark.year, mark.year, mark.monthday)
+    df = db.execute_query(query, params=params, use_cache=False)
+    return [_scalar(v) for v in df.iloc[:, 0].tolist() if v is not None]
+
+
+def changed_years_via(db, fact_table: str, lookup_table: str, key: str,
+                      mark: Watermark) -> List[Any]:
+    """マスタ（NL_UM等）の変更行に結合するファクト行の年
+
+    例: 父馬名が訂正された馬（NL_UM）が出走した年（NL_SE）。
+    """
+    for name in (fact_table, lookup_table, key):
+        validate_identifier(name, "identifier")
+    column = make_date_column(db, lookup_table)
+    if column is None:
+        raise ValueError(f"{lookup_table} has no MakeDate column")
+    df = db.execute_query(
+        f"SELECT DISTINCT f.Year FROM {fact_table} f "
+        f"JOIN {lookup_table} m ON f.{key} = m.{key} WHERE m.{column} >= ?",
+        params=(mark.make_date,),
+        use_cache=False,
+    )
+    return [_scalar(v) for v in df.iloc[:, 0].tolist() if v is not None]
+
+
+def read_watermarks(db, tables: Iterable[str]) -> Optional[Dict[str, Watermark]]:
+    """各ソーステーブルの高水位点（1つでも取れなければNone = 差分更新不可）"""
+    marks = {}
+    for table in tables:
+        mark = read_watermark(db, table)
+        if mark is None:
+            return None
+        marks[table] = mark
+    return marks
+
+
+def changed_years_since(db, marks: Dict[str, Watermark]) -> List[Any]:
+    """複数のソーステーブルで変更があった年の和集合"""
+    years: Dict[str, Any] = {}
+    for table, mark in marks.items():
+        for year in changed_years(db, table, mark):
+            years.setdefault(str(year).strip(), year)
+    return list(years.values())
+
+
+# ============================================================================
+# 定期更新
+# ============================================================================
+
+def refresh_interval() -> float:
+    try:
+        return max(0.0, float(os.getenv("DB_AGGREGATE_REFRESH_INTERVAL", "0")))
+    except ValueError:
+        return 0.0
+
+
+class RefreshScheduler:
+    """派生テーブルの更新処理を一定間隔でバックグラウンド実行する
+
+    Args:
+        interval: 実行間隔（秒）
+        jobs: 更新処理（例外はログに出して次回に持ち越す）
+    """
+
+    def __init__(self, interval: float, jobs: Sequence[Callable[[], Any]]):
+        self.interval = interval
+        self.jobs = list(jobs)
+        self.runs = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> None:
+        for job in self.jobs:
+            try:
+                job()
+            except Exception as e:
+                logger.warning(f"Aggregate refresh failed: {e}")
+        self.runs += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self) -> "RefreshScheduler":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="aggregate-refresh",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def start_refresh_scheduler(jobs: Sequence[Callable[[], Any]]) -> Optional[RefreshScheduler]:
+    """DB_AGGREGATE_REFRESH_INTERVAL が設定されていれば定期更新を開始する"""
+    interval = refresh_interval()
+    if interval <= 0:
+        return None
+    logger.info(f"Aggregate refresh every {interval:g}s")
+    return RefreshScheduler(interval, jobs).start()
+
+
+__all__ = [
+    "Watermark",
+    "make_date_column",
+    "read_watermark",
+    "read_watermarks",
+    "changed_years",
+    "changed_years_since",
+    "changed_years_via",
+    "RefreshScheduler",
+    "start_refresh_scheduler",
+]
@@ -0,0 +1,308 @@
+"""Recommended indexes for the jrvltsql database
+
+高レベルAPIのクエリ（レースキーでのNL_SE⇔NL_RA結合、馬名・騎手コード・騎手名・血統番号・
+人気・枠番での絞り込み）が全件走査にならないためのインデックス定義と、
+その有無の監査・作成処理。
+
+サーバーの接続は読み取り専用のため、作成は保守用コマンド
+（``python -m jvlink_mcp_server.index_builder``）から書き込み可能な接続で行う。
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .race_key import RACE_KEY_COLUMNS, race_key_expr
+from .utils import validate_identifier
+
+logger = logging.getLogger(__name__)
+
+RACE_KEY = RACE_KEY_COLUMNS
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """推奨インデックス1件
+
+    expression を指定すると式インデックス（カラム列の代わりにSQL式）になり、
+    db_types を指定するとそのDB種別でだけ作成・監査する。
+    """
+
+    table: str
+    columns: Tuple[str, ...]
+    suffix: str
+    expression: Optional[str] = None
+    label: Optional[str] = None
+    db_types: Optional[Tuple[str, ...]] = None
+
+    @property
+    def name(self) -> str:
+        return f"idx_{self.table.lower()}_{self.suffix}"
+
+    def create_sql(self) -> str:
+        validate_identifier(self.table, "table name")
+        if self.expression is not None:
+            return (f"CREATE INDEX IF NOT EXISTS {self.name} "
+                    f"ON {self.table}(({self.expression}))")
+        for column in self.columns:
+            validate_identifier(column, "column name")
+        return (f"CREATE INDEX IF NOT EXISTS {self.name} "
+                f"ON {self.table}({', '.join(self.columns)})")
+
+    def covered_by(self, indexed_columns: Sequence[str]) -> bool:
+        """既存インデックスの先頭カラムがこの定義を含むか（大文字小文字は区別しない）
+
+        式インデックスはカラム列では判定できないため、常にFalse（名前で判定する）。
+        """
+        if self.expression is not None:
+            return False
+        wanted = [c.lower() for c in self.columns]
+        return [str(c).lower() for c in indexed_columns[:len(wanted)]] == wanted
+
+    def applies_to(self, db_type: str) -> bool:
+        return self.db_types is None or db_type in self.db_types
+
+    def describe(self) -> str:
+        return f"{self.table}({self.label or ', '.join(self.columns)})"
+
+
+def _race_tables(se: str, ra: str) -> List[IndexSpec]:
+    return [
+        IndexSpec(se, RACE_KEY, "race_key"),
+        IndexSpec(ra, RACE_KEY, "race_key"),
+        IndexSpec(se, ("KettoNum",), "kettonum"),
+        IndexSpec(se, ("KisyuCode",), "kisyucode"),
+        IndexSpec(se, ("KisyuRyakusyo",), "kisyuryakusyo"),
+        IndexSpec(se, ("Bamei",), "bamei"),
+        IndexSpec(se, ("Ninki",), "ninki"),
+        IndexSpec(se, ("Wakuban",), "wakuban"),
+        # RaceKeyでの結合用（race_key.py）。DuckDBはハッシュ結合のため不要
+        IndexSpec(se, RACE_KEY, "racekey", expression=race_key_expr(), label="RaceKey",
+                  db_types=("sqlite", "postgresql")),
+        IndexSpec(ra, RACE_KEY, "racekey", expression=race_key_expr(), label="RaceKey",
+                  db_types=("sqlite", "postgresql")),
+    ]
+
+
+# 中央（JRA）と地方（NAR）の両方に同じ構成で作る
+RECOMMENDED_INDEXES: Tuple[IndexSpec, ...] = tuple(
+    _race_tables("NL_SE", "NL_RA")
+    + _race_tables("NL_SE_NAR", "NL_RA_NAR")
+    + [IndexSpec("NL_UM", ("KettoNum",), "kettonum")]
+)
+
+
+# ============================================================================
+# 既存インデックスの取得
+# ============================================================================
+
+def _fetch(conn: Any, sql: str, params: Tuple = ()) -> List[tuple]:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _sqlite_indexes(conn: Any, tables: Iterable[str]) -> Dict[str, List[Tuple[str, ...]]]:
+    result: Dict[str, List[Tuple[str, ...]]] = {}
+    for table in tables:
+        indexes = []
+        for row in _fetch(conn, "SELECT name FROM pragma_index_list(?)", (table,)):
+            columns = _fetch(conn, "SELECT name FROM pragma_index_info(?) ORDER BY seqno",
+                             (row[0],))
+            indexes.append(tuple(c[0] for c in columns))
+        result[table.lower()] = indexes
+    return result
+
+
+def _duckdb_indexes(conn: Any) -> Dict[str, List[Tuple[str, ...]]]:
+    result: Dict[str, List[Tuple[str, ...]]] = {}
+    rows = conn.execute("SELECT table_name, expressions FROM duckdb_indexes()").fetchall()
+    for table, expressions in rows:
+        # expressions は "['\"Year\"', MonthDay]" 形式の文字列（予約語は引用符付き）
+        columns = tuple(c.strip().strip("'").strip('"')
+                        for c in str(expressions).strip("[]").split(","))
+        result.setdefault(table.lower(), []).append(columns)
+    return result
+
+
+_PG_INDEXES_SQL = """
+    SELECT t.relname, array_agg(a.attname ORDER BY k.ord)
+    FROM pg_index x
+    JOIN pg_class t ON t.oid = x.indrelid
+    JOIN pg_namespace n ON n.oid = t.relnamespace
+    CROSS JOIN LATERAL unnest(x.indkey) WITH ORDINALITY AS k(attnum, ord)
+    JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+    WHERE n.nspname = current_schema()
+    GROUP BY x.indexrelid, t.relname
+"""
+
+
+def _postgresql_indexes(conn: Any) -> Dict[str, List[Tuple[str, ...]]]:
+    result: Dict[str, List[Tuple[str, ...]]] = {}
+    for table, columns in _fetch(conn, _PG_INDEXES_SQL):
+        result.setdefault(table.lower(), []).append(tuple(columns))
+    return result
+
+
+def existing_index_names(conn: Any, db_type: str) -> set:
+    """既存インデックス名（小文字）の集合"""
+    if db_type == "sqlite":
+        rows = _fetch(conn, "SELECT name FROM sqlite_master WHERE type = 'index'")
+    elif db_type == "duckdb":
+        rows = conn.execute("SELECT index_name FROM duckdb_indexes()").fetchall()
+    elif db_type == "postgresql":
+        rows = _fetch(conn, "SELECT indexname FROM pg_indexes "
+                            "WHERE schemaname = current_schema()")
+    else:
+        raise ValueError(f"Unsupported database type: {db_type}")
+    return {str(row[0]).lower() for row in rows}
+
+
+def existing_indexes(conn: Any, db_type: str,
+                     tables: Iterable[str]) -> Dict[str, List[Tuple[str, ...]]]:
+    """テーブル名（小文字）→既存インデックスのカラム列の一覧"""
+    if db_type == "sqlite":
+        return _sqlite_indexes(conn, tables)
+    if db_type == "duckdb":
+        return _duckdb_indexes(conn)
+    if db_type == "postgresql":
+        return _postgresql_indexes(conn)
+    raise ValueError(f"Unsupported database type: {db_type}")
+
+
+def missing_indexes(conn: Any, db_type: str, tables: Iterable[str],
+                    specs: Sequence[IndexSpec] = RECOMMENDED_INDEXES) -> List[IndexSpec]:
+    """存在するテーブルのうち、推奨インデックスが欠けているもの"""
+    present = {t.lower() for t in tables}
+    targets = [spec for spec in specs
+               if spec.table.lower() in present and spec.applies_to(db_type)]
+    indexes = existing_indexes(conn, db_type, sorted({s.table for s in targets}))
+    names = (existing_index_names(conn, db_type)
+             if any(spec.expression is not None for spec in targets) else set())
+    return [spec for spec in targets
+            if spec.name.lower() not in names
+            and not any(spec.covered_by(cols) for cols in indexes.get(spec.table.lower(), []))]
+
+
+def audit_indexes(db) -> List[IndexSpec]:
+    """DatabaseConnectionの接続先で欠けている推奨インデックス"""
+    tables = db.get_tables()
+    return missing_indexes(db.connect(), db.db_type, tables)
+
+
+# ============================================================================
+# 作成
+# ============================================================================
+
+@dataclass
+class IndexBuildResult:
+    spec: IndexSpec
+    status: str  # "created" / "exists" / "would_create" / "failed"
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+def build_indexes(conn: Any, db_type: str, tables: Iterable[str],
+                  specs: Sequence[IndexSpec] = RECOMMENDED_INDEXES,
+                  dry_run: bool = False, analyze: bool = True,
+                  progress=None) -> List[IndexBuildResult]:
+    """欠けている推奨インデックスを作成する（書き込み可能な接続が必要）
+
+    既に同じカラム構成（先頭一致）のインデックスがあれば作らないため、
+    何度実行しても結果は変わらない。
+
+    Args:
+        conn: 書き込み可能なDBAPI接続
+        db_type: sqlite / duckdb / postgresql
+        tables: DBに存在するテーブル名
+        dry_run: Trueなら作成せず、作成予定だけを返す
+        analyze: 作成後にプランナ統計を更新する（ANALYZE）
+        progress: 1件ごとに IndexBuildResult を受け取るコールバック
+    """
+    present = {t.lower() for t in tables}
+    targets = [spec for spec in specs
+               if spec.table.lower() in present and spec.applies_to(db_type)]
+    missing = set(missing_indexes(conn, db_type, present, targets))
+    results: List[IndexBuildResult] = []
+    touched = set()
+
+    for spec in targets:
+        if spec not in missing:
+            result = IndexBuildResult(spec, "exists")
+        elif dry_run:
+            result = IndexBuildResult(spec, "would_create")
+        else:
+            start = time.perf_counter()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(spec.create_sql())
+                conn.commit()
+                result = IndexBuildResult(spec, "created", seconds=time.perf_counter() - start)
+                touched.add(spec.table)
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                logger.warning(f"Failed to create {spec.name}: {e}")
+                result = IndexBuildResult(spec, "failed", error=str(e))
+            finally:
+                cursor.close()
+        results.append(result)
+        if progress is not None:
+            progress(result)
+
+    if analyze and touched and not dry_run:
+        cursor = conn.cursor()
+        try:
+            if db_type == "sqlite":
+                cursor.execute("ANALYZE")
+            elif db_type == "postgresql":
+                for table in sorted(touched):
+                    cursor.execute(f"ANALYZE {validate_identifier(table, 'table name')}")
+            conn.commit()
+        finally:
+            cursor.close()
+    return results
+
+
+def startup_index_audit() -> List[IndexSpec]:
+    """起動時に推奨インデックスの不足をログに出す（DB_INDEX_AUDIT=0 で無効）
+
+    DBに接続できない場合は何もしない（サーバーの起動を妨げない）。
+    """
+    if os.getenv("DB_INDEX_AUDIT", "1").lower() in ("0", "false", "no", "off"):
+        return []
+    from .connection import DatabaseConnection
+    try:
+        with DatabaseConnection() as db:
+            missing = audit_indexes(db)
+    except Exception as e:
+        logger.debug(f"Index audit skipped: {e}")
+        return []
+    if missing:
+        logger.warning(
+            "推奨インデックスが不足しています: "
+            + ", ".join(spec.describe() for spec in missing)
+            + "。python -m jvlink_mcp_server.index_builder で作成できます"
+        )
+    return missing
+
+
+__all__ = [
+    "IndexSpec",
+    "IndexBuildResult",
+    "RECOMMENDED_INDEXES",
+    "RACE_KEY",
+    "existing_indexes",
+    "existing_index_names",
+    "missing_indexes",
+    "audit_indexes",
+    "build_indexes",
+    "startup_index_audit",
+]
@@ -0,0 +1,378 @@
+"""In-memory n-gram index for partial-match names
+
+馬名（Bamei）・騎手名（KisyuRyakusyo）・父馬名（Ketto3InfoBamei1）の部分一致検索
+（``LIKE '%名前%'``）はB-treeインデックスが使えず、NL_SE全体を走査する。
+そこで各カラムの異なり値だけを対象にしたn-gram索引をメモリ上に作り、
+部分一致を完全一致キー（KettoNum等）の集合に解決してから本クエリを
+``IN (...)`` で実行する。
+
+- 3文字以上の検索語はトライグラム、2文字はバイグラムで候補を絞り、
+  最後に部分文字列として含むかを確認する（1文字は全件確認）
+- 索引は初回利用時に作成し、接続先・データ世代ごとに共有する
+  （JVLinkToSQLite等でDBが更新されると作り直す）
+- 騎手は騎手マスタ（NL_KS / NL_KS_NAR）の騎手名・略称から騎手コード
+  （KisyuCode）に解決し、同名・部分一致の別騎手を区別する
+
+環境変数:
+- DB_NAME_INDEX: 0/false で無効化（LIKE検索に戻す）
+- DB_NAME_INDEX_MAX_KEYS: 解決したキーがこの数を超えたらLIKE検索に戻す（既定500）
+"""
+
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .pool import _describe_key
+from .query_control import QueryInterruptedError
+from .utils import validate_identifier
+
+logger = logging.getLogger(__name__)
+
+
+def _fold(text: str) -> str:
+    """照合用の正規化（前後の空白を除き、英字の大文字小文字を無視）"""
+    return text.strip().casefold()
+
+
+def _grams(text: str, n: int) -> set:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class NGramIndex:
+    """名前→キーの部分一致索引
+
+    Args:
+        names: 名前（DB上の値そのまま）
+        keys: 各名前に対応するキー（同じ名前に複数のキーがあってよい）
+    """
+
+    def __init__(self, names: Sequence[str], keys: Sequence[Any]):
+        by_name: Dict[str, List[Any]] = defaultdict(list)
+        for name, key in zip(names, keys):
+            if name is None or key is None or (isinstance(name, float) and name != name):
+                continue
+            name = str(name)
+            if key not in by_name[name]:
+                by_name[name].append(key)
+
+        self.names: List[str] = list(by_name)
+        self.keys: List[Tuple[Any, ...]] = [tuple(by_name[name]) for name in self.names]
+        self._folded: List[str] = [_fold(name) for name in self.names]
+
+        bigrams: Dict[str, array] = defaultdict(lambda: array("I"))
+        trigrams: Dict[str, array] = defaultdict(lambda: array("I"))
+        for i, folded in enumerate(self._folded):
+            for gram in _grams(folded, 2):
+                bigrams[gram].append(i)
+            for gram in _grams(folded, 3):
+                trigrams[gram].append(i)
+        self._bigrams = dict(bigrams)
+        self._trigrams = dict(trigrams)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def search(self, query: str) -> List[int]:
+        """queryを部分文字列として含む名前の番号"""
+        folded = _fold(query)
+        if not folded:
+            return []
+        if len(folded) >= 3:
+            postings = self._trigrams
+            grams = _grams(folded, 3)
+        elif len(folded) == 2:
+            postings = self._bigrams
+            grams = {folded}
+        else:
+            return [i for i, name in enumerate(self._folded) if folded in name]
+
+        lists = []
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting is None:
+                return []
+            lists.append(posting)
+        # 最も短い候補リストだけを部分文字列で確認する
+        candidates = min(lists, key=len)
+        return [i for i in candidates if folded in self._folded[i]]
+
+    def lookup(self, query: str) -> "NameMatch":
+        """queryに部分一致する名前と、そのキー"""
+        ids = self.search(query)
+        names = [self.names[i] for i in ids]
+        keys: List[Any] = []
+        seen = set()
+        for i in ids:
+            for key in self.keys[i]:
+                if key not in seen:
+                    seen.add(key)
+                    keys.append(key)
+        return NameMatch(names=names, keys=keys)
+
+    def stats(self) -> Dict[str, int]:
+        return {"names": len(self.names), "bigrams": len(self._bigrams),
+                "trigrams": len(self._trigrams)}
+
+
+@dataclass
+class NameMatch:
+    """部分一致の解決結果"""
+
+    names: List[str]
+    keys: List[Any]
+
+
+# ============================================================================
+# 接続先・データ世代ごとの索引
+# ============================================================================
+
+@dataclass
+class _Entry:
+    version: Hashable
+    value: Any
+    build_seconds: float
+
+
+_indexes: Dict[Hashable, _Entry] = {}
+_indexes_lock = threading.Lock()
+_build_locks: Dict[Hashable, threading.Lock] = defaultdict(threading.Lock)
+
+
+def name_index_enabled() -> bool:
+    return os.getenv("DB_NAME_INDEX", "1").lower() not in ("0", "false", "no", "off")
+
+
+def max_keys() -> int:
+    try:
+        return int(os.getenv("DB_NAME_INDEX_MAX_KEYS", "500"))
+    except ValueError:
+        return 500
+
+
+def _fetch_frame(db, query: str) -> pd.DataFrame:
+    # 異なり値の一覧は大きいので結果キャッシュには入れない
+    df = db.execute_query(query, use_cache=False)
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("execute_query did not return a DataFrame")
+    return df
+
+
+def _build(db, table: str, name_column: str, key_column: str) -> NGramIndex:
+    validate_identifier(table, "table name")
+    validate_identifier(name_column, "column name")
+    validate_identifier(key_column, "column name")
+    if key_column == name_column:
+        query = f"SELECT DISTINCT {name_column} FROM {table} WHERE {name_column} IS NOT NULL"
+    else:
+        query = (f"SELECT DISTINCT {name_column}, {key_column} FROM {table} "
+                 f"WHERE {name_column} IS NOT NULL")
+    df = _fetch_frame(db, query)
+    names = df.iloc[:, 0].tolist()
+    keys = names if key_column == name_column else df.iloc[:, 1].tolist()
+    return NGramIndex(names, keys)
+
+
+def _get_or_build(db, label: str, builder: Callable[[], Any]) -> Optional[Any]:
+    """接続先・データ世代ごとに1つだけ作って共有する
+
+    データ世代が取れないDB（:memory: 等）では作らずNoneを返す。
+    """
+    version = db.data_version()
+    if version is None:
+        return None
+    key = (db._pool_key(), label)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry.version == version:
+            return entry.value
+        build_lock = _build_locks[key]
+
+    # 同じ索引を複数スレッドで同時に作らない
+    with build_lock:
+        with _indexes_lock:
+            entry = _indexes.get(key)
+            if entry is not None and entry.version == version:
+                return entry.value
+        start = time.perf_counter()
+        value = builder()
+        elapsed = time.perf_counter() - start
+        logger.info(f"Built name index {label}: {len(value)} names in {elapsed:.2f}s")
+        with _indexes_lock:
+            _indexes[key] = _Entry(version, value, elapsed)
+        return value
+
+
+def get_name_index(db, table: str, name_column: str, key_column: str) -> Optional[NGramIndex]:
+    """接続先の (table, name_column → key_column) 索引（データ世代ごとに作り直す）"""
+    label = f"{table}.{name_column}"
+    if key_column != name_column:
+        label += f"->{key_column}"
+    return _get_or_build(db, label, lambda: _build(db, table, name_column, key_column))
+
+
+def resolve_name(db, table: str, name_column: str, key_column: str,
+                 query: str) -> Optional[NameMatch]:
+    """部分一致の名前をキーの集合に解決する
+
+    索引が使えない場合（無効化・索引作成失敗・キーが多すぎる）はNoneを返し、
+    呼び出し側はLIKE検索を使う。タイムアウト・キャンセルはそのまま送出する。
+    """
+    if not name_index_enabled():
+        return None
+    try:
+        index = get_name_index(db, table, name_column, key_column)
+    except QueryInterruptedError:
+        raise
+    except Exception as e:
+        logger.debug(f"Name index unavailable for {table}.{name_column}: {e}")
+        return None
+    if index is None:
+        return None
+    match = index.lookup(query)
+    if len(match.keys) > max_keys():
+        return None
+    return match
+
+
+# ============================================================================
+# 騎手マスタ（NL_KS / NL_KS_NAR）
+# ============================================================================
+
+def _compact(text: str) -> str:
+    """姓名間の空白（全角含む）を除く（"武　豊" と "武豊" を同じに扱う）"""
+    return "".join(str(text).split())
+
+
+def _clean(value: Any) -> Optional[str]:
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+@dataclass(frozen=True)
+class Jockey:
+    """騎手マスタの1件"""
+
+    code: str
+    name: Optional[str]
+    short_name: Optional[str]
+
+    @property
+    def label(self) -> str:
+        return self.short_name or self.name or self.code
+
+
+class JockeyMaster:
+    """騎手マスタの騎手名・略称からKisyuCodeを引く索引
+
+    Args:
+        rows: (KisyuCode, KisyuName, KisyuRyakusyo) の並び
+    """
+
+    def __init__(self, rows: Sequence[Tuple[Any, Any, Any]]):
+        self.jockeys: Dict[str, Jockey] = {}
+        names: List[str] = []
+        codes: List[str] = []
+        for code, name, short_name in rows:
+            if code is None:
+                continue
+            code = str(code).strip()
+            jockey = Jockey(code, _clean(name), _clean(short_name))
+            self.jockeys.setdefault(code, jockey)
+            for value in (jockey.name, jockey.short_name):
+                if value:
+                    names.append(_compact(value))
+                    codes.append(code)
+        self.index = NGramIndex(names, codes)
+
+    def __len__(self) -> int:
+        return len(self.jockeys)
+
+    def lookup(self, query: str) -> List[Jockey]:
+        """騎手名・略称に部分一致する騎手（マスタ上の順）"""
+        return [self.jockeys[code] for code in self.index.lookup(_compact(query)).keys]
+
+    def stats(self) -> Dict[str, int]:
+        return {"jockeys": len(self.jockeys), **self.index.stats()}
+
+
+def _build_jockey_master(db, master_table: str) -> JockeyMaster:
+    validate_identifier(master_table, "table name")
+    columns = [column if db.has_column(master_table, column) else "NULL"
+               for column in ("KisyuName", "KisyuRyakusyo")]
+    df = _fetch_frame(db, f"SELECT KisyuCode, {columns[0]}, {columns[1]} FROM {master_table}")
+    return JockeyMaster(list(df.itertuples(index=False, name=None)))
+
+
+def get_jockey_master(db, master_table: str) -> Optional[JockeyMaster]:
+    """騎手マスタの索引（接続先・データ世代ごとに共有）"""
+    return _get_or_build(db, f"{master_table}.KisyuCode",
+                         lambda: _build_jockey_master(db, master_table))
+
+
+def resolve_jockeys(db, master_table: str, race_table: str,
+                    query: str) -> Optional[List[Jockey]]:
+    """騎手名の部分一致を騎手マスタでKisyuCodeの一覧に解決する
+
+    マスタやKisyuCodeカラムがない、索引が無効・作成失敗、該当が多すぎる
+    場合はNoneを返し、呼び出し側は出走表の騎手名略称で検索する。
+    タイムアウト・キャンセルはそのまま送出する。
+    """
+    if not name_index_enabled():
+        return None
+    try:
+        if not (db.has_column(master_table, "KisyuCode")
+                and db.has_column(race_table, "KisyuCode")):
+            return None
+        master = get_jockey_master(db, master_table)
+    except QueryInterruptedError:
+        raise
+    except Exception as e:
+        logger.debug(f"Jockey master unavailable ({master_table}): {e}")
+        return None
+    if master is None:
+        return None
+    jockeys = master.lookup(query)
+    if len(jockeys) > max_keys():
+        return None
+    return jockeys
+
+
+def clear_name_indexes() -> None:
+    """全索引を破棄する（テスト用）"""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+def name_index_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """接続先（pool_stats と同じ表記）→ 索引名 → 状態"""
+    with _indexes_lock:
+        items = list(_indexes.items())
+    stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for (pool_key, label), entry in items:
+        stats.setdefault(_describe_key(pool_key), {})[label] = {
+            **entry.value.stats(), "build_seconds": round(entry.build_seconds, 3),
+        }
+    return stats
+
+
+__all__ = [
+    "NGramIndex",
+    "NameMatch",
+    "Jockey",
+    "JockeyMaster",
+    "get_name_index",
+    "resolve_name",
+    "get_jockey_master",
+    "resolve_jockeys",
+    "clear_name_indexes",
+    "name_index_stats",
+]
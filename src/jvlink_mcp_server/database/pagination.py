@@ -0,0 +1,134 @@
+"""Cursor-based pagination for free-form SELECT queries
+
+keiba_data_search のページングモードで使う継続トークンを扱う。
+トークンはクエリ本文・次ページのオフセット・データ世代を含む自己完結型
+（サーバー側に状態を持たない）で、次ページ取得時もクエリは通常どおり
+安全性チェックを通ってから実行される。
+
+- トークンはプロセスごとの秘密鍵でHMAC署名する。keiba_data_search_next は
+  最初のページで安全性チェックとコスト見積もりを通ったクエリしか実行しない
+  （サーバーを再起動すると、それまでのトークンは無効になる）
+- データ世代（DatabaseConnection.data_version）が最初のページと変わっていれば
+  トークンを拒否する。行が追加・削除された後のOFFSETは別の行を指すため
+- 続きのページは LIMIT/OFFSET で取得する。ORDER BY の並び順をキーにした
+  keyset方式は採らない。任意のSELECTでは ORDER BY の列が一意とは限らず
+  （同順位の行を読み飛ばす・重複する）、並べ替えはサブクエリの内側にあるため、
+  外側に付けた境界条件ではDB側の走査・ソートを減らせないことが多い。
+  ORDER BY のないクエリでは外側のLIMITで走査を打ち切れる
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+from dataclasses import dataclass
+from typing import Hashable, Optional
+
+from .sql_lexer import lex
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# 継続トークンの署名鍵（プロセスごとに生成する）
+_SECRET = secrets.token_bytes(32)
+
+
+def _sign(payload: dict) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hmac.new(_SECRET, raw.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def version_tag(version: Optional[Hashable]) -> Optional[str]:
+    """data_version() の値をトークンに入れる短い文字列にする（取得できなければNone）"""
+    if version is None:
+        return None
+    return hashlib.sha256(repr(version).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class PageToken:
+    """次ページの位置を表す継続トークン
+
+    version は最初のページを取得したときのデータ世代（version_tag）。
+    """
+
+    sql: str
+    offset: int
+    page_size: int
+    version: Optional[str] = None
+
+    def _payload(self) -> dict:
+        return {
+            "sql": self.sql,
+            "offset": self.offset,
+            "page_size": self.page_size,
+            "version": self.version,
+        }
+
+    def encode(self) -> str:
+        payload = self._payload()
+        payload["sig"] = _sign(payload)
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @classmethod
+    def decode(cls, token: str) -> "PageToken":
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+            signature = str(payload.pop("sig"))
+            sql = payload["sql"]
+            offset = int(payload["offset"])
+            page_size = int(payload["page_size"])
+            version = payload.get("version")
+        except Exception as e:
+            raise ValueError(f"不正な継続トークンです: {e}") from e
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError("継続トークンの署名が一致しません"
+                             "（サーバーの再起動後は最初のページから取得し直してください）")
+        if offset < 0:
+            raise ValueError("継続トークンのオフセットが不正です")
+        return cls(sql=sql, offset=offset, page_size=clamp_page_size(page_size), version=version)
+
+    def check_version(self, version: Optional[str]) -> None:
+        """データ世代が最初のページから変わっていればValueError"""
+        if self.version is not None and self.version != version:
+            raise ValueError("データが更新されたため継続トークンは無効です。"
+                             "最初のページから取得し直してください")
+
+
+def clamp_page_size(page_size: Optional[int]) -> int:
+    """ページサイズを 1〜MAX_PAGE_SIZE に丸める"""
+    if page_size is None:
+        return DEFAULT_PAGE_SIZE
+    return min(max(1, int(page_size)), MAX_PAGE_SIZE)
+
+
+def paginate_sql(sql: str, offset: int, limit: int) -> str:
+    """元クエリをサブクエリで包み、LIMIT/OFFSETを付与する
+
+    LIMITが外側に付くため、ORDER BYのないクエリではDB側が
+    必要な行を読んだ時点で走査を打ち切れる。
+    """
+    inner = lex(sql).body
+    return f"SELECT * FROM ({inner}) AS _page LIMIT {int(limit)} OFFSET {int(offset)}"
+
+
+def next_token(sql: str, offset: int, page_size: int, has_more: bool,
+               version: Optional[str] = None) -> Optional[str]:
+    """次ページがあれば継続トークンを返す"""
+    if not has_more:
+        return None
+    return PageToken(sql=sql, offset=offset + page_size, page_size=page_size,
+                     version=version).encode()
+
+
+__all__ = [
+    "PageToken",
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "clamp_page_size",
+    "paginate_sql",
+    "next_token",
+    "version_tag",
+]
@@ -0,0 +1,263 @@
+"""Process-wide connection pool for JVLink databases
+
+DatabaseConnectionは接続設定ごとに1つのプールを共有し、ツール呼び出しごとに
+温まった接続を借りて返却する。PostgreSQLのTCP接続・認証や
+``SET default_transaction_read_only`` を毎回支払わずに済む。
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    """整数の環境変数を読む（不正値はデフォルト）"""
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}: {os.getenv(name)!r}, using {default}")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    """数値の環境変数を読む（不正値はデフォルト）"""
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}: {os.getenv(name)!r}, using {default}")
+        return default
+
+
+class PoolTimeoutError(RuntimeError):
+    """プールから接続を借りられないまま待ち時間を超えた"""
+
+
+class ConnectionPool:
+    """DBAPI接続のスレッドセーフなプール
+
+    Args:
+        factory: 新しい接続を作る関数（読み取り専用設定済みの接続を返すこと）
+        min_size: アイドル時も保持する接続数
+        max_size: 同時に貸し出せる最大接続数
+        idle_timeout: min_sizeを超えるアイドル接続を破棄するまでの秒数
+        acquire_timeout: 空き接続を待つ最大秒数
+        health_check: 貸し出し前に接続の生存確認を行う関数（例外で失敗扱い）
+        reset: 返却時に接続状態をリセットする関数
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        min_size: int = 0,
+        max_size: int = 5,
+        idle_timeout: float = 300.0,
+        acquire_timeout: float = 30.0,
+        health_check: Optional[Callable[[Any], None]] = None,
+        reset: Optional[Callable[[Any], None]] = None,
+    ):
+        if max_size < 1:
+            raise ValueError(f"max_size must be >= 1, got {max_size}")
+        self._factory = factory
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self._health_check = health_check
+        self._reset = reset
+
+        self._idle: deque = deque()  # (connection, returned_at)
+        self._in_use: set = set()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        for _ in range(self.min_size):
+            self._idle.append((self._factory(), time.monotonic()))
+
+    @property
+    def size(self) -> int:
+        """現在プールが保持している接続の総数"""
+        with self._cond:
+            return len(self._idle) + len(self._in_use)
+
+    def stats(self) -> Dict[str, int]:
+        """プールの状態（idle / in_use / max_size）"""
+        with self._cond:
+            return {
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            }
+
+    def acquire(self, blocking: bool = True) -> Any:
+        """接続を借りる（空きがなければacquire_timeout秒まで待つ）
+
+        blocking=False なら待たず、空きがなければNoneを返す。
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                self._prune_idle_locked()
+                if self._idle:
+                    conn, _ = self._idle.pop()
+                    if self._is_healthy(conn):
+                        self._in_use.add(id(conn))
+                        return conn
+                    self._discard(conn)
+                    continue
+                if len(self._in_use) < self.max_size:
+                    # 枠だけ確保してからロック外で接続を作る
+                    placeholder = object()
+                    self._in_use.add(id(placeholder))
+                    break
+                if not blocking:
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"No database connection available within {self.acquire_timeout}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+        try:
+            conn = self._factory()
+        except BaseException:
+            with self._cond:
+                self._in_use.discard(id(placeholder))
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._in_use.discard(id(placeholder))
+            self._in_use.add(id(conn))
+        return conn
+
+    def release(self, conn: Any) -> None:
+        """接続を返却する（リセットに失敗した接続は破棄）"""
+        with self._cond:
+            if id(conn) not in self._in_use:
+                raise ValueError("Connection was not acquired from this pool")
+            self._in_use.discard(id(conn))
+            closed = self._closed
+
+        healthy = not closed
+        if healthy and self._reset is not None:
+            try:
+                self._reset(conn)
+            except Exception as e:
+                logger.debug(f"Discarding connection after failed reset: {e}")
+                healthy = False
+
+        with self._cond:
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._discard(conn)
+            self._cond.notify()
+
+    def owns(self, conn: Any) -> bool:
+        """connがこのプールから貸し出し中か"""
+        with self._cond:
+            return id(conn) in self._in_use
+
+    def close(self) -> None:
+        """アイドル接続をすべて閉じ、以降の貸し出しを止める"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._cond.notify_all()
+
+    def _is_healthy(self, conn: Any) -> bool:
+        if self._health_check is None:
+            return True
+        try:
+            self._health_check(conn)
+            return True
+        except Exception as e:
+            logger.debug(f"Pooled connection failed health check: {e}")
+            return False
+
+    def _prune_idle_locked(self) -> None:
+        """idle_timeoutを過ぎたアイドル接続をmin_sizeまで減らす"""
+        if self.idle_timeout <= 0:
+            return
+        now = time.monotonic()
+        # dequeの左端が最も古い返却
+        while (self._idle and len(self._idle) + len(self._in_use) > self.min_size
+               and now - self._idle[0][1] > self.idle_timeout):
+            conn, _ = self._idle.popleft()
+            self._discard(conn)
+
+    @staticmethod
+    def _discard(conn: Any) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# 接続設定 → プール
+_pools: Dict[Hashable, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key: Hashable, factory: Callable[[], Any], **kwargs) -> ConnectionPool:
+    """接続設定キーに対応するプロセス共有プールを取得（なければ作成）
+
+    サイズ等の既定値は環境変数 DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE /
+    DB_POOL_IDLE_TIMEOUT / DB_POOL_ACQUIRE_TIMEOUT で上書きできる。
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = {
+                "min_size": _env_int("DB_POOL_MIN_SIZE", 0),
+                "max_size": _env_int("DB_POOL_MAX_SIZE", 5),
+                "idle_timeout": _env_float("DB_POOL_IDLE_TIMEOUT", 300.0),
+                "acquire_timeout": _env_float("DB_POOL_ACQUIRE_TIMEOUT", 30.0),
+            }
+            options.update(kwargs)
+            pool = ConnectionPool(factory, **options)
+            _pools[key] = pool
+        return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """全プールの状態（キーはDB種別と接続先。認証情報は含めない）"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {_describe_key(key): pool.stats() for key, pool in pools}
+
+
+def _describe_key(key: Hashable) -> str:
+    if isinstance(key, tuple) and len(key) == 2:
+        db_type, target = key
+        if isinstance(target, tuple):
+            # PostgreSQL: (host, port, database, user, password_digest)
+            host, port, database, user = target[:4]
+            return f"{db_type}:{user}@{host}:{port}/{database}"
+        return f"{db_type}:{target}"
+    return str(key)
+
+
+def close_all_pools() -> None:
+    """全プールを閉じる（シャットダウン・テスト用）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def pool_enabled() -> bool:
+    """DB_POOL_ENABLED=0/false でプールを無効化できる"""
+    return os.getenv("DB_POOL_ENABLED", "1").lower() not in ("0", "false", "no", "off")
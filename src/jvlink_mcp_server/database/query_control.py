@@ -0,0 +1,183 @@
+"""Per-query timeouts and cancellation
+
+ツール呼び出しごとに ``QueryControl`` をcontextvarに設定し、
+DatabaseConnectionは実行中の文をバックエンドのネイティブな仕組みで中断する。
+
+- SQLite: progress handler で期限・キャンセルを監視
+- DuckDB: 期限到達・キャンセル時に ``connection.interrupt()``
+- PostgreSQL: ``SET LOCAL statement_timeout`` と ``pg_cancel_backend()``
+
+タイムアウト秒数は環境変数 DB_QUERY_TIMEOUT（既定120秒、0で無効）で設定し、
+ツール単位では DB_QUERY_TIMEOUT_<TOOL名の大文字> で上書きできる
+（例: DB_QUERY_TIMEOUT_KEIBA_DATA_SEARCH=30）。
+
+ツール呼び出しの外（集約キューブの定期更新・インデックス監査などのバックグラウンド処理）では
+タイムアウトを適用しない。制限したい処理は ``query_control(QueryControl(秒数))`` で明示する。
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUERY_TIMEOUT = 120.0
+
+
+class QueryInterruptedError(Exception):
+    """クエリがタイムアウトまたはキャンセルで中断された"""
+
+    status = "interrupted"
+
+    def __init__(self, message: str, timeout: Optional[float] = None):
+        super().__init__(message)
+        self.timeout = timeout
+
+    def to_result(self) -> Dict[str, Any]:
+        """ツール応答用の構造化された結果"""
+        return {
+            "success": False,
+            "status": self.status,
+            "error": str(self),
+            "timeout_seconds": self.timeout,
+            "hint": "条件を絞り込む（Year・JyoCDで期間や競馬場を限定する、LIMITを付ける等）か、"
+                    "JOINに6カラムのレースキーを指定してください。",
+        }
+
+
+class QueryTimeoutError(QueryInterruptedError):
+    """クエリが制限時間を超えた"""
+
+    status = "timed_out"
+
+
+class QueryCancelledError(QueryInterruptedError):
+    """クライアントがリクエストをキャンセルした"""
+
+    status = "cancelled"
+
+
+def _parse_timeout(value: Optional[str]) -> Optional[float]:
+    if value is None or value.strip() == "":
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        logger.warning(f"Invalid query timeout value: {value!r}")
+        return None
+    return seconds if seconds > 0 else 0.0
+
+
+def tool_timeout(tool_name: Optional[str] = None) -> Optional[float]:
+    """ツールに適用するタイムアウト秒数（Noneは無制限）"""
+    seconds = None
+    if tool_name:
+        seconds = _parse_timeout(os.getenv(f"DB_QUERY_TIMEOUT_{tool_name.upper()}"))
+    if seconds is None:
+        seconds = _parse_timeout(os.getenv("DB_QUERY_TIMEOUT"))
+    if seconds is None:
+        seconds = DEFAULT_QUERY_TIMEOUT
+    return seconds or None
+
+
+class QueryControl:
+    """1回のツール呼び出しにおけるタイムアウトとキャンセル状態
+
+    実行中の文は ``register_interrupt`` で中断関数を登録し、
+    ``cancel()`` が呼ばれるとそれらが即座に呼び出される。
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._interrupts: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """期限までの残り秒数（期限なしはNone）"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def should_stop(self) -> bool:
+        return self.cancelled or self.expired()
+
+    def cancel(self) -> None:
+        """キャンセルを通知し、実行中の文を中断する"""
+        self._cancelled.set()
+        with self._lock:
+            interrupts = list(self._interrupts)
+        for interrupt in interrupts:
+            try:
+                interrupt()
+            except Exception as e:
+                logger.debug(f"Interrupt callback failed: {e}")
+
+    @contextmanager
+    def register_interrupt(self, interrupt: Callable[[], None]) -> Iterator[None]:
+        """文の実行中だけ中断関数を登録する"""
+        with self._lock:
+            self._interrupts.append(interrupt)
+        try:
+            if self.cancelled:
+                interrupt()
+            yield
+        finally:
+            with self._lock:
+                self._interrupts.remove(interrupt)
+
+    def interrupted_error(self) -> Optional[QueryInterruptedError]:
+        """中断理由に応じた例外（中断されていなければNone）"""
+        if self.cancelled:
+            return QueryCancelledError("クエリはキャンセルされました", self.timeout)
+        if self.expired():
+            return QueryTimeoutError(
+                f"クエリが制限時間（{self.timeout:g}秒）を超えたため中断しました", self.timeout
+            )
+        return None
+
+
+_current_control: contextvars.ContextVar[Optional[QueryControl]] = contextvars.ContextVar(
+    "jvlink_query_control", default=None
+)
+
+
+def current_control() -> QueryControl:
+    """現在のQueryControl（ツール外では期限のない新規インスタンス）"""
+    control = _current_control.get()
+    if control is None:
+        control = QueryControl()
+    return control
+
+
+@contextmanager
+def query_control(control: QueryControl) -> Iterator[QueryControl]:
+    """このコンテキスト内のクエリにcontrolを適用する"""
+    token = _current_control.set(control)
+    try:
+        yield control
+    finally:
+        _current_control.reset(token)
+
+
+__all__ = [
+    "QueryControl",
+    "QueryInterruptedError",
+    "QueryTimeoutError",
+    "QueryCancelledError",
+    "current_control",
+    "query_control",
+    "tool_timeout",
+]
@@ -3,10 +3,107 @@
 よくある間違いを自動的に検出・修正する。
 jrvltsql v2.0以降では数値カラムがINTEGER型になったため、
 ゼロパディングが必要なのはJyoCD（競馬場コード）のみ。
+
+修正ルールはカラム名→ルールの表（RULES）としてimport時に一度だけ組み立て、
+字句解析済みのトークン列を1回走査する間に全ルールを適用する。
+同じSQLの修正結果は上限付きのメモ（LRU）で使い回す。
 """
 
-import re
-from typing import List, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .sql_lexer import IDENT, NUMBER, OP, STRING, LexedQuery, Token, lex, remember, render
+
+# メモに保持するSQLの数
+MEMO_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class CorrectionRule:
+    """1カラム分の修正ルール
+
+    Args:
+        column: カラム名（表記は修正メッセージに使う。照合は大文字小文字を区別しない）
+        padding_length: >0 ならゼロパディング（'5' → '05'）、0 なら文字列→数値変換
+    """
+
+    column: str
+    padding_length: int = 0
+
+    @property
+    def applies_to_in_list(self) -> bool:
+        return self.padding_length > 0
+
+    def rewrite(self, value: str, in_list: bool = False) -> Optional[Tuple[Token, str]]:
+        """文字列リテラルの値を書き換える（不要ならNone）
+
+        Returns:
+            (置き換えるトークン, 修正メッセージ)
+        """
+        if not (value.isascii() and value.isdigit()):
+            return None
+        if self.padding_length == 0:
+            return Token(NUMBER, value), f"{self.column}: '{value}' → {value} (INTEGER型)"
+        if len(value) >= self.padding_length:
+            return None
+        padded_value = value.zfill(self.padding_length)
+        label = f"{self.column} IN句内" if in_list else self.column
+        return Token(STRING, f"'{padded_value}'"), f"{label}: '{value}' → '{padded_value}'"
+
+
+def build_rules(zero_padding_columns: Dict[str, int],
+                integer_columns: Sequence[str]) -> Dict[str, CorrectionRule]:
+    """カラム名（大文字）→ルールの表を作る"""
+    rules = {name.upper(): CorrectionRule(name) for name in integer_columns}
+    for name, padding_length in zero_padding_columns.items():
+        rules[name.upper()] = CorrectionRule(name, padding_length)
+    return rules
+
+
+def apply_rules(sql: str, rules: Dict[str, CorrectionRule]) -> Tuple[str, List[str]]:
+    """トークン列を1回走査し、``column = '値'`` と ``column IN ('値', ...)`` を修正する"""
+    lexed = lex(sql)
+    tokens = lexed.tokens
+    code = lexed.code
+    rewritten: Optional[List[Token]] = None
+    corrections: List[str] = []
+
+    def replace(index: int, rule: CorrectionRule, in_list: bool) -> None:
+        nonlocal rewritten
+        value = tokens[index].string_value()
+        result = rule.rewrite(value, in_list) if value is not None else None
+        if result is None:
+            return
+        if rewritten is None:
+            rewritten = list(tokens)
+        rewritten[index] = result[0]
+        if result[1] not in corrections:
+            corrections.append(result[1])
+
+    end = len(code)
+    for n in range(end - 2):
+        column = tokens[code[n]]
+        if column.kind != IDENT:
+            continue
+        rule = rules.get(column.upper)
+        if rule is None:
+            continue
+        following = tokens[code[n + 1]]
+        if following.kind == OP and following.text == "=":
+            replace(code[n + 2], rule, in_list=False)
+        elif (rule.applies_to_in_list and following.upper == "IN"
+              and tokens[code[n + 2]].text == "("):
+            for m in range(n + 3, end):
+                if tokens[code[m]].text == ")":
+                    break
+                replace(code[m], rule, in_list=True)
+
+    if rewritten is None:
+        return sql, corrections
+    # 置き換えたのはリテラル1トークンずつなので、コード位置はそのまま使える
+    corrected = remember(LexedQuery(sql=render(rewritten), tokens=tuple(rewritten), code=code))
+    return corrected.sql, corrections
 
 
 class QueryCorrector:
@@ -27,115 +124,45 @@ class QueryCorrector:
     def correct_query(self, sql: str) -> Tuple[str, List[str]]:
         """SQLクエリを修正する
 
+        字句解析済みのトークン列（sql_lexer.lex）上で書き換えるため、
+        文字列リテラルやコメントの中身は修正対象にならない。
+
         Args:
             sql: 修正対象のSQLクエリ
 
         Returns:
             (修正後SQL, 修正内容リスト)のタプル
         """
-        self.corrections = []
-        corrected_sql = sql
+        corrected_sql, corrections = correct_query(sql)
+        self.corrections = corrections
+        return corrected_sql, corrections
 
-        # JyoCDのゼロパディング
-        for column_name, padding_length in self.ZERO_PADDING_COLUMNS.items():
-            corrected_sql = self._apply_zero_padding(
-                corrected_sql,
-                column_name,
-                padding_length
-            )
 
-        # INTEGER型カラムの文字列比較を数値比較に修正
-        for column_name in self.INTEGER_COLUMNS:
-            corrected_sql = self._convert_string_to_int(corrected_sql, column_name)
+# import時に一度だけ組み立てるルール表
+RULES: Dict[str, CorrectionRule] = build_rules(
+    QueryCorrector.ZERO_PADDING_COLUMNS, QueryCorrector.INTEGER_COLUMNS
+)
 
-        return corrected_sql, self.corrections
 
-    def _convert_string_to_int(self, sql: str, column_name: str) -> str:
-        """文字列比較を数値比較に変換
-
-        例: Ninki = '1' → Ninki = 1
-        """
-        # パターン: column = 'value' 形式
-        pattern = rf"({column_name}\s*=\s*)'(\d+)'"
-
-        def replacer(match):
-            prefix = match.group(1)
-            value = match.group(2)
-            correction_msg = f"{column_name}: '{value}' → {value} (INTEGER型)"
-            if correction_msg not in self.corrections:
-                self.corrections.append(correction_msg)
-            return f"{prefix}{value}"
-
-        return re.sub(pattern, replacer, sql, flags=re.IGNORECASE)
-
-    def _apply_zero_padding(
-        self,
-        sql: str,
-        column_name: str,
-        padding_length: int
-    ) -> str:
-        """指定カラムの値にゼロパディングを適用"""
-        # パターン: column = 'value' 形式
-        pattern_equal = rf"({column_name}\s*=\s*')(\d+)(')"
-        sql = self._replace_with_padding(
-            sql,
-            pattern_equal,
-            column_name,
-            padding_length
-        )
-
-        # パターン: column IN ('value1', 'value2', ...) 形式
-        pattern_in = rf"{column_name}\s+IN\s*\((.*?)\)"
-
-        def replace_in_clause(match):
-            in_values = match.group(1)
-            value_pattern = r"'(\d+)'"
-
-            def replace_value(value_match):
-                original_value = value_match.group(1)
-                if len(original_value) < padding_length and original_value.isdigit():
-                    padded_value = original_value.zfill(padding_length)
-                    if original_value != padded_value:
-                        correction_msg = (
-                            f"{column_name} IN句内: '{original_value}' → '{padded_value}'"
-                        )
-                        if correction_msg not in self.corrections:
-                            self.corrections.append(correction_msg)
-                    return f"'{padded_value}'"
-                return value_match.group(0)
-
-            corrected_values = re.sub(value_pattern, replace_value, in_values)
-            return f"{column_name} IN ({corrected_values})"
-
-        sql = re.sub(pattern_in, replace_in_clause, sql, flags=re.IGNORECASE)
-        return sql
-
-    def _replace_with_padding(
-        self,
-        sql: str,
-        pattern: str,
-        column_name: str,
-        padding_length: int
-    ) -> str:
-        """パターンマッチして値をゼロパディング"""
-        def replacer(match):
-            prefix = match.group(1)
-            value = match.group(2)
-            suffix = match.group(3)
-
-            if value.isdigit() and len(value) < padding_length:
-                padded_value = value.zfill(padding_length)
-                correction_msg = f"{column_name}: '{value}' → '{padded_value}'"
-                if correction_msg not in self.corrections:
-                    self.corrections.append(correction_msg)
-                return f"{prefix}{padded_value}{suffix}"
-
-            return match.group(0)
-
-        return re.sub(pattern, replacer, sql, flags=re.IGNORECASE)
+@lru_cache(maxsize=MEMO_SIZE)
+def _correct_memo(sql: str) -> Tuple[str, Tuple[str, ...]]:
+    corrected_sql, corrections = apply_rules(sql, RULES)
+    return corrected_sql, tuple(corrections)
 
 
 def correct_query(sql: str) -> Tuple[str, List[str]]:
-    """クエリ修正のヘルパー関数"""
-    corrector = QueryCorrector()
-    return corrector.correct_query(sql)
+    """クエリ修正のヘルパー関数（結果はSQLごとにメモ化）"""
+    corrected_sql, corrections = _correct_memo(sql)
+    return corrected_sql, list(corrections)
+
+
+def memo_stats() -> Dict[str, int]:
+    """修正メモのヒット・ミス数"""
+    info = _correct_memo.cache_info()
+    return {"entries": info.currsize, "max_entries": info.maxsize,
+            "hits": info.hits, "misses": info.misses}
+
+
+def clear_memo() -> None:
+    """修正メモを破棄する（ルール変更・テスト用）"""
+    _correct_memo.cache_clear()
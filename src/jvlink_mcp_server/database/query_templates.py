@@ -6,6 +6,8 @@
 
 from typing import Any, Dict, List, Optional, Tuple
 
+from .race_key import race_join_on, source_table
+
 # 競馬場名→コードマッピング（JRA）
 VENUE_NAME_TO_CODE = {
     "札幌": "01",
@@ -206,14 +208,9 @@ SELECT
     s.Time as time,
     s.HaronTimeL3 as last_3f,
     s.BaTaijyu as weight
-FROM NL_RA r
-JOIN NL_SE s
-  ON r.Year = s.Year
-  AND r.MonthDay = s.MonthDay
-  AND r.JyoCD = s.JyoCD
-  AND r.Kaiji = s.Kaiji
-  AND r.Nichiji = s.Nichiji
-  AND r.RaceNum = s.RaceNum
+FROM {ra_table} r
+JOIN {se_table} s
+  ON {race_join}
 WHERE r.Year = {year}
   AND r.MonthDay = '{month_day}'
   AND r.JyoCD = '{jyo_cd}'
@@ -462,14 +459,9 @@ SELECT
     SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins,
     SUM(CASE WHEN s.KakuteiJyuni <= 3 THEN 1 ELSE 0 END) as top3,
     ROUND(100.0 * SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) / COUNT(*), 1) as win_rate
-FROM NL_SE s
-JOIN NL_RA r
-  ON s.Year = r.Year
-  AND s.MonthDay = r.MonthDay
-  AND s.JyoCD = r.JyoCD
-  AND s.Kaiji = r.Kaiji
-  AND s.Nichiji = r.Nichiji
-  AND s.RaceNum = r.RaceNum
+FROM {se_table} s
+JOIN {ra_table} r
+  ON {race_join}
 WHERE s.Bamei LIKE {horse_name}
   AND s.KakuteiJyuni IS NOT NULL
   AND s.KakuteiJyuni > 0
@@ -506,11 +498,12 @@ def _zero_pad_code(code: str, length: int = 2) -> str:
     return code.zfill(length)
 
 
-def render_template(template_name: str, **params) -> Tuple[str, tuple]:
+def render_template(template_name: str, race_key: bool = False, **params) -> Tuple[str, tuple]:
     """テンプレートにパラメータを適用してSQLとパラメータタプルを生成
 
     Args:
         template_name: テンプレート名
+        race_key: TrueならNL_SEとNL_RAをRaceKeyビュー（RK_NL_SE / RK_NL_RA）で結合する
         **params: パラメータ（テンプレートで定義されたもの）
 
     Returns:
@@ -661,6 +654,11 @@ def render_template(template_name: str, **params) -> Tuple[str, tuple]:
         if cond_key not in formatted_params:
             formatted_params[cond_key] = ""
 
+    # NL_SE⨝NL_RAの結合（ユーザー指定のパラメータでは上書きさせない）
+    formatted_params["se_table"] = source_table("NL_SE", race_key)
+    formatted_params["ra_table"] = source_table("NL_RA", race_key)
+    formatted_params["race_join"] = race_join_on("s", "r", race_key)
+
     # テンプレートに適用
     try:
         sql = sql_template.format(**formatted_params)
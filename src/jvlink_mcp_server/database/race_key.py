@@ -0,0 +1,272 @@
+"""Surrogate integer race key
+
+NL_SE（出馬表・成績）とNL_RA（レース情報）の結合は
+Year, MonthDay, JyoCD, Kaiji, Nichiji, RaceNum の6カラムを比較し、SQLiteでは
+この複合キーの照合が結合コストの大半を占める。
+
+そこでレースキーの各カラムを桁に詰めた整数
+
+    RaceKey = Year * 10^12 + MonthDay * 10^8 + JyoCD * 10^6 + Kaiji * 10^4
+              + Nichiji * 10^2 + RaceNum
+
+（例: 2024年12月22日 中山 5回8日 11R → 2024122206050811）を1つの式で定義し、
+保守用コマンド（``python -m jvlink_mcp_server.index_builder``）で
+
+- 各テーブルにこの式のインデックス（SQLite / PostgreSQLの式インデックス）
+- RaceKeyカラムを加えたビュー ``RK_<テーブル名>``（例: RK_NL_SE, RK_NL_RA_NAR）
+
+を作成する。値はレースキーから決まるため、JVLinkToSQLite等で行が追加されても
+対応表を作り直す必要はない。ビューがあるDBでは高レベルAPI・クエリテンプレートが
+``RK_NL_SE s JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey`` で結合し、
+ないDBでは従来どおり6カラムで結合する。
+
+海外のレース（競馬場コードが 'A8' 等の英数字）は、競馬場コードを36進の2桁
+（0〜1295）として4桁に詰めた値を負にしたもの
+
+    RaceKey = -(Year * 10^14 + MonthDay * 10^10 + 36進(JyoCD) * 10^6 + Kaiji * 10^4
+                + Nichiji * 10^2 + RaceNum)
+
+（例: 2023年10月1日 パリロンシャン 'A8' 0回0日 4R → -202310010368000004）とする。
+国内のレースとは符号で分かれ、英数字2文字の競馬場コードごとに値が異なるため、
+別のレースと取り違えずに結合できる。それ以外の数字でない部分（空の開催回次等）を含む
+レースのRaceKeyはNULLとし、どの行とも結合しない。
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, List, NamedTuple, Optional, Sequence
+
+from .utils import validate_identifier
+
+logger = logging.getLogger(__name__)
+
+# (カラム, 桁数)。上位から順に詰める
+RACE_KEY_DIGITS = (
+    ("Year", 4),
+    ("MonthDay", 4),
+    ("JyoCD", 2),
+    ("Kaiji", 2),
+    ("Nichiji", 2),
+    ("RaceNum", 2),
+)
+RACE_KEY_COLUMNS = tuple(column for column, _ in RACE_KEY_DIGITS)
+
+# 海外の競馬場コードの36進の桁（数字・英大文字）
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# 海外のレースのRaceKeyの詰め方（競馬場コードは36進2桁を4桁に詰める）
+OVERSEAS_KEY_DIGITS = tuple((column, 4 if column == "JyoCD" else digits)
+                            for column, digits in RACE_KEY_DIGITS)
+
+# RaceKeyを付けるテーブル（中央・地方のレース情報と出馬表）
+RACE_KEY_TABLES = ("NL_RA", "NL_SE", "NL_RA_NAR", "NL_SE_NAR")
+
+VIEW_PREFIX = "RK_"
+
+
+def _text_expr(expr: str) -> str:
+    return f"NULLIF(TRIM(CAST({expr} AS VARCHAR)), '')"
+
+
+def _digits_expr(expr: str) -> str:
+    """数字だけの値を整数に、空文字・英字を含む値（海外の JyoCD 'A8' 等）をNULLにする式
+
+    そのままCASTすると、DuckDB / PostgreSQLでは変換エラーになり、SQLiteでは0になって
+    別のレースと同じRaceKeyになる。RTRIM(値, 数字) はSQLite・DuckDB・PostgreSQLで使える。
+    """
+    text = _text_expr(expr)
+    return f"CASE WHEN RTRIM({text}, '0123456789') = '' THEN CAST({text} AS BIGINT) END"
+
+
+def _base36_expr(expr: str) -> str:
+    """数字・英大文字2文字の値を36進の整数（0〜1295）に、それ以外をNULLにする式
+
+    文字の位置は LTRIM(桁, その文字以外の桁) で残る長さから求める
+    （SQLite・DuckDB・PostgreSQLに共通の関数だけを使う）。
+    """
+    text = _text_expr(expr)
+    digit = "(36 - LENGTH(LTRIM('{0}', REPLACE('{0}', SUBSTR({1}, {2}, 1), ''))))"
+    return (f"CASE WHEN LENGTH({text}) = 2 AND RTRIM({text}, '{_BASE36}') = '' "
+            f"THEN {digit.format(_BASE36, text, 1)} * 36 + {digit.format(_BASE36, text, 2)} END")
+
+
+def _packed_expr(prefix: str, layout, encode) -> str:
+    terms = []
+    shift = sum(digits for _, digits in layout)
+    for column, digits in layout:
+        shift -= digits
+        term = encode(column)(f"{prefix}{column}")
+        terms.append(f"{term} * {10 ** shift}" if shift else term)
+    return " + ".join(terms)
+
+
+def race_key_expr(alias: Optional[str] = None) -> str:
+    """RaceKeyを計算するSQL式（インデックス定義とビューで同じ文字列を使う）
+
+    DuckDB / PostgreSQLのINTEGERは32bitのため、BIGINTで計算する。
+    国内のレースは正、競馬場コードが英数字の海外のレースは負の値になり、
+    それ以外の数字でない部分を含むレースのRaceKeyはNULL（どの行とも結合しない）。
+    """
+    prefix = f"{alias}." if alias else ""
+    domestic = _packed_expr(prefix, RACE_KEY_DIGITS, lambda column: _digits_expr)
+    overseas = _packed_expr(prefix, OVERSEAS_KEY_DIGITS,
+                            lambda column: _base36_expr if column == "JyoCD" else _digits_expr)
+    return f"COALESCE({domestic}, -({overseas}))"
+
+
+def race_key_value(year: Any, monthday: Any, jyo_cd: Any, kaiji: Any, nichiji: Any,
+                   race_num: Any) -> Optional[int]:
+    """レースキーの値からRaceKeyを計算する（SQL式と同じ結果。結合できないレースはNone）"""
+    texts = ["" if value is None else str(value).strip()
+             for value in (year, monthday, jyo_cd, kaiji, nichiji, race_num)]
+    if all(text.isascii() and text.isdigit() for text in texts):
+        layout, sign = RACE_KEY_DIGITS, 1
+    else:
+        layout, sign = OVERSEAS_KEY_DIGITS, -1
+    key = 0
+    for (column, digits), text in zip(layout, texts):
+        if sign < 0 and column == "JyoCD":
+            if len(text) != 2 or any(c not in _BASE36 for c in text):
+                return None
+            part = _BASE36.index(text[0]) * 36 + _BASE36.index(text[1])
+        elif text.isascii() and text.isdigit():
+            part = int(text)
+        else:
+            return None
+        key = key * 10 ** digits + part
+    return sign * key
+
+
+def view_name(table: str) -> str:
+    return validate_identifier(f"{VIEW_PREFIX}{table}", "view name")
+
+
+def create_view_sql(table: str, db_type: str) -> str:
+    validate_identifier(table, "table name")
+    # SQLiteは CREATE OR REPLACE VIEW を持たない
+    create = "CREATE VIEW IF NOT EXISTS" if db_type == "sqlite" else "CREATE OR REPLACE VIEW"
+    return f"{create} {view_name(table)} AS SELECT *, {race_key_expr()} AS RaceKey FROM {table}"
+
+
+def race_join_on(left: str, right: str, race_key: bool) -> str:
+    """2つのテーブル別名を同じレースで結合するON条件"""
+    validate_identifier(left, "alias")
+    validate_identifier(right, "alias")
+    if race_key:
+        return f"{left}.RaceKey = {right}.RaceKey"
+    return " AND ".join(f"{left}.{c} = {right}.{c}" for c in RACE_KEY_COLUMNS)
+
+
+def source_table(table: str, race_key: bool) -> str:
+    """結合に使うテーブル名（RaceKeyで結合するならビュー）"""
+    return view_name(table) if race_key else validate_identifier(table, "table name")
+
+
+def has_race_key(db, *tables: str) -> bool:
+    """接続先に各テーブルのRaceKeyビューがあるか（確認できない場合はFalse）"""
+    try:
+        present = set(db.get_tables())
+    except Exception as e:
+        logger.debug(f"Race key lookup failed: {e}")
+        return False
+    return all(view_name(table) in present for table in tables)
+
+
+class RaceJoin(NamedTuple):
+    """出馬表とレース情報の結合（FROM句に入れるテーブル名とON条件）"""
+
+    se: str
+    ra: str
+    on: str
+    race_key: bool
+
+
+def race_join(db, se_table: str, ra_table: str, se_alias: str = "s",
+              ra_alias: str = "r") -> RaceJoin:
+    """出馬表（se）とレース情報（ra）の結合方法を接続先に合わせて選ぶ"""
+    use_key = has_race_key(db, se_table, ra_table)
+    return RaceJoin(source_table(se_table, use_key), source_table(ra_table, use_key),
+                    race_join_on(se_alias, ra_alias, use_key), use_key)
+
+
+# ============================================================================
+# ビューの作成（保守用コマンドから書き込み可能な接続で使う）
+# ============================================================================
+
+@dataclass
+class ViewBuildResult:
+    table: str
+    status: str  # "created" / "exists" / "would_create" / "skipped" / "failed"
+    error: Optional[str] = None
+
+    @property
+    def view(self) -> str:
+        return view_name(self.table)
+
+
+def build_race_key_views(conn: Any, db_type: str, tables: Iterable[str],
+                         indexed: Sequence[str] = (), only: Optional[Sequence[str]] = None,
+                         dry_run: bool = False, progress=None) -> List[ViewBuildResult]:
+    """RaceKeyビューを作成する（書き込み可能な接続が必要）
+
+    SQLite / PostgreSQLでは式インデックスがないテーブルのビューは作らない
+    （インデックスなしのRaceKey結合は6カラム結合より遅いため）。
+
+    Args:
+        conn: 書き込み可能なDBAPI接続
+        db_type: sqlite / duckdb / postgresql
+        tables: DBに存在するテーブル・ビュー名
+        indexed: RaceKeyの式インデックスがあるテーブル
+        only: 対象テーブルを限定する（Noneなら RACE_KEY_TABLES のすべて）
+        dry_run: Trueなら作成せず、作成予定だけを返す
+        progress: 1件ごとに ViewBuildResult を受け取るコールバック
+    """
+    present = {t.lower() for t in tables}
+    indexed_tables = {t.lower() for t in indexed}
+    wanted = {t.lower() for t in only} if only else None
+    results: List[ViewBuildResult] = []
+    for table in RACE_KEY_TABLES:
+        if table.lower() not in present or (wanted is not None and table.lower() not in wanted):
+            continue
+        if view_name(table).lower() in present:
+            result = ViewBuildResult(table, "exists")
+        elif db_type != "duckdb" and table.lower() not in indexed_tables:
+            result = ViewBuildResult(table, "skipped", "RaceKey index is missing")
+        elif dry_run:
+            result = ViewBuildResult(table, "would_create")
+        else:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(create_view_sql(table, db_type))
+                conn.commit()
+                result = ViewBuildResult(table, "created")
+            except Exception as e:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+                logger.warning(f"Failed to create {view_name(table)}: {e}")
+                result = ViewBuildResult(table, "failed", str(e))
+            finally:
+                cursor.close()
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return results
+
+
+__all__ = [
+    "RACE_KEY_COLUMNS",
+    "RACE_KEY_TABLES",
+    "RaceJoin",
+    "ViewBuildResult",
+    "race_key_expr",
+    "race_key_value",
+    "view_name",
+    "create_view_sql",
+    "race_join_on",
+    "source_table",
+    "has_race_key",
+    "race_join",
+    "build_race_key_views",
+]
@@ -0,0 +1,99 @@
+"""Rendered MCP resource cache
+
+schema://database 等のリソースは読み込みのたびに ``json.dumps(..., indent=2)``
+していた（schema://database はNARの自動生成テーブルを含む ALL_TABLES 全体）。
+そこで描画結果のJSON文字列とその内容ハッシュ（ETag）をURIごとに保持し、
+元になった定義・スキーマの版（version）が変わったときだけ描画し直す。
+
+- 定数の定義（ALL_TABLES、コード表等）から作るリソースは版なし（プロセスで1回）
+- DBから作るリソースはテーブル一覧・カラム定義を版にする（スキーマ変更時だけ再描画）
+
+クライアントは resources://etags（URI→ETag）を読めば、変わったリソースだけを
+読み直せる。
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+# 版の指定がないことを表す（None も版として使えるようにする）
+_STATIC = ("static",)
+
+
+class RenderedResource(NamedTuple):
+    """描画済みリソース"""
+
+    uri: str
+    body: str
+    etag: str
+    size: int
+    version: Hashable
+
+
+def render_json(uri: str, data: Any, version: Hashable = _STATIC) -> RenderedResource:
+    """データをJSON文字列に描画し、内容ハッシュをETagにする"""
+    body = json.dumps(data, ensure_ascii=False, indent=2)
+    encoded = body.encode("utf-8")
+    etag = hashlib.sha256(encoded).hexdigest()[:16]
+    return RenderedResource(uri, body, etag, len(encoded), version)
+
+
+class ResourceCache:
+    """URI → 描画済みリソース"""
+
+    def __init__(self):
+        self._entries: Dict[str, RenderedResource] = {}
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.hits = 0
+
+    def get(self, uri: str, render: Callable[[], Any],
+            version: Hashable = _STATIC) -> RenderedResource:
+        """描画済みリソースを返す（未描画または版が変わっていれば render() から描画）"""
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry is not None and entry.version == version:
+                self.hits += 1
+                return entry
+        entry = render_json(uri, render(), version)
+        with self._lock:
+            self._entries[uri] = entry
+            self.renders += 1
+        return entry
+
+    def etag(self, uri: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(uri)
+        return entry.etag if entry is not None else None
+
+    def etags(self) -> Dict[str, Dict[str, Any]]:
+        """描画済みリソースの URI → {etag, bytes}"""
+        with self._lock:
+            entries = sorted(self._entries.items())
+        return {uri: {"etag": entry.etag, "bytes": entry.size} for uri, entry in entries}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            size = sum(entry.size for entry in self._entries.values())
+            return {"resources": len(self._entries), "bytes": size,
+                    "renders": self.renders, "hits": self.hits}
+
+
+_cache = ResourceCache()
+
+
+def get_resource_cache() -> ResourceCache:
+    return _cache
+
+
+__all__ = [
+    "RenderedResource",
+    "ResourceCache",
+    "render_json",
+    "get_resource_cache",
+]
@@ -0,0 +1,211 @@
+"""Data-version-aware query result cache
+
+同じ集計（例: 「1番人気の東京芝1600の勝率」）が繰り返し問い合わせられるため、
+クエリ結果をプロセス内にキャッシュする。キーは
+(接続先, データ世代トークン, 正規化SQL, パラメータ, 結果形式) で、
+JVLinkToSQLite等がデータを書き込むとデータ世代トークンが変わり、
+古いエントリは参照されなくなる（LRUで追い出される）。
+
+データ世代トークン:
+- SQLite / DuckDB: DBファイルとWALファイルの (mtime_ns, size)
+- PostgreSQL: DB_CACHE_VERSION_QUERY（ウォーターマーククエリ）の結果、
+  未設定なら pg_stat_database の tup_inserted/updated/deleted
+
+環境変数:
+- DB_RESULT_CACHE: 0/false で無効化（既定は有効）
+- DB_RESULT_CACHE_MAX_ENTRIES: 最大エントリ数（既定256）
+- DB_RESULT_CACHE_MAX_MB: 合計サイズ上限MB（既定64）
+- DB_CACHE_VERSION_TTL: PostgreSQLのトークンを再取得する間隔秒（既定5）
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        logger.warning(f"Invalid value for {name}: {os.getenv(name)!r}, using {default}")
+        return default
+
+
+def estimate_size(value: Any) -> int:
+    """キャッシュ値のおおよそのバイト数"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        total = 0
+        for arr in value.values():
+            if isinstance(arr, np.ndarray):
+                total += arr.nbytes
+                if arr.dtype.kind == "O":
+                    # 文字列等のオブジェクト本体は1要素あたり概算で加算
+                    total += 48 * len(arr)
+        return total
+    return 0
+
+
+class ResultCache:
+    """サイズ上限付きLRUキャッシュ（ヒット・ミス・追い出し数を記録）"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: Optional[int] = None) -> None:
+        """値を入れる（size を省略すると estimate_size で見積もる）"""
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+_cache: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.getenv("DB_RESULT_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+
+def get_result_cache() -> ResultCache:
+    """プロセス共有の結果キャッシュ"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache(
+                max_entries=_env_int("DB_RESULT_CACHE_MAX_ENTRIES", 256),
+                max_bytes=_env_int("DB_RESULT_CACHE_MAX_MB", 64) * 1024 * 1024,
+            )
+        return _cache
+
+
+def reset_result_cache() -> None:
+    """キャッシュを破棄する（設定変更・テスト用）"""
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+# ============================================================================
+# データ世代トークン
+# ============================================================================
+
+def file_version(db_path: Optional[str]) -> Optional[Tuple]:
+    """DBファイル（と-wal/.walファイル）の (mtime_ns, size)
+
+    ファイルでないDB（:memory: 等）はNone（キャッシュしない）。
+    """
+    if not db_path or db_path == ":memory:":
+        return None
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    token = [st.st_mtime_ns, st.st_size]
+    for suffix in ("-wal", ".wal"):
+        try:
+            wal = os.stat(db_path + suffix)
+            token.extend([wal.st_mtime_ns, wal.st_size])
+        except OSError:
+            pass
+    return tuple(token)
+
+
+class TTLVersion:
+    """問い合わせコストのかかるトークンを一定時間だけ使い回す"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._values: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._values.get(key)
+            if cached is not None and now - cached[0] < self.ttl:
+                return cached[1]
+        value = fetch()
+        with self._lock:
+            self._values[key] = (now, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+pg_versions = TTLVersion(float(os.getenv("DB_CACHE_VERSION_TTL", "5")))
+
+PG_DEFAULT_VERSION_QUERY = (
+    "SELECT tup_inserted, tup_updated, tup_deleted "
+    "FROM pg_stat_database WHERE datname = current_database()"
+)
+
+
+__all__ = [
+    "ResultCache",
+    "cache_enabled",
+    "get_result_cache",
+    "reset_result_cache",
+    "file_version",
+    "pg_versions",
+    "PG_DEFAULT_VERSION_QUERY",
+]
@@ -1,13 +1,33 @@
 """サンプルデータ提供モジュール
 
 LLMがデータ形式を理解しやすいように、実際のデータサンプルを提供します。
+
+サンプルデータとカラム値の例（全件GROUP BY）は、件数・サイズ上限付きのLRU
+（ResultCache）にキャッシュする。キーは (接続先, データ世代トークン, 種別, 引数) で、
+データが書き換わると古いエントリは参照されなくなり、LRUで追い出される。
+データ世代トークンを得られない接続（:memory: 等）はキャッシュしない。
+
+環境変数:
+- DB_SAMPLE_CACHE_MAX_ENTRIES: 最大エントリ数（既定128）
+- DB_SAMPLE_CACHE_MAX_MB: 合計サイズ上限MB（既定16）
 """
 
-from typing import Dict, Any, List, Optional
+import contextvars
+import json
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
+from .query_control import QueryInterruptedError
 from .utils import validate_identifier
 
-# キャッシュ用
-_sample_data_cache: Dict[str, Any] = {}
+logger = logging.getLogger(__name__)
+
+# キャッシュ用（ResultCache。pandas を読み込むため最初の利用時に作る）
+_sample_data_cache = None
+_cache_lock = threading.Lock()
 
 # 重要なカラム定義（サンプル取得時に表示）
 IMPORTANT_COLUMNS = {
@@ -29,6 +49,36 @@ IMPORTANT_COLUMNS = {
 }
 
 
+def _get_cache():
+    global _sample_data_cache
+    with _cache_lock:
+        if _sample_data_cache is None:
+            from .result_cache import ResultCache, _env_int
+            _sample_data_cache = ResultCache(
+                max_entries=_env_int("DB_SAMPLE_CACHE_MAX_ENTRIES", 128),
+                max_bytes=_env_int("DB_SAMPLE_CACHE_MAX_MB", 16) * 1024 * 1024,
+            )
+        return _sample_data_cache
+
+
+def _cache_key(db_connection, kind: str, *args) -> Optional[Hashable]:
+    """キャッシュのキー（データ世代トークンを得られなければNone）"""
+    try:
+        version = db_connection.data_version()
+        key = (db_connection._pool_key(), version, kind) + args
+        hash(key)
+    except Exception:
+        return None
+    return key if version is not None else None
+
+
+def _cache_put(key: Optional[Hashable], result: Dict[str, Any]) -> None:
+    if key is None:
+        return
+    size = len(json.dumps(result, ensure_ascii=False, default=str).encode("utf-8"))
+    _get_cache().put(key, result, size=size)
+
+
 def get_sample_data(
     db_connection,
     table_name: str,
@@ -69,10 +119,12 @@ def get_sample_data(
             "sample_rows": [],
         }
 
-    cache_key = f"{table_name}_{num_rows}_{where_clause}"
-
-    if use_cache and cache_key in _sample_data_cache:
-        return _sample_data_cache[cache_key]
+    cache_key = _cache_key(db_connection, "sample", table_name, num_rows,
+                           where_clause) if use_cache else None
+    if cache_key is not None:
+        cached = _get_cache().get(cache_key)
+        if cached is not None:
+            return cached
 
     # 重要カラムを優先して取得（ホワイトリスト検証）
     important_cols = IMPORTANT_COLUMNS.get(table_name, [])
@@ -113,9 +165,7 @@ def get_sample_data(
             "data_format_notes": _get_data_format_notes(table_name),
         }
 
-        if use_cache:
-            _sample_data_cache[cache_key] = result
-
+        _cache_put(cache_key, result)
         return result
 
     except Exception as e:
@@ -131,7 +181,8 @@ def get_column_value_examples(
     db_connection,
     table_name: str,
     column_name: str,
-    limit: int = 10
+    limit: int = 10,
+    use_cache: bool = True
 ) -> Dict[str, Any]:
     """特定カラムの値の例を取得
 
@@ -140,6 +191,7 @@ def get_column_value_examples(
         table_name: テーブル名
         column_name: カラム名
         limit: 取得する値の種類数
+        use_cache: キャッシュを使用するか（全件のGROUP BYを繰り返さない）
 
     Returns:
         dict: {
@@ -167,6 +219,13 @@ def get_column_value_examples(
     # limit上限
     limit = min(max(1, limit), 100)
 
+    cache_key = _cache_key(db_connection, "values", table_name, column_name,
+                           limit) if use_cache else None
+    if cache_key is not None:
+        cached = _get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
     # ユニーク値取得
     sql = f"""
     SELECT {column_name}, COUNT(*) as cnt
@@ -180,13 +239,15 @@ def get_column_value_examples(
     try:
         df = db_connection.execute_safe_query(sql)
 
-        return {
+        result = {
             "table_name": table_name,
             "column_name": column_name,
             "unique_values": df[column_name].tolist(),
             "value_counts": df.to_dict(orient="records"),
             "description": _get_column_description(table_name, column_name),
         }
+        _cache_put(cache_key, result)
+        return result
     except Exception as e:
         return {
             "table_name": table_name,
@@ -195,56 +256,267 @@ def get_column_value_examples(
         }
 
 
-def get_data_snapshot(db_connection) -> Dict[str, Any]:
+# get_data_snapshot で件数を返すテーブル
+SNAPSHOT_TABLES = [
+    "NL_RA", "NL_SE", "NL_UM", "NL_KS", "NL_CH", "NL_HR", "NL_O1", "NL_RA_NAR", "NL_SE_NAR",
+]
+
+# テーブルごとの件数・期間の取得を並行に流す最大数
+_PROBE_WORKERS = 4
+
+
+def _is_null(value: Any) -> bool:
+    """None または NaN（pandasはNULLをNaNで返すことがある）"""
+    return value is None or value != value
+
+
+def _sqlite_row_estimates(db_connection) -> Dict[str, Tuple[int, str]]:
+    """sqlite_stat1（ANALYZEの結果）の先頭の数値＝テーブルの行数"""
+    df = db_connection.execute_query("SELECT tbl, stat FROM sqlite_stat1", use_cache=False)
+    estimates: Dict[str, Tuple[int, str]] = {}
+    for table, stat in zip(df["tbl"], df["stat"]):
+        try:
+            rows = int(str(stat).split()[0])
+        except (ValueError, IndexError):
+            continue
+        if rows > estimates.get(table, (-1, ""))[0]:
+            estimates[table] = (rows, "sqlite_stat1")
+    return estimates
+
+
+def _duckdb_row_estimates(db_connection) -> Dict[str, Tuple[int, str]]:
+    df = db_connection.execute_query(
+        "SELECT table_name, estimated_size FROM duckdb_tables() WHERE schema_name = 'main'",
+        use_cache=False,
+    )
+    return {
+        table: (int(rows), "duckdb_estimated_size")
+        for table, rows in zip(df["table_name"], df["estimated_size"])
+        if not _is_null(rows)
+    }
+
+
+def _postgresql_row_estimates(db_connection) -> Dict[str, Tuple[int, str]]:
+    """pg_class.reltuples（未ANALYZEなら-1）。なければ統計コレクタの生存行数
+
+    PostgreSQLでは引用符なしのテーブル名が小文字になるため大文字に揃えて返す。
+    """
+    df = db_connection.execute_query("""
+        SELECT c.relname, c.reltuples, s.n_live_tup
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = 'public' AND c.relkind IN ('r', 'p')
+    """, use_cache=False)
+    estimates: Dict[str, Tuple[int, str]] = {}
+    for table, reltuples, live in zip(df["relname"], df["reltuples"], df["n_live_tup"]):
+        if reltuples is not None and reltuples >= 0:
+            estimates[table.upper()] = (int(reltuples), "pg_class")
+        elif not _is_null(live):
+            estimates[table.upper()] = (int(live), "pg_stat_user_tables")
+    return estimates
+
+
+_ROW_ESTIMATORS = {
+    "sqlite": _sqlite_row_estimates,
+    "duckdb": _duckdb_row_estimates,
+    "postgresql": _postgresql_row_estimates,
+}
+
+
+def _row_estimates(db_connection) -> Dict[str, Tuple[int, str]]:
+    """バックエンドの統計情報からテーブルの推定行数を読む（取れなければ空）"""
+    try:
+        estimates = _ROW_ESTIMATORS[db_connection.db_type](db_connection)
+    except Exception as e:
+        logger.debug(f"Table statistics unavailable: {e}")
+        return {}
+    return estimates
+
+
+def _count_rows(db_connection, table_name: str, exact: bool) -> Tuple[int, str]:
+    """行数を数える（SQLiteの概算は索引で引ける MAX(rowid)、失敗すれば COUNT(*)）"""
+    if not exact and getattr(db_connection, "db_type", None) == "sqlite":
+        try:
+            df = db_connection.execute_safe_query(f"SELECT MAX(rowid) AS cnt FROM {table_name}")
+            value = df.iloc[0]["cnt"] if not df.empty else None
+            return (0 if _is_null(value) else int(value)), "max_rowid"
+        except Exception:
+            pass
+    df = db_connection.execute_safe_query(f"SELECT COUNT(*) as cnt FROM {table_name}")
+    return (int(df.iloc[0]["cnt"]) if not df.empty else 0), "count"
+
+
+def _exact_period(db_connection) -> Dict[str, Any]:
+    df = db_connection.execute_safe_query("""
+        SELECT
+            MIN(Year || '-' || MonthDay) as earliest,
+            MAX(Year || '-' || MonthDay) as latest
+        FROM NL_SE
+        WHERE KakuteiJyuni IS NOT NULL
+        """)
+    if df.empty:
+        return {"earliest": None, "latest": None}
+    return {"earliest": df.iloc[0]["earliest"], "latest": df.iloc[0]["latest"]}
+
+
+def _fast_period(db_connection) -> Dict[str, Any]:
+    """最初と最後の年を MIN/MAX(Year) で求め、その年の中だけで月日を探す
+
+    文字列連結の全件走査を避ける。端の年に確定済みの行がなければ全件走査に戻す。
+    """
+    years = db_connection.execute_safe_query(
+        "SELECT MIN(Year) AS earliest, MAX(Year) AS latest FROM NL_SE"
+    )
+    if years.empty or _is_null(years.iloc[0]["latest"]):
+        return {"earliest": None, "latest": None}
+    period = {}
+    for bound, func in (("earliest", "MIN"), ("latest", "MAX")):
+        year = years.iloc[0][bound]
+        year = year.item() if hasattr(year, "item") else year
+        df = db_connection.execute_safe_query(
+            f"SELECT {func}(MonthDay) AS md FROM NL_SE "
+            "WHERE Year = ? AND KakuteiJyuni IS NOT NULL",
+            params=(year,),
+        )
+        monthday = df.iloc[0]["md"] if not df.empty else None
+        if _is_null(monthday):
+            return _exact_period(db_connection)
+        period[bound] = f"{year}-{monthday}"
+    return period
+
+
+def _missing_tables(db_connection) -> set:
+    """SNAPSHOT_TABLES のうちDBにないテーブル（カタログを読めなければ空）"""
+    try:
+        return {table for table in SNAPSHOT_TABLES if not db_connection.has_table(table)}
+    except Exception as e:
+        logger.debug(f"Table catalog unavailable: {e}")
+        return set()
+
+
+def _run_probes(db_connection, probes: Dict[str, Callable[[Any], Any]]) -> Dict[str, Any]:
+    """probe(接続) を並行に実行する（戻り値は結果か例外）
+
+    呼び出し元の接続で順にプローブを処理しつつ、プールにその時点で空きがある分
+    （最大 _PROBE_WORKERS）だけ接続を借りた補助スレッドが残りを分担する。
+    接続を待たないため、プールに空きがなければ呼び出し元の接続だけで処理する。
+    """
+    results: Dict[str, Any] = {}
+    pending = deque(probes.items())
+    lock = threading.Lock()
+
+    def drain(conn) -> None:
+        while True:
+            with lock:
+                if not pending:
+                    return
+                name, probe = pending.popleft()
+            try:
+                results[name] = probe(conn)
+            except Exception as e:
+                results[name] = e
+
+    helpers = []
+    if getattr(db_connection, "db_type", None) in _ROW_ESTIMATORS:
+        for _ in range(min(len(probes) - 1, _PROBE_WORKERS)):
+            helper = db_connection.spawn()
+            try:
+                if not helper.try_connect():
+                    break
+            except Exception as e:
+                logger.debug(f"Probe connection unavailable: {e}")
+                break
+            helpers.append(helper)
+    if not helpers:
+        drain(db_connection)
+        return results
+
+    def run(helper) -> None:
+        with helper:
+            drain(helper)
+
+    with ThreadPoolExecutor(max_workers=len(helpers), thread_name_prefix="jvlink-overview") as pool:
+        # 呼び出し元の QueryControl（タイムアウト・キャンセル）を各スレッドに引き継ぐ
+        futures = [pool.submit(contextvars.copy_context().run, run, helper) for helper in helpers]
+        drain(db_connection)
+        for future in futures:
+            future.result()
+    return results
+
+
+def get_data_snapshot(db_connection, exact: bool = False, use_cache: bool = True) -> Dict[str, Any]:
     """データベース全体のスナップショット情報を取得
 
+    既定ではレコード数をバックエンドの統計情報（SQLite: sqlite_stat1 / MAX(rowid)、
+    DuckDB: duckdb_tables().estimated_size、PostgreSQL: pg_class.reltuples）から
+    概算し、データ期間は MIN/MAX(Year) から求める。統計のないテーブルだけを数え、
+    テーブルごとの取得は並行に実行する。結果はデータ世代ごとにキャッシュする。
+
     Args:
         db_connection: DatabaseConnectionインスタンス
+        exact: Trueなら全テーブルを COUNT(*) で数え、期間も全件走査で求める
+        use_cache: キャッシュを使用するか
 
     Returns:
         dict: {
-            'tables': テーブルごとの概要情報,
+            'tables': テーブルごとの概要情報（count_method: 件数の取得方法）,
             'total_records': 総レコード数,
-            'data_period': データ期間
+            'data_period': データ期間,
+            'exact': 件数がすべて COUNT(*) によるものか
         }
     """
-    results = {
+    cache_key = _cache_key(db_connection, "snapshot", exact) if use_cache else None
+    if cache_key is not None:
+        cached = _get_cache().get(cache_key)
+        if cached is not None:
+            return cached
+
+    # 統計情報を読めない接続（未知の接続型）は常に数える
+    known = getattr(db_connection, "db_type", None) in _ROW_ESTIMATORS
+    fast = not exact and known
+    estimates = _row_estimates(db_connection) if fast else {}
+    missing = _missing_tables(db_connection) if known else set()
+    probes: Dict[str, Callable[[Any], Any]] = {
+        table_name: partial(_count_rows, table_name=table_name, exact=not fast)
+        for table_name in SNAPSHOT_TABLES
+        if table_name not in estimates and table_name not in missing
+    }
+    probes["data_period"] = _fast_period if fast else _exact_period
+    probed = _run_probes(db_connection, probes)
+    for outcome in probed.values():
+        if isinstance(outcome, QueryInterruptedError):
+            raise outcome
+
+    results: Dict[str, Any] = {
         "tables": {},
         "total_records": 0,
     }
-
-    # 各テーブルのレコード数を取得
-    for table_name in ["NL_RA", "NL_SE", "NL_UM", "NL_KS", "NL_CH", "NL_HR", "NL_O1", "NL_RA_NAR", "NL_SE_NAR"]:
-        try:
-            count_sql = f"SELECT COUNT(*) as cnt FROM {table_name}"
-            df = db_connection.execute_safe_query(count_sql)
-            count = int(df.iloc[0]["cnt"]) if not df.empty else 0
-            results["tables"][table_name] = {
-                "record_count": count,
-                "description": _get_table_description(table_name),
-            }
-            results["total_records"] += count
-        except Exception:
+    for table_name in SNAPSHOT_TABLES:
+        if table_name in missing:
+            results["tables"][table_name] = {"record_count": 0, "error": "テーブルが存在しません"}
+            continue
+        outcome = estimates.get(table_name) or probed[table_name]
+        if isinstance(outcome, Exception):
             results["tables"][table_name] = {"record_count": 0, "error": "取得失敗"}
+            continue
+        count, method = outcome
+        results["tables"][table_name] = {
+            "record_count": count,
+            "description": _get_table_description(table_name),
+            "count_method": method,
+        }
+        results["total_records"] += count
 
-    # データ期間を取得（NL_SEから）
-    try:
-        period_sql = """
-        SELECT
-            MIN(Year || '-' || MonthDay) as earliest,
-            MAX(Year || '-' || MonthDay) as latest
-        FROM NL_SE
-        WHERE KakuteiJyuni IS NOT NULL
-        """
-        df = db_connection.execute_safe_query(period_sql)
-        if not df.empty:
-            results["data_period"] = {
-                "earliest": df.iloc[0]["earliest"],
-                "latest": df.iloc[0]["latest"],
-            }
-    except Exception:
-        results["data_period"] = {"error": "取得失敗"}
+    period = probed["data_period"]
+    results["data_period"] = {"error": "取得失敗"} if isinstance(period, Exception) else period
+    results["exact"] = all(
+        info.get("count_method", "count") == "count" for info in results["tables"].values()
+    )
 
+    # 取得に失敗したプローブ（接続・一時的なエラー）を含む結果はキャッシュしない
+    if not any(isinstance(outcome, Exception) for outcome in probed.values()):
+        _cache_put(cache_key, results)
     return results
 
 
@@ -335,7 +607,13 @@ def _get_table_description(table_name: str) -> str:
 def clear_cache():
     """キャッシュをクリア"""
     global _sample_data_cache
-    _sample_data_cache = {}
+    with _cache_lock:
+        _sample_data_cache = None
+
+
+def sample_cache_stats() -> Dict[str, Any]:
+    """キャッシュの統計（エントリ数・サイズ・ヒット・ミス・追い出し数）"""
+    return _get_cache().stats()
 
 
 __all__ = [
@@ -344,4 +622,5 @@ __all__ = [
     "get_data_snapshot",
     "IMPORTANT_COLUMNS",
     "clear_cache",
+    "sample_cache_stats",
 ]
@@ -2,51 +2,585 @@
 
 カラム名の命名規則から自動的に説明を生成します。
 全410+カラムを網羅的にカバーします。
+
+規則は次の順に引きます（先に当たったものを返す）。
+
+1. EXACT_DESCRIPTIONS: カラム名の完全一致（dict を1回引くだけ）
+2. _describe_by_pattern: 接頭辞・正規表現の規則（配列カラム等。上から順に評価）
+
+結果は (テーブル名, カラム名) ごとにメモ化するため、同じカラムの2回目以降は
+規則を評価しない。
 """
 
 import re
+from functools import lru_cache
 
+# カラム名（完全一致） → 説明
+EXACT_DESCRIPTIONS = {
+    # === 共通ヘッダー項目 ===
+    "RecordSpec": "レコード種別ID（例：RA, SE, HR等）",
+    "headRecordSpec": "レコード種別ID（例：RA, SE, HR等）",
+    "DataKubun": "データ区分（1=通常, 2=削除, 9=WIN5等）",
+    "headDataKubun": "データ区分（1=通常, 2=削除, 9=WIN5等）",
+    "MakeDate": "データ作成年月日（YYYYMMDD形式）",
+    "headMakeDate": "データ作成年月日（YYYYMMDD形式）",
+    "RecordDelimiter": "レコード区切り（改行コード）",
 
-# カラム名パターンマッチング関数
-def generate_column_description(table_name: str, column_name: str) -> str:
-    """カラム名のパターンから説明を自動生成
+    # === 識別子（id*または直接名） ===
+    "Year": "開催年（YYYY形式）",
+    "idYear": "開催年（YYYY形式）",
+    "MonthDay": "開催月日（MMDD形式）",
+    "idMonthDay": "開催月日（MMDD形式）",
+    "Kaiji": "開催回次（第何回開催か）",
+    "idKaiji": "開催回次（第何回開催か）",
+    "Nichiji": "開催日次（何日目か）",
+    "idNichiji": "開催日次（何日目か）",
+    "RaceNum": "レース番号（1-12）",
+    "idRaceNum": "レース番号（1-12）",
+    "idUmaban": "馬番",
+    "Umaban": "馬番",
 
-    Args:
-        table_name: テーブル名
-        column_name: カラム名
+    # === グレード ===
+    "GradeCD": "グレードコード（A=G1, B=G2, C=G3, D=リステッド, E=オープン特別, F=1600万下, G=1000万下, H=500万下, I=未勝利, J=新馬）",
+    "GradeCDBefore": "グレードコード（変更前）",
+    "JyokenName": "競走条件名",
 
-    Returns:
-        カラムの説明（推測も含む）
-    """
-    col = column_name
+    # === 距離（Kyori*） ===
+    "Kyori": "距離（メートル単位、例：1600, 2000）",
+    "KyoriBefore": "距離（変更前、メートル単位）",
 
-    # === 共通ヘッダー項目 ===
-    if col == "RecordSpec" or col == "headRecordSpec":
-        return "レコード種別ID（例：RA, SE, HR等）"
-    if col == "DataKubun" or col == "headDataKubun":
-        return "データ区分（1=通常, 2=削除, 9=WIN5等）"
-    if col == "MakeDate" or col == "headMakeDate":
-        return "データ作成年月日（YYYYMMDD形式）"
-    if col == "RecordDelimiter":
-        return "レコード区切り（改行コード）"
+    # === トラック（Track*） ===
+    "TrackCD": "トラックコード（10=芝・右, 11=芝・左, 18=芝・直, 20=ダート・右, 21=ダート・左, 23=ダート・直, 29=障害）",
+    "TrackCDBefore": "トラックコード（変更前）",
 
-    # === 識別子（id*または直接名） ===
-    if col == "Year" or col == "idYear":
-        return "開催年（YYYY形式）"
-    if col == "MonthDay" or col == "idMonthDay":
-        return "開催月日（MMDD形式）"
+    # === コース区分 ===
+    "CourseKubunCD": "コース区分コード",
+    "CourseKubunCDBefore": "コース区分コード（変更前）",
+
+    # === 発走時刻 ===
+    "HassoTime": "発走時刻（HHmm形式、例：1530=15時30分）",
+    "HassoTimeBefore": "発走時刻（変更前）",
+
+    # === 頭数 ===
+    "TorokuTosu": "登録頭数",
+    "SyussoTosu": "出走頭数",
+    "NyusenTosu": "入線頭数",
+
+    # === 障害マイルタイム ===
+    "SyogaiMileTime": "障害マイルタイム（障害レースの1マイル通過タイム）",
+
+    # === レコード更新 ===
+    "RecordUpKubun": "レコード更新区分（1=レコード, 2=タイレコード）",
+
+    # === 出馬表・馬情報 ===
+    "Wakuban": "枠番",
+    "KettoNum": "血統登録番号（10桁、馬の一意識別子）",
+    "Bamei": "馬名",
+    "BameiKana": "馬名カナ",
+    "BameiEng": "馬名英字",
+
+    # === 性別 ===
+    "SexCD": "性別コード（1=牡, 2=牝, 3=セン）",
+
+    # === 品種 ===
+    "HinsyuCD": "品種コード（1=サラブレッド系, 2=アングロアラブ系）",
+
+    # === 毛色 ===
+    "KeiroCD": "毛色コード（1=栗, 2=栃栗, 3=鹿, 4=黒鹿, 5=青鹿, 6=青, 7=芦, 8=栗粕, 9=鹿粕, 10=青粕, 11=白）",
+
+    # === 馬齢 ===
+    "Barei": "馬齢（歳）",
+
+    # === 東西所属 ===
+    "TozaiCD": "東西所属コード（1=美浦, 2=栗東, 3=地方, 4=海外）",
+
+    # === 服色 ===
+    "Fukusyoku": "服色標示（服色の説明）",
+
+    # === 斤量 ===
+    "Futan": "斤量（kg、55.0のように小数点1桁）",
+    "FutanBefore": "斤量（変更前）",
+
+    # === ブリンカー ===
+    "Blinker": "ブリンカー使用区分（0=使用なし, 1=使用）",
+
+    # === 馬体重 ===
+    "BaTaijyu": "馬体重（kg）",
+
+    # === 増減 ===
+    "ZogenFugo": "馬体重増減記号（+, -, ±）",
+    "ZogenSa": "馬体重増減差（kg、前走比）",
+
+    # === 異常区分 ===
+    "IJyoCD": "異常区分コード（1=取消, 2=除外, 3=中止, 4=失格, 5=降着, 6=再騎乗）",
+
+    # === 着順 ===
+    "NyusenJyuni": "入線順位（入線時の順位）",
+    "KakuteiJyuni": "確定着順（最終確定順位、0=着外）",
+
+    # === 同着 ===
+    "DochakuKubun": "同着区分（1=単独, 2=同着）",
+    "DochakuTosu": "同着頭数",
+
+    # === タイム ===
+    "Time": "走破タイム（MMSSf形式、例：010435=1分04秒35、0=計測なし）",
+
+    # === 着差 ===
+    "ChakusaCD": "着差コード（前走との着差、1=ハナ, 2=クビ, 3=1/2馬身, 4=3/4馬身, 5=1馬身, ...）",
+    "ChakusaCDP": "着差コード（前々走との着差）",
+    "ChakusaCDPP": "着差コード（3走前との着差）",
+
+    # === オッズ ===
+    "Odds": "単勝オッズ（確定オッズ）",
+    "OddsWin": "単勝オッズ",
+    "OddsPlace": "複勝オッズ",
+
+    # === 人気 ===
+    "Ninki": "人気順位（確定後、1=1番人気）",
+
+    # === 賞金（単体） ===
+    "Honsyokin": "獲得本賞金（単位：万円）",
+    "Fukasyokin": "獲得付加賞金（単位：万円）",
+
+    # === タイム差 ===
+    "TimeDiff": "1着馬とのタイム差（0.1秒単位）",
+
+    # === 客質区分 ===
+    "KyakusituKubun": "客質区分",
+
+    # === 初胎 ===
+    "Syotai": "初胎（初仔の場合に「初」）",
+
+    # === レース数 ===
+    "RaceCount": "総レース出走回数",
+
+    # === 削除区分 ===
+    "DelKubun": "削除区分（1=抹消）",
+
+    # === 日付関連 ===
+    "RegDate": "登録年月日（YYYYMMDD形式）",
+    "DelDate": "抹消年月日（YYYYMMDD形式）",
+    "BirthDate": "生年月日（YYYYMMDD形式またはYYYY形式）",
+
+    # === 在厩フラグ ===
+    "ZaikyuFlag": "在厩フラグ（1=在厩中）",
+
+    # === 発行日・作成時刻 ===
+    "IssueDate": "発行年月日（YYYYMMDD形式）",
+    "MakeHM": "作成時分（HHMM形式）",
+
+    # === 騎手資格 ===
+    "SikakuCD": "騎手資格コード",
+
+    # === 票数テーブル（H1-H6）用カラム ===
+    # 発売フラグ
+    "HatubaiFlag": "発売フラグ（0=発売なし, 1=発売あり）",
+
+    # 単勝票数 (H1)
+    "TansyoUmaban": "単勝馬番",
+    "TansyoHyo": "単勝票数",
+    "TansyoNinki": "単勝人気順",
+    "TansyoHyoTotal": "単勝票数合計",
+    "TansyoHenkanHyoTotal": "単勝返還票数合計",
+
+    # 複勝票数 (H1)
+    "FukusyoUmaban": "複勝馬番",
+    "FukusyoHyo": "複勝票数",
+    "FukusyoNinki": "複勝人気順",
+    "FukusyoHyoTotal": "複勝票数合計",
+    "FukusyoHenkanHyoTotal": "複勝返還票数合計",
+
+    # 馬連票数 (H2)
+    "UmarenKumi": "馬連組番（4桁：上位2桁=1頭目馬番、下位2桁=2頭目馬番）",
+    "UmarenHyo": "馬連票数",
+    "UmarenNinki": "馬連人気順",
+    "UmarenHyoTotal": "馬連票数合計",
+    "UmarenHenkanHyoTotal": "馬連返還票数合計",
+
+    # ワイド票数 (H3)
+    "WideKumi": "ワイド組番（4桁：上位2桁=1頭目馬番、下位2桁=2頭目馬番）",
+    "WideHyo": "ワイド票数",
+    "WideNinki": "ワイド人気順",
+    "WideHyoTotal": "ワイド票数合計",
+    "WideHenkanHyoTotal": "ワイド返還票数合計",
+
+    # 馬単票数 (H4)
+    "UmatanKumi": "馬単組番（4桁：上位2桁=1着馬番、下位2桁=2着馬番）",
+    "UmatanHyo": "馬単票数",
+    "UmatanNinki": "馬単人気順",
+    "UmatanHyoTotal": "馬単票数合計",
+    "UmatanHenkanHyoTotal": "馬単返還票数合計",
+
+    # 3連複票数 (H5)
+    "SanrenfukuKumi": "3連複組番（6桁：各2桁で3頭の馬番）",
+    "SanrenfukuHyo": "3連複票数",
+    "SanrenfukuNinki": "3連複人気順",
+    "SanrenfukuHyoTotal": "3連複票数合計",
+    "SanrenfukuHenkanHyoTotal": "3連複返還票数合計",
+
+    # 3連単票数 (H6)
+    "SanrentanKumi": "3連単組番（6桁：各2桁で1着・2着・3着の馬番）",
+    "SanrentanHyo": "3連単票数",
+    "SanrentanNinki": "3連単人気順",
+    "SanrentanHyoTotal": "3連単票数合計",
+    "SanrentanHenkanHyoTotal": "3連単返還票数合計",
+
+    # === オッズテーブル用フラグ ===
+    "TanFlag": "単勝発売フラグ（0=発売なし, 1=発売あり）",
+    "FukuFlag": "複勝発売フラグ（0=発売なし, 1=発売あり）",
+    "WakuFlag": "枠連発売フラグ（0=発売なし, 1=発売あり）",
+    "UmarenFlag": "馬連発売フラグ（0=発売なし, 1=発売あり）",
+    "WideFlag": "ワイド発売フラグ（0=発売なし, 1=発売あり）",
+    "UmatanFlag": "馬単発売フラグ（0=発売なし, 1=発売あり）",
+    "SanrenpukuFlag": "3連複発売フラグ（0=発売なし, 1=発売あり）",
+    "SanrentanFlag": "3連単発売フラグ（0=発売なし, 1=発売あり）",
+
+    # オッズ値
+    "TanOdds": "単勝オッズ",
+    "FukuOddsMin": "複勝オッズ（最小値）",
+    "FukuOddsMax": "複勝オッズ（最大値）",
+    "WakuOdds": "枠連オッズ",
+    "UmarenOdds": "馬連オッズ",
+    "WideOddsMin": "ワイドオッズ（最小値）",
+    "WideOddsMax": "ワイドオッズ（最大値）",
+    "UmatanOdds": "馬単オッズ",
+    "SanrenpukuOdds": "3連複オッズ",
+    "SanrentanOdds": "3連単オッズ",
+
+    # === その他の共通カラム ===
+    "HappyoTime": "発表時刻（HHmm形式）",
+    "HenkoID": "変更ID",
+    "SetYear": "設定年（YYYY形式）",
+    "HonSyokinTotal": "本賞金合計（単位：万円）",
+    "FukaSyokin": "付加賞金（単位：万円）",
+    "ChakuKaisu": "着回数",
+    "YoubiCD": "曜日コード（0=日, 1=月, 2=火, 3=水, 4=木, 5=金, 6=土）",
+    "TokuNum": "特別競走番号",
+    "HondaiEng": "レース名（英語）",
+    "FukudaiEng": "副題（英語）",
+    "KakkoEng": "カッコ内表記（英語）",
+    "Hondai": "レース名（正式名称）",
+    "Fukudai": "副題",
+    "Kakko": "カッコ内表記",
+
+    # === 繁殖・血統関連 ===
+    "HansyokuNum": "繁殖登録番号",
+    "FHansyokuNum": "父の繁殖登録番号",
+    "MHansyokuNum": "母の繁殖登録番号",
+    "KeitoId": "系統ID",
+    "KeitoName": "系統名",
+    "KeitoEx": "系統説明",
+    "MochiKubun": "持込区分",
+    "ImportYear": "輸入年",
+    "SankuMochiKubun": "産駒持込区分",
+    "FNum": "父番号",
+    "BirthYear": "生年",
+
+    # === コース・馬場情報 ===
+    "Course": "コース",
+    "CourseEx": "コース説明",
+    "KaishuDate": "開催日",
+    "TresenKubun": "トレセン区分（1=美浦, 2=栗東）",
+    "ChokyoDate": "調教日",
+    "ChokyoTime": "調教時刻",
+    "BabaMawari": "馬場回り",
+    "HaronTime10Total": "10ハロンタイム合計",
+
+    # === 売上・販売情報 ===
+    "SaleHostName": "販売元名",
+    "SaleName": "販売名",
+    "SaleCode": "販売コード",
+    "Price": "価格",
+    "FromDate": "開始日",
+    "ToDate": "終了日",
+    "Address": "住所",
+    "Num": "番号",
+
+    # === タイムマスタ ===
+    "TMScore": "タイムスコア",
+
+    # === 変更理由 ===
+    "HenkouJiyuCD": "変更事由コード",
+    "RecInfoKubun": "レコード情報区分",
+
+    # === 賞金詳細 ===
+    "HeichiHonsyokinTotal": "平地本賞金合計（単位：万円）",
+    "SyogaiHonsyokinTotal": "障害本賞金合計（単位：万円）",
+    "HonSyokinHeichi": "本賞金・平地（単位：万円）",
+    "HonSyokinSyogai": "本賞金・障害（単位：万円）",
+    "FukaSyokinHeichi": "付加賞金・平地（単位：万円）",
+    "FukaSyokinSyogai": "付加賞金・障害（単位：万円）",
+
+    # === オッズテーブル共通 ===
+    "Kumi": "組番（馬番の組み合わせ）",
+    "Vote": "票数",
+    "OddsLow": "オッズ（下限）",
+    "OddsHigh": "オッズ（上限）",
+    "WakurenFlag": "枠連発売フラグ（0=発売なし, 1=発売あり）",
+    "FukuChakubaraiKey": "複勝着払いキー",
+    "FukuChakuBaraiKey": "複勝着払いキー",
+    "TanNinki": "単勝人気順",
+    "TanUma": "単勝馬番",
+    "TanHyo": "単勝票数",
+    "FukuUma": "複勝馬番",
+    "FukuHyo": "複勝票数",
+    "crlf": "改行コード",
+
+    # === コース変更情報 ===
+    "AtoKyori": "変更後距離（メートル）",
+    "AtoTruckCD": "変更後トラックコード",
+    "AtoTrackCD": "変更後トラックコード",
+    "MaeKyori": "変更前距離（メートル）",
+    "MaeTruckCD": "変更前トラックコード",
+    "MaeTrackCD": "変更前トラックコード",
+    "JiyuCD": "事由コード",
+    "AtoFutan": "変更後斤量",
+    "MaeFutan": "変更前斤量",
+    "AtoJi": "変更後時",
+    "AtoFun": "変更後分",
+    "MaeJi": "変更前時",
+    "MaeFun": "変更前分",
+
+    # === 競走条件 ===
+    "Kubun": "区分",
+    "Nkai": "第N回",
+    "SyubetuCD": "競走種別コード（11=芝, 21=ダート, 23=障害芝, 24=障害ダート）",
+    "SyubetuCD_TrackCD": "競走種別・トラックコード",
+    "RecKubun": "レコード区分",
+    "RecTime": "レコードタイム",
+
+    # === 天候・馬場状態 ===
+    "TenkoState": "天候状態",
+    "SibaBabaState": "芝馬場状態",
+    "DirtBabaState": "ダート馬場状態",
+
+    # === 出走関連 ===
+    "SyussoKubun": "出走区分",
+    "JyogaiStateKubun": "除外状態区分",
+
+    # === 繁殖関連 ===
+    "HansyokuFNum": "父の繁殖番号",
+    "HansyokuMNum": "母の繁殖番号",
+
+    # === 着払い情報 ===
+    "HenkanUma": "返還馬番情報",
+
+    # === 9番目のフラグ（WIN5用） ===
+    "FuseirituFlag9": "WIN5不成立フラグ（0=成立, 1=不成立）",
+    "TokubaraiFlag9": "WIN5特払フラグ（0=通常, 1=特払）",
+    "HenkanFlag9": "WIN5返還フラグ（0=返還なし, 1=返還あり）",
+
+    # === 血統情報（拡張） ===
+    "Ketto3InfoBamei7": "父父父の馬名",
+    "Ketto3InfoBamei8": "父父母の馬名",
+    "Ketto3InfoBamei9": "父母父の馬名",
+    "Ketto3InfoBamei10": "父母母の馬名",
+    "Ketto3InfoBamei11": "母父父の馬名",
+    "Ketto3InfoBamei12": "母父母の馬名",
+    "Ketto3InfoBamei13": "母母父の馬名",
+    "Ketto3InfoBamei14": "母母母の馬名",
+
+    # === 賞金詳細（拡張） ===
+    "HeichiFukasyokinTotal": "平地付加賞金合計（単位：万円）",
+    "SyogaiFukasyokinTotal": "障害付加賞金合計（単位：万円）",
+    "HeichiSyutokuTotal": "平地取得賞金合計（単位：万円）",
+    "SyogaiSyutokuTotal": "障害取得賞金合計（単位：万円）",
+
+    # === 出馬表の対戦情報 ===
+    "KettoNum1": "対戦相手の血統登録番号（1着馬は2着馬、2着以下は1着馬）",
+    "Bamei1": "対戦相手の馬名（1着馬は2着馬、2着以下は1着馬）",
+
+    # === NL_RA: 競走記号コード ===
+    "KigoCD": "競走記号コード（000=一般, 001=指定, 002=見習騎手, 010=馬齢戦など）",
+
+    # === NL_RA: 重量種別コード ===
+    "JyuryoCD": "重量種別コード（1=ハンデ, 2=別定, 3=馬齢, 4=定量）",
+
+    # === NL_RA: グレードコード ===
+    # === NL_CK: 着度数詳細（芝・ダート・障害・回り・馬場状態別） ===
+    "TotalChakuCount": "総合着回数",
+    "ChuoChakuCount": "中央着回数",
+
+    # 芝・ダート・障害の直進/右回り/左回り
+    "SibaChoChaku": "芝直線コース着回数",
+    "SibaMigiChaku": "芝右回り着回数",
+    "SibaHidariChaku": "芝左回り着回数",
+    "DirtChoChaku": "ダート直線コース着回数",
+    "DirtMigiChaku": "ダート右回り着回数",
+    "DirtHidariChaku": "ダート左回り着回数",
+    "SyogaiChaku": "障害着回数",
+
+    # 馬場状態別着回数（芝・ダート・障害）
+    "SibaRyoChaku": "芝良馬場着回数",
+    "SibaYayaChaku": "芝稍重着回数",
+    "SibaOmoChaku": "芝重馬場着回数",
+    "SibaFuryoChaku": "芝不良馬場着回数",
+    "SibaFuChaku": "芝不良馬場着回数",
+    "DirtRyoChaku": "ダート良馬場着回数",
+    "DirtYayaChaku": "ダート稍重着回数",
+    "DirtOmoChaku": "ダート重馬場着回数",
+    "DirtFuryoChaku": "ダート不良馬場着回数",
+    "DirtFuChaku": "ダート不良馬場着回数",
+    "SyogaiRyoChaku": "障害良馬場着回数",
+    "SyogaiYayaChaku": "障害稍重着回数",
+    "SyogaiOmoChaku": "障害重馬場着回数",
+    "SyogaiFuryoChaku": "障害不良馬場着回数",
+    "SyogaiFuChaku": "障害不良馬場着回数",
+
+    # 季節別着回数
+    "SpringChaku": "春季着回数",
+    "SummerChaku": "夏季着回数",
+    "AutumnChaku": "秋季着回数",
+    "WinterChaku": "冬季着回数",
+
+    # 距離別着回数（詳細）
+    "Dist1000Chaku": "1000m以下着回数",
+    "Dist1200Chaku": "1200m着回数",
+    "Dist1400Chaku": "1400m着回数",
+    "Dist1600Chaku": "1600m着回数",
+    "Dist1800Chaku": "1800m着回数",
+    "Dist2000Chaku": "2000m着回数",
+    "Dist2200Chaku": "2200m着回数",
+    "Dist2400Chaku": "2400m着回数",
+    "Dist2500Chaku": "2500m以上着回数",
+
+    # === NL_CH: 賞金・着度数詳細（H=平地, S=障害） ===
+    "HonSyokinH": "本賞金・平地（単位：千円）",
+    "HonSyokinS": "本賞金・障害（単位：千円）",
+    "FukaSyokinH": "付加賞金・平地（単位：千円）",
+    "FukaSyokinS": "付加賞金・障害（単位：千円）",
+    "ChakuKaisuH": "着回数・平地",
+    "ChakuKaisuS": "着回数・障害",
+
+    # === NL_HR/RT_HR: 払戻詳細（単体カラム） ===
+    "TanUmaban": "単勝馬番",
+    "TanPay": "単勝払戻金（円）",
+    "FukuUmaban": "複勝馬番",
+    "FukuPay": "複勝払戻金（円）",
+    "FukuNinki": "複勝人気順",
+    "WakuKumi": "枠連組番",
+    "WakuPay": "枠連払戻金（円）",
+    "WakuNinki": "枠連人気順",
+    "UmarenPay": "馬連払戻金（円）",
+    "WidePay": "ワイド払戻金（円）",
+    "UmatanPay": "馬単払戻金（円）",
+    "SanrenfukuPay": "3連複払戻金（円）",
+    "SanrentanPay": "3連単払戻金（円）",
+
+    # === NL_H1: 票数詳細（単体カラム） ===
+    "WakuHyo": "枠連票数",
+    "TanHyoTotal": "単勝票数合計",
+    "FukuHyoTotal": "複勝票数合計",
+    "WakuHyoTotal": "枠連票数合計",
+    "TanHenkanHyoTotal": "単勝返還票数合計",
+    "FukuHenkanHyoTotal": "複勝返還票数合計",
+    "WakuHenkanHyoTotal": "枠連返還票数合計",
+
+    # === NL_O1: オッズ詳細（単体カラム） ===
+    "FukuOddsLow": "複勝オッズ（下限）",
+    "FukuOddsHigh": "複勝オッズ（上限）",
+    "WakurenOdds": "枠連オッズ",
+    "WakurenNinki": "枠連人気順",
+    "TanVote": "単勝票数",
+    "FukuVote": "複勝票数",
+    "WakurenVote": "枠連票数",
+
+    # === NL_RA: ラップ・コーナー情報（単体カラム） ===
+    "LapTime": "ラップタイム",
+    "Haron3F": "前半3ハロンタイム",
+    "Haron4F": "前半4ハロンタイム",
+    "Haron3L": "上がり3ハロンタイム",
+    "Haron4L": "上がり4ハロンタイム",
+    "Corner": "コーナー位置",
+    "Syukaisu": "周回数",
+    "TsukaJyuni": "通過順位",
+    "Crlf": "改行コード",
+
+    # === NL_TK: 特別レース情報 ===
+    "RaceMeiKubun": "レース名区分",
+    "JyusyoKaiji": "重賞回次",
+    "CourseKubun": "コース区分",
+    "HandeHappyoDate": "ハンデ発表日",
+    "RenbanNum": "連番番号",
+    "Koryu": "交流区分",
+    "RecordBreak": "レコード更新フラグ",
+
+    # === NL_WE: 天候・馬場状態（2回目発表） ===
+    "TenkoState2": "天候状態（2回目発表）",
+    "SibaBabaState2": "芝馬場状態（2回目発表）",
+    "DirtBabaState2": "ダート馬場状態（2回目発表）",
+
+    # === NL_WF: WIN5情報 ===
+    "HatubaiHyosu": "発売票数",
+    "YukoHyosu": "有効票数",
+    "HenkanFlag": "返還フラグ",
+    "FuseirituFlag": "不成立フラグ",
+    "TekichuNasiFlag": "的中なしフラグ",
+    "CarryOverStart": "キャリーオーバー開始額",
+    "CarryOverBalance": "キャリーオーバー残高",
+    "PayJyushosiki": "払戻重勝式",
+    "TekichuHyosu": "的中票数",
+
+    # === NL_CK: その他詳細情報 ===
+    "KyakusituKeiko": "客質傾向（脚質傾向）",
+    "RegisteredRaceCount": "登録レース数",
+    "KisyuResultsInfo": "騎手成績情報",
+    "ChokyosiResultsInfo": "調教師成績情報",
+    "BanusiResultsInfo": "馬主成績情報",
+    "BreederResultsInfo": "生産者成績情報",
+}
+
+# === 払戻金詳細（PayTansyo, PayFukusyo, PayWakuren, PayUmaren, PayWide, PayUmatan, Pay3fukutan, Pay3tan, PayWin5, PayReserved） ===
+PAY_PATTERNS = [
+    (prefix, ticket_name, re.compile(rf'{prefix}(\d+)(\w+)'))
+    for prefix, ticket_name in [
+        ("PayTansyo", "単勝"),
+        ("PayFukusyo", "複勝"),
+        ("PayWakuren", "枠連"),
+        ("PayUmaren", "馬連"),
+        ("PayWide", "ワイド"),
+        ("PayUmatan", "馬単"),
+        ("Pay3fukutan", "3連複"),
+        ("Pay3tan", "3連単"),
+        ("PayWin5", "WIN5"),
+        ("PayReserved", "予約枠"),
+    ]
+]
+
+# === 票数配列 ===
+# TansyoInfo, FukusyoInfo等
+HYO_PATTERNS = [
+    (re.compile(r'TansyoInfo(\d+)(.+)'), "単勝"),
+    (re.compile(r'FukusyoInfo(\d+)(.+)'), "複勝"),
+    (re.compile(r'UmarenInfo(\d+)(.+)'), "馬連"),
+    (re.compile(r'WideInfo(\d+)(.+)'), "ワイド"),
+    (re.compile(r'UmatanInfo(\d+)(.+)'), "馬単"),
+    (re.compile(r'SanrenfukuInfo(\d+)(.+)'), "3連複"),
+    (re.compile(r'SanrentanInfo(\d+)(.+)'), "3連単"),
+]
+
+# === NL_CK: 競馬場別着回数（SapporoSibaChaku等） ===
+JYO_TRACK_PATTERNS = [
+    (re.compile(r'Sapporo(Siba|Dirt|Syogai)Chaku'), "札幌"),
+    (re.compile(r'Hakodate(Siba|Dirt|Syogai)Chaku'), "函館"),
+    (re.compile(r'Fukushima(Siba|Dirt|Syogai)Chaku'), "福島"),
+    (re.compile(r'Niigata(Siba|Dirt|Syogai)Chaku'), "新潟"),
+    (re.compile(r'Tokyo(Siba|Dirt|Syogai)Chaku'), "東京"),
+    (re.compile(r'Nakayama(Siba|Dirt|Syogai)Chaku'), "中山"),
+    (re.compile(r'Chukyo(Siba|Dirt|Syogai)Chaku'), "中京"),
+    (re.compile(r'Kyoto(Siba|Dirt|Syogai)Chaku'), "京都"),
+    (re.compile(r'Hanshin(Siba|Dirt|Syogai)Chaku'), "阪神"),
+    (re.compile(r'Kokura(Siba|Dirt|Syogai)Chaku'), "小倉"),
+]
+
+
+# パターン規則から説明を生成する（EXACT_DESCRIPTIONS にないカラム用）
+def _describe_by_pattern(table_name: str, col: str) -> str:
+    # === 識別子（テーブルによって異なるもの） ===
     if col == "JyoCD" or col == "idJyoCD":
         if table_name.endswith("_NAR"):
             return "地方競馬場コード（30=門別, 35=盛岡, 36=水沢, 42=浦和, 43=船橋, 44=大井, 45=川崎, 46=金沢, 47=笠松, 48=名古屋, 49=園田, 50=姫路, 53=高知, 54=佐賀）"
         return "競馬場コード（01=札幌, 02=函館, 03=福島, 04=新潟, 05=東京, 06=中山, 07=中京, 08=京都, 09=阪神, 10=小倉）"
-    if col == "Kaiji" or col == "idKaiji":
-        return "開催回次（第何回開催か）"
-    if col == "Nichiji" or col == "idNichiji":
-        return "開催日次（何日目か）"
-    if col == "RaceNum" or col == "idRaceNum":
-        return "レース番号（1-12）"
-    if col == "idUmaban" or col == "Umaban":
-        return "馬番"
 
     # === レース情報（RaceInfo*） ===
     if col.startswith("RaceInfo"):
@@ -78,12 +612,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         if "Nkai" in col:
             return "第N回（回数）"
 
-    # === グレード ===
-    if col == "GradeCD":
-        return "グレードコード（A=G1, B=G2, C=G3, D=リステッド, E=オープン特別, F=1600万下, G=1000万下, H=500万下, I=未勝利, J=新馬）"
-    if col == "GradeCDBefore":
-        return "グレードコード（変更前）"
-
     # === 条件情報（JyokenInfo*） ===
     if col.startswith("JyokenInfo"):
         if "SyubetuCD" in col:
@@ -95,27 +623,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         if "JyokenCD" in col:
             return "競走条件コード"
 
-    if col == "JyokenName":
-        return "競走条件名"
-
-    # === 距離（Kyori*） ===
-    if col == "Kyori":
-        return "距離（メートル単位、例：1600, 2000）"
-    if col == "KyoriBefore":
-        return "距離（変更前、メートル単位）"
-
-    # === トラック（Track*） ===
-    if col == "TrackCD":
-        return "トラックコード（10=芝・右, 11=芝・左, 18=芝・直, 20=ダート・右, 21=ダート・左, 23=ダート・直, 29=障害）"
-    if col == "TrackCDBefore":
-        return "トラックコード（変更前）"
-
-    # === コース区分 ===
-    if col == "CourseKubunCD":
-        return "コース区分コード"
-    if col == "CourseKubunCDBefore":
-        return "コース区分コード（変更前）"
-
     # === 賞金（配列パターン） ===
     # 本賞金（0=1着, 1=2着, ...）
     if col.startswith("Honsyokin") and col[-1].isdigit():
@@ -139,25 +646,13 @@ def generate_column_description(table_name: str, column_name: str) -> str:
             if place:
                 return f"付加賞金{int(place.group(1))+1}着（単位：万円）"
 
-    # === 発走時刻 ===
-    if col == "HassoTime":
-        return "発走時刻（HHmm形式、例：1530=15時30分）"
-    if col == "HassoTimeBefore":
-        return "発走時刻（変更前）"
-
-    # === 頭数 ===
-    if col == "TorokuTosu":
-        return "登録頭数"
-    if col == "SyussoTosu":
-        return "出走頭数"
-    if col == "NyusenTosu":
-        return "入線頭数"
-
     # === 天候・馬場 ===
     if "TenkoCD" in col:
         return "天候コード（1=晴, 2=曇, 3=雨, 4=小雨, 5=雪, 6=小雪）"
+
     if "SibaBabaCD" in col:
         return "芝馬場状態コード（1=良, 2=稍重, 3=重, 4=不良）"
+
     if "DirtBabaCD" in col:
         return "ダート馬場状態コード（1=良, 2=稍重, 3=重, 4=不良）"
 
@@ -166,10 +661,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         lap_num = int(col[7:])
         return f"ラップタイム{lap_num+1}ハロン目（0.1秒単位）"
 
-    # === 障害マイルタイム ===
-    if col == "SyogaiMileTime":
-        return "障害マイルタイム（障害レースの1マイル通過タイム）"
-
     # === ハロンタイム ===
     if col.startswith("HaronTime"):
         if "S3" in col:
@@ -194,83 +685,38 @@ def generate_column_description(table_name: str, column_name: str) -> str:
             if info_type == "Jyuni":
                 return f"{corner_num}コーナー通過順位"
 
-    # === レコード更新 ===
-    if col == "RecordUpKubun":
-        return "レコード更新区分（1=レコード, 2=タイレコード）"
-
-    # === 出馬表・馬情報 ===
-    if col == "Wakuban":
-        return "枠番"
-    if col == "KettoNum":
-        return "血統登録番号（10桁、馬の一意識別子）"
-    if col == "Bamei":
-        return "馬名"
-    if col == "BameiKana":
-        return "馬名カナ"
-    if col == "BameiEng":
-        return "馬名英字"
-
     # === 馬記号 ===
     if "UmaKigoCD" in col:
         return "馬記号コード（[地]=地方馬, [外]=外国馬, [抽]=抽選馬など）"
 
-    # === 性別 ===
-    if col == "SexCD":
-        return "性別コード（1=牡, 2=牝, 3=セン）"
-
-    # === 品種 ===
-    if col == "HinsyuCD":
-        return "品種コード（1=サラブレッド系, 2=アングロアラブ系）"
-
-    # === 毛色 ===
-    if col == "KeiroCD":
-        return "毛色コード（1=栗, 2=栃栗, 3=鹿, 4=黒鹿, 5=青鹿, 6=青, 7=芦, 8=栗粕, 9=鹿粕, 10=青粕, 11=白）"
-
-    # === 馬齢 ===
-    if col == "Barei":
-        return "馬齢（歳）"
-
-    # === 東西所属 ===
-    if col == "TozaiCD":
-        return "東西所属コード（1=美浦, 2=栗東, 3=地方, 4=海外）"
-
     # === 調教師 ===
     if "ChokyosiCode" in col:
         return "調教師コード"
+
     if "ChokyosiRyakusyo" in col:
         return "調教師略称"
+
     if "ChokyosiName" in col:
         return "調教師名"
 
     # === 馬主 ===
     if "BanusiCode" in col:
         return "馬主コード"
+
     if "BanusiName" in col:
         return "馬主名"
 
-    # === 服色 ===
-    if col == "Fukusyoku":
-        return "服色標示（服色の説明）"
-
-    # === 斤量 ===
-    if col == "Futan":
-        return "斤量（kg、55.0のように小数点1桁）"
-    if col == "FutanBefore":
-        return "斤量（変更前）"
-
-    # === ブリンカー ===
-    if col == "Blinker":
-        return "ブリンカー使用区分（0=使用なし, 1=使用）"
-
     # === 騎手 ===
     if "KisyuCode" in col:
         if "Before" in col:
             return "騎手コード（変更前）"
         return "騎手コード"
+
     if "KisyuRyakusyo" in col:
         if "Before" in col:
             return "騎手略称（変更前）"
         return "騎手略称"
+
     if "KisyuName" in col:
         return "騎手名"
 
@@ -280,67 +726,11 @@ def generate_column_description(table_name: str, column_name: str) -> str:
             return "見習い区分（変更前、☆, ▲, △, ●）"
         return "見習い区分（☆=☆減3kg, ▲=▲減2kg, △=△減1kg, ●=練習生）"
 
-    # === 馬体重 ===
-    if col == "BaTaijyu":
-        return "馬体重（kg）"
-
-    # === 増減 ===
-    if col == "ZogenFugo":
-        return "馬体重増減記号（+, -, ±）"
-    if col == "ZogenSa":
-        return "馬体重増減差（kg、前走比）"
-
-    # === 異常区分 ===
-    if col == "IJyoCD":
-        return "異常区分コード（1=取消, 2=除外, 3=中止, 4=失格, 5=降着, 6=再騎乗）"
-
-    # === 着順 ===
-    if col == "NyusenJyuni":
-        return "入線順位（入線時の順位）"
-    if col == "KakuteiJyuni":
-        return "確定着順（最終確定順位、0=着外）"
-
-    # === 同着 ===
-    if col == "DochakuKubun":
-        return "同着区分（1=単独, 2=同着）"
-    if col == "DochakuTosu":
-        return "同着頭数"
-
-    # === タイム ===
-    if col == "Time":
-        return "走破タイム（MMSSf形式、例：010435=1分04秒35、0=計測なし）"
-
-    # === 着差 ===
-    if col == "ChakusaCD":
-        return "着差コード（前走との着差、1=ハナ, 2=クビ, 3=1/2馬身, 4=3/4馬身, 5=1馬身, ...）"
-    if col == "ChakusaCDP":
-        return "着差コード（前々走との着差）"
-    if col == "ChakusaCDPP":
-        return "着差コード（3走前との着差）"
-
     # === コーナー通過順位（Jyuni1c～4c） ===
     if re.match(r'Jyuni\dc', col):
         corner = col[5]
         return f"{corner}コーナー通過順位"
 
-    # === オッズ ===
-    if col == "Odds":
-        return "単勝オッズ（確定オッズ）"
-    if col == "OddsWin":
-        return "単勝オッズ"
-    if col == "OddsPlace":
-        return "複勝オッズ"
-
-    # === 人気 ===
-    if col == "Ninki":
-        return "人気順位（確定後、1=1番人気）"
-
-    # === 賞金（単体） ===
-    if col == "Honsyokin":
-        return "獲得本賞金（単位：万円）"
-    if col == "Fukasyokin":
-        return "獲得付加賞金（単位：万円）"
-
     # === 着順情報（ChakuUmaInfo） ===
     if col.startswith("ChakuUmaInfo"):
         match = re.search(r'ChakuUmaInfo(\d+)(\w+)', col)
@@ -352,10 +742,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
             if info_type == "Bamei":
                 return f"{place}着馬の馬名"
 
-    # === タイム差 ===
-    if col == "TimeDiff":
-        return "1着馬とのタイム差（0.1秒単位）"
-
     # === DM（デジタルメモ） ===
     if col.startswith("DM"):
         if col == "DMKubun":
@@ -369,10 +755,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         if col == "DMJyuni":
             return "デジタルメモ着順"
 
-    # === 客質区分 ===
-    if col == "KyakusituKubun":
-        return "客質区分"
-
     # === 血統情報（Ketto3Info） ===
     if col.startswith("Ketto3Info"):
         match = re.search(r'Ketto3Info(\d+)(\w+)', col)
@@ -394,6 +776,7 @@ def generate_column_description(table_name: str, column_name: str) -> str:
     # === 生産者 ===
     if "BreederCode" in col:
         return "生産者コード"
+
     if "BreederName" in col:
         return "生産者名"
 
@@ -401,10 +784,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
     if "SanchiName" in col:
         return "産地名"
 
-    # === 初胎 ===
-    if col == "Syotai":
-        return "初胎（初仔の場合に「初」）"
-
     # === 累計賞金 ===
     if col.startswith("Ruikei"):
         if "Honsyo" in col:
@@ -513,40 +892,10 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         elif num == 3:
             return "客質（その他区分）"
 
-    # === レース数 ===
-    if col == "RaceCount":
-        return "総レース出走回数"
-
-    # === 削除区分 ===
-    if col == "DelKubun":
-        return "削除区分（1=抹消）"
-
-    # === 日付関連 ===
-    if col == "RegDate":
-        return "登録年月日（YYYYMMDD形式）"
-    if col == "DelDate":
-        return "抹消年月日（YYYYMMDD形式）"
-    if col == "BirthDate":
-        return "生年月日（YYYYMMDD形式またはYYYY形式）"
-
-    # === 在厩フラグ ===
-    if col == "ZaikyuFlag":
-        return "在厩フラグ（1=在厩中）"
-
     # === リザーブ ===
     if col.startswith("reserved") or col == "Reserved":
         return "（予約領域）"
 
-    # === 発行日・作成時刻 ===
-    if col == "IssueDate":
-        return "発行年月日（YYYYMMDD形式）"
-    if col == "MakeHM":
-        return "作成時分（HHMM形式）"
-
-    # === 騎手資格 ===
-    if col == "SikakuCD":
-        return "騎手資格コード"
-
     # === 調教師の最近重賞成績（SaikinJyusyo0-9） ===
     if col.startswith("SaikinJyusyo"):
         match = re.search(r'SaikinJyusyo(\d+)(\w+)', col)
@@ -750,23 +1099,9 @@ def generate_column_description(table_name: str, column_name: str) -> str:
                 elif place < len(place_names):
                     return f"{year_label}の距離区分{kyori_idx}{place_names[place]}回数"
 
-    # === 払戻金詳細（PayTansyo, PayFukusyo, PayWakuren, PayUmaren, PayWide, PayUmatan, Pay3fukutan, Pay3tan, PayWin5, PayReserved） ===
-    pay_patterns = [
-        ("PayTansyo", "単勝"),
-        ("PayFukusyo", "複勝"),
-        ("PayWakuren", "枠連"),
-        ("PayUmaren", "馬連"),
-        ("PayWide", "ワイド"),
-        ("PayUmatan", "馬単"),
-        ("Pay3fukutan", "3連複"),
-        ("Pay3tan", "3連単"),
-        ("PayWin5", "WIN5"),
-        ("PayReserved", "予約枠")
-    ]
-
-    for prefix, ticket_name in pay_patterns:
+    for prefix, ticket_name, pattern in PAY_PATTERNS:
         if col.startswith(prefix):
-            match = re.search(rf'{prefix}(\d+)(\w+)', col)
+            match = pattern.search(col)
             if match:
                 num = int(match.group(1))
                 field = match.group(2)
@@ -780,135 +1115,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
                 elif field == "Ninki":
                     return f"{ticket_name}払戻{num+1}の人気順"
 
-    # === 票数テーブル（H1-H6）用カラム ===
-    # 発売フラグ
-    if col == "HatubaiFlag":
-        return "発売フラグ（0=発売なし, 1=発売あり）"
-
-    # 単勝票数 (H1)
-    if col == "TansyoUmaban":
-        return "単勝馬番"
-    if col == "TansyoHyo":
-        return "単勝票数"
-    if col == "TansyoNinki":
-        return "単勝人気順"
-    if col == "TansyoHyoTotal":
-        return "単勝票数合計"
-    if col == "TansyoHenkanHyoTotal":
-        return "単勝返還票数合計"
-
-    # 複勝票数 (H1)
-    if col == "FukusyoUmaban":
-        return "複勝馬番"
-    if col == "FukusyoHyo":
-        return "複勝票数"
-    if col == "FukusyoNinki":
-        return "複勝人気順"
-    if col == "FukusyoHyoTotal":
-        return "複勝票数合計"
-    if col == "FukusyoHenkanHyoTotal":
-        return "複勝返還票数合計"
-
-    # 馬連票数 (H2)
-    if col == "UmarenKumi":
-        return "馬連組番（4桁：上位2桁=1頭目馬番、下位2桁=2頭目馬番）"
-    if col == "UmarenHyo":
-        return "馬連票数"
-    if col == "UmarenNinki":
-        return "馬連人気順"
-    if col == "UmarenHyoTotal":
-        return "馬連票数合計"
-    if col == "UmarenHenkanHyoTotal":
-        return "馬連返還票数合計"
-
-    # ワイド票数 (H3)
-    if col == "WideKumi":
-        return "ワイド組番（4桁：上位2桁=1頭目馬番、下位2桁=2頭目馬番）"
-    if col == "WideHyo":
-        return "ワイド票数"
-    if col == "WideNinki":
-        return "ワイド人気順"
-    if col == "WideHyoTotal":
-        return "ワイド票数合計"
-    if col == "WideHenkanHyoTotal":
-        return "ワイド返還票数合計"
-
-    # 馬単票数 (H4)
-    if col == "UmatanKumi":
-        return "馬単組番（4桁：上位2桁=1着馬番、下位2桁=2着馬番）"
-    if col == "UmatanHyo":
-        return "馬単票数"
-    if col == "UmatanNinki":
-        return "馬単人気順"
-    if col == "UmatanHyoTotal":
-        return "馬単票数合計"
-    if col == "UmatanHenkanHyoTotal":
-        return "馬単返還票数合計"
-
-    # 3連複票数 (H5)
-    if col == "SanrenfukuKumi":
-        return "3連複組番（6桁：各2桁で3頭の馬番）"
-    if col == "SanrenfukuHyo":
-        return "3連複票数"
-    if col == "SanrenfukuNinki":
-        return "3連複人気順"
-    if col == "SanrenfukuHyoTotal":
-        return "3連複票数合計"
-    if col == "SanrenfukuHenkanHyoTotal":
-        return "3連複返還票数合計"
-
-    # 3連単票数 (H6)
-    if col == "SanrentanKumi":
-        return "3連単組番（6桁：各2桁で1着・2着・3着の馬番）"
-    if col == "SanrentanHyo":
-        return "3連単票数"
-    if col == "SanrentanNinki":
-        return "3連単人気順"
-    if col == "SanrentanHyoTotal":
-        return "3連単票数合計"
-    if col == "SanrentanHenkanHyoTotal":
-        return "3連単返還票数合計"
-
-    # === オッズテーブル用フラグ ===
-    if col == "TanFlag":
-        return "単勝発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "FukuFlag":
-        return "複勝発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "WakuFlag":
-        return "枠連発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "UmarenFlag":
-        return "馬連発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "WideFlag":
-        return "ワイド発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "UmatanFlag":
-        return "馬単発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "SanrenpukuFlag":
-        return "3連複発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "SanrentanFlag":
-        return "3連単発売フラグ（0=発売なし, 1=発売あり）"
-
-    # オッズ値
-    if col == "TanOdds":
-        return "単勝オッズ"
-    if col == "FukuOddsMin":
-        return "複勝オッズ（最小値）"
-    if col == "FukuOddsMax":
-        return "複勝オッズ（最大値）"
-    if col == "WakuOdds":
-        return "枠連オッズ"
-    if col == "UmarenOdds":
-        return "馬連オッズ"
-    if col == "WideOddsMin":
-        return "ワイドオッズ（最小値）"
-    if col == "WideOddsMax":
-        return "ワイドオッズ（最大値）"
-    if col == "UmatanOdds":
-        return "馬単オッズ"
-    if col == "SanrenpukuOdds":
-        return "3連複オッズ"
-    if col == "SanrentanOdds":
-        return "3連単オッズ"
-
     # === 発売フラグ（番号付き） ===
     if col.startswith("HatubaiFlag") and col[-1].isdigit():
         num = col.replace("HatubaiFlag", "")
@@ -919,29 +1125,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
     if col.startswith("Reserved") or col.startswith("reserved"):
         return "予約領域（未使用）"
 
-    # === その他の共通カラム ===
-    if col == "HappyoTime":
-        return "発表時刻（HHmm形式）"
-    if col == "HenkoID":
-        return "変更ID"
-    if col == "SetYear":
-        return "設定年（YYYY形式）"
-    if col == "HonSyokinTotal":
-        return "本賞金合計（単位：万円）"
-    if col == "FukaSyokin":
-        return "付加賞金（単位：万円）"
-    if col == "ChakuKaisu":
-        return "着回数"
-    if col == "YoubiCD":
-        return "曜日コード（0=日, 1=月, 2=火, 3=水, 4=木, 5=金, 6=土）"
-    if col == "TokuNum":
-        return "特別競走番号"
-    if col == "HondaiEng":
-        return "レース名（英語）"
-    if col == "FukudaiEng":
-        return "副題（英語）"
-    if col == "KakkoEng":
-        return "カッコ内表記（英語）"
     if col.startswith("Ryakusyo"):
         if "10" in col:
             return "略称（10文字）"
@@ -950,36 +1133,7 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         if "3" in col:
             return "略称（3文字）"
         return "略称"
-    if col == "Hondai":
-        return "レース名（正式名称）"
-    if col == "Fukudai":
-        return "副題"
-    if col == "Kakko":
-        return "カッコ内表記"
 
-    # === 繁殖・血統関連 ===
-    if col == "HansyokuNum":
-        return "繁殖登録番号"
-    if col == "FHansyokuNum":
-        return "父の繁殖登録番号"
-    if col == "MHansyokuNum":
-        return "母の繁殖登録番号"
-    if col == "KeitoId":
-        return "系統ID"
-    if col == "KeitoName":
-        return "系統名"
-    if col == "KeitoEx":
-        return "系統説明"
-    if col == "MochiKubun":
-        return "持込区分"
-    if col == "ImportYear":
-        return "輸入年"
-    if col == "SankuMochiKubun":
-        return "産駒持込区分"
-    if col == "FNum":
-        return "父番号"
-    if col == "BirthYear":
-        return "生年"
     if col.startswith("Ketto3InfoHansyokuNum"):
         match = re.search(r'Ketto3InfoHansyokuNum(\d+)', col)
         if match:
@@ -988,76 +1142,19 @@ def generate_column_description(table_name: str, column_name: str) -> str:
             if gen_num <= len(generations):
                 return f"{generations[gen_num-1]}の繁殖登録番号"
 
-    # === コース・馬場情報 ===
-    if col == "Course":
-        return "コース"
-    if col == "CourseEx":
-        return "コース説明"
-    if col == "KaishuDate":
-        return "開催日"
-    if col == "TresenKubun":
-        return "トレセン区分（1=美浦, 2=栗東）"
-    if col == "ChokyoDate":
-        return "調教日"
-    if col == "ChokyoTime":
-        return "調教時刻"
-    if col == "BabaMawari":
-        return "馬場回り"
-    if col == "HaronTime10Total":
-        return "10ハロンタイム合計"
     if col.startswith("LapTime_"):
         return f"ラップタイム（{col.replace('LapTime_', '')}）"
 
-    # === 売上・販売情報 ===
-    if col == "SaleHostName":
-        return "販売元名"
-    if col == "SaleName":
-        return "販売名"
-    if col == "SaleCode":
-        return "販売コード"
-    if col == "Price":
-        return "価格"
-    if col == "FromDate":
-        return "開始日"
-    if col == "ToDate":
-        return "終了日"
-    if col == "Address":
-        return "住所"
-    if col == "Num":
-        return "番号"
-
-    # === タイムマスタ ===
-    if col == "TMScore":
-        return "タイムスコア"
-
     # === 重賞成績関連（番号なし直接参照） ===
     if col.startswith("SaikinJyusyo") and "_id" in col:
         return "最近重賞のレースID"
+
     if col.startswith("HatuKiJyo") and "id" in col:
         return "初騎乗のレースID"
+
     if col.startswith("HatuSyori") and "id" in col:
         return "初勝利のレースID"
 
-    # === 変更理由 ===
-    if col == "HenkouJiyuCD":
-        return "変更事由コード"
-    if col == "RecInfoKubun":
-        return "レコード情報区分"
-
-    # === 賞金詳細 ===
-    if col == "HeichiHonsyokinTotal":
-        return "平地本賞金合計（単位：万円）"
-    if col == "SyogaiHonsyokinTotal":
-        return "障害本賞金合計（単位：万円）"
-    if col == "HonSyokinHeichi":
-        return "本賞金・平地（単位：万円）"
-    if col == "HonSyokinSyogai":
-        return "本賞金・障害（単位：万円）"
-    if col == "FukaSyokinHeichi":
-        return "付加賞金・平地（単位：万円）"
-    if col == "FukaSyokinSyogai":
-        return "付加賞金・障害（単位：万円）"
-
     # === 開催スケジュール ===
     if col.startswith("Jyusyo") and "TokuNum" in col:
         return "重賞特別競走番号"
@@ -1065,123 +1162,12 @@ def generate_column_description(table_name: str, column_name: str) -> str:
     # === Yobi（予備）フィールド ===
     if col.startswith("Yobi"):
         return "予備フィールド"
+
     if col.startswith("Field"):
         return "予備フィールド"
 
-    # === オッズテーブル共通 ===
-    if col == "Kumi":
-        return "組番（馬番の組み合わせ）"
-    if col == "Vote":
-        return "票数"
-    if col == "OddsLow":
-        return "オッズ（下限）"
-    if col == "OddsHigh":
-        return "オッズ（上限）"
-    if col == "WakurenFlag":
-        return "枠連発売フラグ（0=発売なし, 1=発売あり）"
-    if col == "FukuChakubaraiKey" or col == "FukuChakuBaraiKey":
-        return "複勝着払いキー"
-    if col == "TanNinki":
-        return "単勝人気順"
-    if col == "TanUma":
-        return "単勝馬番"
-    if col == "TanHyo":
-        return "単勝票数"
-    if col == "FukuUma":
-        return "複勝馬番"
-    if col == "FukuHyo":
-        return "複勝票数"
-    if col == "crlf":
-        return "改行コード"
-
-    # === コース変更情報 ===
-    if col == "AtoKyori":
-        return "変更後距離（メートル）"
-    if col == "AtoTruckCD" or col == "AtoTrackCD":
-        return "変更後トラックコード"
-    if col == "MaeKyori":
-        return "変更前距離（メートル）"
-    if col == "MaeTruckCD" or col == "MaeTrackCD":
-        return "変更前トラックコード"
-    if col == "JiyuCD":
-        return "事由コード"
-    if col == "AtoFutan":
-        return "変更後斤量"
-    if col == "MaeFutan":
-        return "変更前斤量"
-    if col == "AtoJi":
-        return "変更後時"
-    if col == "AtoFun":
-        return "変更後分"
-    if col == "MaeJi":
-        return "変更前時"
-    if col == "MaeFun":
-        return "変更前分"
-
-    # === 競走条件 ===
-    if col == "Kubun":
-        return "区分"
-    if col == "Nkai":
-        return "第N回"
     if col.startswith("JyokenCD"):
         return "競走条件コード"
-    if col == "SyubetuCD":
-        return "競走種別コード（11=芝, 21=ダート, 23=障害芝, 24=障害ダート）"
-    if col == "SyubetuCD_TrackCD":
-        return "競走種別・トラックコード"
-    if col == "RecKubun":
-        return "レコード区分"
-    if col == "RecTime":
-        return "レコードタイム"
-
-    # === 天候・馬場状態 ===
-    if col == "TenkoState":
-        return "天候状態"
-    if col == "SibaBabaState":
-        return "芝馬場状態"
-    if col == "DirtBabaState":
-        return "ダート馬場状態"
-
-    # === 出走関連 ===
-    if col == "SyussoKubun":
-        return "出走区分"
-    if col == "JyogaiStateKubun":
-        return "除外状態区分"
-
-    # === 繁殖関連 ===
-    if col == "HansyokuFNum":
-        return "父の繁殖番号"
-    if col == "HansyokuMNum":
-        return "母の繁殖番号"
-
-    # === 着払い情報 ===
-    if col == "HenkanUma":
-        return "返還馬番情報"
-
-    # === 9番目のフラグ（WIN5用） ===
-    if col == "FuseirituFlag9":
-        return "WIN5不成立フラグ（0=成立, 1=不成立）"
-    if col == "TokubaraiFlag9":
-        return "WIN5特払フラグ（0=通常, 1=特払）"
-    if col == "HenkanFlag9":
-        return "WIN5返還フラグ（0=返還なし, 1=返還あり）"
-
-    # === 血統情報（拡張） ===
-    for i in range(7, 15):
-        if col == f"Ketto3InfoBamei{i}":
-            generations = ["父", "母", "父父", "父母", "母父", "母母", "父父父", "父父母", "父母父", "父母母", "母父父", "母父母", "母母父", "母母母"]
-            if i <= len(generations):
-                return f"{generations[i-1]}の馬名"
-
-    # === 賞金詳細（拡張） ===
-    if col == "HeichiFukasyokinTotal":
-        return "平地付加賞金合計（単位：万円）"
-    if col == "SyogaiFukasyokinTotal":
-        return "障害付加賞金合計（単位：万円）"
-    if col == "HeichiSyutokuTotal":
-        return "平地取得賞金合計（単位：万円）"
-    if col == "SyogaiSyutokuTotal":
-        return "障害取得賞金合計（単位：万円）"
 
     # === 重賞成績詳細 ===
     if col.startswith("SaikinJyusyo") and "_" in col:
@@ -1230,12 +1216,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         if match:
             return f"{match.group(1)}ハロンタイム合計"
 
-    # === 出馬表の対戦情報 ===
-    if col == "KettoNum1":
-        return "対戦相手の血統登録番号（1着馬は2着馬、2着以下は1着馬）"
-    if col == "Bamei1":
-        return "対戦相手の馬名（1着馬は2着馬、2着以下は1着馬）"
-
     # === NL_CH/NL_KS: 最近重賞成績配列（番号付き直接パターン） ===
     # SaikinJyusyo0Hondai, SaikinJyusyo1GradeCD など
     saikin_match = re.match(r'SaikinJyusyo(\d+)(.+)', col)
@@ -1420,18 +1400,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         num = int(jyoken_match.group(1))
         return f"競走条件コード{num}（出走条件の詳細）"
 
-    # === NL_RA: 競走記号コード ===
-    if col == "KigoCD":
-        return "競走記号コード（000=一般, 001=指定, 002=見習騎手, 010=馬齢戦など）"
-
-    # === NL_RA: 重量種別コード ===
-    if col == "JyuryoCD":
-        return "重量種別コード（1=ハンデ, 2=別定, 3=馬齢, 4=定量）"
-
-    # === NL_RA: グレードコード ===
-    if col == "GradeCD":
-        return "グレードコード（A=G1, B=G2, C=G3, D=リステッド, E=オープン, F=3勝クラス等）"
-
     # === NL_RA: コーナー情報配列（CornerInfo0~3） ===
     corner_match = re.match(r'CornerInfo(\d+)(.+)', col)
     if corner_match:
@@ -1563,19 +1531,8 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         if field == "Bamei":
             return f"{place}着馬の馬名"
 
-    # === 票数配列 ===
-    # TansyoInfo, FukusyoInfo等
-    hyo_patterns = [
-        (r'TansyoInfo(\d+)(.+)', "単勝"),
-        (r'FukusyoInfo(\d+)(.+)', "複勝"),
-        (r'UmarenInfo(\d+)(.+)', "馬連"),
-        (r'WideInfo(\d+)(.+)', "ワイド"),
-        (r'UmatanInfo(\d+)(.+)', "馬単"),
-        (r'SanrenfukuInfo(\d+)(.+)', "3連複"),
-        (r'SanrentanInfo(\d+)(.+)', "3連単"),
-    ]
-    for pattern, hyo_name in hyo_patterns:
-        hyo_match = re.match(pattern, col)
+    for pattern, hyo_name in HYO_PATTERNS:
+        hyo_match = pattern.match(col)
         if hyo_match:
             num = int(hyo_match.group(1)) + 1
             field = hyo_match.group(2)
@@ -1661,75 +1618,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
     if col.startswith("Win5") or col.startswith("WIN5"):
         return "WIN5関連情報"
 
-    # === NL_CK: 着度数詳細（芝・ダート・障害・回り・馬場状態別） ===
-    if col == "TotalChakuCount":
-        return "総合着回数"
-    if col == "ChuoChakuCount":
-        return "中央着回数"
-
-    # 芝・ダート・障害の直進/右回り/左回り
-    track_patterns = [
-        ("SibaChoChaku", "芝直線コース着回数"),
-        ("SibaMigiChaku", "芝右回り着回数"),
-        ("SibaHidariChaku", "芝左回り着回数"),
-        ("DirtChoChaku", "ダート直線コース着回数"),
-        ("DirtMigiChaku", "ダート右回り着回数"),
-        ("DirtHidariChaku", "ダート左回り着回数"),
-        ("SyogaiChaku", "障害着回数"),
-    ]
-    for pattern, desc in track_patterns:
-        if col == pattern:
-            return desc
-
-    # 馬場状態別着回数（芝・ダート・障害）
-    baba_patterns = [
-        ("SibaRyoChaku", "芝良馬場着回数"),
-        ("SibaYayaChaku", "芝稍重着回数"),
-        ("SibaOmoChaku", "芝重馬場着回数"),
-        ("SibaFuryoChaku", "芝不良馬場着回数"),
-        ("SibaFuChaku", "芝不良馬場着回数"),
-        ("DirtRyoChaku", "ダート良馬場着回数"),
-        ("DirtYayaChaku", "ダート稍重着回数"),
-        ("DirtOmoChaku", "ダート重馬場着回数"),
-        ("DirtFuryoChaku", "ダート不良馬場着回数"),
-        ("DirtFuChaku", "ダート不良馬場着回数"),
-        ("SyogaiRyoChaku", "障害良馬場着回数"),
-        ("SyogaiYayaChaku", "障害稍重着回数"),
-        ("SyogaiOmoChaku", "障害重馬場着回数"),
-        ("SyogaiFuryoChaku", "障害不良馬場着回数"),
-        ("SyogaiFuChaku", "障害不良馬場着回数"),
-    ]
-    for pattern, desc in baba_patterns:
-        if col == pattern:
-            return desc
-
-    # 季節別着回数
-    season_patterns = [
-        ("SpringChaku", "春季着回数"),
-        ("SummerChaku", "夏季着回数"),
-        ("AutumnChaku", "秋季着回数"),
-        ("WinterChaku", "冬季着回数"),
-    ]
-    for pattern, desc in season_patterns:
-        if col == pattern:
-            return desc
-
-    # 距離別着回数（詳細）
-    dist_patterns = [
-        ("Dist1000Chaku", "1000m以下着回数"),
-        ("Dist1200Chaku", "1200m着回数"),
-        ("Dist1400Chaku", "1400m着回数"),
-        ("Dist1600Chaku", "1600m着回数"),
-        ("Dist1800Chaku", "1800m着回数"),
-        ("Dist2000Chaku", "2000m着回数"),
-        ("Dist2200Chaku", "2200m着回数"),
-        ("Dist2400Chaku", "2400m着回数"),
-        ("Dist2500Chaku", "2500m以上着回数"),
-    ]
-    for pattern, desc in dist_patterns:
-        if col == pattern:
-            return desc
-
     # === NL_CK: 距離別着回数（詳細パターン） ===
     # 芝の距離別：Siba1200IkaChaku, Siba1201_1400Chaku, Siba2801OverChaku等
     siba_dist = re.match(r'Siba(\d+)(Ika|Over|_\d+)?Chaku', col)
@@ -1770,39 +1658,13 @@ def generate_column_description(table_name: str, column_name: str) -> str:
             return f"障害{dist}〜{suffix[1:]}m着回数"
         return f"障害{dist}m着回数"
 
-    # === NL_CK: 競馬場別着回数（SapporoSibaChaku等） ===
-    jyo_track_patterns = [
-        (r'Sapporo(Siba|Dirt|Syogai)Chaku', "札幌"),
-        (r'Hakodate(Siba|Dirt|Syogai)Chaku', "函館"),
-        (r'Fukushima(Siba|Dirt|Syogai)Chaku', "福島"),
-        (r'Niigata(Siba|Dirt|Syogai)Chaku', "新潟"),
-        (r'Tokyo(Siba|Dirt|Syogai)Chaku', "東京"),
-        (r'Nakayama(Siba|Dirt|Syogai)Chaku', "中山"),
-        (r'Chukyo(Siba|Dirt|Syogai)Chaku', "中京"),
-        (r'Kyoto(Siba|Dirt|Syogai)Chaku', "京都"),
-        (r'Hanshin(Siba|Dirt|Syogai)Chaku', "阪神"),
-        (r'Kokura(Siba|Dirt|Syogai)Chaku', "小倉"),
-    ]
-    for pattern, jyo_name in jyo_track_patterns:
-        match = re.match(pattern, col)
+    for pattern, jyo_name in JYO_TRACK_PATTERNS:
+        match = pattern.match(col)
         if match:
             track = match.group(1)
             track_map = {"Siba": "芝", "Dirt": "ダート", "Syogai": "障害"}
             return f"{jyo_name}{track_map.get(track, track)}着回数"
 
-    # === NL_CH: 賞金・着度数詳細（H=平地, S=障害） ===
-    ch_patterns = [
-        ("HonSyokinH", "本賞金・平地（単位：千円）"),
-        ("HonSyokinS", "本賞金・障害（単位：千円）"),
-        ("FukaSyokinH", "付加賞金・平地（単位：千円）"),
-        ("FukaSyokinS", "付加賞金・障害（単位：千円）"),
-        ("ChakuKaisuH", "着回数・平地"),
-        ("ChakuKaisuS", "着回数・障害"),
-    ]
-    for pattern, desc in ch_patterns:
-        if col == pattern:
-            return desc
-
     # ChakuKaisu01H〜ChakuKaisu06H（1着〜着外）
     chaku_h_match = re.match(r'ChakuKaisu0?(\d+)([HS])', col)
     if chaku_h_match:
@@ -1827,101 +1689,6 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         place_name = place_names.get(place, f"{place}着")
         return f"ダート{place_name}回数"
 
-    # === NL_HR/RT_HR: 払戻詳細（単体カラム） ===
-    hr_patterns = [
-        ("TanUmaban", "単勝馬番"),
-        ("TanPay", "単勝払戻金（円）"),
-        ("TanNinki", "単勝人気順"),
-        ("FukuUmaban", "複勝馬番"),
-        ("FukuPay", "複勝払戻金（円）"),
-        ("FukuNinki", "複勝人気順"),
-        ("WakuKumi", "枠連組番"),
-        ("WakuPay", "枠連払戻金（円）"),
-        ("WakuNinki", "枠連人気順"),
-        ("UmarenPay", "馬連払戻金（円）"),
-        ("WidePay", "ワイド払戻金（円）"),
-        ("UmatanPay", "馬単払戻金（円）"),
-        ("SanrenfukuPay", "3連複払戻金（円）"),
-        ("SanrentanPay", "3連単払戻金（円）"),
-        ("Yobi1", "予備1"),
-        ("Yobi2", "予備2"),
-        ("Yobi3", "予備3"),
-    ]
-    for pattern, desc in hr_patterns:
-        if col == pattern:
-            return desc
-
-    # === NL_H1: 票数詳細（単体カラム） ===
-    h1_patterns = [
-        ("TanUmaban", "単勝馬番"),
-        ("TanHyo", "単勝票数"),
-        ("TanNinki", "単勝人気順"),
-        ("FukuUmaban", "複勝馬番"),
-        ("FukuHyo", "複勝票数"),
-        ("FukuNinki", "複勝人気順"),
-        ("WakuKumi", "枠連組番"),
-        ("WakuHyo", "枠連票数"),
-        ("WakuNinki", "枠連人気順"),
-        ("TanHyoTotal", "単勝票数合計"),
-        ("FukuHyoTotal", "複勝票数合計"),
-        ("WakuHyoTotal", "枠連票数合計"),
-        ("TanHenkanHyoTotal", "単勝返還票数合計"),
-        ("FukuHenkanHyoTotal", "複勝返還票数合計"),
-        ("WakuHenkanHyoTotal", "枠連返還票数合計"),
-    ]
-    for pattern, desc in h1_patterns:
-        if col == pattern:
-            return desc
-
-    # === NL_O1: オッズ詳細（単体カラム） ===
-    o1_patterns = [
-        ("TanUmaban", "単勝馬番"),
-        ("TanOdds", "単勝オッズ"),
-        ("TanNinki", "単勝人気順"),
-        ("FukuUmaban", "複勝馬番"),
-        ("FukuOddsLow", "複勝オッズ（下限）"),
-        ("FukuOddsHigh", "複勝オッズ（上限）"),
-        ("FukuNinki", "複勝人気順"),
-        ("WakurenOdds", "枠連オッズ"),
-        ("WakurenNinki", "枠連人気順"),
-        ("TanVote", "単勝票数"),
-        ("FukuVote", "複勝票数"),
-        ("WakurenVote", "枠連票数"),
-    ]
-    for pattern, desc in o1_patterns:
-        if col == pattern:
-            return desc
-
-    # === NL_RA: ラップ・コーナー情報（単体カラム） ===
-    ra_patterns = [
-        ("LapTime", "ラップタイム"),
-        ("Haron3F", "前半3ハロンタイム"),
-        ("Haron4F", "前半4ハロンタイム"),
-        ("Haron3L", "上がり3ハロンタイム"),
-        ("Haron4L", "上がり4ハロンタイム"),
-        ("Corner", "コーナー位置"),
-        ("Syukaisu", "周回数"),
-        ("TsukaJyuni", "通過順位"),
-        ("Crlf", "改行コード"),
-    ]
-    for pattern, desc in ra_patterns:
-        if col == pattern:
-            return desc
-
-    # === NL_TK: 特別レース情報 ===
-    tk_patterns = [
-        ("RaceMeiKubun", "レース名区分"),
-        ("JyusyoKaiji", "重賞回次"),
-        ("CourseKubun", "コース区分"),
-        ("HandeHappyoDate", "ハンデ発表日"),
-        ("RenbanNum", "連番番号"),
-        ("Koryu", "交流区分"),
-        ("RecordBreak", "レコード更新フラグ"),
-    ]
-    for pattern, desc in tk_patterns:
-        if col == pattern:
-            return desc
-
     # === NL_YS: 開催スケジュール重賞情報 ===
     ys_jyusyo = re.match(r'Jyusyo(\d+)(.+)', col)
     if ys_jyusyo:
@@ -1971,47 +1738,25 @@ def generate_column_description(table_name: str, column_name: str) -> str:
         num = int(saikin_id.group(1))
         return f"最近重賞{num}のレースID"
 
-    # === NL_WE: 天候・馬場状態（2回目発表） ===
-    we_patterns = [
-        ("TenkoState2", "天候状態（2回目発表）"),
-        ("SibaBabaState2", "芝馬場状態（2回目発表）"),
-        ("DirtBabaState2", "ダート馬場状態（2回目発表）"),
-    ]
-    for pattern, desc in we_patterns:
-        if col == pattern:
-            return desc
+    # === デフォルト：カラム名をそのまま返す ===
+    return f"（説明未登録: {col}）"
 
-    # === NL_WF: WIN5情報 ===
-    wf_patterns = [
-        ("HatubaiHyosu", "発売票数"),
-        ("YukoHyosu", "有効票数"),
-        ("HenkanFlag", "返還フラグ"),
-        ("FuseirituFlag", "不成立フラグ"),
-        ("TekichuNasiFlag", "的中なしフラグ"),
-        ("CarryOverStart", "キャリーオーバー開始額"),
-        ("CarryOverBalance", "キャリーオーバー残高"),
-        ("PayJyushosiki", "払戻重勝式"),
-        ("TekichuHyosu", "的中票数"),
-    ]
-    for pattern, desc in wf_patterns:
-        if col == pattern:
-            return desc
 
-    # === NL_CK: その他詳細情報 ===
-    ck_extra = [
-        ("KyakusituKeiko", "客質傾向（脚質傾向）"),
-        ("RegisteredRaceCount", "登録レース数"),
-        ("KisyuResultsInfo", "騎手成績情報"),
-        ("ChokyosiResultsInfo", "調教師成績情報"),
-        ("BanusiResultsInfo", "馬主成績情報"),
-        ("BreederResultsInfo", "生産者成績情報"),
-    ]
-    for pattern, desc in ck_extra:
-        if col == pattern:
-            return desc
+@lru_cache(maxsize=8192)
+def generate_column_description(table_name: str, column_name: str) -> str:
+    """カラム名のパターンから説明を自動生成
 
-    # === デフォルト：カラム名をそのまま返す ===
-    return f"（説明未登録: {col}）"
+    Args:
+        table_name: テーブル名
+        column_name: カラム名
+
+    Returns:
+        カラムの説明（推測も含む）
+    """
+    description = EXACT_DESCRIPTIONS.get(column_name)
+    if description is not None:
+        return description
+    return _describe_by_pattern(table_name, column_name)
 
 
 # 一括説明生成関数
@@ -2025,7 +1770,5 @@ def get_all_column_descriptions(table_name: str, column_names: list) -> dict:
     Returns:
         {column_name: description}の辞書
     """
-    descriptions = {}
-    for col_name in column_names:
-        descriptions[col_name] = generate_column_description(table_name, col_name)
-    return descriptions
+    return {col_name: generate_column_description(table_name, col_name)
+            for col_name in column_names}
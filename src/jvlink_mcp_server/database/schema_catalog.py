@@ -0,0 +1,111 @@
+"""In-process schema catalog
+
+テーブル一覧とテーブルごとのカラム情報を、接続プール（接続先）ごとに一度だけ
+読み込んで保持する。ホワイトリスト検証は集合の参照（O(1)）になり、
+get_sample_data / get_column_value_examples が毎回 get_tables() /
+get_table_schema() のカタログクエリを発行することはなくなる。
+
+カタログはデータ世代トークン（DatabaseConnection.data_version()）に紐づき、
+JVLinkToSQLite等がDBを書き換えてトークンが変わると再読み込みされる。
+"""
+
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from .pool import _describe_key
+
+
+class SchemaCatalog:
+    """テーブル名・カラム名・宣言型のキャッシュ
+
+    Args:
+        tables: テーブル名の一覧
+        version: 読み込み時のデータ世代トークン（Noneは世代管理なし）
+    """
+
+    def __init__(self, tables: Iterable[str], version: Optional[Hashable] = None):
+        self.version = version
+        self.table_list: Tuple[str, ...] = tuple(tables)
+        self.tables: FrozenSet[str] = frozenset(self.table_list)
+        self._schemas: Dict[str, pd.DataFrame] = {}
+        self._columns: Dict[str, FrozenSet[str]] = {}
+        self._lock = threading.Lock()
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name in self.tables
+
+    def schema(self, table_name: str, loader: Callable[[str], pd.DataFrame]) -> pd.DataFrame:
+        """テーブルのスキーマDataFrame（column_name, column_type, ...）
+
+        未読み込みのテーブルは loader で取得して保持する。
+        """
+        with self._lock:
+            df = self._schemas.get(table_name)
+        if df is None:
+            df = loader(table_name)
+            with self._lock:
+                self._schemas[table_name] = df
+                self._columns[table_name] = frozenset(df["column_name"].tolist())
+        return df.copy()
+
+    def columns(self, table_name: str, loader: Callable[[str], pd.DataFrame]) -> FrozenSet[str]:
+        """テーブルのカラム名集合"""
+        with self._lock:
+            cols = self._columns.get(table_name)
+        if cols is None:
+            self.schema(table_name, loader)
+            with self._lock:
+                cols = self._columns[table_name]
+        return cols
+
+    def column_types(self, table_name: str,
+                     loader: Callable[[str], pd.DataFrame]) -> Dict[str, Any]:
+        """カラム名→宣言型"""
+        df = self.schema(table_name, loader)
+        return dict(zip(df["column_name"].tolist(), df["column_type"].tolist()))
+
+    def loaded_tables(self) -> int:
+        with self._lock:
+            return len(self._schemas)
+
+
+# 接続先キー → カタログ
+_catalogs: Dict[Hashable, SchemaCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(key: Hashable, version: Hashable,
+                factory: Callable[[], SchemaCatalog]) -> SchemaCatalog:
+    """接続先キーのカタログを取得（データ世代が変わっていれば作り直す）"""
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is not None and catalog.version == version:
+            return catalog
+    catalog = factory()
+    with _catalogs_lock:
+        _catalogs[key] = catalog
+    return catalog
+
+
+def clear_catalogs() -> None:
+    """全カタログを破棄する（テスト・スキーマ変更時用）"""
+    with _catalogs_lock:
+        _catalogs.clear()
+
+
+def catalog_stats() -> Dict[str, Dict[str, int]]:
+    """接続先ごとのカタログの状態（キーは pool_stats と同じ表記）"""
+    with _catalogs_lock:
+        items = list(_catalogs.items())
+    return {_describe_key(key): {"tables": len(cat.tables), "schemas_loaded": cat.loaded_tables()}
+            for key, cat in items}
+
+
+__all__ = [
+    "SchemaCatalog",
+    "get_catalog",
+    "clear_catalogs",
+    "catalog_stats",
+]
@@ -4,6 +4,9 @@
 LLMがより正確にクエリを生成できるようにするための情報です。
 """
 
+from functools import lru_cache
+from typing import Dict, Tuple
+
 from .schema_auto_descriptions import generate_column_description as auto_generate
 
 # テーブルの説明
@@ -442,10 +445,37 @@ jrvltsql v2.0以降では適切な型が使用されています：
 
 ### 主要な結合パターン
 
-1. レース情報 + 出馬表: NL_RA JOIN NL_SE ON 6カラム
+1. レース情報 + 出馬表: NL_RA JOIN NL_SE ON RaceKey（下記）または6カラム
 2. 出馬表 + 馬マスタ: NL_SE JOIN NL_UM ON KettoNum
 3. 出馬表 + 騎手マスタ: NL_SE JOIN NL_KS ON KisyuCode
 
+### RaceKey（整数のレースキー）での結合
+
+list_tables に RK_NL_SE / RK_NL_RA（NARは RK_NL_SE_NAR / RK_NL_RA_NAR）がある場合、
+これらは元テーブルの全カラムに整数のレースキー RaceKey を加えたビューです。
+6カラムの比較より速いため、出馬表とレース情報の結合はこちらを使ってください：
+
+```sql
+SELECT r.Kyori, COUNT(*) as total
+FROM RK_NL_SE s
+JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey
+WHERE s.Ninki = 1
+GROUP BY r.Kyori
+```
+
+RK_ビューがない場合は6カラムで結合します：
+
+```sql
+FROM NL_SE s
+JOIN NL_RA r
+  ON s.Year = r.Year AND s.MonthDay = r.MonthDay AND s.JyoCD = r.JyoCD
+  AND s.Kaiji = r.Kaiji AND s.Nichiji = r.Nichiji AND s.RaceNum = r.RaceNum
+```
+
+- RaceKey = Year, MonthDay, JyoCD, Kaiji, Nichiji, RaceNum を桁に詰めた整数
+  （例: 2024年12月22日 中山 5回8日 11R → 2024122206050811）
+- JRAとNARのビューを混ぜて結合しないこと（RK_NL_SE_NAR は RK_NL_RA_NAR と結合）
+
 ### 速報系・時系列オッズの使い方
 
 - 当日のレース情報: RT_RA, RT_SE を使用
@@ -492,22 +522,33 @@ GROUP BY org
 """
 
 
-def get_column_description(table_name: str, column_name: str) -> str:
-    # Try exact table name first
-    if table_name in COLUMN_DESCRIPTIONS:
-        manual_desc = COLUMN_DESCRIPTIONS[table_name].get(column_name, "")
-        if manual_desc:
-            return manual_desc
+@lru_cache(maxsize=None)
+def _manual_descriptions(table_name: str) -> Dict[str, str]:
+    """テーブルの手動説明（NARテーブルはJRAテーブルの説明で補う）"""
+    sources = [COLUMN_DESCRIPTIONS.get(table_name, {})]
     # For NAR tables, fall back to JRA table descriptions
     if table_name.endswith("_NAR"):
         jra_table = table_name[:-4]  # Remove _NAR suffix
-        if jra_table in COLUMN_DESCRIPTIONS:
-            manual_desc = COLUMN_DESCRIPTIONS[jra_table].get(column_name, "")
-            if manual_desc:
-                return manual_desc
+        sources.insert(0, COLUMN_DESCRIPTIONS.get(jra_table, {}))
+    descriptions = {}
+    for source in sources:
+        descriptions.update((column, desc) for column, desc in source.items() if desc)
+    return descriptions
+
+
+def get_column_description(table_name: str, column_name: str) -> str:
+    manual_desc = _manual_descriptions(table_name).get(column_name)
+    if manual_desc:
+        return manual_desc
     return auto_generate(table_name, column_name)
 
 
+@lru_cache(maxsize=256)
+def get_column_descriptions(table_name: str, column_names: Tuple[str, ...]) -> Dict[str, str]:
+    """カラム名 → 説明（テーブルのカラム構成ごとに一度だけ作る。返す辞書は変更しないこと）"""
+    return {column: get_column_description(table_name, column) for column in column_names}
+
+
 def get_table_description(table_name: str) -> dict:
     return TABLE_DESCRIPTIONS.get(table_name, {
         "description": "（説明未登録）",
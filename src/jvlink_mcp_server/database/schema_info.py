@@ -11,6 +11,8 @@
 - TS_: 時系列オッズ
 """
 
+from .race_key import race_join_on, source_table
+
 # === 蓄積系テーブル (NL_) ===
 JVLINK_TABLES = {
     # レース・出走情報
@@ -293,13 +295,17 @@ def get_schema_description():
     }
 
 
-def get_query_examples():
+def get_query_examples(race_key: bool = False):
+    """よく使うクエリの例（race_key=TrueならNL_SE⨝NL_RAをRaceKeyビューで結合する）"""
+    se, ra = source_table("NL_SE", race_key), source_table("NL_RA", race_key)
+    race_join = race_join_on("s", "r", race_key)
     return {
         "1番人気勝率": "SELECT COUNT(*) as total, SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM NL_SE WHERE Ninki = 1 AND KakuteiJyuni IS NOT NULL",
         "騎手成績": "SELECT KisyuRyakusyo, COUNT(*) as rides, SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM NL_SE WHERE KakuteiJyuni IS NOT NULL GROUP BY KisyuRyakusyo ORDER BY wins DESC LIMIT 20",
         "東京1番人気": "SELECT COUNT(*) as total, SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM NL_SE WHERE JyoCD = '05' AND Ninki = 1 AND KakuteiJyuni IS NOT NULL",
         "枠番別成績": "SELECT Wakuban, COUNT(*) as total, SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM NL_SE WHERE KakuteiJyuni IS NOT NULL GROUP BY Wakuban ORDER BY Wakuban",
         "種牡馬成績": "SELECT u.Ketto3InfoBamei1 as sire, COUNT(*) as runs, SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM NL_SE s JOIN NL_UM u ON s.KettoNum = u.KettoNum WHERE s.KakuteiJyuni IS NOT NULL GROUP BY u.Ketto3InfoBamei1 HAVING COUNT(*) >= 100 ORDER BY wins DESC LIMIT 20",
+        "距離別1番人気勝率": f"SELECT r.Kyori, COUNT(*) as total, SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM {se} s JOIN {ra} r ON {race_join} WHERE s.Ninki = 1 AND s.KakuteiJyuni IS NOT NULL GROUP BY r.Kyori ORDER BY r.Kyori",
         "当日オッズ推移": "SELECT HassoTime, Umaban, TanOdds, TanNinki FROM TS_O1 WHERE Year = 2024 AND MonthDay = 1222 AND JyoCD = '06' AND RaceNum = 11 ORDER BY HassoTime, Umaban",
         "NAR大井1番人気": "SELECT COUNT(*) as total, SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM NL_SE_NAR WHERE JyoCD = '44' AND Ninki = 1 AND KakuteiJyuni IS NOT NULL",
         "NAR騎手成績": "SELECT KisyuRyakusyo, COUNT(*) as rides, SUM(CASE WHEN KakuteiJyuni = 1 THEN 1 ELSE 0 END) as wins FROM NL_SE_NAR WHERE KakuteiJyuni IS NOT NULL GROUP BY KisyuRyakusyo ORDER BY wins DESC LIMIT 20",
@@ -307,5 +313,5 @@ def get_query_examples():
     }
 
 
-def get_target_equivalent_query_examples():
-    return get_query_examples()
+def get_target_equivalent_query_examples(race_key: bool = False):
+    return get_query_examples(race_key)
@@ -0,0 +1,285 @@
+"""Relevance-sliced schema for NL→SQL prompts
+
+get_sql_generation_prompt はスキーマ全体（NL_/RT_/TS_ と自動生成の _NAR を含む
+全テーブル、約25,000文字）をプロンプトに入れていた。ここでは質問文に関係する
+テーブルとカラムだけを、文字数の予算内で切り出す。
+
+- ALL_TABLES・TABLE_DESCRIPTIONS・COLUMN_DESCRIPTIONS の説明文から、
+  日本語はバイグラム、英数字は単語を語として転置索引を一度だけ作る
+  （語の重みはIDF。多くのカラムに出てくる語ほど軽い）
+- 質問文は同義語（ジョッキー→騎手、産駒→父馬名 等）で展開してから照合する
+- 地方競馬（_NAR）・速報系（RT_）・時系列オッズ（TS_）のテーブルは、
+  質問文にその系統を示す語（地方・大井、当日、推移 等）があるときだけ候補にする
+  （地方競馬だけの質問では、_NAR版のある中央のテーブルは外す）
+- 各テーブルは主キーと、照合したカラム・key_columnsだけを載せる
+
+環境変数:
+- DB_SCHEMA_PROMPT_BUDGET: プロンプトに入れるスキーマの最大文字数（既定6000）
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from .schema_descriptions import COLUMN_DESCRIPTIONS, TABLE_DESCRIPTIONS
+from .schema_info import ALL_TABLES, NAR_TRACK_CODES, TRACK_CODES
+
+DEFAULT_BUDGET = 6000
+MAX_TABLES = 6
+MAX_COLUMNS = 16
+# 最高点のこの割合に満たないテーブル・カラムは載せない
+MIN_RELATIVE_SCORE = 0.3
+MIN_COLUMN_SCORE = 0.35
+# 何も照合しなかったときに載せるテーブル（系統ごと）
+DEFAULT_TABLES = ("NL_SE", "NL_RA")
+
+# 質問でよく使われる言い方 → スキーマの説明文にある語
+SYNONYMS: Dict[str, str] = {
+    "ジョッキー": "騎手", "騎乗": "騎手", "鞍上": "騎手",
+    "トレーナー": "調教師", "厩舎": "調教師",
+    "産駒": "父馬名 血統", "種牡馬": "父馬名 血統", "母父": "母父馬名 血統",
+    "血統": "血統 父馬名 母父馬名", "父": "父馬名",
+    "配当": "払戻", "払い戻し": "払戻", "馬券": "払戻 オッズ", "回収率": "払戻 単勝オッズ",
+    "勝率": "確定着順", "連対": "確定着順", "複勝率": "確定着順 複勝",
+    "着順": "確定着順", "成績": "確定着順", "1着": "確定着順", "勝ち": "確定着順",
+    "人気": "人気", "オッズ": "オッズ",
+    "芝": "トラックコード 芝", "ダート": "トラックコード ダート", "障害": "競走種別 障害",
+    "マイル": "距離", "短距離": "距離", "長距離": "距離",
+    "重賞": "グレード", "G1": "グレード", "G2": "グレード", "G3": "グレード",
+    "GI": "グレード", "ダービー": "レース名本題", "レース名": "レース名本題",
+    "競馬場": "競馬場コード", "コース": "競馬場コード トラックコード",
+    "枠": "枠番", "内枠": "枠番", "外枠": "枠番",
+    "上がり": "上がり3F", "末脚": "上がり3F", "タイム": "走破タイム",
+    "馬体重": "馬体重", "斤量": "斤量", "年齢": "馬齢", "歳": "馬齢",
+    "牝馬": "性別", "牡馬": "性別", "セン馬": "性別",
+    "調教": "調教タイム", "追い切り": "調教タイム", "坂路": "調教タイム",
+    "天気": "天候", "馬場": "馬場状態", "不良": "馬場状態", "重馬場": "馬場状態",
+    "出走取消": "出走取消", "除外": "競走除外",
+    "馬主": "馬主", "生産者": "生産者", "セリ": "セリ市",
+    "推移": "時系列 時間推移", "直前": "時系列", "変動": "時系列",
+    "当日": "速報", "今日": "速報", "リアルタイム": "速報",
+    "地方": "NAR地方競馬", "NAR": "NAR地方競馬",
+}
+for _name in TRACK_CODES.values():
+    SYNONYMS.setdefault(_name, "競馬場コード")
+for _name in NAR_TRACK_CODES.values():
+    SYNONYMS.setdefault(_name, "NAR地方競馬 地方競馬場コード")
+
+# 系統ごとの判定（テーブル名の判定, その系統を示す語）
+FAMILY_MARKERS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "nar": (("_NAR",), ("地方", "NAR", "nar", *NAR_TRACK_CODES.values())),
+    "realtime": (("RT_",), ("速報", "当日", "今日", "リアルタイム")),
+    "timeseries": (("TS_",), ("時系列", "推移", "直前", "変動")),
+}
+# 地方競馬の質問でも中央のテーブルを残す語
+JRA_MARKERS = ("中央", "JRA", *TRACK_CODES.values())
+
+_ASCII_WORD = re.compile(r"[a-z0-9]{2,}")
+_JAPANESE_RUN = re.compile(r"[^\x00-\x7f、。・（）()「」【】：:，,\s\-=]+")
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _terms(text: str) -> Set[str]:
+    """照合に使う語（英数字は単語、日本語は連続部分のバイグラム）"""
+    text = _normalize(text)
+    terms = set(_ASCII_WORD.findall(text))
+    for run in _JAPANESE_RUN.findall(text):
+        if len(run) == 1:
+            terms.add(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def _table_families(table: str) -> Set[str]:
+    return {family for family, (patterns, _) in FAMILY_MARKERS.items()
+            if any(table.startswith(p) or table.endswith(p) for p in patterns)}
+
+
+def _column_descriptions(table: str) -> Dict[str, str]:
+    """テーブルのカラム説明（key_columnsとCOLUMN_DESCRIPTIONS。NARはJRAの説明も使う）"""
+    columns: Dict[str, str] = {}
+    sources = [COLUMN_DESCRIPTIONS.get(table, {})]
+    if table.endswith("_NAR"):
+        sources.append(COLUMN_DESCRIPTIONS.get(table[:-4], {}))
+    for source in sources:
+        for column, desc in source.items():
+            columns.setdefault(column, desc)
+    for column, desc in ALL_TABLES.get(table, {}).get("key_columns", {}).items():
+        columns[column] = desc
+    return columns
+
+
+class SchemaIndex:
+    """テーブル・カラムの説明文の転置索引"""
+
+    def __init__(self):
+        self.tables: Dict[str, dict] = {}
+        self.columns: Dict[str, Dict[str, str]] = {}
+        self._table_terms: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, List[Tuple[str, Optional[str]]]] = defaultdict(list)
+
+        documents = 0
+        for table, info in ALL_TABLES.items():
+            desc = TABLE_DESCRIPTIONS.get(table, {}).get("description") or info["description"]
+            self.tables[table] = {"description": desc,
+                                  "primary_keys": list(info.get("primary_keys", []))}
+            self.columns[table] = _column_descriptions(table)
+            self._table_terms[table] = _terms(f"{table} {desc}")
+            for term in self._table_terms[table]:
+                self._postings[term].append((table, None))
+            documents += 1
+            for column, col_desc in self.columns[table].items():
+                for term in _terms(f"{column} {col_desc}"):
+                    self._postings[term].append((table, column))
+                documents += 1
+        self.idf = {term: math.log(documents / len(postings))
+                    for term, postings in self._postings.items()}
+
+    def score(self, query_terms: Set[str], families: Set[str],
+              exclude: FrozenSet[str] = frozenset()
+              ) -> Tuple[Dict[str, float], Dict[str, Dict[str, float]]]:
+        """テーブルごとの点数と、テーブルごとのカラムの点数
+
+        families にない系統のテーブルと exclude のテーブルは数えない。
+        """
+        table_scores: Dict[str, float] = defaultdict(float)
+        column_scores: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for term in query_terms:
+            for table, column in self._postings.get(term, ()):
+                if not _table_families(table) <= families or table in exclude:
+                    continue
+                if column is None:
+                    table_scores[table] += 1.5 * self.idf[term]
+                else:
+                    column_scores[table][column] += self.idf[term]
+        for table, columns in column_scores.items():
+            table_scores[table] += sum(sorted(columns.values(), reverse=True)[:3])
+        return dict(table_scores), {t: dict(c) for t, c in column_scores.items()}
+
+
+_index: Optional[SchemaIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_schema_index() -> SchemaIndex:
+    """転置索引（初回呼び出し時に作成）"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SchemaIndex()
+        return _index
+
+
+def expand_query(query_text: str) -> str:
+    """質問文に同義語の展開を加える"""
+    normalized = _normalize(query_text)
+    expansions = [value for key, value in SYNONYMS.items() if _normalize(key) in normalized]
+    return " ".join([query_text, *expansions])
+
+
+def detect_families(query_text: str) -> Set[str]:
+    """質問文が示すテーブル系統（nar / realtime / timeseries）"""
+    normalized = _normalize(query_text)
+    return {family for family, (_, markers) in FAMILY_MARKERS.items()
+            if any(_normalize(marker) in normalized for marker in markers)}
+
+
+class SchemaSlice(NamedTuple):
+    """切り出したスキーマ"""
+
+    tables: Dict[str, dict]
+    omitted: List[str]
+    families: Set[str]
+    chars: int
+
+    def to_json(self) -> str:
+        return json.dumps(self.tables, ensure_ascii=False, indent=1)
+
+
+def schema_budget() -> int:
+    try:
+        return max(500, int(os.getenv("DB_SCHEMA_PROMPT_BUDGET", str(DEFAULT_BUDGET))))
+    except ValueError:
+        return DEFAULT_BUDGET
+
+
+def _entry(index: SchemaIndex, table: str, ranked: List[str], with_key_columns: bool) -> dict:
+    descriptions = index.columns[table]
+    names = list(ranked)
+    if with_key_columns:
+        names += [c for c in ALL_TABLES[table].get("key_columns", {}) if c not in names]
+    return {**index.tables[table],
+            "columns": {c: descriptions[c] for c in names[:MAX_COLUMNS]}}
+
+
+def _size(table: str, entry: dict) -> int:
+    return len(json.dumps({table: entry}, ensure_ascii=False, indent=1))
+
+
+def slice_schema(query_text: str, budget: Optional[int] = None) -> SchemaSlice:
+    """質問文に関係するテーブル・カラムだけのスキーマを、budget文字以内で返す
+
+    Args:
+        query_text: 自然言語の質問
+        budget: スキーマ部分の最大文字数（Noneなら DB_SCHEMA_PROMPT_BUDGET）
+    """
+    budget = budget or schema_budget()
+    index = get_schema_index()
+    families = detect_families(query_text)
+    exclude: FrozenSet[str] = frozenset()
+    normalized = _normalize(query_text)
+    if "nar" in families and not any(_normalize(m) in normalized for m in JRA_MARKERS):
+        # 地方競馬だけの質問では、_NAR版のある中央のテーブルを外す
+        exclude = frozenset(t for t in index.tables if f"{t}_NAR" in index.tables)
+    table_scores, column_scores = index.score(_terms(expand_query(query_text)), families,
+                                              exclude)
+
+    ranked = sorted(table_scores.items(), key=lambda item: -item[1])
+    if ranked:
+        top = ranked[0][1]
+        candidates = [t for t, s in ranked if s >= top * MIN_RELATIVE_SCORE]
+    else:
+        suffix = "_NAR" if "nar" in families else ""
+        candidates = [f"{t}{suffix}" for t in DEFAULT_TABLES]
+
+    tables: Dict[str, dict] = {}
+    omitted: List[str] = []
+    used = 2
+    for table in candidates:
+        if len(tables) >= MAX_TABLES:
+            omitted.append(table)
+            continue
+        columns = sorted(column_scores.get(table, {}).items(), key=lambda item: -item[1])
+        matched = [c for c, score in columns if score >= columns[0][1] * MIN_COLUMN_SCORE]
+        # 予算に収まらなければ、照合したカラムだけ → 主キーだけ、と削って試す
+        for entry in (_entry(index, table, matched, True), _entry(index, table, matched, False),
+                      _entry(index, table, [], False)):
+            size = _size(table, entry)
+            if used + size <= budget or not tables:
+                tables[table] = entry
+                used += size
+                break
+        else:
+            omitted.append(table)
+    return SchemaSlice(tables, omitted, families, used)
+
+
+__all__ = [
+    "DEFAULT_BUDGET",
+    "SYNONYMS",
+    "SchemaIndex",
+    "SchemaSlice",
+    "get_schema_index",
+    "expand_query",
+    "detect_families",
+    "schema_budget",
+    "slice_schema",
+]
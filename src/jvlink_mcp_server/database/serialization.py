@@ -0,0 +1,156 @@
+"""Columnar result conversion for tool responses
+
+クエリ結果をカラムごとのNumPy配列として扱い、``ndarray.tolist()`` で
+カラム単位に一括変換してからツール応答を組み立てる。
+``DataFrame.to_dict(orient="records")`` のようにセルごとにPythonオブジェクトを
+箱詰めし直す処理を避ける。NULL/NaNはNone、日時はdatetimeに揃える。
+
+ツール応答の形式（response_format）:
+- records: 行ごとのdict（``[{"Year": 2024, ...}, ...]``。既定）
+- columnar: カラムごとの配列（``{"Year": [2024, ...], ...}``）。カラム名を
+  行ごとに繰り返さないため、列の多いNL_SE等ではJSONが3〜4割小さくなる。
+  日時はISO 8601文字列に変換し、値をJSONのプリミティブ（数値・文字列・null）
+  だけにするので、MCPのシリアライザがPython側のフォールバックを呼ばずに済む
+"""
+
+import datetime
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+ColumnArrays = Dict[str, np.ndarray]
+
+
+def frame_to_arrays(df: pd.DataFrame) -> ColumnArrays:
+    """DataFrameをカラム名→NumPy配列に変換（重複カラム名は後勝ち）"""
+    return {str(col): df.iloc[:, i].to_numpy() for i, col in enumerate(df.columns)}
+
+
+def num_rows(arrays: Mapping[str, np.ndarray]) -> int:
+    """結果の行数"""
+    for arr in arrays.values():
+        return len(arr)
+    return 0
+
+
+RESPONSE_FORMATS = ("records", "columnar")
+
+_ISO_TYPES = (datetime.date, datetime.time)
+
+
+def _datetime64_to_iso(arr: np.ndarray) -> List[Optional[str]]:
+    """datetime64配列をISO 8601文字列に一括変換する（単位は配列全体で揃える）"""
+    arr = arr.astype("datetime64[us]")
+    nat = np.isnat(arr)
+    valid = arr[~nat]
+    if (valid == valid.astype("datetime64[D]")).all():
+        unit = "D"
+    elif (valid == valid.astype("datetime64[s]")).all():
+        unit = "s"
+    else:
+        unit = "us"
+    values = np.datetime_as_string(arr, unit=unit).tolist()
+    if nat.any():
+        return [None if m else v for v, m in zip(values, nat.tolist())]
+    return values
+
+
+def column_to_list(arr: np.ndarray, limit: Optional[int] = None,
+                   iso_datetime: bool = False) -> List[Any]:
+    """1カラム分の配列をJSON化可能なPythonリストに変換する
+
+    iso_datetime=True なら日時をdatetimeではなくISO 8601文字列にする。
+    """
+    if limit is not None:
+        arr = arr[:limit]
+    kind = arr.dtype.kind
+
+    if iso_datetime and kind in "MO" and isinstance(arr, np.ma.MaskedArray):
+        # DuckDBはNULLを含む日時カラムをマスク付き配列で返す。マスクを外して
+        # 同じISO変換を通し、NULLの位置をNoneにする
+        mask = np.ma.getmaskarray(arr)
+        values = column_to_list(arr.filled(np.datetime64("NaT") if kind == "M" else None),
+                                iso_datetime=True)
+        if mask.any():
+            return [None if m else v for v, m in zip(values, mask.tolist())]
+        return values
+    if kind == "M" and iso_datetime:
+        return _datetime64_to_iso(arr)
+    if kind == "M":
+        # datetime64[ns] の tolist() は整数になるため μs 精度に揃える
+        arr = arr.astype("datetime64[us]")
+    elif kind == "m":
+        arr = arr.astype("timedelta64[us]")
+
+    if isinstance(arr, np.ma.MaskedArray):
+        # DuckDBのfetchnumpy()はNULLをマスクで返す（tolist()でNoneになる）
+        values = arr.tolist()
+        if kind == "f":
+            return [None if v is not None and v != v else v for v in values]
+        return values
+
+    values = arr.tolist()
+    if kind == "f":
+        if np.isnan(arr).any():
+            return [None if v != v else v for v in values]
+    elif kind == "O":
+        mask = pd.isna(arr)
+        if iso_datetime and pd.api.types.infer_dtype(arr, skipna=True) in (
+                "datetime", "date", "time"):
+            # タイムゾーン付きの日時・DATE型などはobject配列で届く
+            return [None if m else v.isoformat() if isinstance(v, _ISO_TYPES) else v
+                    for v, m in zip(values, mask.tolist())]
+        if mask.any():
+            return [None if m else v for v, m in zip(values, mask.tolist())]
+    return values
+
+
+def arrays_to_columns(arrays: Mapping[str, np.ndarray],
+                      limit: Optional[int] = None) -> Dict[str, List[Any]]:
+    """カラム名→Pythonリスト（列指向）"""
+    return {name: column_to_list(arr, limit) for name, arr in arrays.items()}
+
+
+def arrays_to_records(arrays: Mapping[str, np.ndarray],
+                      limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """カラム配列からrecords形式（行ごとのdict）を組み立てる"""
+    names = list(arrays.keys())
+    columns = [column_to_list(arrays[name], limit) for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+def validate_response_format(response_format: Optional[str]) -> str:
+    """response_format を検証して正規化する（Noneは records）"""
+    value = (response_format or "records").strip().lower()
+    if value not in RESPONSE_FORMATS:
+        raise ValueError(f"不明な response_format: {response_format}. "
+                         f"有効な値: {list(RESPONSE_FORMATS)}")
+    return value
+
+
+def encode_rows(arrays: Mapping[str, np.ndarray], response_format: Optional[str] = "records",
+                limit: Optional[int] = None) -> Dict[str, Any]:
+    """ツール応答の columns / data（columnar なら format も）を組み立てる"""
+    response_format = validate_response_format(response_format)
+    if response_format == "columnar":
+        return {
+            "format": "columnar",
+            "columns": list(arrays.keys()),
+            "data": {name: column_to_list(arr, limit, iso_datetime=True)
+                     for name, arr in arrays.items()},
+        }
+    return {"columns": list(arrays.keys()), "data": arrays_to_records(arrays, limit)}
+
+
+__all__ = [
+    "RESPONSE_FORMATS",
+    "ColumnArrays",
+    "frame_to_arrays",
+    "num_rows",
+    "column_to_list",
+    "arrays_to_columns",
+    "arrays_to_records",
+    "validate_response_format",
+    "encode_rows",
+]
@@ -0,0 +1,217 @@
+"""Precomputed sire / broodmare-sire rollups
+
+sire_stats は呼び出しごとに NL_SE⨝NL_UM（距離指定時はNL_RAとの6カラム結合も）を
+父馬名（Ketto3InfoBamei1）でGROUP BYしており、高レベルAPIの中で最も遅い。
+
+そこで種牡馬（父）と母の父（Ketto3InfoBamei5）それぞれについて
+名前 × 競馬場（JyoCD）× 年（Year）× 距離（Kyori）× 芝/ダート/障害（TrackCD）
+の単位で一度だけ集計したロールアップを作り、集約キューブ（aggregate_cube）と
+同じ仕組みでサイドカーファイルに保存・差分更新する。
+
+- 距離は実距離（Kyori）で持つ。距離帯（短距離・マイル等）は実距離の範囲の合計で求まる
+- 名前の部分一致はロールアップ上の異なり名に対するn-gram索引で解決する
+- NL_SEの追加・訂正はその年を、NL_UMの訂正（父馬名の修正等）はその馬が
+  出走した年を集計し直す
+- 作成は集約キューブと同じくバックグラウンドで行い、ロールアップがない間はSQLで答える。
+  定期更新の対象にするには register_sire_rollups() で登録する
+
+環境変数:
+- DB_FAVORITE_CUBE: 0/false で集約キューブとともに無効化（常にSQLで集計）
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .aggregate_cube import (
+    MEASURES,
+    CubeSpec,
+    _as_int,
+    _track_expr,
+    get_cube,
+    has_race_table,
+    register_cube,
+)
+from .name_index import NGramIndex
+from .race_key import race_join
+from .utils import validate_identifier
+
+# 集計対象の血統カラム（NL_UM）
+PEDIGREE_COLUMNS = {
+    "sire": "Ketto3InfoBamei1",
+    "broodmare_sire": "Ketto3InfoBamei5",
+}
+
+# ロールアップの次元（カラム名, 元テーブル別名, 元カラム）
+DIMENSIONS: Tuple[Tuple[str, str, str], ...] = (
+    ("JyoCD", "s", "JyoCD"),
+    ("Year", "s", "Year"),
+    ("Kyori", "r", "Kyori"),
+    ("Track", "r", "TrackCD"),
+)
+
+
+def build_rollup_sql(db, se_table: str, um_table: str, ra_table: str, name_column: str,
+                     years: Optional[Sequence[Any]] = None) -> Tuple[str, Tuple, Tuple[str, ...]]:
+    """ロールアップを集計するSQL・パラメータと、ソースで実際に使える次元
+
+    NL_RAやその一部カラムがないDBでは、その次元をNULLで埋めて集計する。
+    """
+    for table in (se_table, um_table, ra_table):
+        validate_identifier(table, "table name")
+    validate_identifier(name_column, "column name")
+    if not db.has_column(um_table, name_column):
+        raise ValueError(f"{um_table} has no {name_column} column")
+    has_ra = has_race_table(db, ra_table)
+
+    selects = [f"u.{name_column} AS Name"]
+    dimensions = []
+    for name, alias, column in DIMENSIONS:
+        table = se_table if alias == "s" else ra_table
+        if (alias == "r" and not has_ra) or not db.has_column(table, column):
+            selects.append(f"NULL AS {name}")
+            continue
+        dimensions.append(name)
+        source = f"{alias}.{column}"
+        if name == "Track":
+            selects.append(f"{_track_expr(source)} AS {name}")
+        elif name in ("Year", "Kyori"):
+            selects.append(f"{_as_int(source)} AS {name}")
+        else:
+            selects.append(f"{source} AS {name}")
+
+    source, join = se_table, ""
+    if has_ra:
+        race = race_join(db, se_table, ra_table)
+        source, join = race.se, f"LEFT JOIN {race.ra} r ON {race.on}"
+    group_by = ", ".join(str(i) for i in range(1, len(DIMENSIONS) + 2))
+    year_filter = ""
+    if years:
+        year_filter = f" AND s.Year IN ({', '.join('?' * len(years))})"
+    query = f"""
+    SELECT {', '.join(selects)},
+        COUNT(*) AS total,
+        SUM(CASE WHEN s.KakuteiJyuni = 1 THEN 1 ELSE 0 END) AS wins,
+        SUM(CASE WHEN s.KakuteiJyuni IN (1, 2) THEN 1 ELSE 0 END) AS places_2,
+        SUM(CASE WHEN s.KakuteiJyuni IN (1, 2, 3) THEN 1 ELSE 0 END) AS places_3
+    FROM {source} s
+    JOIN {um_table} u ON s.KettoNum = u.KettoNum
+    {join}
+    WHERE u.{name_column} IS NOT NULL
+        AND s.KakuteiJyuni IS NOT NULL AND s.KakuteiJyuni > 0{year_filter}
+    GROUP BY {group_by}
+    """
+    return query, tuple(years or ()), tuple(dimensions)
+
+
+class SireRollup:
+    """血統名別成績のロールアップ（メモリ上）
+
+    Args:
+        frame: Name・次元カラムと total/wins/places_2/places_3 を持つ集計結果
+        dimensions: ソースで実際に集計できた次元（それ以外の次元での絞り込みは不可）
+    """
+
+    def __init__(self, frame: pd.DataFrame, dimensions: Tuple[str, ...]):
+        self.dimensions = frozenset(dimensions)
+        self.rows = len(frame)
+        names = pd.Categorical(frame["Name"].astype(object).where(frame["Name"].notna(), None))
+        self.names: List[str] = [str(name) for name in names.categories]
+        self._name_codes = names.codes.astype(np.int32)
+        self._index = NGramIndex(self.names, range(len(self.names)))
+
+        self._categories: Dict[str, Dict[str, int]] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        for name in ("JyoCD", "Track"):
+            values = frame[name].astype(object).where(frame[name].notna(), None)
+            values = values.map(lambda v: None if v is None else str(v).strip())
+            categorical = pd.Categorical(values)
+            self._categories[name] = {c: i for i, c in enumerate(categorical.categories)}
+            self._columns[name] = categorical.codes.astype(np.int16)
+        for name in ("Year", "Kyori"):
+            self._columns[name] = pd.to_numeric(frame[name], errors="coerce").fillna(-1) \
+                .to_numpy(np.int32)
+        for name in MEASURES:
+            self._columns[name] = pd.to_numeric(frame[name], errors="coerce").fillna(0) \
+                .to_numpy(np.int64)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def covers(self, **filters: Any) -> bool:
+        """指定された絞り込みをすべてロールアップで扱えるか"""
+        used = {name for name, value in filters.items() if value is not None}
+        return used <= self.dimensions
+
+    def match(self, query: str) -> List[str]:
+        """queryに部分一致する名前（出走のある名前だけ）"""
+        return self._index.lookup(query).names
+
+    def rollup(self, query: str, venue_code: Optional[str] = None,
+               year_from: Optional[int] = None, distance: Optional[int] = None,
+               track: Optional[str] = None) -> List[Tuple[str, int, int, int, int]]:
+        """部分一致する名前ごとの (名前, total, wins, places_2, places_3)（出走数の多い順）"""
+        ids = self._index.lookup(query).keys
+        if not ids:
+            return []
+        mask = np.isin(self._name_codes, ids)
+        for name, value in (("JyoCD", venue_code), ("Track", track)):
+            if value is not None:
+                code = self._categories[name].get(str(value).strip())
+                if code is None:
+                    return []
+                mask &= self._columns[name] == code
+        if year_from is not None:
+            mask &= self._columns["Year"] >= int(year_from)
+        if distance is not None:
+            mask &= self._columns["Kyori"] == int(distance)
+
+        codes = self._name_codes[mask]
+        sums = [np.bincount(codes, weights=self._columns[name][mask],
+                            minlength=len(self.names)).astype(np.int64)
+                for name in MEASURES]
+        rows = [(self.names[i], *(int(s[i]) for s in sums)) for i in ids if sums[0][i] > 0]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cells": self.rows, "names": len(self.names),
+                "dimensions": sorted(self.dimensions)}
+
+
+def sire_rollup_spec(role: str, se_table: str = "NL_SE", um_table: str = "NL_UM",
+                     ra_table: str = "NL_RA") -> CubeSpec:
+    column = PEDIGREE_COLUMNS[role]
+    return CubeSpec(
+        name=validate_identifier(f"{role}_rollup", "table name"),
+        fact_table=se_table,
+        race_table=ra_table,
+        build_sql=lambda db, years: build_rollup_sql(db, se_table, um_table, ra_table,
+                                                     column, years),
+        factory=SireRollup,
+        lookups=((um_table, "KettoNum"),),
+    )
+
+
+_SPECS = {role: sire_rollup_spec(role) for role in PEDIGREE_COLUMNS}
+
+
+def register_sire_rollups() -> None:
+    """父・母の父のロールアップを定期更新（refresh_cubes）の対象に登録する"""
+    for spec in _SPECS.values():
+        register_cube(spec)
+
+
+def get_sire_rollup(db, role: str = "sire") -> Optional[SireRollup]:
+    """接続先の血統名別ロールアップ（作り方・更新は aggregate_cube.get_cube を参照）"""
+    return get_cube(db, _SPECS[role])
+
+
+__all__ = [
+    "PEDIGREE_COLUMNS",
+    "SireRollup",
+    "build_rollup_sql",
+    "sire_rollup_spec",
+    "register_sire_rollups",
+    "get_sire_rollup",
+]
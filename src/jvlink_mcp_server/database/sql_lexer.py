@@ -0,0 +1,253 @@
+"""Single-pass SQL lexer
+
+安全性チェック（DatabaseConnection.check_query_safety）、validate_sql_query ツール、
+QueryCorrector が同じトークン列を共有するための字句解析器。
+
+- 1本のコンパイル済み正規表現でSQLを先頭から1回だけ走査する
+- 文字列リテラル（'...'、PostgreSQLの E'...'）、引用符付き識別子（"..."）、
+  コメント（-- / /* */）を1トークンとして切り出すため、
+  ``Bamei LIKE '%UPDATE%'`` や ``-- DROP`` をキーワードと誤認しない
+- 結果は生のSQL文字列をキーとするLRUに保持し、同じクエリの検証と修正では
+  字句解析を1回しか行わない
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+# 読み取り専用でないことを示すキーワード（この順で報告する）
+DANGEROUS_KEYWORDS: Tuple[str, ...] = (
+    "DROP", "DELETE", "UPDATE", "INSERT", "CREATE", "ALTER",
+    "TRUNCATE", "REPLACE", "MERGE", "GRANT", "REVOKE",
+)
+_DANGEROUS = frozenset(DANGEROUS_KEYWORDS)
+
+# 予約語テーブル（WORDトークンをKEYWORDとIDENTに分類する）
+KEYWORDS = frozenset({
+    "SELECT", "FROM", "WHERE", "AND", "OR", "NOT", "IN", "IS", "NULL", "LIKE",
+    "ILIKE", "GLOB", "BETWEEN", "EXISTS", "AS", "ON", "USING", "JOIN", "INNER",
+    "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "NATURAL", "GROUP", "BY", "ORDER",
+    "HAVING", "LIMIT", "OFFSET", "UNION", "ALL", "EXCEPT", "INTERSECT", "DISTINCT",
+    "CASE", "WHEN", "THEN", "ELSE", "END", "CAST", "WITH", "RECURSIVE", "ASC",
+    "DESC", "OVER", "PARTITION", "WINDOW", "FILTER", "VALUES", "TRUE", "FALSE",
+    "EXPLAIN", "PRAGMA", "ATTACH", "DETACH", "COPY", "SET", "INTO", "TABLE",
+    "VACUUM", "REINDEX", "EXPORT", "IMPORT", "INSTALL", "LOAD", "CALL",
+}) | _DANGEROUS
+
+# 種別
+WS = "ws"
+COMMENT = "comment"
+STRING = "string"
+QUOTED_IDENT = "quoted_ident"
+NUMBER = "number"
+KEYWORD = "keyword"
+IDENT = "ident"
+OP = "op"
+PUNCT = "punct"
+OTHER = "other"
+
+_TRIVIA = (WS, COMMENT)
+
+# LexedQuery.violation の値
+MULTIPLE_STATEMENTS = "multiple_statements"
+DANGEROUS_KEYWORD = "dangerous_keyword"
+NOT_SELECT = "not_select"
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>[Ee]'(?:[^'\\]|\\.|'')*(?:'|\Z)|'(?:[^']|'')*(?:'|\Z))
+  | (?P<quoted_ident>"(?:[^"]|"")*(?:"|\Z))
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<word>[^\W\d]\w*)
+  | (?P<op><>|!=|<=|>=|\|\||::|[=<>+\-*/%])
+  | (?P<punct>[;,.()])
+  | (?P<other>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+class Token(NamedTuple):
+    """字句トークン（kind は上記の種別、text は元のSQLの該当部分）"""
+
+    kind: str
+    text: str
+
+    @property
+    def upper(self) -> str:
+        return self.text.upper()
+
+    @property
+    def is_trivia(self) -> bool:
+        return self.kind in _TRIVIA
+
+    def string_value(self) -> Optional[str]:
+        """'...' リテラルの中身（文字列トークン以外・未終端はNone）"""
+        if self.kind != STRING or len(self.text) < 2 or self.text[0] != "'" \
+                or self.text[-1] != "'":
+            return None
+        return self.text[1:-1].replace("''", "'")
+
+
+def tokenize(sql: str) -> Tuple[Token, ...]:
+    """SQLをトークン列に分解する（連結すると元のSQLに戻る）"""
+    tokens = []
+    append = tokens.append
+    make = tuple.__new__  # NamedTupleの__new__を経由しない（トークン数に比例する処理のため）
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "word":
+            kind = KEYWORD if text.upper() in KEYWORDS else IDENT
+        append(make(Token, (kind, text)))
+    return tuple(tokens)
+
+
+def render(tokens: Iterable[Token]) -> str:
+    """トークン列をSQLに戻す"""
+    return "".join(token.text for token in tokens)
+
+
+@dataclass(frozen=True)
+class LexedQuery:
+    """字句解析済みのクエリ（lex() がキャッシュして共有するため不変）
+
+    派生情報（キーワード・文の数等）は初回参照時に計算して保持する。
+    """
+
+    sql: str
+    tokens: Tuple[Token, ...]
+    # コメント・空白を除いたトークンの tokens 内の位置
+    code: Tuple[int, ...]
+
+    @cached_property
+    def keywords(self) -> Tuple[str, ...]:
+        """リテラル・コメントの外に現れるキーワード（大文字）"""
+        return tuple(self.tokens[i].upper for i in self.code if self.tokens[i].kind == KEYWORD)
+
+    @cached_property
+    def dangerous_keywords(self) -> Tuple[str, ...]:
+        """含まれる危険なキーワード（DANGEROUS_KEYWORDS の順）"""
+        found = set(self.keywords) & _DANGEROUS
+        return tuple(kw for kw in DANGEROUS_KEYWORDS if kw in found)
+
+    @cached_property
+    def statement_count(self) -> int:
+        """セミコロンで区切られた空でない文の数"""
+        count = 0
+        in_statement = False
+        for i in self.code:
+            token = self.tokens[i]
+            if token.kind == PUNCT and token.text == ";":
+                in_statement = False
+            elif not in_statement:
+                count += 1
+                in_statement = True
+        return count
+
+    @cached_property
+    def body(self) -> str:
+        """先頭・末尾の空白とコメント、末尾のセミコロンを除いたSQL
+
+        サブクエリとして包むときに、末尾の ``-- コメント`` が閉じ括弧を
+        コメントアウトしないようにする。
+        """
+        code = [i for i in self.code
+                if not (self.tokens[i].kind == PUNCT and self.tokens[i].text == ";")]
+        if not code:
+            return ""
+        return render(self.tokens[code[0]:code[-1] + 1])
+
+    @cached_property
+    def leading_keyword(self) -> Optional[str]:
+        """最初のキーワード（括弧は読み飛ばす）"""
+        for i in self.code:
+            token = self.tokens[i]
+            if token.kind == PUNCT and token.text == "(":
+                continue
+            return token.upper if token.kind == KEYWORD else None
+        return None
+
+    @cached_property
+    def is_select(self) -> bool:
+        """SELECT（またはWITH ... SELECT）文か"""
+        return self.leading_keyword in ("SELECT", "WITH") and "SELECT" in self.keywords
+
+    @cached_property
+    def violation(self) -> Optional[str]:
+        """読み取り専用として実行できない理由（実行できるならNone）
+
+        MULTIPLE_STATEMENTS / DANGEROUS_KEYWORD / NOT_SELECT のいずれか。
+        安全性チェック（DatabaseConnection.check_query_safety）と validate_sql_query
+        ツールはこの判定だけを使い、結果が食い違わないようにする。
+        """
+        if self.statement_count > 1:
+            return MULTIPLE_STATEMENTS
+        if self.dangerous_keywords:
+            return DANGEROUS_KEYWORD
+        if not self.is_select:
+            return NOT_SELECT
+        return None
+
+    @property
+    def is_safe(self) -> bool:
+        return self.violation is None
+
+
+# 生のSQL文字列 → LexedQuery のLRU
+LEX_CACHE_SIZE = 1024
+_lex_cache: "OrderedDict[str, LexedQuery]" = OrderedDict()
+_lex_cache_lock = threading.Lock()
+
+
+def lex(sql: str) -> LexedQuery:
+    """SQLを字句解析する（生のSQL文字列をキーにLRUキャッシュ）"""
+    with _lex_cache_lock:
+        lexed = _lex_cache.get(sql)
+        if lexed is not None:
+            _lex_cache.move_to_end(sql)
+            return lexed
+    tokens = tokenize(sql)
+    code = tuple(i for i, token in enumerate(tokens) if token[0] not in _TRIVIA)
+    return remember(LexedQuery(sql=sql, tokens=tokens, code=code))
+
+
+def remember(lexed: LexedQuery) -> LexedQuery:
+    """トークン列から組み立てた LexedQuery をキャッシュに登録する
+
+    QueryCorrector がリテラルを書き換えたSQLを、安全性チェックで再び
+    字句解析しなくて済むようにする。
+    """
+    with _lex_cache_lock:
+        current = _lex_cache.setdefault(lexed.sql, lexed)
+        _lex_cache.move_to_end(lexed.sql)
+        while len(_lex_cache) > LEX_CACHE_SIZE:
+            _lex_cache.popitem(last=False)
+    return current
+
+
+def clear_lex_cache() -> None:
+    """字句解析キャッシュを破棄する（テスト・ベンチマーク用）"""
+    with _lex_cache_lock:
+        _lex_cache.clear()
+
+
+__all__ = [
+    "DANGEROUS_KEYWORDS",
+    "KEYWORDS",
+    "MULTIPLE_STATEMENTS",
+    "DANGEROUS_KEYWORD",
+    "NOT_SELECT",
+    "Token",
+    "LexedQuery",
+    "tokenize",
+    "render",
+    "lex",
+    "remember",
+    "clear_lex_cache",
+]
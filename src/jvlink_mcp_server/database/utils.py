@@ -1,7 +1,10 @@
 """Shared database utilities"""
 
+import hashlib
 import re
 
+from .sql_lexer import PUNCT, lex
+
 _IDENTIFIER_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
 
 
@@ -19,3 +22,32 @@ def validate_identifier(name: str, kind: str = "identifier") -> str:
             f"Invalid {kind} {name!r}: only letters, digits, and underscores are allowed."
         )
     return name
+
+
+
+def normalize_sql(sql: str) -> str:
+    """SQLの空白・コメントと末尾セミコロンを正規化する（フィンガープリント・キャッシュキー用）
+
+    sql_lexer のトークン列から、コメント・空白を除いたトークンを1つの空白で区切って
+    並べ直す（元のSQLで間に空白もコメントもなかったトークンは続けたまま）。
+    ``SELECT 1 -- x`` の後に改行があるかどうかで意味が変わるSQLを同じキーにしない。
+    文字列リテラル内の空白はそのまま残す。
+    """
+    lexed = lex(sql)
+    tokens = lexed.tokens
+    code = list(lexed.code)
+    while code and tokens[code[-1]].kind == PUNCT and tokens[code[-1]].text == ";":
+        code.pop()
+    parts = []
+    previous = None
+    for i in code:
+        if previous is not None and i != previous + 1:
+            parts.append(" ")
+        parts.append(tokens[i].text)
+        previous = i
+    return "".join(parts)
+
+
+def query_fingerprint(sql: str) -> str:
+    """正規化したSQLの短いハッシュ"""
+    return hashlib.sha256(normalize_sql(sql).encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,109 @@
+"""Worker thread pool for blocking tool bodies
+
+MCPツールの本体（pandas.read_sql_query等のDB処理）は同期的にブロックするため、
+そのままイベントループ上で実行するとSSEモードで他クライアントのストリームや
+keepaliveまで止まってしまう。ここで定義する ``run_in_worker`` デコレータを
+付けたツールは有界のスレッドプールで実行され、ループは応答可能なまま残る。
+
+ワーカー数は環境変数 MCP_WORKER_THREADS で設定する（既定はDB_POOL_MAX_SIZE）。
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Union
+
+from .database.query_control import (
+    QueryControl,
+    QueryInterruptedError,
+    query_control,
+    tool_timeout,
+)
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    """ワーカースレッド数（接続プールの最大数と揃えるのが既定）"""
+    default = os.getenv("DB_POOL_MAX_SIZE", "5")
+    try:
+        return max(1, int(os.getenv("MCP_WORKER_THREADS", default)))
+    except ValueError:
+        logger.warning(f"Invalid MCP_WORKER_THREADS: {os.getenv('MCP_WORKER_THREADS')!r}, using 5")
+        return 5
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """プロセス共有のワーカースレッドプールを取得（初回呼び出しで作成）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_worker_count(), thread_name_prefix="jvlink-worker"
+            )
+        return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """ワーカープールを停止する（シャットダウン・テスト用）"""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """同期関数をワーカースレッドで実行し、結果を待つ"""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def run_in_worker(func: Union[Callable[..., Any], str, None] = None):
+    """同期ツール関数を、ワーカースレッドで実行する非同期関数に変換する
+
+    functools.wraps により元のシグネチャ・docstringが保たれるため、
+    FastMCPの引数スキーマ生成はそのまま機能する。
+
+    呼び出しごとに QueryControl を設定し、DB_QUERY_TIMEOUT[_<ツール名>] の
+    タイムアウトを適用する。MCPリクエストがキャンセルされると実行中の文を中断し、
+    タイムアウト時は構造化された ``{"status": "timed_out", ...}`` を返す。
+
+    ``@run_in_worker`` のほか、MCPのツール名が関数名と異なる場合は
+    ``@run_in_worker("keiba_data_search")`` のようにツール名を渡す。
+    """
+    if isinstance(func, str) or func is None:
+        tool_name = func
+        return lambda f: _wrap(f, tool_name or f.__name__)
+    return _wrap(func, func.__name__)
+
+
+def _wrap(func: Callable[..., Any], tool_name: str) -> Callable[..., Any]:
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        control = QueryControl(tool_timeout(tool_name))
+
+        def call():
+            with query_control(control):
+                return func(*args, **kwargs)
+
+        try:
+            return await run_blocking(call)
+        except asyncio.CancelledError:
+            # ワーカー側で実行中の文を中断してからキャンセルを伝播する
+            control.cancel()
+            raise
+        except QueryInterruptedError as e:
+            logger.info(f"{tool_name}: {e}")
+            return e.to_result()
+
+    return wrapper
@@ -0,0 +1,121 @@
+"""JVLink MCP Server - 推奨インデックスの作成コマンド
+
+jrvltsqlで作成したDBに、高レベルAPIが使うインデックス（レースキー、
+KettoNum、KisyuCode、KisyuRyakusyo、Bamei、Ninki、Wakuban、RaceKey式）と、
+RaceKeyカラムを加えたビュー（RK_NL_SE 等。database/race_key.py）を作成し、
+集約キューブ・血統ロールアップ（database/aggregate_cube.py, sire_rollup.py）を
+集計してサイドカーファイルに保存する。
+接続先は .env / 環境変数（DB_TYPE, DB_PATH, DB_HOST, ...）から読む。
+
+サーバーの接続は読み取り専用のため、インデックスはこのコマンドで作成する。
+既にあるインデックス・ビューは作り直さないので、データ更新のたびに実行してよい。
+DuckDBは書き込み接続が排他のため、サーバーを停止してから実行すること。
+
+Usage:
+    python -m jvlink_mcp_server.index_builder [--dry-run] [--no-analyze] [--no-cubes]
+                                              [--table NL_SE ...]
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+from .database.aggregate_cube import refresh_cubes
+from .database.connection import DatabaseConnection
+from .database.indexes import RECOMMENDED_INDEXES, build_indexes
+from .database.pool import close_all_pools
+from .database.race_key import build_race_key_views
+from .database.sire_rollup import register_sire_rollups
+
+_STATUS_LABELS = {
+    "created": "作成",
+    "exists": "既存",
+    "would_create": "作成予定",
+    "failed": "失敗",
+    "skipped": "省略",
+}
+
+# refresh_cubes の origin → 表示
+_CUBE_LABELS = {
+    "built": "作成",
+    "incremental": "差分更新",
+    "sidecar": "既存",
+    "failed": "失敗",
+    "disabled": "省略",
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="jrvltsql DBに推奨インデックスを作成する（冪等）"
+    )
+    parser.add_argument("--dry-run", action="store_true",
+                        help="作成せず、欠けているインデックスを表示する")
+    parser.add_argument("--no-analyze", action="store_true",
+                        help="作成後のANALYZEを行わない")
+    parser.add_argument("--no-cubes", action="store_true",
+                        help="集約キューブを集計しない")
+    parser.add_argument("--table", action="append", default=None,
+                        help="対象テーブルを限定する（複数指定可）")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    db = DatabaseConnection()
+    specs = RECOMMENDED_INDEXES
+    if args.table:
+        wanted = {t.lower() for t in args.table}
+        specs = tuple(s for s in specs if s.table.lower() in wanted)
+
+    with db:
+        tables = db.get_tables()
+    # 読み取り専用の接続を閉じてから書き込み接続を開く（DuckDBは同一ファイルの
+    # 設定違いの接続を同時に持てない）
+    close_all_pools()
+    print(f"Database: {db.db_type} {db.db_path or ''}".rstrip())
+
+    def report(result):
+        line = f"  [{_STATUS_LABELS[result.status]}] {result.spec.name}: {result.spec.describe()}"
+        if result.status == "created":
+            line += f" ({result.seconds:.1f}s)"
+        elif result.error:
+            line += f" - {result.error}"
+        print(line, flush=True)
+
+    def report_view(result):
+        line = f"  [{_STATUS_LABELS[result.status]}] {result.view}: {result.table} + RaceKey"
+        if result.error:
+            line += f" - {result.error}"
+        print(line, flush=True)
+
+    conn = db.open_writable_connection()
+    try:
+        results = build_indexes(conn, db.db_type, tables, specs=specs,
+                                dry_run=args.dry_run, analyze=not args.no_analyze,
+                                progress=report)
+        # RaceKeyの式インデックスがあるテーブルにだけビューを作る
+        indexed = [r.spec.table for r in results
+                   if r.spec.expression is not None
+                   and r.status in ("created", "exists", "would_create")]
+        views = build_race_key_views(conn, db.db_type, tables, indexed=indexed,
+                                     only=args.table, dry_run=args.dry_run,
+                                     progress=report_view)
+    finally:
+        conn.close()
+
+    if not results:
+        print("対象テーブルがありません")
+    failed = [r for r in list(results) + list(views) if r.status == "failed"]
+
+    if not (args.dry_run or args.no_cubes or args.table):
+        # サーバーが初回の利用時にバックグラウンドで集計するキューブを先に作っておく
+        # （全履歴の集計はツールのタイムアウトより長くかかることがある）。
+        # 集計できないキューブ（必要なカラムがない等）はサーバーもSQLで答えるので失敗扱いにしない
+        register_sire_rollups()
+        for name, origin in refresh_cubes().items():
+            print(f"  [{_CUBE_LABELS.get(origin, origin)}] {name}", flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
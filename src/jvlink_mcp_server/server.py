@@ -2,14 +2,17 @@
 
 import os
 import json
+import importlib
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, List, Optional
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
 
 # .envファイルを読み込む
 load_dotenv()
-from .database.connection import DatabaseConnection
 from .database.schema_info import (
     get_schema_description,
     get_target_equivalent_query_examples,
@@ -18,57 +21,155 @@ from .database.schema_info import (
     GRADE_CODES,
 )
 from .database.schema_descriptions import (
-    get_column_description,
+    get_column_descriptions,
     get_table_description,
     QUERY_GENERATION_HINTS,
 )
 # Improvement modules
-from .database.query_corrector import correct_query as auto_correct_query
+from .database.query_corrector import (
+    correct_query as auto_correct_query,
+    memo_stats as corrector_memo_stats,
+)
+from .database.query_control import QueryInterruptedError
+from .database.cost_guard import QueryCostError, plan_cache, preflight
+from .database.pagination import (
+    PageToken,
+    clamp_page_size,
+    next_token as next_page_token,
+    version_tag,
+)
+from .database.indexes import startup_index_audit
+from .database.race_key import has_race_key
+from .database.incremental import start_refresh_scheduler
+from .database.pool import pool_stats
+from .database.resource_cache import get_resource_cache
+from .database.schema_slicer import slice_schema
+from .database.sql_lexer import DANGEROUS_KEYWORD, MULTIPLE_STATEMENTS, NOT_SELECT
+from .database.sql_lexer import lex as lex_sql
 from .database.query_templates import (
     list_templates as get_templates_list,
     render_template,
     get_template_info,
 )
-from .database.high_level_api import (
-    get_favorite_performance as _get_favorite_performance,
-    get_jockey_stats as _get_jockey_stats,
-    get_frame_stats as _get_frame_stats,
-    get_horse_history as _get_horse_history,
-    get_sire_stats as _get_sire_stats,
-    get_nar_favorite_performance as _get_nar_favorite_performance,
-    get_nar_jockey_stats as _get_nar_jockey_stats,
-    get_nar_horse_history as _get_nar_horse_history,
-)
 from .database.sample_data_provider import (
     get_sample_data as _get_sample_data,
     get_column_value_examples as _get_column_value_examples,
     get_data_snapshot as _get_data_snapshot,
+    sample_cache_stats,
 )
-from .updater import check_for_updates, perform_update, startup_update_check
+from .updater import check_for_updates, perform_update, start_update_check
+from .executor import run_in_worker
 
-# FastMCPサーバーの初期化
-mcp = FastMCP("JVLink MCP Server")
 
-# 起動時にアップデートを確認（バックグラウンドでサイレントに）
-_update_notice = startup_update_check()
-if _update_notice:
-    import logging as _logging
-    _logging.getLogger(__name__).info(_update_notice)
+def _lazy(module: str, name: str):
+    """最初の呼び出し時に module を import して name を呼ぶ関数
+
+    pandas を読み込むモジュール（接続・シリアライズ・高レベルAPI・集約キャッシュ）は
+    起動時に import せず、最初のツール呼び出しまで遅らせる。
+    """
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(module, __package__), name)(*args, **kwargs)
+    call.__name__ = name
+    return call
+
+
+DatabaseConnection = _lazy(".database.connection", "DatabaseConnection")
+
+encode_rows = _lazy(".database.serialization", "encode_rows")
+frame_to_arrays = _lazy(".database.serialization", "frame_to_arrays")
+num_rows = _lazy(".database.serialization", "num_rows")
+validate_response_format = _lazy(".database.serialization", "validate_response_format")
+
+_get_favorite_performance = _lazy(".database.high_level_api", "get_favorite_performance")
+_get_favorite_performance_batch = _lazy(".database.high_level_api",
+                                        "get_favorite_performance_batch")
+_get_jockey_stats = _lazy(".database.high_level_api", "get_jockey_stats")
+_get_jockey_stats_batch = _lazy(".database.high_level_api", "get_jockey_stats_batch")
+_get_frame_stats = _lazy(".database.high_level_api", "get_frame_stats")
+_get_horse_history = _lazy(".database.high_level_api", "get_horse_history")
+_get_sire_stats = _lazy(".database.high_level_api", "get_sire_stats")
+_get_broodmare_sire_stats = _lazy(".database.high_level_api", "get_broodmare_sire_stats")
+_get_nar_favorite_performance = _lazy(".database.high_level_api",
+                                      "get_nar_favorite_performance")
+_get_nar_jockey_stats = _lazy(".database.high_level_api", "get_nar_jockey_stats")
+_get_nar_horse_history = _lazy(".database.high_level_api", "get_nar_horse_history")
+
+refresh_cubes = _lazy(".database.aggregate_cube", "refresh_cubes")
+register_sire_rollups = _lazy(".database.sire_rollup", "register_sire_rollups")
+cube_stats = _lazy(".database.aggregate_cube", "cube_stats")
+name_index_stats = _lazy(".database.name_index", "name_index_stats")
+get_result_cache = _lazy(".database.result_cache", "get_result_cache")
+catalog_stats = _lazy(".database.schema_catalog", "catalog_stats")
+
+# 起動時にアップデートを確認（バックグラウンドスレッドで。MCP_UPDATE_CHECK=0 で無効）
+_update_thread = start_update_check()
+
+# 推奨インデックスの監査と集約キューブの定期更新はDBに触れるため、import時ではなく
+# サーバーの起動時（start_background_jobs）に開始する
+_INDEX_AUDIT_DELAY = 2.0
+_missing_indexes = []
+_background_lock = threading.Lock()
+_index_audit: Optional[threading.Timer] = None
+_refresh_scheduler = None
+
+
+def _audit_indexes():
+    global _missing_indexes
+    _missing_indexes = startup_index_audit()
+
+
+def _refresh_aggregates() -> dict:
+    """定期更新の対象（人気別キューブと血統ロールアップ）を登録してから更新する"""
+    register_sire_rollups()
+    return refresh_cubes()
+
+
+def start_background_jobs() -> None:
+    """インデックス監査と集約キューブの定期更新を開始する（2回目以降は何もしない）
+
+    インデックス監査はDBへの接続と pandas の読み込みを伴うので、MCPの初期化応答を
+    返した後（起動から数秒後）に行い、不足分はログに出す。
+    DB_AGGREGATE_REFRESH_INTERVAL（秒）が設定されていれば集約キューブと血統ロールアップを
+    定期的に差分更新する（未設定でもデータ世代が変わった後の最初の利用時に
+    バックグラウンドで差分更新され、それまではSQLで答える）。
+    """
+    global _index_audit, _refresh_scheduler
+    with _background_lock:
+        if _index_audit is not None:
+            return
+        _index_audit = threading.Timer(_INDEX_AUDIT_DELAY, _audit_indexes)
+        _index_audit.name = "jvlink-index-audit"
+        _index_audit.daemon = True
+        _index_audit.start()
+        _refresh_scheduler = start_refresh_scheduler([_refresh_aggregates])
+
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP) -> AsyncIterator[dict]:
+    # stdio・SSEどちらの起動経路でもセッション開始時に呼ばれる（SSEは接続ごと）
+    start_background_jobs()
+    yield {}
+
+
+# FastMCPサーバーの初期化
+mcp = FastMCP("JVLink MCP Server", lifespan=_lifespan)
+# DBアクセス等でブロックするツール/リソースは @run_in_worker でワーカースレッドに逃がし、
+# SSEモードのイベントループを止めないようにする
 
 # データディレクトリのパス（パッケージルートからの相対パス）
 DATA_DIR = Path(__file__).parent.parent.parent / "data"
 
-# 特徴量知見データの読み込み
-_feature_importance_path = DATA_DIR / "feature_importance.json"
-if _feature_importance_path.exists():
-    with open(_feature_importance_path, "r", encoding="utf-8") as f:
-        FEATURE_IMPORTANCE_DATA = json.load(f)
-else:
+
+@lru_cache(maxsize=1)
+def _feature_importance() -> dict:
+    """特徴量知見データ（最初の利用時に読み込む）"""
+    path = DATA_DIR / "feature_importance.json"
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
     import logging
-    logging.getLogger(__name__).warning(
-        f"feature_importance.json not found at {_feature_importance_path}"
-    )
-    FEATURE_IMPORTANCE_DATA = {
+    logging.getLogger(__name__).warning(f"feature_importance.json not found at {path}")
+    return {
         "important_features": [],
         "feature_combinations": [],
         "references": []
@@ -80,39 +181,58 @@ else:
 # Resources: Claude Desktopが接続時に自動的に読み込む情報
 # ============================================================================
 
+# 定数の定義から描画するリソース（URI → データを返す関数）。描画はプロセスで1回
+_STATIC_RESOURCES = {
+    "schema://database": get_schema_description,
+    "examples://queries": get_target_equivalent_query_examples,
+    "knowledge://features": _feature_importance,
+    "codes://tracks": lambda: TRACK_CODES,
+    "codes://nar_tracks": lambda: NAR_TRACK_CODES,
+    "codes://grades": lambda: GRADE_CODES,
+}
+
+
+def _static_resource(uri: str) -> str:
+    return get_resource_cache().get(uri, _STATIC_RESOURCES[uri]).body
+
+
 @mcp.resource("schema://database")
 def database_schema_resource() -> str:
     """データベース全体のスキーマ情報
 
     接続時に自動的に読み込まれ、Claudeが最初からテーブル構造を理解できます
     """
-    schema_info = get_schema_description()
-    return json.dumps(schema_info, ensure_ascii=False, indent=2)
+    return _static_resource("schema://database")
 
 
 @mcp.resource("schema://tables")
+@run_in_worker
 def tables_list_resource() -> str:
     """テーブル一覧と説明
 
     全テーブルの概要を提供し、どのテーブルを使うべきか判断しやすくします
     """
     with DatabaseConnection() as db:
-        tables = db.get_tables()
+        tables = tuple(db.get_tables())
 
-    tables_info = []
-    for table in tables:
-        desc = get_table_description(table)
-        tables_info.append({
-            "table_name": table,
-            "description": desc.get("description", ""),
-            "target_equivalent": desc.get("target_equivalent", ""),
-            "primary_keys": desc.get("primary_keys", [])
-        })
+    def render():
+        tables_info = []
+        for table in tables:
+            desc = get_table_description(table)
+            tables_info.append({
+                "table_name": table,
+                "description": desc.get("description", ""),
+                "target_equivalent": desc.get("target_equivalent", ""),
+                "primary_keys": desc.get("primary_keys", [])
+            })
+        return {"tables": tables_info, "total": len(tables_info)}
 
-    return json.dumps({"tables": tables_info, "total": len(tables_info)}, ensure_ascii=False, indent=2)
+    # テーブル一覧が変わったときだけ描画し直す
+    return get_resource_cache().get("schema://tables", render, version=tables).body
 
 
 @mcp.resource("schema://table/{table_name}")
+@run_in_worker
 def table_detail_resource(table_name: str) -> str:
     """個別テーブルの詳細情報（動的リソース）
 
@@ -124,20 +244,21 @@ def table_detail_resource(table_name: str) -> str:
     """
     with DatabaseConnection() as db:
         schema_df = db.get_table_schema(table_name)
+    columns = tuple(zip(schema_df["column_name"].tolist(),
+                        schema_df["column_type"].astype(str).tolist()))
 
-        columns_with_desc = []
-        for _, row in schema_df.iterrows():
-            col_name = row["column_name"]
-            col_info = {
+    def render():
+        descriptions = get_column_descriptions(table_name, tuple(name for name, _ in columns))
+        columns_with_desc = [
+            {
                 "name": col_name,
-                "type": row["column_type"],
-                "description": get_column_description(table_name, col_name)
+                "type": col_type,
+                "description": descriptions[col_name]
             }
-            columns_with_desc.append(col_info)
-
+            for col_name, col_type in columns
+        ]
         table_desc = get_table_description(table_name)
-
-        info = {
+        return {
             "table_name": table_name,
             "table_description": table_desc.get("description", ""),
             "target_equivalent": table_desc.get("target_equivalent", ""),
@@ -147,7 +268,9 @@ def table_detail_resource(table_name: str) -> str:
             "query_hints": QUERY_GENERATION_HINTS if table_name in ["NL_RA", "NL_SE"] else ""
         }
 
-        return json.dumps(info, ensure_ascii=False, indent=2)
+    # カラム定義が変わったときだけ描画し直す
+    return get_resource_cache().get(f"schema://table/{table_name}", render,
+                                    version=columns).body
 
 
 @mcp.resource("examples://queries")
@@ -156,8 +279,7 @@ def query_examples_resource() -> str:
 
     よく使うクエリパターンをサンプルとして提供
     """
-    examples = get_target_equivalent_query_examples()
-    return json.dumps(examples, ensure_ascii=False, indent=2)
+    return _static_resource("examples://queries")
 
 
 @mcp.resource("knowledge://features")
@@ -166,7 +288,7 @@ def feature_knowledge_resource() -> str:
 
     機械学習モデルで重要とされる特徴量とその活用方法
     """
-    return json.dumps(FEATURE_IMPORTANCE_DATA, ensure_ascii=False, indent=2)
+    return _static_resource("knowledge://features")
 
 
 @mcp.resource("codes://tracks")
@@ -175,7 +297,7 @@ def track_codes_resource() -> str:
 
     JVLinkで使用される競馬場コードのマスタデータ
     """
-    return json.dumps(TRACK_CODES, ensure_ascii=False, indent=2)
+    return _static_resource("codes://tracks")
 
 
 @mcp.resource("codes://nar_tracks")
@@ -184,7 +306,7 @@ def nar_track_codes_resource() -> str:
 
     NARで使用される地方競馬場コードのマスタデータ（30-57）
     """
-    return json.dumps(NAR_TRACK_CODES, ensure_ascii=False, indent=2)
+    return _static_resource("codes://nar_tracks")
 
 
 @mcp.resource("codes://grades")
@@ -193,7 +315,19 @@ def grade_codes_resource() -> str:
 
     レースグレード（G1, G2, G3等）のコード表
     """
-    return json.dumps(GRADE_CODES, ensure_ascii=False, indent=2)
+    return _static_resource("codes://grades")
+
+
+@mcp.resource("resources://etags")
+def resource_etags_resource() -> str:
+    """リソースのETag（内容ハッシュ）一覧
+
+    前回読んだときとETagが同じリソースは内容も同じなので、読み直す必要はありません。
+    schema://tables と schema://table/{table_name} は一度読まれたものだけが載ります。
+    """
+    for uri in _STATIC_RESOURCES:
+        _static_resource(uri)
+    return json.dumps(get_resource_cache().etags(), ensure_ascii=False, indent=2)
 
 
 # ============================================================================
@@ -211,16 +345,23 @@ def get_database_schema() -> dict:
 
 
 @mcp.tool()
+@run_in_worker
 def get_query_examples() -> dict:
     """クエリ例集を取得
 
     Returns:
-        よく使うクエリのサンプル集
+        よく使うクエリのサンプル集（RaceKeyビューがあるDBではRaceKeyで結合する例）
     """
-    return get_target_equivalent_query_examples()
+    try:
+        with DatabaseConnection() as db:
+            race_key = has_race_key(db, "NL_SE", "NL_RA")
+    except Exception:
+        race_key = False
+    return get_target_equivalent_query_examples(race_key)
 
 
 @mcp.tool()
+@run_in_worker
 def list_tables() -> list[str]:
     """データベース内のテーブル一覧を取得
 
@@ -232,6 +373,7 @@ def list_tables() -> list[str]:
 
 
 @mcp.tool()
+@run_in_worker
 def get_table_info(table_name: str) -> dict:
     """指定テーブルのスキーマ情報を取得（詳細説明付き）
 
@@ -243,18 +385,15 @@ def get_table_info(table_name: str) -> dict:
     """
     with DatabaseConnection() as db:
         schema_df = db.get_table_schema(table_name)
-        
+
         # カラム情報に説明を追加
-        columns_with_desc = []
-        for _, row in schema_df.iterrows():
-            col_name = row["column_name"]
-            col_info = {
-                "name": col_name,
-                "type": row["column_type"],
-                "description": get_column_description(table_name, col_name)
-            }
-            columns_with_desc.append(col_info)
-        
+        names = schema_df["column_name"].tolist()
+        descriptions = get_column_descriptions(table_name, tuple(names))
+        columns_with_desc = [
+            {"name": col_name, "type": col_type, "description": descriptions[col_name]}
+            for col_name, col_type in zip(names, schema_df["column_type"].tolist())
+        ]
+
         # テーブル説明を取得
         table_desc = get_table_description(table_name)
         
@@ -280,11 +419,12 @@ def get_important_features() -> dict:
     Returns:
         重要特徴量のリスト、説明、での活用方法
     """
+    data = _feature_importance()
     return {
-        "features": FEATURE_IMPORTANCE_DATA["important_features"],
-        "feature_combinations": FEATURE_IMPORTANCE_DATA["feature_combinations"],
-        "total_features": len(FEATURE_IMPORTANCE_DATA["important_features"]),
-        "references": FEATURE_IMPORTANCE_DATA["references"]
+        "features": data["important_features"],
+        "feature_combinations": data["feature_combinations"],
+        "total_features": len(data["important_features"]),
+        "references": data["references"]
     }
 
 
@@ -299,7 +439,7 @@ def get_feature_by_category(category: str) -> dict:
         該当カテゴリの特徴量リスト
     """
     features = [
-        f for f in FEATURE_IMPORTANCE_DATA["important_features"]
+        f for f in _feature_importance()["important_features"]
         if f["category"] == category
     ]
     return {
@@ -320,7 +460,7 @@ def search_features(keyword: str) -> dict:
         該当する特徴量のリスト
     """
     matching_features = [
-        f for f in FEATURE_IMPORTANCE_DATA["important_features"]
+        f for f in _feature_importance()["important_features"]
         if keyword.lower() in f["name"].lower() or
            keyword.lower() in f["description"].lower()
     ]
@@ -336,7 +476,7 @@ def search_features(keyword: str) -> dict:
 # ============================================================================
 
 @mcp.tool()
-def get_sql_generation_prompt(query_text: str) -> dict:
+def get_sql_generation_prompt(query_text: str, max_schema_chars: Optional[int] = None) -> dict:
     """自然言語クエリをSQLに変換するためのLLMプロンプトを生成
 
     このツールはSQLを直接実行しません。LLMにSQLを生成させるためのプロンプトを返します。
@@ -346,23 +486,33 @@ def get_sql_generation_prompt(query_text: str) -> dict:
         query_text: 自然言語のクエリ
             例: "過去3年で東京競馬場の芝1600mで1番人気だった馬の成績を教えて"
             例: "ディープインパクト産駒の距離別成績を集計して"
+        max_schema_chars: プロンプトに載せるスキーマの最大文字数
+            （省略時は環境変数 DB_SCHEMA_PROMPT_BUDGET、既定6000）
 
     Returns:
-        LLM用プロンプトとスキーマ情報
+        LLM用プロンプトと、載せたテーブルの一覧
+        （スキーマ全体ではなく、クエリに関係するテーブルとカラムだけを載せる）
     """
-    # スキーマ情報を取得
-    schema_info = get_schema_description()
+    # クエリに関係するテーブル・カラムだけを切り出す
+    schema = slice_schema(query_text, max_schema_chars)
+    omitted = ""
+    if schema.omitted:
+        omitted = (f"\n（他に関係しそうなテーブル: {', '.join(schema.omitted)}。"
+                   "カラムは get_table_info で確認できます）\n")
+    track_codes = dict(TRACK_CODES)
+    if "nar" in schema.families:
+        track_codes.update(NAR_TRACK_CODES)
 
     # プロンプトを構築
     prompt = f"""
 あなたはJVLink競馬データベースのSQLエキスパートです。
 以下のユーザーの自然言語クエリをSQLに変換してください。
 
-### データベース構造:
-{json.dumps(schema_info, ensure_ascii=False, indent=2)}
-
+### データベース構造（関係するテーブルのみ）:
+{schema.to_json()}
+{omitted}
 ### 競馬場コード:
-{json.dumps(TRACK_CODES, ensure_ascii=False)}
+{json.dumps(track_codes, ensure_ascii=False)}
 
 ### グレードコード:
 {json.dumps(GRADE_CODES, ensure_ascii=False)}
@@ -389,12 +539,18 @@ def get_sql_generation_prompt(query_text: str) -> dict:
     return {
         "prompt_for_llm": prompt,
         "hint": "このプロンプトをLLMに渡してSQLを生成してください",
-        "schema_info": schema_info
+        "schema_info": {
+            "tables": list(schema.tables),
+            "omitted_tables": schema.omitted,
+            "schema_chars": schema.chars,
+        }
     }
 
 
 @mcp.tool(name="keiba_data_search")
-def execute_safe_query(sql_query: str) -> dict:
+@run_in_worker("keiba_data_search")
+def execute_safe_query(sql_query: str, page_size: Optional[int] = None,
+                       response_format: str = "records") -> dict:
     """SQLで競馬データを自由に検索・分析できる万能ツール
 
     人気別成績、騎手成績などの専用ツールでカバーできない分析はこのツールで実行できます。
@@ -402,32 +558,65 @@ def execute_safe_query(sql_query: str) -> dict:
 
     Args:
         sql_query: 実行するSQLクエリ（SELECTのみ）
+        page_size: 指定するとページングモードになり、この行数だけ取得して
+            続きは next_token を keiba_data_search_next に渡して取得する（最大1000）
+        response_format: "records"（行ごとのdict。既定）または "columnar"
+            （data をカラム名→値の配列で返す。列が多い結果ではサイズが3〜4割小さくなる）
 
     Returns:
         クエリ実行結果
     """
     try:
+        response_format = validate_response_format(response_format)
         # Auto-correct query (zero-padding etc.)
         corrected_sql, corrections = auto_correct_query(sql_query)
-        
-        with DatabaseConnection() as db:
-            result_df = db.execute_safe_query(corrected_sql)
 
+        with DatabaseConnection() as db:
+            # 実行前にEXPLAINで全件走査・直積を検出（DB_COST_GUARDで拒否/LIMIT付与/警告）
+            db.check_query_safety(corrected_sql)
+            assessment = preflight(db, corrected_sql)
+
+            if page_size is None:
+                # 列指向のまま取得し、表示する先頭100行だけをPythonオブジェクト化する
+                arrays = db.execute_safe_query_arrays(assessment.sql)
+
+        if page_size is not None:
+            # ページングモードは1ページずつしか取得しないため、LIMIT付与は不要
+            result = _fetch_page(PageToken(
+                sql=corrected_sql, offset=0, page_size=clamp_page_size(page_size)
+            ), response_format)
+        else:
+            total_rows = num_rows(arrays)
             result = {
                 "success": True,
-                "rows": len(result_df),
-                "columns": result_df.columns.tolist(),
-                "data": result_df.head(100).to_dict(orient="records"),
-                "note": "最大100行まで表示" if len(result_df) > 100 else None
+                "rows": total_rows,
+                **encode_rows(arrays, response_format, limit=100),
+                "note": "最大100行まで表示" if total_rows > 100 else None
             }
-            
-            # Notify if auto-corrections were made
-            if corrections:
-                result["auto_corrections"] = corrections
-                result["original_query"] = sql_query
-                result["corrected_query"] = corrected_sql
-            
-            return result
+            if assessment.limited:
+                result["note"] = (f"高コストなクエリのため結果を{total_rows}行に制限しました"
+                                  "（最大100行まで表示）")
+
+        if assessment.findings:
+            result["warnings"] = assessment.warnings
+
+        # Notify if auto-corrections were made
+        if corrections:
+            result["auto_corrections"] = corrections
+            result["original_query"] = sql_query
+            result["corrected_query"] = corrected_sql
+
+        return result
+    except QueryInterruptedError:
+        raise
+    except QueryCostError as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "warnings": [f.to_dict() for f in e.findings],
+            "hint": "レースキー（Year, MonthDay, JyoCD, Kaiji, Nichiji, RaceNum）やKettoNumで結合し、"
+                    "WHERE句で期間や競馬場を絞り込んでください。",
+        }
     except Exception as e:
         return {
             "success": False,
@@ -436,6 +625,54 @@ def execute_safe_query(sql_query: str) -> dict:
         }
 
 
+@mcp.tool(name="keiba_data_search_next")
+@run_in_worker("keiba_data_search_next")
+def execute_safe_query_next(next_token: str, response_format: str = "records") -> dict:
+    """keiba_data_search（ページングモード）の続きのページを取得
+
+    最初のページの後にデータが更新された場合やサーバーの再起動後は、
+    next_token が無効になるため keiba_data_search から取得し直す。
+
+    Args:
+        next_token: 前回の結果に含まれる next_token
+        response_format: "records"（既定）または "columnar"（keiba_data_searchと同じ）
+
+    Returns:
+        次ページのクエリ実行結果（最終ページでは next_token が null）
+    """
+    try:
+        return _fetch_page(PageToken.decode(next_token), validate_response_format(response_format))
+    except QueryInterruptedError:
+        raise
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "hint": "next_token は keiba_data_search(page_size=...) の結果からそのまま渡してください。"
+        }
+
+
+def _fetch_page(token: PageToken, response_format: str = "records") -> dict:
+    """継続トークンの位置から1ページ分を取得して結果dictを組み立てる"""
+    with DatabaseConnection() as db:
+        # 最初のページの後にデータが更新されていれば、OFFSETは別の行を指す
+        version = version_tag(db.data_version())
+        token.check_version(version)
+        page_df, has_more = db.execute_safe_query_page(
+            token.sql, offset=token.offset, page_size=token.page_size
+        )
+    return {
+        "success": True,
+        "rows": len(page_df),
+        **encode_rows(frame_to_arrays(page_df), response_format),
+        "offset": token.offset,
+        "page_size": token.page_size,
+        "has_more": has_more,
+        "next_token": next_page_token(token.sql, token.offset, token.page_size, has_more,
+                                      version),
+    }
+
+
 @mcp.tool()
 def validate_sql_query(sql_query: str) -> dict:
     """SQLクエリの安全性を検証
@@ -446,21 +683,25 @@ def validate_sql_query(sql_query: str) -> dict:
     Returns:
         検証結果と安全性チェック
     """
-    dangerous_keywords = [
-        "DROP", "DELETE", "UPDATE", "INSERT", "CREATE", "ALTER",
-        "TRUNCATE", "REPLACE", "MERGE", "GRANT", "REVOKE"
-    ]
-
-    query_upper = sql_query.upper()
-    found_dangerous = [kw for kw in dangerous_keywords if kw in query_upper]
-
-    is_safe = len(found_dangerous) == 0 and "SELECT" in query_upper
+    # keiba_data_search の安全性チェック（check_query_safety）と同じ判定を使う
+    lexed = lex_sql(sql_query)
+    found_dangerous = list(lexed.dangerous_keywords)
+    multiple_statements = lexed.statement_count > 1
+    is_safe = lexed.is_safe
+
+    recommendation = {
+        None: "安全に実行可能",
+        MULTIPLE_STATEMENTS: "複数のSQL文は実行できません",
+        DANGEROUS_KEYWORD: "危険なキーワードが含まれています",
+        NOT_SELECT: "SELECT文のみ実行可能です",
+    }[lexed.violation]
 
     return {
         "is_safe": is_safe,
         "query": sql_query,
         "dangerous_keywords_found": found_dangerous,
-        "recommendation": "安全に実行可能" if is_safe else "危険なキーワードが含まれています",
+        "multiple_statements": multiple_statements,
+        "recommendation": recommendation,
         "can_execute": is_safe
     }
 
@@ -472,26 +713,30 @@ def validate_sql_query(sql_query: str) -> dict:
 # ============================================================================
 
 @mcp.tool(name="favorite_performance")
+@run_in_worker("favorite_performance")
 def analyze_favorite_performance(
     ninki: int = 1,
     venue: Optional[str] = None,
     grade: Optional[str] = None,
     year_from: Optional[str] = None,
-    distance: Optional[int] = None
+    distance: Optional[int] = None,
+    track: Optional[str] = None
 ) -> dict:
     """指定した人気順位の馬の成績を分析
 
     1番人気、2番人気など、人気順位別の勝率・複勝率を調べられます。
-    競馬場やグレード、距離でフィルタリングも可能です。
+    競馬場やグレード、距離、芝/ダート（track: '芝' / 'ダート' / '障害'）で
+    フィルタリングも可能です。
     """
     with DatabaseConnection() as db:
         return _get_favorite_performance(
             db, venue=venue, ninki=ninki, grade=grade,
-            year_from=year_from, distance=distance
+            year_from=year_from, distance=distance, track=track
         )
 
 
 @mcp.tool(name="jockey_stats")
+@run_in_worker("jockey_stats")
 def analyze_jockey_stats(
     jockey_name: str,
     venue: Optional[str] = None,
@@ -502,6 +747,8 @@ def analyze_jockey_stats(
 
     騎手名を指定して、勝率・複勝率・騎乗数などを調べられます。
     競馬場や距離でのフィルタリングも可能です。
+    騎手名が複数の騎手に一致した場合（例: "武" → 武豊・武幸四郎）は合算値に加えて
+    jockeys に騎手コードごとの内訳を返し、ambiguous が true になります。
     """
     with DatabaseConnection() as db:
         return _get_jockey_stats(
@@ -510,61 +757,134 @@ def analyze_jockey_stats(
         )
 
 
+@mcp.tool(name="favorite_performance_batch")
+@run_in_worker("favorite_performance_batch")
+def analyze_favorite_performance_batch(
+    ninki_list: List[int],
+    venue: Optional[str] = None,
+    grade: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None,
+    track: Optional[str] = None
+) -> dict:
+    """複数の人気順位の成績を一括で比較
+
+    「1〜5番人気の勝率を比較」のような質問は、favorite_performance を人気ごとに
+    呼ぶ代わりにこちらを1回呼んでください（ninki_list=[1, 2, 3, 4, 5]）。
+    絞り込みは favorite_performance と同じで、results に人気ごとの成績を返します。
+    """
+    with DatabaseConnection() as db:
+        return _get_favorite_performance_batch(
+            db, ninki_list=ninki_list, venue=venue, grade=grade,
+            year_from=year_from, distance=distance, track=track
+        )
+
+
+@mcp.tool(name="jockey_stats_batch")
+@run_in_worker("jockey_stats_batch")
+def analyze_jockey_stats_batch(
+    jockey_names: List[str],
+    venue: Optional[str] = None,
+    year_from: Optional[str] = None,
+    distance: Optional[int] = None
+) -> dict:
+    """複数の騎手の成績を一括で比較
+
+    騎手同士を比較するときは jockey_stats を騎手ごとに呼ぶ代わりにこちらを1回呼んで
+    ください。results に騎手ごとの成績（jockey_stats と同じ形式）を指定順で返します。
+    """
+    with DatabaseConnection() as db:
+        return _get_jockey_stats_batch(
+            db, jockey_names=jockey_names, venue=venue,
+            year_from=year_from, distance=distance
+        )
+
+
 @mcp.tool(name="frame_stats")
+@run_in_worker("frame_stats")
 def analyze_frame_stats(
     venue: Optional[str] = None,
     distance: Optional[int] = None,
-    year_from: Optional[str] = None
+    year_from: Optional[str] = None,
+    response_format: str = "records"
 ) -> dict:
     """枠番（1〜8枠）別の成績を分析
 
     内枠・外枠の有利不利を調べられます。
     競馬場や距離でフィルタリングすると、コース特性が見えます。
+    response_format="columnar" で data をカラムごとの配列で返します。
     """
+    response_format = validate_response_format(response_format)
     with DatabaseConnection() as db:
         df = _get_frame_stats(db, venue=venue, distance=distance, year_from=year_from)
         return {
-            "data": df.to_dict(orient="records"),
+            **encode_rows(frame_to_arrays(df), response_format),
             "conditions": df.attrs.get("conditions", ""),
-            "columns": df.columns.tolist()
         }
 
 
 @mcp.tool(name="horse_history")
+@run_in_worker("horse_history")
 def get_horse_race_history(
     horse_name: str,
-    year_from: Optional[str] = None
+    year_from: Optional[str] = None,
+    response_format: str = "records"
 ) -> dict:
     """特定の馬の過去レース戦績を取得
 
     馬名を指定して、過去の出走履歴・着順・タイムなどを一覧できます。
+    response_format="columnar" で data をカラムごとの配列で返します。
     """
+    response_format = validate_response_format(response_format)
     with DatabaseConnection() as db:
         df = _get_horse_history(db, horse_name=horse_name, year_from=year_from)
         return {
             "horse_name": horse_name,
             "total_races": len(df),
-            "data": df.to_dict(orient="records"),
-            "columns": df.columns.tolist()
+            **encode_rows(frame_to_arrays(df), response_format),
         }
 
 
 @mcp.tool(name="sire_stats")
+@run_in_worker("sire_stats")
 def analyze_sire_stats(
     sire_name: str,
     venue: Optional[str] = None,
     distance: Optional[int] = None,
-    year_from: Optional[str] = None
+    year_from: Optional[str] = None,
+    track: Optional[str] = None
 ) -> dict:
     """種牡馬（父馬）の産駒成績を分析
 
     種牡馬名を指定して、産駒の勝率・複勝率を調べられます。
-    距離や競馬場でフィルタリングすると、血統の適性傾向が見えます。
+    距離や競馬場、芝/ダート（track: '芝' / 'ダート' / '障害'）でフィルタリングすると、
+    血統の適性傾向が見えます。
     """
     with DatabaseConnection() as db:
         return _get_sire_stats(
             db, sire_name=sire_name, venue=venue,
-            distance=distance, year_from=year_from
+            distance=distance, year_from=year_from, track=track
+        )
+
+
+@mcp.tool(name="broodmare_sire_stats")
+@run_in_worker("broodmare_sire_stats")
+def analyze_broodmare_sire_stats(
+    broodmare_sire_name: str,
+    venue: Optional[str] = None,
+    distance: Optional[int] = None,
+    year_from: Optional[str] = None,
+    track: Optional[str] = None
+) -> dict:
+    """母の父（ブルードメアサイアー）別の産駒成績を分析
+
+    母の父の名前を指定して、産駒の勝率・複勝率を調べられます。
+    絞り込みは sire_stats と同じです。
+    """
+    with DatabaseConnection() as db:
+        return _get_broodmare_sire_stats(
+            db, broodmare_sire_name=broodmare_sire_name, venue=venue,
+            distance=distance, year_from=year_from, track=track
         )
 
 
@@ -573,11 +893,13 @@ def analyze_sire_stats(
 # ============================================================================
 
 @mcp.tool(name="nar_favorite_performance")
+@run_in_worker("nar_favorite_performance")
 def analyze_nar_favorite_performance(
     ninki: int = 1,
     venue: Optional[str] = None,
     year_from: Optional[str] = None,
-    distance: Optional[int] = None
+    distance: Optional[int] = None,
+    track: Optional[str] = None
 ) -> dict:
     """NAR地方競馬の人気別成績を分析
 
@@ -586,11 +908,12 @@ def analyze_nar_favorite_performance(
     with DatabaseConnection() as db:
         return _get_nar_favorite_performance(
             db, venue=venue, ninki=ninki,
-            year_from=year_from, distance=distance
+            year_from=year_from, distance=distance, track=track
         )
 
 
 @mcp.tool(name="nar_jockey_stats")
+@run_in_worker("nar_jockey_stats")
 def analyze_nar_jockey_stats(
     jockey_name: str,
     venue: Optional[str] = None,
@@ -607,21 +930,24 @@ def analyze_nar_jockey_stats(
 
 
 @mcp.tool(name="nar_horse_history")
+@run_in_worker("nar_horse_history")
 def get_nar_horse_race_history(
     horse_name: str,
-    year_from: Optional[str] = None
+    year_from: Optional[str] = None,
+    response_format: str = "records"
 ) -> dict:
     """NAR地方競馬の馬の過去レース戦績を取得
 
     地方競馬で出走した馬の戦績を一覧できます。
+    response_format="columnar" で data をカラムごとの配列で返します。
     """
+    response_format = validate_response_format(response_format)
     with DatabaseConnection() as db:
         df = _get_nar_horse_history(db, horse_name=horse_name, year_from=year_from)
         return {
             "horse_name": horse_name,
             "total_races": len(df),
-            "data": df.to_dict(orient="records"),
-            "columns": df.columns.tolist()
+            **encode_rows(frame_to_arrays(df), response_format),
         }
 
 
@@ -641,11 +967,19 @@ def list_query_templates() -> dict:
 
 
 @mcp.tool()
-def execute_template_query(template_name: str, **params) -> dict:
-    """テンプレートからSQLを生成して実行"""
+@run_in_worker
+def execute_template_query(template_name: str, response_format: str = "records",
+                           **params) -> dict:
+    """テンプレートからSQLを生成して実行
+
+    response_format="columnar" で data をカラムごとの配列で返します。
+    """
     try:
-        sql, query_params = render_template(template_name, **params)
+        response_format = validate_response_format(response_format)
         with DatabaseConnection() as db:
+            sql, query_params = render_template(
+                template_name, race_key=has_race_key(db, "NL_SE", "NL_RA"), **params
+            )
             result_df = db.execute_safe_query(sql, params=query_params)
             return {
                 "success": True,
@@ -654,10 +988,11 @@ def execute_template_query(template_name: str, **params) -> dict:
                 "generated_sql": sql,
                 "query_params": list(query_params),
                 "rows": len(result_df),
-                "columns": result_df.columns.tolist(),
-                "data": result_df.head(100).to_dict(orient="records"),
+                **encode_rows(frame_to_arrays(result_df), response_format, limit=100),
                 "note": "max 100 rows" if len(result_df) > 100 else None
             }
+    except QueryInterruptedError:
+        raise
     except ValueError as e:
         return {"success": False, "error": str(e), "hint": "Use list_query_templates to see available templates"}
     except Exception as e:
@@ -669,6 +1004,7 @@ def execute_template_query(template_name: str, **params) -> dict:
 # ============================================================================
 
 @mcp.tool()
+@run_in_worker
 def get_table_sample_data(table_name: str, num_rows: int = 5) -> dict:
     """テーブルのサンプルデータを取得（データ形式理解用）"""
     with DatabaseConnection() as db:
@@ -676,6 +1012,7 @@ def get_table_sample_data(table_name: str, num_rows: int = 5) -> dict:
 
 
 @mcp.tool()
+@run_in_worker
 def get_column_examples(table_name: str, column_name: str, limit: int = 10) -> dict:
     """特定カラムの値の例を取得（データ形式理解用）"""
     with DatabaseConnection() as db:
@@ -686,13 +1023,39 @@ def get_column_examples(table_name: str, column_name: str, limit: int = 10) -> d
 
 
 @mcp.tool()
-def get_database_overview() -> dict:
-    """データベース全体の概要を取得"""
+@run_in_worker
+def get_database_overview(exact: bool = False) -> dict:
+    """データベース全体の概要を取得
+
+    レコード数は既定でDBの統計情報による概算（count_method で取得方法を示す）。
+    正確な件数が必要なときだけ exact=True を指定する（全テーブルを COUNT(*) で数えるため遅い）。
+
+    Args:
+        exact: Trueなら全テーブルを COUNT(*) で数え、データ期間も全件から求める
+    """
     with DatabaseConnection() as db:
-        return _get_data_snapshot(db)
+        return _get_data_snapshot(db, exact=exact)
+
+
+@mcp.tool()
+def get_server_stats() -> dict:
+    """サーバー内部のキャッシュと接続プールの統計を取得"""
+    return {
+        "result_cache": get_result_cache().stats(),
+        "sample_cache": sample_cache_stats(),
+        "connection_pools": pool_stats(),
+        "schema_catalogs": catalog_stats(),
+        "query_corrector": corrector_memo_stats(),
+        "cost_guard_plans": plan_cache.stats(),
+        "missing_indexes": [spec.describe() for spec in _missing_indexes],
+        "name_indexes": name_index_stats(),
+        "aggregate_cubes": cube_stats(),
+        "resources": get_resource_cache().stats(),
+    }
 
 
 @mcp.tool()
+@run_in_worker
 def check_update() -> dict:
     """サーバーの最新バージョンを確認する。アップデートがあるか確認します。"""
     info = check_for_updates()
@@ -702,6 +1065,7 @@ def check_update() -> dict:
 
 
 @mcp.tool()
+@run_in_worker
 def update_server() -> dict:
     """サーバーを最新バージョンにアップデートする。git pull + 依存関係の更新を行います。"""
     return perform_update()
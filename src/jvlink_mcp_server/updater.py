@@ -2,12 +2,14 @@
 
 import json
 import logging
+import os
 import subprocess
 import sys
+import threading
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -248,3 +250,30 @@ def startup_update_check() -> Optional[str]:
     except Exception:
         pass
     return None
+
+
+def update_check_enabled() -> bool:
+    """起動時のアップデート確認を行うか（MCP_UPDATE_CHECK=0 で無効。閉域環境向け）"""
+    return os.getenv("MCP_UPDATE_CHECK", "1").lower() not in ("0", "false", "no", "off")
+
+
+def start_update_check(
+    on_notice: Optional[Callable[[str], None]] = None,
+) -> Optional[threading.Thread]:
+    """起動時のアップデート確認をバックグラウンドスレッドで開始する
+
+    GitHubへの問い合わせ（タイムアウト10秒×最大2回）がMCPの初期化応答を
+    待たせないよう、確認はデーモンスレッドで行う。通知があれば on_notice に渡す
+    （省略時はログに出す）。無効にされている場合は None を返す。
+    """
+    if not update_check_enabled():
+        return None
+
+    def run():
+        notice = startup_update_check()
+        if notice:
+            (on_notice or logger.info)(notice)
+
+    thread = threading.Thread(target=run, name="jvlink-update-check", daemon=True)
+    thread.start()
+    return thread
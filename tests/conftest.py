@@ -1,3 +1,5 @@
+import pytest
+
 collect_ignore = [
     "test_mcp_startup.py",
     "test_db_compatibility.py",
@@ -12,3 +14,24 @@ collect_ignore = [
 import os
 os.environ.setdefault("DB_TYPE", "sqlite")
 os.environ.setdefault("DB_PATH", ":memory:")
+
+from jvlink_mcp_server.database.aggregate_cube import clear_cubes  # noqa: E402
+from jvlink_mcp_server.database.name_index import clear_name_indexes  # noqa: E402
+from jvlink_mcp_server.database.pool import close_all_pools  # noqa: E402
+from jvlink_mcp_server.database.sample_data_provider import clear_cache  # noqa: E402
+
+
+def _reset_shared_state():
+    """接続プールとプロセス内のキャッシュ（キューブ・名前索引・サンプル）を捨てる"""
+    close_all_pools()
+    clear_cubes()
+    clear_name_indexes()
+    clear_cache()
+
+
+@pytest.fixture
+def reset_caches():
+    """前後で接続プールとプロセス内のキャッシュを空にする（テスト用DBを作るフィクスチャが使う）"""
+    _reset_shared_state()
+    yield
+    _reset_shared_state()
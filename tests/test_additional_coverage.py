@@ -135,8 +135,9 @@ class TestConnectionPostgreSQL:
             mock_conn = MagicMock()
             db.connection = mock_conn
 
-            # Mock get_tables to return our table
-            db.get_tables = Mock(return_value=["NL_SE"])
+            # Mock the catalog's table loader (per-instance catalog, no data version)
+            db.data_version = Mock(return_value=None)
+            db._load_table_names = Mock(return_value=["NL_SE"])
 
             schema_df = pd.DataFrame({
                 "column_name": ["Year", "MonthDay"],
@@ -208,8 +209,8 @@ class TestRenderAllTemplates:
         """race_result template exists and has the expected JOIN structure."""
         info = QUERY_TEMPLATES["race_result"]
         sql = info["sql"]
-        assert "NL_RA" in sql
-        assert "NL_SE" in sql
+        assert "{ra_table}" in sql
+        assert "{se_table}" in sql
         assert "JOIN" in sql.upper()
         # Uses direct {year}, {month_day} etc. placeholders
         assert "{year}" in sql
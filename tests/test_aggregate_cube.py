@@ -0,0 +1,333 @@
+"""Tests for the precomputed favorite-performance cube"""
+
+import itertools
+import os
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server import index_builder
+from jvlink_mcp_server.database import aggregate_cube
+from jvlink_mcp_server.database.aggregate_cube import (
+    clear_cubes,
+    cube_stats,
+    get_favorite_cube,
+    refresh_cubes,
+    wait_for_builds,
+)
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.high_level_api import (
+    get_favorite_performance,
+    get_nar_favorite_performance,
+)
+from jvlink_mcp_server.database.incremental import RefreshScheduler, Watermark, changed_years
+from jvlink_mcp_server.database.query_control import (
+    QueryControl,
+    QueryTimeoutError,
+    query_control,
+)
+
+RACE_COLUMNS = "Year TEXT, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT, Nichiji TEXT, RaceNum TEXT"
+RATE_KEYS = ("total", "wins", "places_2", "places_3", "win_rate", "place_rate_2", "place_rate_3")
+
+# (年, 競馬場, 距離, グレード, TrackCD)
+RACES = [
+    ("2021", "05", 1600, "A", "11"),
+    ("2022", "05", 2400, "A", "11"),
+    ("2023", "06", 1200, "C", "24"),
+    ("2023", "09", 1600, " ", "17"),
+    ("2024", "05", 1600, "B", "23"),
+    ("2024", "08", 3000, " ", "51"),
+]
+
+
+def _cubes():
+    """cube_stats() をキューブ名 → 状態に平らにする（テストの接続先は1つ）"""
+    (stats,) = cube_stats().values()
+    return stats
+
+
+def _create_db(path, se="NL_SE", ra="NL_RA", with_ra=True, make_date=False):
+    extra = ", MakeDate TEXT" if make_date else ""
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"CREATE TABLE {se} ({RACE_COLUMNS}, Umaban INTEGER, "
+                 f"Ninki INTEGER, KakuteiJyuni INTEGER{extra})")
+    if with_ra:
+        conn.execute(f"CREATE TABLE {ra} ({RACE_COLUMNS}, Kyori INTEGER, "
+                     f"GradeCD TEXT, TrackCD TEXT{extra})")
+    for n, race in enumerate(RACES, start=1):
+        # データ作成日はレース当日（JV-Dataの成績は開催日に作成される）
+        _insert_race(conn, n, race, se, ra, with_ra, f"{race[0]}0101" if make_date else None)
+    conn.commit()
+    conn.close()
+
+
+def _insert_race(conn, n, race, se="NL_SE", ra="NL_RA", with_ra=True, make_date=None):
+    year, jyo, kyori, grade, track = race
+    key = (year, "0101", jyo, "01", "01", f"{n:02d}")
+    extra = (make_date,) if make_date else ()
+    marks = ",?" if make_date else ""
+    if with_ra:
+        conn.execute(f"INSERT INTO {ra} VALUES (?,?,?,?,?,?,?,?,?{marks})",
+                     key + (kyori, grade, track) + extra)
+    for umaban in range(1, 9):
+        # 人気と着順をレースごとにずらす（取消 = 着順0 も含める）
+        ninki = (umaban + n) % 8 + 1
+        jyuni = (umaban * 3 + n) % 9
+        conn.execute(f"INSERT INTO {se} VALUES (?,?,?,?,?,?,?,?,?{marks})",
+                     key + (umaban, ninki, jyuni) + extra)
+
+
+@pytest.fixture
+def keiba_db(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    _create_db(path)
+    _create_db(path, se="NL_SE_NAR", ra="NL_RA_NAR")
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+def _first_call(func=get_favorite_performance, **kwargs):
+    """キューブがない間はSQLで答え、キューブはバックグラウンドで作られる"""
+    with DatabaseConnection() as db:
+        result = func(db, **kwargs)
+    assert "answered_from" not in result
+    assert wait_for_builds(10)
+    return result
+
+
+def _live(func, **kwargs):
+    with patch.dict(os.environ, {"DB_FAVORITE_CUBE": "0"}):
+        with DatabaseConnection() as db:
+            return func(db, **kwargs)
+
+
+FILTERS = {
+    "ninki": [1, 3],
+    "venue": [None, "東京"],
+    "grade": [None, "G1"],
+    "year_from": [None, "2023"],
+    "distance": [None, 1600],
+    "track": [None, "芝", "ダート"],
+}
+
+
+def test_cube_matches_live_sql(keiba_db):
+    _first_call(ninki=1)
+    names = list(FILTERS)
+    for values in itertools.product(*FILTERS.values()):
+        kwargs = dict(zip(names, values))
+        with DatabaseConnection() as db:
+            cubed = get_favorite_performance(db, **kwargs)
+        live = _live(get_favorite_performance, **kwargs)
+        assert cubed["answered_from"] == "aggregate_cube"
+        assert "answered_from" not in live
+        assert {k: cubed[k] for k in RATE_KEYS} == {k: live[k] for k in RATE_KEYS}, kwargs
+        # キューブで答えたときは実行していないSQLを返さない
+        assert "query" not in cubed and "query" in live
+        assert cubed["cube_lookup"]["cube"] == "favorite_cube_jra"
+        assert cubed["cube_lookup"]["filters"]["Ninki"] == kwargs["ninki"]
+
+
+def test_nar_cube(keiba_db):
+    _first_call(get_nar_favorite_performance, ninki=2)
+    with DatabaseConnection() as db:
+        cubed = get_nar_favorite_performance(db, ninki=2, venue="東京")
+    live = _live(get_nar_favorite_performance, ninki=2, venue="東京")
+    assert cubed["answered_from"] == "aggregate_cube"
+    assert cubed["total"] == live["total"] and cubed["wins"] == live["wins"]
+    assert set(_cubes()) == {"favorite_cube_nar"}
+
+
+def test_sidecar_reused_after_restart(keiba_db):
+    _first_call(ninki=1)
+    assert os.path.exists(f"{keiba_db}.cube.sqlite")
+    assert _cubes()["favorite_cube_jra"]["origin"] == "built"
+
+    clear_cubes()
+    with DatabaseConnection() as db:
+        result = get_favorite_performance(db, ninki=1)
+    assert result["answered_from"] == "aggregate_cube"
+    assert _cubes()["favorite_cube_jra"]["origin"] == "sidecar"
+
+
+def test_rebuilt_when_data_changes(keiba_db):
+    _first_call(ninki=1)
+    with DatabaseConnection() as db:
+        before = get_favorite_performance(db, ninki=1)
+    assert before["answered_from"] == "aggregate_cube"
+    conn = sqlite3.connect(str(keiba_db))
+    conn.execute("INSERT INTO NL_SE VALUES ('2024','0101','05','01','01','05',9,1,1)")
+    conn.commit()
+    conn.close()
+    # 古いキューブでは答えず、作り直しの間はSQLで答える
+    after = _first_call(ninki=1)
+    assert after["total"] == before["total"] + 1
+    assert after["wins"] == before["wins"] + 1
+    with DatabaseConnection() as db:
+        assert get_favorite_performance(db, ninki=1)["total"] == after["total"]
+    assert _cubes()["favorite_cube_jra"]["origin"] == "built"
+
+
+def test_uncovered_filter_falls_back_to_sql(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    _create_db(path, with_ra=False)
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        _first_call(ninki=1)
+        with DatabaseConnection() as db:
+            cube = get_favorite_cube(db, "jra", "NL_SE", "NL_RA")
+            assert cube.covers(JyoCD="05", Year=2023)
+            assert not cube.covers(GradeCD="A")
+            assert get_favorite_performance(db, ninki=1, venue="東京")["answered_from"] \
+                == "aggregate_cube"
+
+
+def test_first_call_does_not_wait_for_the_build(keiba_db):
+    """全体の集計がツールのタイムアウトより長くかかっても、SQLで答え続ける"""
+    release = threading.Event()
+    aggregate = aggregate_cube._aggregate
+
+    def slow_aggregate(*args, **kwargs):
+        release.wait(10)
+        return aggregate(*args, **kwargs)
+
+    with patch.object(aggregate_cube, "_aggregate", side_effect=slow_aggregate):
+        with query_control(QueryControl(timeout=1.0)), DatabaseConnection() as db:
+            for _ in range(3):
+                result = get_favorite_performance(db, ninki=1)
+                assert "answered_from" not in result
+        assert _cubes()["favorite_cube_jra"] == {"origin": "building"}
+        release.set()
+        assert wait_for_builds(10)
+    live = _live(get_favorite_performance, ninki=1)
+    assert {k: result[k] for k in RATE_KEYS} == {k: live[k] for k in RATE_KEYS}
+    assert _cubes()["favorite_cube_jra"]["origin"] == "built"
+
+
+def test_interrupted_build_is_not_recorded_as_failed(keiba_db):
+    build = aggregate_cube._load_or_build
+    calls = []
+
+    def timed_out_once(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            raise QueryTimeoutError("timed out", 1.0)
+        return build(*args)
+
+    with patch.object(aggregate_cube, "_load_or_build", side_effect=timed_out_once):
+        live = _first_call(ninki=1)
+        assert not any("favorite_cube_jra" in c for c in cube_stats().values())
+        _first_call(ninki=1)
+    with DatabaseConnection() as db:
+        cubed = get_favorite_performance(db, ninki=1)
+    assert cubed["answered_from"] == "aggregate_cube"
+    assert {k: cubed[k] for k in RATE_KEYS} == {k: live[k] for k in RATE_KEYS}
+    assert _cubes()["favorite_cube_jra"]["origin"] == "built"
+
+
+def test_index_builder_builds_sidecar(keiba_db, capsys):
+    index_builder.main(["--no-analyze"])  # テスト用DBにないカラムのインデックスは失敗する
+    assert "[作成] favorite_cube_jra" in capsys.readouterr().out
+    clear_cubes()
+    with DatabaseConnection() as db:
+        assert get_favorite_performance(db, ninki=1)["answered_from"] == "aggregate_cube"
+    assert _cubes()["favorite_cube_jra"]["origin"] == "sidecar"
+
+
+def test_disabled(keiba_db):
+    with patch.dict(os.environ, {"DB_FAVORITE_CUBE": "0"}):
+        with DatabaseConnection() as db:
+            assert get_favorite_cube(db, "jra", "NL_SE", "NL_RA") is None
+
+
+def test_invalid_track(keiba_db):
+    with DatabaseConnection() as db:
+        with pytest.raises(ValueError, match="不明なトラック"):
+            get_favorite_performance(db, track="砂")
+
+
+@pytest.fixture
+def dated_db(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    _create_db(path, make_date=True)
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+def _assert_matches_live(**kwargs):
+    with DatabaseConnection() as db:
+        get_favorite_performance(db, **kwargs)
+    assert wait_for_builds(10)
+    with DatabaseConnection() as db:
+        cubed = get_favorite_performance(db, **kwargs)
+    live = _live(get_favorite_performance, **kwargs)
+    assert cubed["answered_from"] == "aggregate_cube"
+    assert {k: cubed[k] for k in RATE_KEYS} == {k: live[k] for k in RATE_KEYS}, kwargs
+
+
+class TestIncrementalRefresh:
+    def test_changed_years(self, dated_db):
+        with DatabaseConnection() as db:
+            assert changed_years(db, "NL_SE", Watermark("2024", "0101", "20240101")) == ["2024"]
+            assert changed_years(db, "NL_SE", Watermark("2024", "0101", "20240102")) == []
+            assert sorted(changed_years(db, "NL_SE", Watermark("2022", "0101", "20230101"))) \
+                == ["2023", "2024"]
+
+    def test_new_races_refresh_only_their_year(self, dated_db):
+        _first_call(ninki=1)
+        assert _cubes()["favorite_cube_jra"]["origin"] == "built"
+
+        conn = sqlite3.connect(str(dated_db))
+        _insert_race(conn, 7, ("2025", "05", 1600, "A", "11"), make_date="20250105")
+        conn.commit()
+        conn.close()
+
+        for ninki in (1, 2, 3):
+            _assert_matches_live(ninki=ninki)
+            _assert_matches_live(ninki=ninki, venue="東京", grade="G1")
+        stats = _cubes()["favorite_cube_jra"]
+        assert stats["origin"] == "incremental"
+        # 前回の最新作成日（2024年分）は同日の追記を取りこぼさないよう再集計される
+        assert sorted(stats["refreshed_years"]) == ["2024", "2025"]
+        assert stats["watermarks"]["NL_SE"]["make_date"] == "20250105"
+
+    def test_corrected_rows_replace_their_year(self, dated_db):
+        _first_call(ninki=1)
+        conn = sqlite3.connect(str(dated_db))
+        # 2021年のレースの着順訂正（再送でMakeDateが新しくなる）
+        conn.execute("UPDATE NL_SE SET KakuteiJyuni = 1, MakeDate = '20250110' "
+                     "WHERE Year = '2021' AND Umaban = 3")
+        conn.commit()
+        conn.close()
+
+        _assert_matches_live(ninki=5)
+        _assert_matches_live(ninki=5, year_from="2021")
+        assert sorted(_cubes()["favorite_cube_jra"]["refreshed_years"]) == ["2021", "2024"]
+
+    def test_refresh_after_restart_starts_from_sidecar(self, dated_db):
+        _first_call(ninki=1)
+        clear_cubes()
+        conn = sqlite3.connect(str(dated_db))
+        _insert_race(conn, 7, ("2025", "06", 2000, "B", "24"), make_date="20250105")
+        conn.commit()
+        conn.close()
+
+        _assert_matches_live(ninki=2, track="ダート")
+        assert _cubes()["favorite_cube_jra"]["origin"] == "incremental"
+
+    def test_scheduler_job(self, dated_db):
+        assert refresh_cubes() == {"favorite_cube_jra": "built"}
+        assert refresh_cubes() == {"favorite_cube_jra": "built"}  # 世代が同じなら何もしない
+        conn = sqlite3.connect(str(dated_db))
+        _insert_race(conn, 7, ("2025", "05", 1600, "A", "11"), make_date="20250105")
+        conn.commit()
+        conn.close()
+
+        calls = []
+        scheduler = RefreshScheduler(3600, [lambda: calls.append(refresh_cubes()),
+                                            lambda: 1 / 0])
+        scheduler.run_once()
+        assert calls == [{"favorite_cube_jra": "incremental"}]
+        assert scheduler.runs == 1
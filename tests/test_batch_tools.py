@@ -0,0 +1,118 @@
+"""Tests for the batch variants of the high-level tools"""
+
+import os
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database.aggregate_cube import refresh_cubes
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.high_level_api import (
+    MAX_BATCH_SIZE,
+    get_favorite_performance,
+    get_favorite_performance_batch,
+    get_jockey_stats,
+    get_jockey_stats_batch,
+)
+
+RACE_KEY = "Year INTEGER, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT, Nichiji TEXT, RaceNum TEXT"
+JOCKEYS = [("00666", "武　豊", "武豊"), ("01017", "武　幸四郎", "武幸四郎"),
+           ("05339", "Ｃ．ルメール", "ルメール"), ("01126", "川田　将雅", "川田")]
+RACES = [(2022, "05", 1600, "A"), (2023, "06", 2000, "C"), (2023, "05", 1600, " "),
+         (2024, "09", 1200, "B")]
+
+
+@pytest.fixture
+def keiba_db(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"CREATE TABLE NL_SE ({RACE_KEY}, Umaban INTEGER, KisyuCode TEXT, "
+                 "KisyuRyakusyo TEXT, Ninki INTEGER, KakuteiJyuni INTEGER)")
+    conn.execute(f"CREATE TABLE NL_RA ({RACE_KEY}, Kyori INTEGER, GradeCD TEXT)")
+    conn.execute("CREATE TABLE NL_KS (KisyuCode TEXT, KisyuName TEXT, KisyuRyakusyo TEXT)")
+    conn.executemany("INSERT INTO NL_KS VALUES (?,?,?)", JOCKEYS)
+    for n, (year, jyo, kyori, grade) in enumerate(RACES, start=1):
+        key = (year, "0101", jyo, "01", "01", f"{n:02d}")
+        conn.execute("INSERT INTO NL_RA VALUES (?,?,?,?,?,?,?,?)", key + (kyori, grade))
+        for umaban in range(1, 9):
+            code, _, short = JOCKEYS[(umaban + n) % len(JOCKEYS)]
+            # 騎手マスタにない騎手（略称の部分一致に戻る）も混ぜる
+            if umaban == 8:
+                code, short = "09999", "横山和"
+            conn.execute("INSERT INTO NL_SE VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                         key + (umaban, code, short, (umaban + n) % 8 + 1, (umaban * 3 + n) % 9))
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+FAVORITE_KEYS = ("total", "wins", "places_2", "places_3", "win_rate", "place_rate_2",
+                 "place_rate_3")
+
+
+@pytest.mark.parametrize("cube", ["0", "1"])
+@pytest.mark.parametrize("kwargs", [{}, {"venue": "東京"}, {"grade": "G1", "year_from": "2022"},
+                                    {"distance": 1600}])
+def test_favorite_batch_matches_single_calls(keiba_db, cube, kwargs):
+    with patch.dict(os.environ, {"DB_FAVORITE_CUBE": cube}):
+        refresh_cubes()
+        with DatabaseConnection() as db:
+            batch = get_favorite_performance_batch(db, [1, 2, 3, 9], **kwargs)
+            singles = [get_favorite_performance(db, ninki=n, **kwargs) for n in (1, 2, 3, 9)]
+    assert [r["ninki"] for r in batch["results"]] == [1, 2, 3, 9]
+    for result, single in zip(batch["results"], singles):
+        assert {k: result[k] for k in FAVORITE_KEYS} == {k: single[k] for k in FAVORITE_KEYS}
+    assert ("answered_from" in batch) == (cube == "1")
+    assert ("query" in batch) == (cube == "0")
+    if cube == "1":
+        assert batch["cube_lookup"]["filters"]["Ninki"] == [1, 2, 3, 9]
+
+
+def test_favorite_batch_runs_one_query(keiba_db):
+    with patch.dict(os.environ, {"DB_FAVORITE_CUBE": "0"}):
+        with DatabaseConnection() as db:
+            with patch.object(db, "execute_safe_query", wraps=db.execute_safe_query) as spy:
+                result = get_favorite_performance_batch(db, [1, 2, 3, 4, 5], venue="東京")
+    assert spy.call_count == 1
+    assert "GROUP BY Ninki" in result["query"]
+    assert "Ninki IN (?, ?, ?, ?, ?)" in result["query"]
+    assert result["conditions"] == "東京競馬場"
+
+
+JOCKEY_KEYS = ("jockey_name", "total_rides", "wins", "places_2", "places_3", "win_rate",
+               "conditions", "matched_jockeys", "jockeys", "ambiguous")
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"venue": "東京"}, {"year_from": "2023"},
+                                    {"distance": 1600}])
+def test_jockey_batch_matches_single_calls(keiba_db, kwargs):
+    names = ["武", "ルメール", "横山", "存在しない騎手"]
+    with DatabaseConnection() as db:
+        batch = get_jockey_stats_batch(db, names, **kwargs)
+        singles = [get_jockey_stats(db, name, **kwargs) for name in names]
+    assert len(batch["results"]) == len(names)
+    for result, single in zip(batch["results"], singles):
+        assert {k: result.get(k) for k in JOCKEY_KEYS} == {k: single.get(k) for k in JOCKEY_KEYS}
+
+
+def test_jockey_batch_runs_one_query(keiba_db):
+    with DatabaseConnection() as db:
+        with patch.object(db, "execute_safe_query", wraps=db.execute_safe_query) as spy:
+            result = get_jockey_stats_batch(db, ["武豊", "川田"], year_from="2023")
+    assert spy.call_count == 1
+    assert [r["jockeys"][0]["jockey_code"] for r in result["results"]] == ["00666", "01126"]
+    assert result["conditions"] == "2023年以降"
+
+
+def test_invalid_batches(keiba_db):
+    with DatabaseConnection() as db:
+        with pytest.raises(ValueError, match="1件以上"):
+            get_favorite_performance_batch(db, [])
+        with pytest.raises(ValueError, match="1件以上"):
+            get_jockey_stats_batch(db, "武豊")
+        with pytest.raises(ValueError, match=f"{MAX_BATCH_SIZE}件まで"):
+            get_jockey_stats_batch(db, [f"騎手{i}" for i in range(MAX_BATCH_SIZE + 1)])
+        with pytest.raises(ValueError, match="不明な競馬場名"):
+            get_favorite_performance_batch(db, [1, 2], venue="存在しない")
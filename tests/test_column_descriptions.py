@@ -0,0 +1,82 @@
+"""Tests for the table-driven column description lookup"""
+
+import os
+import sqlite3
+from unittest.mock import patch
+
+from jvlink_mcp_server.database import schema_auto_descriptions as auto
+from jvlink_mcp_server.database.pool import close_all_pools
+from jvlink_mcp_server.database.schema_auto_descriptions import (
+    EXACT_DESCRIPTIONS,
+    generate_column_description,
+    get_all_column_descriptions,
+)
+from jvlink_mcp_server.database.schema_descriptions import (
+    get_column_description,
+    get_column_descriptions,
+)
+from jvlink_mcp_server.server import get_table_info
+
+
+class TestGenerateColumnDescription:
+    def test_exact_names_come_from_the_table(self):
+        assert generate_column_description("NL_SE", "KettoNum") == EXACT_DESCRIPTIONS["KettoNum"]
+        assert generate_column_description("NL_H1", "TansyoHyo") == "単勝票数"
+        # ループで定義されていた規則も完全一致の表に入る
+        assert generate_column_description("NL_CK", "SibaChoChaku") == "芝直線コース着回数"
+        assert generate_column_description("NL_UM", "Ketto3InfoBamei7") == "父父父の馬名"
+
+    def test_pattern_rules(self):
+        assert generate_column_description("NL_RA", "LapTime0") == "ラップタイム1ハロン目（0.1秒単位）"
+        assert generate_column_description("NL_RA", "Honsyokin2") == "本賞金3着（単位：万円）"
+        assert generate_column_description("NL_HR", "PayTansyo1Pay") == "単勝払戻2の払戻金（円）"
+        assert generate_column_description("NL_CK", "TokyoSibaChaku") == "東京芝着回数"
+        assert generate_column_description("NL_H1", "UmarenInfo0Hyo") == "馬連1の票数"
+        # 先の規則に当たるカラムは完全一致の表に入れない（Yobi1 は Yobi* の規則）
+        assert "Yobi1" not in EXACT_DESCRIPTIONS
+        assert generate_column_description("NL_RA", "Yobi1") == "予備フィールド"
+
+    def test_table_dependent_rule(self):
+        assert "大井" in generate_column_description("NL_RA_NAR", "JyoCD")
+        assert "大井" not in generate_column_description("NL_RA", "JyoCD")
+
+    def test_unknown_column(self):
+        assert generate_column_description("NL_RA", "NoSuchThing") == "（説明未登録: NoSuchThing）"
+
+    def test_memoized(self):
+        generate_column_description.cache_clear()
+        with patch.object(auto, "_describe_by_pattern",
+                          wraps=auto._describe_by_pattern) as describe:
+            for _ in range(3):
+                get_all_column_descriptions("NL_RA", ["LapTime1", "Kyori", "HaronTimeL3"])
+        # 完全一致のKyoriはパターン規則を通らず、残りも1回ずつ
+        assert describe.call_count == 2
+
+
+class TestColumnDescriptions:
+    def test_manual_descriptions_win(self):
+        assert get_column_description("NL_RA", "JyoCD").startswith("競馬場コード（01=札幌")
+        # NARテーブルは手動説明をJRAテーブルから引き継ぐ
+        assert get_column_description("NL_SE_NAR", "Bamei") == get_column_description("NL_SE", "Bamei")
+
+    def test_table_map_is_built_once(self):
+        columns = ("Year", "JyoCD", "LapTime3", "Unknown1")
+        first = get_column_descriptions("NL_RA", columns)
+        assert get_column_descriptions("NL_RA", columns) is first
+        assert first == {c: get_column_description("NL_RA", c) for c in columns}
+
+
+def test_get_table_info_uses_descriptions(tmp_path):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_RA (Year INTEGER, JyoCD TEXT, LapTime0 INTEGER, Extra TEXT)")
+    conn.commit()
+    conn.close()
+    close_all_pools()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        info = get_table_info.__wrapped__("NL_RA")
+    close_all_pools()
+    assert info["total_columns"] == 4
+    assert [c["name"] for c in info["columns"]] == ["Year", "JyoCD", "LapTime0", "Extra"]
+    assert info["columns"][2]["description"] == "ラップタイム1ハロン目（0.1秒単位）"
+    assert info["columns"][3]["description"] == "（説明未登録: Extra）"
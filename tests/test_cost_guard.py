@@ -0,0 +1,231 @@
+"""Tests for the EXPLAIN-based cost guard"""
+
+import os
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.cost_guard import (
+    CostPolicy,
+    QueryCostError,
+    analyze_duckdb_plan,
+    analyze_postgresql_plan,
+    analyze_sqlite_plan,
+    plan_cache,
+    preflight,
+    static_findings,
+    table_aliases,
+)
+
+CROSS_JOIN = "SELECT * FROM NL_SE s, NL_UM u"
+KEYED_JOIN = "SELECT * FROM NL_SE s JOIN NL_UM u ON s.KettoNum = u.KettoNum WHERE s.Year = '2024'"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_plan_cache():
+    plan_cache.clear()
+    yield
+    plan_cache.clear()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "guard.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_SE (Year TEXT, KettoNum TEXT, Bamei TEXT)")
+    conn.execute("CREATE TABLE NL_UM (KettoNum TEXT, Bamei TEXT)")
+    conn.execute("CREATE INDEX idx_se_year ON NL_SE(Year)")
+    conn.execute("CREATE INDEX idx_um_ketto ON NL_UM(KettoNum)")
+    conn.executemany("INSERT INTO NL_SE VALUES (?, ?, ?)",
+                     [("2024", f"{i:010d}", f"馬{i}") for i in range(30)])
+    conn.executemany("INSERT INTO NL_UM VALUES (?, ?)",
+                     [(f"{i:010d}", f"馬{i}") for i in range(30)])
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+class TestSqlitePlan:
+    def test_cartesian_product_detected(self):
+        rows = [(3, 0, 0, "SCAN s"), (5, 0, 0, "SCAN u")]
+        findings = analyze_sqlite_plan(rows, CROSS_JOIN, CostPolicy())
+        kinds = {(f.kind, f.table) for f in findings}
+        assert ("full_scan", "NL_SE") in kinds
+        assert ("cartesian_product", "NL_UM") in kinds
+
+    def test_indexed_join_is_clean(self):
+        rows = [(3, 0, 0, "SEARCH s USING INDEX idx_se_year (Year=?)"),
+                (7, 0, 0, "SEARCH u USING AUTOMATIC COVERING INDEX (KettoNum=?)")]
+        assert analyze_sqlite_plan(rows, KEYED_JOIN, CostPolicy()) == []
+
+    def test_scans_in_separate_branches_are_not_joined(self):
+        rows = [(1, 0, 0, "COMPOUND QUERY"), (2, 1, 0, "LEFT-MOST SUBQUERY"),
+                (5, 2, 0, "SCAN NL_UM"), (9, 1, 0, "UNION ALL"), (12, 9, 0, "SCAN NL_UM")]
+        sql = "SELECT Bamei FROM NL_UM UNION ALL SELECT Bamei FROM NL_UM"
+        policy = CostPolicy(large_tables=frozenset())
+        assert analyze_sqlite_plan(rows, sql, policy) == []
+
+    def test_unindexed_inner_join_key(self):
+        rows = [(4, 0, 0, "SEARCH s USING INDEX idx_se_year (Year=?)"), (9, 0, 0, "SCAN u")]
+        findings = analyze_sqlite_plan(rows, KEYED_JOIN, CostPolicy())
+        assert [(f.kind, f.severity, f.table) for f in findings] == [
+            ("missing_join_key", "error", "NL_UM")]
+
+
+class TestSqlText:
+    def test_aliases_ignore_literals_and_comments(self):
+        sql = ("SELECT * FROM NL_SE s JOIN \"NL_UM\" AS u ON s.KettoNum = u.KettoNum "
+               "WHERE s.Bamei = 'FROM NL_HR h' -- JOIN NL_O1 o\n")
+        assert table_aliases(sql) == {"NL_SE": "NL_SE", "s": "NL_SE", "NL_UM": "NL_UM",
+                                      "u": "NL_UM"}
+        assert table_aliases("SELECT * FROM NL_SE s, main.NL_UM AS u WHERE 1") == {
+            "NL_SE": "NL_SE", "s": "NL_SE", "NL_UM": "NL_UM", "u": "NL_UM"}
+
+    def test_leading_wildcard_only_in_code(self):
+        policy = CostPolicy()
+        assert static_findings("SELECT * FROM NL_UM WHERE Bamei NOT LIKE '%馬'", policy)
+        for sql in ("SELECT 'a LIKE ''%x' AS s FROM NL_UM",
+                    "SELECT * FROM NL_UM -- WHERE Bamei LIKE '%馬'\n",
+                    "SELECT * FROM NL_UM WHERE Bamei LIKE '馬%'"):
+            assert static_findings(sql, policy) == [], sql
+
+
+class TestOtherBackends:
+    def test_duckdb_cross_product(self):
+        plan = [{"name": "CROSS_PRODUCT", "children": [{"name": "SEQ_SCAN"}]}]
+        findings = analyze_duckdb_plan(plan, CostPolicy())
+        assert [f.kind for f in findings] == ["cartesian_product"]
+
+    def test_duckdb_hash_join_is_clean(self):
+        plan = '[{"name": "HASH_JOIN", "children": [{"name": "SEQ_SCAN", "children": []}]}]'
+        assert analyze_duckdb_plan(plan, CostPolicy()) == []
+
+    def test_duckdb_nested_loop_without_condition(self):
+        plan = [{"name": "BLOCKWISE_NL_JOIN", "extra_info": {"Condition": "true"}}]
+        findings = analyze_duckdb_plan(plan, CostPolicy())
+        assert [(f.kind, f.severity) for f in findings] == [("cartesian_product", "error")]
+
+    def test_duckdb_range_join_only_warns(self):
+        duckdb = pytest.importorskip("duckdb")
+        conn = duckdb.connect(":memory:")
+        conn.execute("CREATE TABLE NL_RA (Year INTEGER, Kyori INTEGER)")
+        conn.execute("CREATE TABLE NL_SE (Year INTEGER, Kyori INTEGER)")
+        for sql in ("SELECT * FROM NL_SE s LEFT JOIN NL_RA r ON s.Kyori <> r.Kyori",
+                    "SELECT * FROM NL_SE s JOIN NL_RA r ON s.Year = r.Year OR s.Kyori = r.Kyori"):
+            plan = conn.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()[0][-1]
+            findings = analyze_duckdb_plan(plan, CostPolicy())
+            assert [(f.kind, f.severity) for f in findings] == [("nested_loop_join", "warning")]
+
+    def test_postgresql_plan(self):
+        plan = [{"Plan": {
+            "Node Type": "Nested Loop",
+            "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "nl_se", "Plan Rows": 5_000_000},
+                {"Node Type": "Materialize", "Plans": [
+                    {"Node Type": "Seq Scan", "Relation Name": "nl_um", "Plan Rows": 200_000},
+                ]},
+            ],
+        }}]
+        findings = analyze_postgresql_plan(plan, CostPolicy())
+        kinds = [(f.kind, f.table) for f in findings]
+        assert ("cartesian_product", None) in kinds
+        assert ("full_scan", "nl_se") in kinds
+        assert ("full_scan", "nl_um") not in kinds
+
+    def test_postgresql_index_nested_loop_is_clean(self):
+        plan = {"Plan": {
+            "Node Type": "Nested Loop",
+            "Plans": [
+                {"Node Type": "Index Scan", "Relation Name": "nl_ra", "Plan Rows": 10,
+                 "Index Cond": "(year = '2024')"},
+                {"Node Type": "Index Scan", "Relation Name": "nl_se", "Plan Rows": 16,
+                 "Index Cond": "(kettonum = r.kettonum)"},
+            ],
+        }}
+        assert analyze_postgresql_plan(plan, CostPolicy()) == []
+
+
+class TestPreflight:
+    def test_warn_mode_returns_findings(self, db_path):
+        with DatabaseConnection() as db:
+            result = preflight(db, CROSS_JOIN, CostPolicy(mode="warn"))
+        assert result.sql == CROSS_JOIN
+        assert any(w["kind"] == "cartesian_product" for w in result.warnings)
+
+    def test_reject_mode_raises(self, db_path):
+        with DatabaseConnection() as db:
+            with pytest.raises(QueryCostError) as exc:
+                preflight(db, CROSS_JOIN, CostPolicy(mode="reject"))
+        assert exc.value.findings
+
+    def test_limit_mode_wraps_query(self, db_path):
+        with DatabaseConnection() as db:
+            result = preflight(db, CROSS_JOIN, CostPolicy(mode="limit", auto_limit=50))
+            df = db.execute_safe_query(result.sql)
+        assert result.limited
+        assert len(df) == 50
+
+    def test_limit_mode_wraps_query_with_trailing_comment(self, db_path):
+        with DatabaseConnection() as db:
+            result = preflight(db, CROSS_JOIN + " -- 全件;",
+                               CostPolicy(mode="limit", auto_limit=50))
+            df = db.execute_safe_query(result.sql)
+        assert len(df) == 50
+
+    def test_clean_query_unchanged(self, db_path):
+        with DatabaseConnection() as db:
+            result = preflight(db, KEYED_JOIN, CostPolicy(mode="reject"))
+        assert result.findings == []
+        assert not result.limited
+
+    def test_leading_wildcard_like_warns(self, db_path):
+        sql = "SELECT * FROM NL_UM WHERE Bamei LIKE '%馬1%'"
+        with DatabaseConnection() as db:
+            result = preflight(db, sql, CostPolicy(mode="reject"))
+        kinds = [w["kind"] for w in result.warnings]
+        assert kinds == ["leading_wildcard_like", "full_scan"]
+
+    def test_plans_cached_per_fingerprint(self, db_path):
+        with DatabaseConnection() as db:
+            preflight(db, CROSS_JOIN, CostPolicy())
+            preflight(db, CROSS_JOIN.replace(" FROM ", "\n  FROM  ") + ";", CostPolicy())
+            preflight(db, CROSS_JOIN, CostPolicy())
+        assert plan_cache.stats()["misses"] == 1
+        assert plan_cache.stats()["hits"] >= 1
+
+    def test_off_mode_skips_explain(self, db_path):
+        with DatabaseConnection() as db:
+            result = preflight(db, CROSS_JOIN, CostPolicy(mode="off"))
+        assert result.findings == []
+        assert plan_cache.stats()["misses"] == 0
+
+    def test_invalid_sql_left_to_execution(self, db_path):
+        with DatabaseConnection() as db:
+            result = preflight(db, "SELECT * FROM missing_table", CostPolicy(mode="reject"))
+        assert result.findings == []
+
+    def test_duckdb_explain(self, tmp_path):
+        duckdb = pytest.importorskip("duckdb")
+        path = tmp_path / "guard.duckdb"
+        conn = duckdb.connect(str(path))
+        conn.execute("CREATE TABLE NL_SE (Year INTEGER, KettoNum TEXT)")
+        conn.execute("CREATE TABLE NL_UM (KettoNum TEXT)")
+        conn.close()
+        with patch.dict(os.environ, {"DB_TYPE": "duckdb", "DB_PATH": str(path)}):
+            with DatabaseConnection() as db:
+                cross = preflight(db, CROSS_JOIN, CostPolicy())
+                keyed = preflight(db, KEYED_JOIN, CostPolicy())
+        assert [w["kind"] for w in cross.warnings] == ["cartesian_product"]
+        assert keyed.findings == []
+
+    def test_policy_from_env(self):
+        env = {"DB_COST_GUARD": "reject", "DB_COST_GUARD_LARGE_TABLES": "NL_SE, NL_HR",
+               "DB_COST_GUARD_AUTO_LIMIT": "10"}
+        with patch.dict(os.environ, env):
+            policy = CostPolicy.from_env()
+        assert policy.mode == "reject"
+        assert policy.large_tables == frozenset({"NL_SE", "NL_HR"})
+        assert policy.auto_limit == 10
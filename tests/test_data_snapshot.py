@@ -0,0 +1,144 @@
+"""Tests for get_data_snapshot (statistics-based counts and the exact mode)"""
+
+import os
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database import sample_data_provider as provider
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.pool import close_all_pools
+from jvlink_mcp_server.database.query_control import QueryTimeoutError
+from jvlink_mcp_server.database.sample_data_provider import clear_cache, get_data_snapshot
+
+SE_ROWS = [
+    (2019, "0105", 1), (2019, "0106", None), (2021, "1228", 3),
+    (2023, "0107", 2), (2024, "1222", 1), (2024, "1228", None),
+]
+
+
+def _build_sqlite(path, analyze=False):
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_SE (Year INTEGER, MonthDay TEXT, KakuteiJyuni INTEGER)")
+    conn.execute("CREATE INDEX idx_se_year ON NL_SE (Year, MonthDay)")
+    conn.executemany("INSERT INTO NL_SE VALUES (?,?,?)", SE_ROWS)
+    conn.execute("CREATE TABLE NL_RA (Year INTEGER, MonthDay TEXT)")
+    conn.executemany("INSERT INTO NL_RA VALUES (?,?)", [(2024, "1222")] * 3)
+    conn.execute("CREATE TABLE NL_UM (KettoNum TEXT)")
+    if analyze:
+        conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def sqlite_env(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path),
+                                 "DB_RESULT_CACHE": "0"}):
+        yield path
+
+
+def _counts(snapshot):
+    return {name: info["record_count"] for name, info in snapshot["tables"].items()
+            if "error" not in info}
+
+
+def test_fast_mode_matches_exact_counts(sqlite_env):
+    _build_sqlite(sqlite_env)
+    with DatabaseConnection() as db:
+        fast = get_data_snapshot(db)
+        exact = get_data_snapshot(db, exact=True)
+    assert _counts(fast) == _counts(exact) == {"NL_SE": 6, "NL_RA": 3, "NL_UM": 0}
+    assert fast["total_records"] == exact["total_records"] == 9
+    assert fast["tables"]["NL_SE"]["count_method"] == "max_rowid"
+    assert exact["tables"]["NL_SE"]["count_method"] == "count"
+    assert (fast["exact"], exact["exact"]) == (False, True)
+    assert fast["tables"]["NL_HR"] == {"record_count": 0, "error": "テーブルが存在しません"}
+    # 期間は確定済みの行（KakuteiJyuni IS NOT NULL）の範囲
+    assert fast["data_period"] == exact["data_period"] == {
+        "earliest": "2019-0105", "latest": "2024-1222",
+    }
+
+
+def test_uses_sqlite_stat1(sqlite_env):
+    _build_sqlite(sqlite_env, analyze=True)
+    with DatabaseConnection() as db:
+        snapshot = get_data_snapshot(db)
+    assert snapshot["tables"]["NL_SE"] == {
+        "record_count": 6, "description": "出馬表・レース結果テーブル",
+        "count_method": "sqlite_stat1",
+    }
+    assert snapshot["tables"]["NL_RA"]["count_method"] == "sqlite_stat1"
+
+
+def test_cached_per_data_version(sqlite_env):
+    _build_sqlite(sqlite_env)
+    with DatabaseConnection() as db:
+        first = get_data_snapshot(db)
+        assert get_data_snapshot(db) is first
+        assert get_data_snapshot(db, exact=True) is not first
+    conn = sqlite3.connect(str(sqlite_env))
+    conn.executemany("INSERT INTO NL_RA VALUES (?,?)", [(2025, "0105")] * 4)
+    conn.commit()
+    conn.close()
+    with DatabaseConnection() as db:
+        assert get_data_snapshot(db)["tables"]["NL_RA"]["record_count"] == 7
+
+
+def test_pool_without_headroom(sqlite_env):
+    """プールに空きがなければ呼び出し元の接続だけで数える（接続を待たない）"""
+    _build_sqlite(sqlite_env)
+    with patch.dict(os.environ, {"DB_POOL_MAX_SIZE": "1", "DB_POOL_ACQUIRE_TIMEOUT": "5"}):
+        with DatabaseConnection() as db:
+            start = time.monotonic()
+            snapshot = get_data_snapshot(db)
+            assert time.monotonic() - start < 2
+    assert _counts(snapshot) == {"NL_SE": 6, "NL_RA": 3, "NL_UM": 0}
+    assert snapshot["data_period"] == {"earliest": "2019-0105", "latest": "2024-1222"}
+
+
+def test_failed_probes_are_not_cached(sqlite_env):
+    _build_sqlite(sqlite_env)
+    original = provider._count_rows
+
+    def flaky(db_connection, table_name, exact):
+        if table_name == "NL_RA":
+            raise sqlite3.OperationalError("database is locked")
+        return original(db_connection, table_name=table_name, exact=exact)
+
+    with DatabaseConnection() as db:
+        with patch.object(provider, "_count_rows", side_effect=flaky):
+            failed = get_data_snapshot(db)
+        assert failed["tables"]["NL_RA"] == {"record_count": 0, "error": "取得失敗"}
+        assert get_data_snapshot(db)["tables"]["NL_RA"]["record_count"] == 3
+
+
+def test_interrupt_is_not_swallowed(sqlite_env):
+    _build_sqlite(sqlite_env)
+    timeout = QueryTimeoutError("timed out", 1.0)
+    with DatabaseConnection() as db, \
+            patch.object(provider, "_count_rows", side_effect=timeout):
+        with pytest.raises(QueryTimeoutError):
+            get_data_snapshot(db, use_cache=False)
+
+
+def test_duckdb_estimated_size(tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+    path = tmp_path / "keiba.duckdb"
+    conn = duckdb.connect(str(path))
+    conn.execute("CREATE TABLE NL_SE AS SELECT 2020 + i % 5 AS Year, '0105' AS MonthDay, "
+                 "1 AS KakuteiJyuni FROM range(1000) t(i)")
+    conn.close()
+    close_all_pools()
+    clear_cache()
+    with patch.dict(os.environ, {"DB_TYPE": "duckdb", "DB_PATH": str(path)}):
+        with DatabaseConnection() as db:
+            snapshot = get_data_snapshot(db)
+    close_all_pools()
+    clear_cache()
+    assert snapshot["tables"]["NL_SE"]["count_method"] == "duckdb_estimated_size"
+    assert snapshot["tables"]["NL_SE"]["record_count"] == 1000
+    assert snapshot["data_period"] == {"earliest": "2020-0105", "latest": "2024-0105"}
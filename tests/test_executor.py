@@ -0,0 +1,83 @@
+"""Tests for the worker thread pool used by blocking tools"""
+
+import asyncio
+import inspect
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.executor import (
+    get_executor,
+    run_blocking,
+    run_in_worker,
+    shutdown_executor,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_executor():
+    shutdown_executor()
+    yield
+    shutdown_executor()
+
+
+def test_run_in_worker_preserves_signature():
+    def tool(table_name: str, num_rows: int = 5) -> dict:
+        """doc"""
+        return {}
+
+    wrapped = run_in_worker(tool)
+    assert inspect.iscoroutinefunction(wrapped)
+    assert inspect.signature(wrapped) == inspect.signature(tool)
+    assert wrapped.__doc__ == "doc"
+
+
+def test_runs_off_event_loop_thread():
+    loop_thread = []
+
+    async def main():
+        loop_thread.append(threading.get_ident())
+        return await run_blocking(threading.get_ident)
+
+    worker_thread = asyncio.run(main())
+    assert worker_thread != loop_thread[0]
+
+
+def test_blocking_calls_run_concurrently():
+    @run_in_worker
+    def slow():
+        time.sleep(0.2)
+        return 1
+
+    async def main():
+        start = time.perf_counter()
+        results = await asyncio.gather(slow(), slow(), slow())
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    assert results == [1, 1, 1]
+    assert elapsed < 0.5
+
+
+def test_loop_stays_responsive():
+    @run_in_worker
+    def slow():
+        time.sleep(0.3)
+
+    async def main():
+        task = asyncio.create_task(slow())
+        ticks = 0
+        while not task.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        return ticks
+
+    assert asyncio.run(main()) > 5
+
+
+def test_worker_count_from_env():
+    with patch.dict(os.environ, {"MCP_WORKER_THREADS": "3"}):
+        assert get_executor()._max_workers == 3
@@ -0,0 +1,153 @@
+"""Tests for the recommended index audit and the index builder command"""
+
+import os
+import sqlite3
+from unittest.mock import patch
+
+import duckdb
+import pytest
+
+from jvlink_mcp_server import index_builder
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.indexes import (
+    RECOMMENDED_INDEXES,
+    IndexSpec,
+    audit_indexes,
+    build_indexes,
+    missing_indexes,
+    startup_index_audit,
+)
+from jvlink_mcp_server.database.pool import close_all_pools
+from jvlink_mcp_server.database.race_key import race_key_expr
+
+SE_COLUMNS = ("Year TEXT, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT, Nichiji TEXT, RaceNum TEXT, "
+              "KettoNum TEXT, KisyuCode TEXT, KisyuRyakusyo TEXT, Bamei TEXT, Ninki INTEGER, Wakuban INTEGER")
+RA_COLUMNS = "Year TEXT, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT, Nichiji TEXT, RaceNum TEXT"
+
+JRA_SPECS = [s for s in RECOMMENDED_INDEXES if s.table in ("NL_SE", "NL_RA")]
+
+
+def _jra_specs(db_type):
+    return [s for s in JRA_SPECS if s.applies_to(db_type)]
+
+
+@pytest.fixture(autouse=True)
+def _close_pools():
+    close_all_pools()
+    yield
+    close_all_pools()
+
+
+def _create_tables(conn):
+    conn.execute(f"CREATE TABLE NL_SE ({SE_COLUMNS})")
+    conn.execute(f"CREATE TABLE NL_RA ({RA_COLUMNS})")
+    conn.commit()
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    _create_tables(conn)
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+@pytest.fixture
+def duckdb_db(tmp_path):
+    path = tmp_path / "keiba.duckdb"
+    conn = duckdb.connect(str(path))
+    _create_tables(conn)
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "duckdb", "DB_PATH": str(path)}):
+        yield path
+
+
+class TestIndexSpec:
+    def test_name_and_sql(self):
+        spec = IndexSpec("NL_SE", ("Bamei",), "bamei")
+        assert spec.name == "idx_nl_se_bamei"
+        assert spec.create_sql() == "CREATE INDEX IF NOT EXISTS idx_nl_se_bamei ON NL_SE(Bamei)"
+
+    def test_covered_by_prefix(self):
+        spec = IndexSpec("NL_SE", ("Year", "MonthDay"), "ym")
+        assert spec.covered_by(("year", "monthday", "jyocd"))
+        assert not spec.covered_by(("MonthDay", "Year"))
+
+    def test_expression_index(self):
+        spec = next(s for s in RECOMMENDED_INDEXES if s.name == "idx_nl_se_racekey")
+        assert spec.create_sql() == ("CREATE INDEX IF NOT EXISTS idx_nl_se_racekey "
+                                     f"ON NL_SE(({race_key_expr()}))")
+        assert spec.describe() == "NL_SE(RaceKey)"
+        assert not spec.covered_by(spec.columns)
+        assert spec.applies_to("sqlite") and not spec.applies_to("duckdb")
+
+    def test_recommended_set_covers_jra_and_nar(self):
+        tables = {s.table for s in RECOMMENDED_INDEXES}
+        assert {"NL_SE", "NL_RA", "NL_SE_NAR", "NL_RA_NAR"} <= tables
+
+
+@pytest.mark.parametrize("fixture", ["sqlite_db", "duckdb_db"])
+def test_build_is_idempotent(fixture, request):
+    request.getfixturevalue(fixture)
+    db = DatabaseConnection()
+
+    conn = db.open_writable_connection()
+    try:
+        first = build_indexes(conn, db.db_type, ["NL_SE", "NL_RA"])
+        second = build_indexes(conn, db.db_type, ["NL_SE", "NL_RA"])
+        assert missing_indexes(conn, db.db_type, ["NL_SE", "NL_RA"]) == []
+    finally:
+        conn.close()
+
+    assert [r.spec for r in first] == _jra_specs(db.db_type)
+    assert {r.status for r in first} == {"created"}
+    assert {r.status for r in second} == {"exists"}
+
+
+def test_audit_reports_only_existing_tables(sqlite_db):
+    with DatabaseConnection() as db:
+        missing = audit_indexes(db)
+    assert missing == _jra_specs("sqlite")
+
+
+def test_existing_index_with_other_name_is_respected(sqlite_db):
+    conn = sqlite3.connect(str(sqlite_db))
+    conn.execute("CREATE INDEX my_bamei ON NL_SE(Bamei, Year)")
+    conn.commit()
+    conn.close()
+    with DatabaseConnection() as db:
+        missing = audit_indexes(db)
+    assert IndexSpec("NL_SE", ("Bamei",), "bamei") not in missing
+
+
+def test_dry_run_creates_nothing(sqlite_db):
+    db = DatabaseConnection()
+    conn = db.open_writable_connection()
+    try:
+        results = build_indexes(conn, "sqlite", ["NL_SE", "NL_RA"], dry_run=True)
+        assert {r.status for r in results} == {"would_create"}
+        assert len(missing_indexes(conn, "sqlite", ["NL_SE", "NL_RA"])) == len(_jra_specs("sqlite"))
+    finally:
+        conn.close()
+
+
+def test_startup_audit(sqlite_db):
+    assert startup_index_audit() == _jra_specs("sqlite")
+    with patch.dict(os.environ, {"DB_INDEX_AUDIT": "0"}):
+        assert startup_index_audit() == []
+
+
+def test_startup_audit_without_database():
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": "/nonexistent/keiba.db"}):
+        assert startup_index_audit() == []
+
+
+def test_cli_builds_indexes(duckdb_db, capsys):
+    assert index_builder.main(["--table", "NL_RA"]) == 0
+    assert "idx_nl_ra_race_key" in capsys.readouterr().out
+    with DatabaseConnection() as db:
+        missing = audit_indexes(db)
+    assert IndexSpec("NL_RA", JRA_SPECS[1].columns, "race_key") not in missing
+    assert IndexSpec("NL_SE", ("Bamei",), "bamei") in missing
@@ -0,0 +1,236 @@
+"""Tests for the in-memory n-gram name index"""
+
+import os
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database import name_index
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.high_level_api import (
+    get_horse_history,
+    get_jockey_stats,
+    get_sire_stats,
+)
+from jvlink_mcp_server.database.name_index import (
+    JockeyMaster,
+    NGramIndex,
+    name_index_stats,
+    resolve_jockeys,
+    resolve_name,
+)
+from jvlink_mcp_server.database.query_control import QueryTimeoutError
+
+HORSES = [
+    ("2017101111", "ディープボンド"),
+    ("2002100816", "ディープインパクト"),
+    ("2019105219", "イクイノックス"),
+    ("2018105123", "ソダシ"),
+]
+
+
+def _name_indexes():
+    """name_index_stats() を索引名 → 状態に平らにする（テストの接続先は1つ）"""
+    (stats,) = name_index_stats().values()
+    return stats
+
+
+class TestNGramIndex:
+    @pytest.fixture
+    def index(self):
+        names = [name for _, name in HORSES] + ["武豊", "武幸四郎", "ルメール", "Mデムーロ"]
+        return NGramIndex(names, names)
+
+    def test_trigram_lookup(self, index):
+        assert index.lookup("ディープ").names == ["ディープボンド", "ディープインパクト"]
+        assert index.lookup("インパクト").names == ["ディープインパクト"]
+
+    def test_bigram_lookup_for_short_names(self, index):
+        assert index.lookup("ソダ").names == ["ソダシ"]
+        assert index.lookup("武豊").names == ["武豊"]
+
+    def test_single_character_scans_names(self, index):
+        assert set(index.lookup("武").names) == {"武豊", "武幸四郎"}
+
+    def test_case_insensitive_ascii(self, index):
+        assert index.lookup("mデム").names == ["Mデムーロ"]
+
+    def test_no_match(self, index):
+        assert index.lookup("キタサン").names == []
+        assert index.lookup("").names == []
+
+    def test_multiple_keys_per_name(self):
+        index = NGramIndex(["アグネスタキオン", "アグネスタキオン", None],
+                           ["1998101786", "1998101787", "x"])
+        assert index.lookup("タキオン").keys == ["1998101786", "1998101787"]
+
+
+@pytest.fixture
+def keiba_db(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("""CREATE TABLE NL_SE (Year INTEGER, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT,
+        Nichiji TEXT, RaceNum TEXT, KettoNum TEXT, Bamei TEXT, KisyuRyakusyo TEXT,
+        KakuteiJyuni INTEGER, Ninki INTEGER, Time TEXT)""")
+    conn.execute("""CREATE TABLE NL_RA (Year INTEGER, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT,
+        Nichiji TEXT, RaceNum TEXT, Hondai TEXT, Kyori INTEGER)""")
+    conn.execute("CREATE TABLE NL_UM (KettoNum TEXT, Bamei TEXT, Ketto3InfoBamei1 TEXT)")
+    rows = []
+    for race, (ketto, name) in enumerate(HORSES, start=1):
+        for jockey in ("武豊", "武幸四郎"):
+            rows.append((2023, "0101", "05", "01", "01", f"{race:02d}", ketto, name, jockey,
+                         1 if jockey == "武豊" else 2, race, "1345"))
+    conn.executemany("INSERT INTO NL_SE VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", rows)
+    conn.executemany("INSERT INTO NL_RA VALUES (?,?,?,?,?,?,?,?)",
+                     [(2023, "0101", "05", "01", "01", f"{r:02d}", f"R{r}", 1600)
+                      for r in range(1, len(HORSES) + 1)])
+    conn.executemany("INSERT INTO NL_UM VALUES (?,?,?)",
+                     [(k, n, "サンデーサイレンス" if "ディープ" in n else "キタサンブラック")
+                      for k, n in HORSES])
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+class TestResolveName:
+    def test_resolves_to_keys(self, keiba_db):
+        with DatabaseConnection() as db:
+            match = resolve_name(db, "NL_SE", "Bamei", "KettoNum", "ディープ")
+        assert sorted(match.keys) == ["2002100816", "2017101111"]
+        assert "NL_SE.Bamei->KettoNum" in _name_indexes()
+
+    def test_falls_back_when_too_many_keys(self, keiba_db):
+        with patch.dict(os.environ, {"DB_NAME_INDEX_MAX_KEYS": "1"}):
+            with DatabaseConnection() as db:
+                assert resolve_name(db, "NL_SE", "Bamei", "KettoNum", "ディープ") is None
+
+    def test_disabled(self, keiba_db):
+        with patch.dict(os.environ, {"DB_NAME_INDEX": "0"}):
+            with DatabaseConnection() as db:
+                assert resolve_name(db, "NL_SE", "Bamei", "KettoNum", "ディープ") is None
+
+    def test_interrupt_is_not_swallowed(self, keiba_db):
+        """索引作成中のタイムアウトはLIKE検索に切り替えず、そのまま送出する"""
+        timeout = QueryTimeoutError("timed out", 1.0)
+        with DatabaseConnection() as db, \
+                patch.object(name_index, "_fetch_frame", side_effect=timeout):
+            with pytest.raises(QueryTimeoutError):
+                resolve_name(db, "NL_SE", "Bamei", "KettoNum", "ディープ")
+        assert name_index_stats() == {}
+
+    def test_rebuilt_when_data_changes(self, keiba_db):
+        with DatabaseConnection() as db:
+            assert resolve_name(db, "NL_SE", "Bamei", "KettoNum", "ドウデュース").keys == []
+        conn = sqlite3.connect(str(keiba_db))
+        conn.execute("INSERT INTO NL_SE (KettoNum, Bamei) VALUES ('2019105283', 'ドウデュース')")
+        conn.commit()
+        conn.close()
+        with DatabaseConnection() as db:
+            assert resolve_name(db, "NL_SE", "Bamei", "KettoNum", "ドウデュース").keys == [
+                "2019105283"]
+
+
+class TestHighLevelApi:
+    def test_horse_history_uses_key_lookup(self, keiba_db):
+        with DatabaseConnection() as db:
+            df = get_horse_history(db, "ディープ")
+        assert "s.KettoNum IN (?, ?)" in df.attrs["query"]
+        assert sorted(df["horse_name"].unique()) == ["ディープインパクト", "ディープボンド"]
+
+    def test_same_result_as_like(self, keiba_db):
+        with DatabaseConnection() as db:
+            indexed = get_jockey_stats(db, "武")
+        with patch.dict(os.environ, {"DB_NAME_INDEX": "0"}):
+            with DatabaseConnection() as db:
+                scanned = get_jockey_stats(db, "武")
+        assert "LIKE" in scanned["query"] and "LIKE" not in indexed["query"]
+        for key in ("total_rides", "wins", "places_2", "matched_jockeys"):
+            assert indexed[key] == scanned[key]
+
+    def test_no_match_returns_empty(self, keiba_db):
+        with DatabaseConnection() as db:
+            df = get_horse_history(db, "キタサンブラック")
+        assert df.empty
+
+    def test_sire_stats(self, keiba_db):
+        with DatabaseConnection() as db:
+            result = get_sire_stats(db, "サンデー")
+        assert "u.Ketto3InfoBamei1 IN (?)" in result["query"]
+        assert result["total_runs"] == 4
+
+
+JOCKEYS = [("00666", "武　豊", "武豊"), ("01017", "武　幸四郎", "武幸四郎"),
+           ("05339", "Ｃ．ルメール", "ルメール")]
+
+
+class TestJockeyMaster:
+    def test_lookup_by_name_or_short_name(self):
+        master = JockeyMaster(JOCKEYS)
+        assert [j.code for j in master.lookup("武")] == ["00666", "01017"]
+        assert [j.code for j in master.lookup("武 豊")] == ["00666"]
+        assert [j.code for j in master.lookup("ルメール")] == ["05339"]
+        assert master.lookup("武豊")[0].name == "武　豊"
+
+
+@pytest.fixture
+def jockey_db(keiba_db):
+    conn = sqlite3.connect(str(keiba_db))
+    conn.execute("ALTER TABLE NL_SE ADD COLUMN KisyuCode TEXT")
+    conn.execute("UPDATE NL_SE SET KisyuCode = CASE KisyuRyakusyo "
+                 "WHEN '武豊' THEN '00666' ELSE '01017' END")
+    conn.execute("CREATE TABLE NL_KS (KisyuCode TEXT, KisyuName TEXT, KisyuRyakusyo TEXT)")
+    conn.executemany("INSERT INTO NL_KS VALUES (?,?,?)", JOCKEYS)
+    conn.commit()
+    conn.close()
+    return keiba_db
+
+
+class TestJockeyResolution:
+    def test_resolves_codes(self, jockey_db):
+        with DatabaseConnection() as db:
+            jockeys = resolve_jockeys(db, "NL_KS", "NL_SE", "武")
+        assert [j.code for j in jockeys] == ["00666", "01017"]
+        assert "NL_KS.KisyuCode" in _name_indexes()
+
+    def test_interrupt_is_not_swallowed(self, jockey_db):
+        timeout = QueryTimeoutError("timed out", 1.0)
+        with DatabaseConnection() as db, \
+                patch.object(name_index, "_fetch_frame", side_effect=timeout):
+            with pytest.raises(QueryTimeoutError):
+                resolve_jockeys(db, "NL_KS", "NL_SE", "武")
+
+    def test_without_code_column(self, keiba_db):
+        with DatabaseConnection() as db:
+            assert resolve_jockeys(db, "NL_KS", "NL_SE", "武") is None
+
+    def test_single_jockey_uses_equality(self, jockey_db):
+        with DatabaseConnection() as db:
+            result = get_jockey_stats(db, "武豊")
+        assert "s.KisyuCode = ?" in result["query"]
+        assert result["total_rides"] == 4 and result["wins"] == 4
+        assert result["ambiguous"] is False
+        assert result["jockeys"][0]["jockey_code"] == "00666"
+        assert result["jockeys"][0]["full_name"] == "武　豊"
+
+    def test_partial_name_reports_each_jockey(self, jockey_db):
+        with DatabaseConnection() as db:
+            result = get_jockey_stats(db, "武")
+        assert "s.KisyuCode IN (?, ?)" in result["query"]
+        assert result["ambiguous"] is True
+        assert result["total_rides"] == 8
+        by_code = {j["jockey_code"]: j for j in result["jockeys"]}
+        assert by_code["00666"]["wins"] == 4 and by_code["00666"]["win_rate"] == 100.0
+        assert by_code["01017"]["wins"] == 0 and by_code["01017"]["total_rides"] == 4
+        assert "該当騎手2名" in result["conditions"]
+
+    def test_falls_back_when_not_in_master(self, jockey_db):
+        conn = sqlite3.connect(str(jockey_db))
+        conn.execute("DELETE FROM NL_KS WHERE KisyuCode = '01017'")
+        conn.commit()
+        conn.close()
+        with DatabaseConnection() as db:
+            result = get_jockey_stats(db, "武幸四郎")
+        assert "KisyuCode" not in result["query"]
+        assert result["total_rides"] == 4
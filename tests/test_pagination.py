@@ -0,0 +1,134 @@
+"""Tests for cursor-based pagination of free-form queries"""
+
+import base64
+import json
+import os
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database import pagination
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.pagination import (
+    MAX_PAGE_SIZE,
+    PageToken,
+    clamp_page_size,
+    next_token,
+    paginate_sql,
+    version_tag,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db_path = tmp_path / "page.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE NL_SE (Year INTEGER, Umaban INTEGER)")
+    conn.executemany("INSERT INTO NL_SE VALUES (?, ?)", [(2024, i) for i in range(1, 26)])
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(db_path)}):
+        with DatabaseConnection() as db:
+            yield db
+
+
+class TestPageToken:
+    def test_round_trip(self):
+        token = PageToken(sql="SELECT * FROM NL_SE", offset=20, page_size=10)
+        assert PageToken.decode(token.encode()) == token
+
+    def test_tampered_sql_rejected(self):
+        token = PageToken(sql="SELECT * FROM NL_SE", offset=0, page_size=10).encode()
+        payload = json.loads(base64.urlsafe_b64decode(token))
+        for key, value in (("sql", "SELECT * FROM NL_UM"), ("offset", 100), ("version", "0")):
+            bad = base64.urlsafe_b64encode(json.dumps({**payload, key: value}).encode()).decode()
+            with pytest.raises(ValueError, match="署名"):
+                PageToken.decode(bad)
+
+    def test_token_from_another_process_rejected(self):
+        token = PageToken(sql="SELECT * FROM NL_SE", offset=0, page_size=10).encode()
+        with patch.object(pagination, "_SECRET", b"restarted"):
+            with pytest.raises(ValueError, match="署名"):
+                PageToken.decode(token)
+
+    def test_stale_version_rejected(self):
+        token = PageToken.decode(next_token("SELECT 1", 0, 10, has_more=True,
+                                            version=version_tag((1, 2))))
+        token.check_version(version_tag((1, 2)))
+        with pytest.raises(ValueError, match="データが更新"):
+            token.check_version(version_tag((3, 4)))
+        # 世代を取得できない接続先（最初のページで None）は検査しない
+        PageToken(sql="SELECT 1", offset=10, page_size=10).check_version(version_tag((3, 4)))
+
+    def test_garbage_rejected(self):
+        with pytest.raises(ValueError, match="継続トークン"):
+            PageToken.decode("not-a-token")
+
+    def test_next_token_none_on_last_page(self):
+        assert next_token("SELECT 1", 0, 10, has_more=False) is None
+        token = PageToken.decode(next_token("SELECT 1", 10, 10, has_more=True))
+        assert token.offset == 20
+
+    def test_clamp_page_size(self):
+        assert clamp_page_size(0) == 1
+        assert clamp_page_size(10**6) == MAX_PAGE_SIZE
+
+    def test_paginate_sql_strips_semicolon(self):
+        sql = paginate_sql("SELECT * FROM NL_SE;", offset=5, limit=11)
+        assert sql == "SELECT * FROM (SELECT * FROM NL_SE) AS _page LIMIT 11 OFFSET 5"
+
+    def test_paginate_sql_strips_trailing_comments(self):
+        for tail in (" -- 全件", ";  -- 全件\n", " /* 全件 */ ;", "\n-- a\n-- b"):
+            sql = paginate_sql("SELECT Year FROM NL_SE" + tail, offset=0, limit=3)
+            assert sql == "SELECT * FROM (SELECT Year FROM NL_SE) AS _page LIMIT 3 OFFSET 0"
+        # 途中のコメントは改行ごと残る
+        assert "-- 年\nFROM" in paginate_sql("SELECT Year -- 年\nFROM NL_SE", 0, 3)
+
+
+class TestExecuteSafeQueryPage:
+    def test_pages_through_results(self, db):
+        sql = "SELECT Umaban FROM NL_SE ORDER BY Umaban"
+        seen, offset, has_more = [], 0, True
+        while has_more:
+            df, has_more = db.execute_safe_query_page(sql, offset=offset, page_size=10)
+            seen.extend(df["Umaban"].tolist())
+            offset += 10
+        assert seen == list(range(1, 26))
+
+    def test_params_passed_through(self, db):
+        df, has_more = db.execute_safe_query_page(
+            "SELECT Umaban FROM NL_SE WHERE Umaban > ?", params=(20,), page_size=10
+        )
+        assert len(df) == 5
+        assert not has_more
+
+    def test_trailing_comment(self, db):
+        df, has_more = db.execute_safe_query_page("SELECT Year FROM NL_SE -- 全件", page_size=3)
+        assert len(df) == 3 and has_more
+
+    def test_dangerous_query_blocked(self, db):
+        with pytest.raises(ValueError, match="Dangerous keyword"):
+            db.execute_safe_query_page("DELETE FROM NL_SE")
+
+
+def test_next_page_rejected_after_data_changes(tmp_path):
+    from jvlink_mcp_server.server import execute_safe_query, execute_safe_query_next
+
+    path = tmp_path / "page.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_SE (Year INTEGER, Umaban INTEGER)")
+    conn.executemany("INSERT INTO NL_SE VALUES (?, ?)", [(2024, i) for i in range(1, 26)])
+    conn.commit()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path),
+                                 "DB_COST_GUARD": "off"}):
+        first = execute_safe_query.__wrapped__("SELECT Umaban FROM NL_SE ORDER BY Umaban",
+                                               page_size=10)
+        second = execute_safe_query_next.__wrapped__(first["next_token"])
+        assert second["success"] and second["offset"] == 10
+        # 先頭に行が増えると、OFFSETで取得する続きのページは1行ずれる
+        conn.execute("INSERT INTO NL_SE VALUES (2024, 0)")
+        conn.commit()
+        conn.close()
+        third = execute_safe_query_next.__wrapped__(second["next_token"])
+    assert not third["success"] and "データが更新" in third["error"]
@@ -0,0 +1,139 @@
+"""Tests for the process-wide connection pool"""
+
+import os
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.pool import (
+    ConnectionPool,
+    PoolTimeoutError,
+    close_all_pools,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_pools():
+    close_all_pools()
+    yield
+    close_all_pools()
+
+
+@pytest.fixture
+def sqlite_db(tmp_path):
+    db_path = tmp_path / "pool.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE NL_SE (Year INTEGER, Bamei TEXT)")
+    conn.execute("INSERT INTO NL_SE VALUES (2024, 'テスト馬')")
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(db_path)}):
+        yield db_path
+
+
+class TestConnectionPool:
+    def test_reuses_released_connection(self):
+        pool = ConnectionPool(lambda: sqlite3.connect(":memory:"), max_size=2)
+        conn = pool.acquire()
+        pool.release(conn)
+        assert pool.acquire() is conn
+
+    def test_min_size_prewarms(self):
+        created = []
+
+        def factory():
+            created.append(1)
+            return sqlite3.connect(":memory:")
+
+        pool = ConnectionPool(factory, min_size=2, max_size=3)
+        assert len(created) == 2
+        assert pool.stats()["idle"] == 2
+
+    def test_max_size_blocks_until_timeout(self):
+        pool = ConnectionPool(lambda: sqlite3.connect(":memory:"),
+                              max_size=1, acquire_timeout=0.05)
+        pool.acquire()
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+
+    def test_non_blocking_acquire(self):
+        pool = ConnectionPool(lambda: sqlite3.connect(":memory:"),
+                              max_size=1, acquire_timeout=30)
+        conn = pool.acquire()
+        assert pool.acquire(blocking=False) is None
+        pool.release(conn)
+        assert pool.acquire(blocking=False) is conn
+
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool(lambda: sqlite3.connect(":memory:", check_same_thread=False),
+                              max_size=1, acquire_timeout=2)
+        conn = pool.acquire()
+        got = []
+        t = threading.Thread(target=lambda: got.append(pool.acquire()))
+        t.start()
+        pool.release(conn)
+        t.join(timeout=2)
+        assert got == [conn]
+
+    def test_failed_health_check_replaces_connection(self):
+        def check(conn):
+            if getattr(conn, "broken", False):
+                raise RuntimeError("dead")
+
+        class Conn:
+            broken = False
+
+            def close(self):
+                pass
+
+        pool = ConnectionPool(Conn, max_size=1, health_check=check)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.broken = True
+        assert pool.acquire() is not conn
+
+    def test_idle_timeout_prunes_above_min_size(self):
+        pool = ConnectionPool(lambda: sqlite3.connect(":memory:"),
+                              max_size=2, idle_timeout=0.01)
+        conn = pool.acquire()
+        pool.release(conn)
+        import time
+        time.sleep(0.02)
+        assert pool.acquire() is not conn
+
+    def test_release_foreign_connection_rejected(self):
+        pool = ConnectionPool(lambda: sqlite3.connect(":memory:"))
+        with pytest.raises(ValueError):
+            pool.release(sqlite3.connect(":memory:"))
+
+
+class TestDatabaseConnectionPooling:
+    def test_context_manager_returns_connection(self, sqlite_db):
+        with DatabaseConnection() as db:
+            first = db.connection
+        with DatabaseConnection() as db:
+            assert db.connection is first
+
+    def test_pooled_connection_is_read_only(self, sqlite_db):
+        with DatabaseConnection() as db:
+            with pytest.raises(sqlite3.OperationalError):
+                db.connection.execute("INSERT INTO NL_SE VALUES (1, 'x')")
+
+    def test_pool_can_be_disabled(self, sqlite_db):
+        with patch.dict(os.environ, {"DB_POOL_ENABLED": "0"}):
+            with DatabaseConnection() as db:
+                first = db.connection
+            with DatabaseConnection() as db:
+                assert db.connection is not first
+
+    def test_separate_pool_per_database(self, sqlite_db, tmp_path):
+        other = tmp_path / "other.db"
+        sqlite3.connect(str(other)).close()
+        with DatabaseConnection() as db:
+            first = db.connection
+        with patch.dict(os.environ, {"DB_PATH": str(other)}):
+            with DatabaseConnection() as db:
+                assert db.connection is not first
@@ -0,0 +1,133 @@
+"""Tests for per-query timeouts and cancellation"""
+
+import asyncio
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.query_control import (
+    QueryCancelledError,
+    QueryControl,
+    QueryTimeoutError,
+    current_control,
+    query_control,
+    tool_timeout,
+)
+from jvlink_mcp_server.executor import run_in_worker
+
+# 終わらない再帰CTE（SQLite/DuckDB共通）
+RUNAWAY_SQL = """
+WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r)
+SELECT COUNT(*) FROM r
+"""
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def db(request, tmp_path):
+    if request.param == "sqlite":
+        import sqlite3
+        path = tmp_path / "t.db"
+        sqlite3.connect(str(path)).close()
+    else:
+        import duckdb
+        path = tmp_path / "t.duckdb"
+        duckdb.connect(str(path)).close()
+    with patch.dict(os.environ, {"DB_TYPE": request.param, "DB_PATH": str(path)}):
+        with DatabaseConnection() as db:
+            yield db
+
+
+class TestToolTimeout:
+    def test_default(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("DB_QUERY_TIMEOUT", None)
+            assert tool_timeout() == 120.0
+
+    def test_per_tool_override(self):
+        with patch.dict(os.environ, {"DB_QUERY_TIMEOUT": "60",
+                                     "DB_QUERY_TIMEOUT_KEIBA_DATA_SEARCH": "5"}):
+            assert tool_timeout("keiba_data_search") == 5.0
+            assert tool_timeout("jockey_stats") == 60.0
+
+    def test_zero_disables(self):
+        with patch.dict(os.environ, {"DB_QUERY_TIMEOUT": "0"}):
+            assert tool_timeout() is None
+
+    def test_no_timeout_outside_tools(self):
+        # 定期更新などのバックグラウンド処理にはツールのタイムアウトを適用しない
+        with patch.dict(os.environ, {"DB_QUERY_TIMEOUT": "0.01"}):
+            assert current_control().timeout is None
+            with query_control(QueryControl(timeout=5)):
+                assert current_control().timeout == 5
+
+
+class TestNativeInterruption:
+    def test_timeout_interrupts_statement(self, db):
+        start = time.monotonic()
+        with query_control(QueryControl(timeout=0.3)):
+            with pytest.raises(QueryTimeoutError):
+                db.execute_query(RUNAWAY_SQL)
+        assert time.monotonic() - start < 5
+        # 接続は引き続き使える
+        assert db.execute_query("SELECT 1 AS v").iloc[0]["v"] == 1
+
+    def test_timeout_applies_to_pages(self, db):
+        with query_control(QueryControl(timeout=0.3)):
+            with pytest.raises(QueryTimeoutError):
+                db.execute_query_page("SELECT i FROM (" + RUNAWAY_SQL.replace("COUNT(*)", "i") + ") ORDER BY i")
+
+    def test_cancel_interrupts_statement(self, db):
+        control = QueryControl(timeout=None)
+        threading.Timer(0.3, control.cancel).start()
+        with query_control(control):
+            with pytest.raises(QueryCancelledError):
+                db.execute_query(RUNAWAY_SQL)
+
+    def test_already_expired_control_fails_fast(self, db):
+        control = QueryControl(timeout=0.01)
+        time.sleep(0.02)
+        with query_control(control):
+            with pytest.raises(QueryTimeoutError):
+                db.execute_query("SELECT 1")
+
+
+class TestWorkerIntegration:
+    def test_timeout_returns_structured_result(self, db):
+        @run_in_worker("slow_tool")
+        def slow_tool():
+            return db.execute_query(RUNAWAY_SQL)
+
+        with patch.dict(os.environ, {"DB_QUERY_TIMEOUT_SLOW_TOOL": "0.3"}):
+            result = asyncio.run(slow_tool())
+        assert result["success"] is False
+        assert result["status"] == "timed_out"
+        assert result["timeout_seconds"] == 0.3
+
+    def test_request_cancellation_interrupts_worker(self, db):
+        finished = threading.Event()
+        errors = []
+
+        @run_in_worker("cancel_tool")
+        def cancel_tool():
+            try:
+                db.execute_query(RUNAWAY_SQL)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                finished.set()
+
+        async def main():
+            task = asyncio.create_task(cancel_tool())
+            await asyncio.sleep(0.3)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        with patch.dict(os.environ, {"DB_QUERY_TIMEOUT": "0"}):
+            asyncio.run(main())
+        assert finished.wait(5)
+        assert isinstance(errors[0], QueryCancelledError)
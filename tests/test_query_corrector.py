@@ -55,3 +55,41 @@ class TestCorrectQuery:
         sql = "SELECT * FROM NL_SE WHERE Year = '2024'"
         corrected, corrections = correct_query(sql)
         assert "Year = 2024" in corrected
+
+
+class TestRuleRegistry:
+    """ルール表とメモのテスト"""
+
+    def test_rules_built_once_per_column(self):
+        from jvlink_mcp_server.database.query_corrector import RULES
+        assert RULES["JYOCD"].padding_length == 2
+        assert RULES["NINKI"].padding_length == 0
+        assert set(RULES) == {c.upper() for c in QueryCorrector.INTEGER_COLUMNS} | {"JYOCD"}
+
+    def test_single_pass_applies_all_rules(self):
+        sql = ("SELECT * FROM NL_SE WHERE jyocd = '6' AND Year = '2024' "
+               "AND JyoCD IN ('5', '10') AND Ninki = '1'")
+        corrected, corrections = correct_query(sql)
+        assert corrected == ("SELECT * FROM NL_SE WHERE jyocd = '06' AND Year = 2024 "
+                             "AND JyoCD IN ('05', '10') AND Ninki = 1")
+        assert corrections == [
+            "JyoCD: '6' → '06'",
+            "Year: '2024' → 2024 (INTEGER型)",
+            "JyoCD IN句内: '5' → '05'",
+            "Ninki: '1' → 1 (INTEGER型)",
+        ]
+
+    def test_memoized_result_is_not_shared_mutable(self):
+        from jvlink_mcp_server.database.query_corrector import clear_memo, memo_stats
+        clear_memo()
+        sql = "SELECT * FROM NL_SE WHERE Ninki = '2'"
+        _, first = correct_query(sql)
+        first.append("mutated")
+        _, second = correct_query(sql)
+        assert second == ["Ninki: '2' → 2 (INTEGER型)"]
+        assert memo_stats()["hits"] == 1
+
+    def test_instance_api_keeps_corrections(self):
+        corrector = QueryCorrector()
+        corrector.correct_query("SELECT * FROM NL_SE WHERE JyoCD = '9'")
+        assert corrector.corrections == ["JyoCD: '9' → '09'"]
@@ -0,0 +1,224 @@
+"""Tests for the surrogate integer race key (RK_ views and expression indexes)"""
+
+import os
+import sqlite3
+from unittest.mock import Mock, patch
+
+import duckdb
+import pytest
+
+from jvlink_mcp_server import index_builder
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.high_level_api import (
+    get_favorite_performance,
+    get_frame_stats,
+    get_horse_history,
+    get_jockey_stats,
+)
+from jvlink_mcp_server.database.pool import close_all_pools
+from jvlink_mcp_server.database.query_templates import render_template
+from jvlink_mcp_server.database.race_key import (
+    create_view_sql,
+    has_race_key,
+    race_join,
+    race_key_expr,
+    race_key_value,
+)
+from jvlink_mcp_server.database.schema_info import get_query_examples
+
+RACE_COLUMNS = "Year INTEGER, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT, Nichiji TEXT, RaceNum TEXT"
+RACES = [(2022, "0605", "05", "03", "02", "11", 1600), (2023, "1222", "06", "05", "08", "11", 2500),
+         (2024, "0101", "44", "01", "01", "01", 1200)]
+
+
+def _create(conn, suffix=""):
+    conn.execute(f"CREATE TABLE NL_SE{suffix} ({RACE_COLUMNS}, KettoNum TEXT, Bamei TEXT, "
+                 "KisyuCode TEXT, KisyuRyakusyo TEXT, Ninki INTEGER, Wakuban INTEGER, "
+                 "KakuteiJyuni INTEGER, Time REAL)")
+    conn.execute(f"CREATE TABLE NL_RA{suffix} ({RACE_COLUMNS}, Hondai TEXT, Kyori INTEGER, "
+                 "GradeCD TEXT, TrackCD TEXT)")
+    for year, monthday, jyo, kaiji, nichiji, race_num, kyori in RACES:
+        key = (year, monthday, jyo, kaiji, nichiji, race_num)
+        conn.execute(f"INSERT INTO NL_RA{suffix} VALUES (?,?,?,?,?,?,?,?,?,?)",
+                     key + ("テスト", kyori, "A", "11"))
+        for umaban in range(1, 7):
+            conn.execute(f"INSERT INTO NL_SE{suffix} VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                         key + (f"20201{umaban:05d}", f"テスト馬{umaban}", "00666", "武豊",
+                                umaban, (umaban + 1) // 2, (umaban + year) % 6 + 1, 95.0))
+
+
+@pytest.fixture
+def keiba_db(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    _create(conn)
+    _create(conn, "_NAR")
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path),
+                                 "DB_FAVORITE_CUBE": "0"}):
+        yield path
+
+
+def test_race_key_value_matches_sql():
+    assert race_key_value(2024, "1222", "06", "05", "08", "11") == 2024122206050811
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"CREATE TABLE NL_RA ({RACE_COLUMNS})")
+    conn.executemany("INSERT INTO NL_RA VALUES (?,?,?,?,?,?)", [r[:6] for r in RACES])
+    conn.execute(create_view_sql("NL_RA", "sqlite"))
+    keys = [row[0] for row in conn.execute("SELECT RaceKey FROM RK_NL_RA ORDER BY RaceKey")]
+    assert keys == sorted(race_key_value(*r[:6]) for r in RACES)
+
+
+def test_race_key_expr_with_alias():
+    expr = race_key_expr("s")
+    assert "TRIM(CAST(s.Year AS VARCHAR))" in expr and "1000000000000" in expr
+    assert "TRIM(CAST(s.RaceNum AS VARCHAR))" in expr and "r.RaceNum" not in expr
+
+
+# 海外の競馬場コード（英数字）は負の RaceKey になり、空の開催回次は NULL（どの行とも結合しない）
+OVERSEAS = [(2024, "1006", "A8", "00", "00", "04"), (2024, "1006", "B6", "00", "00", "04"),
+            (2024, "1006", "05", "", "  ", "04")]
+
+
+def test_race_key_value_non_numeric():
+    assert [race_key_value(*r) for r in OVERSEAS] == \
+        [-202410060368000004, -202410060402000004, None]
+    assert race_key_value(2024, "1006", None, "01", "01", "04") is None
+    assert race_key_value(2024, "1006", "a8", "00", "00", "04") is None
+    assert race_key_value(2024, "1006", "A80", "00", "00", "04") is None
+
+
+def _overseas_join(conn):
+    conn.execute(f"CREATE TABLE NL_RA ({RACE_COLUMNS})")
+    conn.execute(f"CREATE TABLE NL_SE ({RACE_COLUMNS})")
+    for table in ("NL_RA", "NL_SE"):
+        conn.executemany(f"INSERT INTO {table} VALUES (?,?,?,?,?,?)",
+                         [r[:6] for r in RACES] + OVERSEAS)
+    keys = [row[0] for row in conn.execute(
+        "SELECT RaceKey FROM (SELECT *, " + race_key_expr() + " AS RaceKey FROM NL_RA) "
+        "ORDER BY JyoCD, Kaiji").fetchall()]
+    for table in ("NL_RA", "NL_SE"):
+        conn.execute(create_view_sql(table, "duckdb" if isinstance(conn, duckdb.DuckDBPyConnection)
+                                     else "sqlite"))
+    joined = conn.execute("SELECT COUNT(*) FROM RK_NL_SE s "
+                          "JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey").fetchone()[0]
+    return keys, joined
+
+
+@pytest.mark.parametrize("connect", [sqlite3.connect, duckdb.connect])
+def test_non_numeric_parts(connect):
+    keys, joined = _overseas_join(connect(":memory:"))
+    assert sorted(keys, key=lambda k: (k is None, k)) == \
+        sorted(race_key_value(*r[:6]) for r in RACES + OVERSEAS[:2]) + [None]
+    assert joined == len(RACES) + 2
+
+
+def test_without_views_uses_six_columns(keiba_db):
+    with DatabaseConnection() as db:
+        assert not has_race_key(db, "NL_SE", "NL_RA")
+        join = race_join(db, "NL_SE", "NL_RA")
+    assert (join.se, join.ra, join.race_key) == ("NL_SE", "NL_RA", False)
+    assert join.on.startswith("s.Year = r.Year AND s.MonthDay = r.MonthDay")
+    # カタログを読めない接続（モック等）は6カラム結合
+    assert not has_race_key(Mock(get_tables=Mock(side_effect=RuntimeError)), "NL_SE")
+
+
+def test_cli_builds_views_and_indexes(keiba_db, capsys):
+    assert index_builder.main(["--no-analyze"]) == 0
+    out = capsys.readouterr().out
+    for view in ("RK_NL_SE", "RK_NL_RA", "RK_NL_SE_NAR", "RK_NL_RA_NAR"):
+        assert view in out
+    assert "idx_nl_se_racekey" in out
+
+    assert index_builder.main(["--no-analyze"]) == 0
+    assert "[作成]" not in capsys.readouterr().out
+
+    with DatabaseConnection() as db:
+        assert has_race_key(db, "NL_SE", "NL_RA", "NL_SE_NAR", "NL_RA_NAR")
+
+
+def _query_stats(db):
+    """RaceKeyで結合するようになる高レベルAPIの結果（dictのものとDataFrameのもの）"""
+    return (
+        get_favorite_performance(db, ninki=1, distance=1600),
+        get_jockey_stats(db, "武豊", distance=1600),
+        get_horse_history(db, "テスト馬1"),
+        get_frame_stats(db, distance=1600),
+    )
+
+
+def test_high_level_api_joins_on_race_key(keiba_db):
+    with DatabaseConnection() as db:
+        before = _query_stats(db)
+    assert index_builder.main(["--no-analyze"]) == 0
+    with DatabaseConnection() as db:
+        after = _query_stats(db)
+
+    for old, new in zip(before[:2], after[:2]):
+        assert "s.Year = r.Year" in old["query"]
+        assert "JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey" in new["query"]
+        assert {k: v for k, v in new.items() if k != "query"} == \
+            {k: v for k, v in old.items() if k != "query"}
+    for old, new in zip(before[2:], after[2:]):
+        assert "JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey" in new.attrs["query"]
+        assert not new.empty and new.equals(old)
+
+
+def test_overseas_races_are_kept(keiba_db):
+    """海外のレース（JyoCD 'A8'）もRaceKeyビューでの結合で落ちない"""
+    conn = sqlite3.connect(str(keiba_db))
+    key = (2023, "1001", "A8", "00", "00", "04")
+    conn.execute("INSERT INTO NL_RA VALUES (?,?,?,?,?,?,?,?,?,?)",
+                 key + ("凱旋門賞", 2400, "A", "10"))
+    conn.execute("INSERT INTO NL_SE VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                 key + ("2019105219", "スルーセブンシーズ", "05339", "ルメール", 7, 4, 4, 153.3))
+    conn.commit()
+    conn.close()
+    with DatabaseConnection() as db:
+        before = get_horse_history(db, "スルーセブンシーズ")
+    assert index_builder.main(["--no-analyze"]) == 0
+    with DatabaseConnection() as db:
+        after = get_horse_history(db, "スルーセブンシーズ")
+    assert "ON s.RaceKey = r.RaceKey" in after.attrs["query"]
+    assert len(after) == 1 and after.equals(before)
+
+
+def test_join_uses_expression_index(keiba_db):
+    assert index_builder.main(["--no-analyze"]) == 0
+    conn = sqlite3.connect(str(keiba_db))
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT r.Kyori FROM RK_NL_SE s "
+        "JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey WHERE s.Ninki = 1"))
+    conn.close()
+    assert "idx_nl_ra_racekey" in plan or "idx_nl_se_racekey" in plan
+
+
+def test_duckdb_views_need_no_index(tmp_path, capsys):
+    path = tmp_path / "keiba.duckdb"
+    conn = duckdb.connect(str(path))
+    _create(conn)
+    conn.close()
+    close_all_pools()
+    with patch.dict(os.environ, {"DB_TYPE": "duckdb", "DB_PATH": str(path)}):
+        assert index_builder.main(["--no-analyze"]) == 0
+        assert "racekey" not in capsys.readouterr().out
+        with DatabaseConnection() as db:
+            assert has_race_key(db, "NL_SE", "NL_RA")
+            df = db.execute_safe_query("SELECT COUNT(*) AS n FROM RK_NL_SE s "
+                                       "JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey")
+    close_all_pools()
+    assert int(df["n"][0]) == len(RACES) * 6
+
+
+def test_templates_and_examples():
+    sql, _ = render_template("race_result", race_key=True, year=2024, month_day="1222",
+                             jyo_cd="06", kaiji=5, nichiji=8, race_num=11)
+    assert "FROM RK_NL_RA r" in sql and "s.RaceKey = r.RaceKey" in sql
+    sql, _ = render_template("race_result", year=2024, month_day="1222", jyo_cd="06",
+                             kaiji=5, nichiji=8, race_num=11)
+    assert "FROM NL_RA r" in sql and "s.RaceNum = r.RaceNum" in sql
+
+    assert "JOIN RK_NL_RA r ON s.RaceKey = r.RaceKey" in \
+        get_query_examples(race_key=True)["距離別1番人気勝率"]
+    assert "JOIN NL_RA r ON s.Year = r.Year" in get_query_examples()["距離別1番人気勝率"]
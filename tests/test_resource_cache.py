@@ -0,0 +1,90 @@
+"""Tests for the rendered MCP resource cache"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from unittest.mock import Mock, patch
+
+import pytest
+
+from jvlink_mcp_server import server
+from jvlink_mcp_server.database.pool import close_all_pools
+from jvlink_mcp_server.database.resource_cache import ResourceCache, get_resource_cache
+from jvlink_mcp_server.database.schema_info import ALL_TABLES, GRADE_CODES
+from jvlink_mcp_server.server import (
+    database_schema_resource,
+    grade_codes_resource,
+    resource_etags_resource,
+    table_detail_resource,
+    tables_list_resource,
+)
+
+
+@pytest.fixture(autouse=True)
+def _clear_resources():
+    get_resource_cache().clear()
+    yield
+    get_resource_cache().clear()
+
+
+class TestResourceCache:
+    def test_renders_once_per_version(self):
+        cache = ResourceCache()
+        render = Mock(return_value={"a": 1})
+        first = cache.get("x://a", render)
+        assert cache.get("x://a", render) is first
+        assert render.call_count == 1
+        assert first.body == json.dumps({"a": 1}, ensure_ascii=False, indent=2)
+        assert first.etag == hashlib.sha256(first.body.encode()).hexdigest()[:16]
+
+        cache.get("x://a", render, version=("t1",))
+        cache.get("x://a", render, version=("t1",))
+        assert render.call_count == 2
+        assert cache.stats() == {"resources": 1, "bytes": first.size, "renders": 2, "hits": 2}
+
+    def test_etag_follows_content(self):
+        cache = ResourceCache()
+        a = cache.get("x://a", lambda: {"v": 1}, version=1)
+        b = cache.get("x://a", lambda: {"v": 1}, version=2)
+        c = cache.get("x://a", lambda: {"v": 2}, version=3)
+        assert a.etag == b.etag != c.etag
+        assert cache.etags() == {"x://a": {"etag": c.etag, "bytes": c.size}}
+
+
+def test_static_resources_are_rendered_once():
+    describe = Mock(return_value={"tables": ALL_TABLES})
+    with patch.dict(server._STATIC_RESOURCES, {"schema://database": describe}):
+        body = database_schema_resource()
+        assert database_schema_resource() is body
+    assert describe.call_count == 1
+    assert json.loads(grade_codes_resource()) == GRADE_CODES
+
+    etags = json.loads(resource_etags_resource())
+    assert {"schema://database", "codes://grades", "examples://queries"} <= set(etags)
+    assert etags["codes://grades"]["etag"] == get_resource_cache().etag("codes://grades")
+
+
+def test_db_resources_refresh_on_schema_change(tmp_path):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_RA (Year INTEGER, JyoCD TEXT)")
+    conn.commit()
+    close_all_pools()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        tables = tables_list_resource.__wrapped__()
+        detail = table_detail_resource.__wrapped__("NL_RA")
+        assert tables_list_resource.__wrapped__() is tables
+        assert table_detail_resource.__wrapped__("NL_RA") is detail
+        renders = get_resource_cache().stats()["renders"]
+
+        conn.execute("CREATE TABLE NL_SE (Year INTEGER)")
+        conn.execute("ALTER TABLE NL_RA ADD COLUMN Kyori INTEGER")
+        conn.commit()
+        new_tables = json.loads(tables_list_resource.__wrapped__())
+        new_detail = json.loads(table_detail_resource.__wrapped__("NL_RA"))
+    conn.close()
+    close_all_pools()
+    assert get_resource_cache().stats()["renders"] == renders + 2
+    assert {t["table_name"] for t in new_tables["tables"]} == {"NL_RA", "NL_SE"}
+    assert [c["name"] for c in new_detail["columns"]] == ["Year", "JyoCD", "Kyori"]
@@ -0,0 +1,136 @@
+"""Tests for the data-version-aware result cache"""
+
+import os
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.result_cache import (
+    ResultCache,
+    file_version,
+    get_result_cache,
+    reset_result_cache,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    reset_result_cache()
+    yield
+    reset_result_cache()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "cache.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_SE (Year INTEGER, Ninki INTEGER)")
+    conn.execute("INSERT INTO NL_SE VALUES (2024, 1)")
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+class TestResultCache:
+    def test_lru_eviction_by_entries(self):
+        cache = ResultCache(max_entries=2)
+        for key in "abc":
+            cache.put(key, pd.DataFrame({"x": [1]}))
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_eviction_by_size(self):
+        df = pd.DataFrame({"x": range(1000)})
+        cache = ResultCache(max_entries=100, max_bytes=int(df.memory_usage().sum() * 1.5))
+        cache.put("a", df)
+        cache.put("b", df)
+        assert cache.get("a") is None
+        assert cache.get("b") is not None
+
+    def test_oversized_value_not_stored(self):
+        cache = ResultCache(max_bytes=10)
+        cache.put("a", pd.DataFrame({"x": range(100)}))
+        assert cache.stats()["entries"] == 0
+
+    def test_hit_miss_counters(self):
+        cache = ResultCache()
+        cache.get("a")
+        cache.put("a", pd.DataFrame())
+        cache.get("a")
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["hit_rate"] == 0.5
+
+
+class TestFileVersion:
+    def test_memory_db_not_versioned(self):
+        assert file_version(":memory:") is None
+        assert file_version(None) is None
+
+    def test_changes_on_write(self, db_path):
+        before = file_version(str(db_path))
+        time.sleep(0.01)
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("INSERT INTO NL_SE VALUES (2025, 2)")
+        conn.commit()
+        conn.close()
+        assert file_version(str(db_path)) != before
+
+
+class TestConnectionCaching:
+    SQL = "SELECT COUNT(*) AS n FROM NL_SE"
+
+    def test_repeated_query_hits_cache(self, db_path):
+        with DatabaseConnection() as db:
+            db.execute_query(self.SQL)
+            db.execute_query("SELECT  COUNT(*) AS n\nFROM NL_SE;")
+        stats = get_result_cache().stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_comments_are_part_of_the_key(self, db_path):
+        """行コメントの後に改行があるかどうかで別のクエリとして扱う"""
+        with DatabaseConnection() as db:
+            both = db.execute_query("SELECT 1 AS a -- x\n, 2 AS b")
+            first = db.execute_query("SELECT 1 AS a -- x , 2 AS b")
+            db.execute_query("SELECT 1 AS a /* x */ , 2 AS b")
+        assert list(both.columns) == ["a", "b"]
+        assert list(first.columns) == ["a"]
+        assert get_result_cache().stats()["hits"] == 1
+
+    def test_cached_frame_is_a_copy(self, db_path):
+        with DatabaseConnection() as db:
+            df = db.execute_query(self.SQL)
+            df["extra"] = 1
+            assert "extra" not in db.execute_query(self.SQL).columns
+
+    def test_params_are_part_of_key(self, db_path):
+        with DatabaseConnection() as db:
+            a = db.execute_query("SELECT COUNT(*) AS n FROM NL_SE WHERE Ninki = ?", params=(1,))
+            b = db.execute_query("SELECT COUNT(*) AS n FROM NL_SE WHERE Ninki = ?", params=(2,))
+        assert a.iloc[0]["n"] == 1
+        assert b.iloc[0]["n"] == 0
+
+    def test_invalidated_when_data_changes(self, db_path):
+        with DatabaseConnection() as db:
+            assert db.execute_query(self.SQL).iloc[0]["n"] == 1
+        time.sleep(0.01)
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("INSERT INTO NL_SE VALUES (2025, 2)")
+        conn.commit()
+        conn.close()
+        with DatabaseConnection() as db:
+            assert db.execute_query(self.SQL).iloc[0]["n"] == 2
+
+    def test_cache_can_be_disabled(self, db_path):
+        with patch.dict(os.environ, {"DB_RESULT_CACHE": "0"}):
+            with DatabaseConnection() as db:
+                db.execute_query(self.SQL)
+                db.execute_query(self.SQL)
+        assert get_result_cache().stats()["hits"] == 0
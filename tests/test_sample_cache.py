@@ -0,0 +1,83 @@
+"""Tests for the bounded, data-version-aware sample data cache"""
+
+import os
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.sample_data_provider import (
+    clear_cache,
+    get_column_value_examples,
+    get_sample_data,
+    sample_cache_stats,
+)
+
+
+@pytest.fixture
+def keiba_db(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_RA (Year INTEGER, JyoCD TEXT, Kyori INTEGER)")
+    conn.executemany("INSERT INTO NL_RA VALUES (?,?,?)",
+                     [(2024, "05", 1600), (2024, "06", 2000), (2023, "05", 1600)])
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path),
+                                 "DB_RESULT_CACHE": "0"}):
+        yield path
+
+
+def _queries(db):
+    """execute_safe_query の呼び出しを数える"""
+    return patch.object(db, "execute_safe_query", wraps=db.execute_safe_query)
+
+
+def test_sample_and_value_examples_are_cached(keiba_db):
+    with DatabaseConnection() as db, _queries(db) as query:
+        first = get_sample_data(db, "NL_RA", num_rows=2)
+        assert get_sample_data(db, "NL_RA", num_rows=2) is first
+        values = get_column_value_examples(db, "NL_RA", "JyoCD")
+        assert get_column_value_examples(db, "NL_RA", "JyoCD") is values
+        assert query.call_count == 2
+    assert values["unique_values"] == ["05", "06"]
+    stats = sample_cache_stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (2, 2, 2)
+    assert stats["bytes"] > 0
+
+
+def test_invalidated_when_data_changes(keiba_db):
+    with DatabaseConnection() as db:
+        before = get_column_value_examples(db, "NL_RA", "JyoCD")
+    conn = sqlite3.connect(str(keiba_db))
+    conn.executemany("INSERT INTO NL_RA VALUES (?,?,?)", [(2024, "08", 1800)] * 5)
+    conn.commit()
+    conn.close()
+    with DatabaseConnection() as db:
+        after = get_column_value_examples(db, "NL_RA", "JyoCD")
+    assert before["unique_values"] == ["05", "06"]
+    assert after["unique_values"][0] == "08"
+
+
+def test_bounded_lru(keiba_db):
+    with patch.dict(os.environ, {"DB_SAMPLE_CACHE_MAX_ENTRIES": "2"}):
+        clear_cache()
+        with DatabaseConnection() as db:
+            for column in ("Year", "JyoCD", "Kyori"):
+                get_column_value_examples(db, "NL_RA", column)
+            stats = sample_cache_stats()
+            assert (stats["entries"], stats["evictions"]) == (2, 1)
+            with _queries(db) as query:
+                get_column_value_examples(db, "NL_RA", "Year")
+                assert query.call_count == 1
+
+
+def test_no_cache_without_data_version(keiba_db):
+    with DatabaseConnection() as db, _queries(db) as query, \
+            patch.object(db, "data_version", return_value=None):
+        get_sample_data(db, "NL_RA")
+        get_sample_data(db, "NL_RA")
+        get_column_value_examples(db, "NL_RA", "JyoCD", use_cache=False)
+        assert query.call_count == 3
+    assert sample_cache_stats()["entries"] == 0
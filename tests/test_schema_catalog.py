@@ -0,0 +1,101 @@
+"""Tests for the in-process schema catalog"""
+
+import os
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.result_cache import reset_result_cache
+from jvlink_mcp_server.database.sample_data_provider import get_column_value_examples
+from jvlink_mcp_server.database.schema_catalog import catalog_stats, clear_catalogs
+
+
+@pytest.fixture(autouse=True)
+def _fresh_state():
+    clear_catalogs()
+    reset_result_cache()
+    yield
+    clear_catalogs()
+    reset_result_cache()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "catalog.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_SE (Year INTEGER, JyoCD TEXT, Ninki INTEGER)")
+    conn.execute("INSERT INTO NL_SE VALUES (2024, '05', 1)")
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path),
+                                 "DB_RESULT_CACHE": "0"}):
+        yield path
+
+
+def _catalog_queries(calls):
+    return [q for q in calls if "sqlite_master" in q or "PRAGMA table_info" in q]
+
+
+def test_catalog_loaded_once_across_connections(db_path):
+    calls = []
+    original = DatabaseConnection.execute_query
+
+    def spy(self, query, params=None):
+        calls.append(query)
+        return original(self, query, params=params)
+
+    with patch.object(DatabaseConnection, "execute_query", spy):
+        for _ in range(3):
+            with DatabaseConnection() as db:
+                get_column_value_examples(db, "NL_SE", "JyoCD")
+    # テーブル一覧1回 + PRAGMA 1回のみ
+    assert len(_catalog_queries(calls)) == 2
+
+
+def test_lookups(db_path):
+    with DatabaseConnection() as db:
+        assert db.has_table("NL_SE")
+        assert not db.has_table("NL_RA")
+        assert db.has_column("NL_SE", "Ninki")
+        assert not db.has_column("NL_SE", "Bamei")
+        assert not db.has_column("NL_RA", "Ninki")
+        assert db.get_table_columns("NL_SE") == {"Year", "JyoCD", "Ninki"}
+        with pytest.raises(ValueError, match="存在しません"):
+            db.validate_table("NL_RA")
+        with pytest.raises(ValueError, match="Invalid table name"):
+            db.validate_table("NL_SE; --")
+
+
+def test_schema_copy_is_independent(db_path):
+    with DatabaseConnection() as db:
+        schema = db.get_table_schema("NL_SE")
+        schema["column_name"] = "x"
+        assert "Ninki" in db.get_table_schema("NL_SE")["column_name"].tolist()
+
+
+def test_catalog_reloaded_after_schema_change(db_path):
+    with DatabaseConnection() as db:
+        assert not db.has_table("NL_RA")
+    time.sleep(0.01)
+    conn = sqlite3.connect(str(db_path))
+    conn.execute("CREATE TABLE NL_RA (Year INTEGER)")
+    conn.commit()
+    conn.close()
+    with DatabaseConnection() as db:
+        assert db.has_table("NL_RA")
+
+
+def test_stats_keep_each_target(db_path, tmp_path):
+    other = tmp_path / "other.db"
+    conn = sqlite3.connect(str(other))
+    conn.execute("CREATE TABLE NL_RA (Year INTEGER)")
+    conn.commit()
+    conn.close()
+    for path in (db_path, other):
+        with patch.dict(os.environ, {"DB_PATH": str(path)}):
+            with DatabaseConnection() as db:
+                db.get_tables()
+    assert set(catalog_stats()) == {f"sqlite:{db_path}", f"sqlite:{other}"}
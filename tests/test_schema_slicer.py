@@ -0,0 +1,59 @@
+"""Tests for the relevance-sliced schema in get_sql_generation_prompt"""
+
+import json
+
+from jvlink_mcp_server.database.schema_info import get_schema_description
+from jvlink_mcp_server.database.schema_slicer import slice_schema
+from jvlink_mcp_server.server import get_sql_generation_prompt
+
+
+def test_sire_question_picks_pedigree_columns():
+    schema = slice_schema("ディープインパクト産駒の距離別成績を集計して")
+    assert "NL_UM" in schema.tables
+    assert "Ketto3InfoBamei1" in schema.tables["NL_UM"]["columns"]
+    assert "NL_SE" in schema.tables
+
+
+def test_favorite_question_picks_race_and_entry_tables():
+    schema = slice_schema("過去3年で東京競馬場の芝1600mで1番人気だった馬の成績を教えて")
+    assert list(schema.tables)[:2] == ["NL_RA", "NL_SE"]
+    assert {"JyoCD", "Kyori", "TrackCD"} <= set(schema.tables["NL_RA"]["columns"])
+    assert "Ninki" in schema.tables["NL_SE"]["columns"]
+    assert not any(t.startswith(("RT_", "TS_")) or t.endswith("_NAR") for t in schema.tables)
+
+
+def test_nar_question_uses_nar_tables_only():
+    schema = slice_schema("大井競馬の騎手別勝率")
+    assert schema.families == {"nar"}
+    assert {"NL_SE_NAR", "NL_KS_NAR"} <= set(schema.tables)
+    assert "NL_SE" not in schema.tables
+
+    both = slice_schema("JRAと地方の1番人気勝率比較")
+    assert {"NL_SE", "NL_SE_NAR"} <= set(both.tables)
+
+
+def test_realtime_tables_need_a_marker():
+    schema = slice_schema("今日の中山11Rのオッズ推移")
+    assert {"realtime", "timeseries"} <= schema.families
+    assert "TS_O1" in schema.tables
+
+
+def test_fallback_and_budget():
+    schema = slice_schema("hello")
+    assert list(schema.tables) == ["NL_SE", "NL_RA"]
+
+    small = slice_schema("3連単の配当が高いレース", budget=800)
+    assert small.chars <= 800
+    assert small.omitted
+
+
+def test_prompt_is_much_smaller_than_full_schema():
+    full = len(json.dumps(get_schema_description(), ensure_ascii=False, indent=2))
+    result = get_sql_generation_prompt("ディープインパクト産駒の距離別成績を集計して")
+    assert len(result["prompt_for_llm"]) * 5 < full
+    assert "Ketto3InfoBamei1" in result["prompt_for_llm"]
+    assert "NL_UM" in result["schema_info"]["tables"]
+    assert "all_tables" not in result["schema_info"]
+
+    nar = get_sql_generation_prompt("大井競馬の騎手別勝率", max_schema_chars=1000)
+    assert "大井" in nar["prompt_for_llm"] and nar["schema_info"]["schema_chars"] <= 1000
@@ -0,0 +1,154 @@
+"""Tests for columnar result conversion"""
+
+import datetime
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.serialization import (
+    arrays_to_columns,
+    arrays_to_records,
+    column_to_list,
+    encode_rows,
+    frame_to_arrays,
+    num_rows,
+    validate_response_format,
+)
+
+
+class TestColumnToList:
+    def test_nan_becomes_none(self):
+        assert column_to_list(np.array([1.5, np.nan])) == [1.5, None]
+
+    def test_masked_becomes_none(self):
+        arr = np.ma.masked_array([1, 2], mask=[False, True])
+        assert column_to_list(arr) == [1, None]
+
+    def test_datetime64_ns_becomes_datetime(self):
+        arr = np.array(["2024-01-01T10:00", "NaT"], dtype="datetime64[ns]")
+        assert column_to_list(arr) == [datetime.datetime(2024, 1, 1, 10, 0), None]
+
+    def test_object_na_becomes_none(self):
+        arr = np.array(["a", None, np.nan, pd.NA], dtype=object)
+        assert column_to_list(arr) == ["a", None, None, None]
+
+    def test_limit(self):
+        assert column_to_list(np.arange(10), limit=3) == [0, 1, 2]
+
+
+class TestArrays:
+    def test_records_and_columns(self):
+        arrays = frame_to_arrays(pd.DataFrame({"a": [1, 2], "b": ["x", None]}))
+        assert num_rows(arrays) == 2
+        assert arrays_to_records(arrays) == [{"a": 1, "b": "x"}, {"a": 2, "b": None}]
+        assert arrays_to_columns(arrays, limit=1) == {"a": [1], "b": ["x"]}
+
+    def test_empty(self):
+        assert num_rows({}) == 0
+        assert arrays_to_records({}) == []
+
+
+@pytest.mark.parametrize("db_type", ["sqlite", "duckdb"])
+def test_execute_query_arrays(db_type, tmp_path):
+    path = tmp_path / f"t.{db_type}"
+    if db_type == "duckdb":
+        import duckdb
+        duckdb.connect(str(path)).close()
+    else:
+        import sqlite3
+        sqlite3.connect(str(path)).close()
+    with patch.dict(os.environ, {"DB_TYPE": db_type, "DB_PATH": str(path)}):
+        with DatabaseConnection() as db:
+            arrays = db.execute_safe_query_arrays(
+                "SELECT 1 AS n, NULL AS missing UNION ALL SELECT 2, 'x'"
+            )
+            with pytest.raises(ValueError, match="Dangerous keyword"):
+                db.execute_safe_query_arrays("DROP TABLE t")
+    records = sorted(arrays_to_records(arrays), key=lambda r: r["n"])
+    assert records == [{"n": 1, "missing": None}, {"n": 2, "missing": "x"}]
+
+
+class TestColumnarFormat:
+    def test_datetime64_becomes_iso_string(self):
+        arr = np.array(["2024-01-01T10:00", "NaT"], dtype="datetime64[ns]")
+        assert column_to_list(arr, iso_datetime=True) == ["2024-01-01T10:00:00", None]
+        dates = np.array(["2024-01-01", "2024-01-02"], dtype="datetime64[ns]")
+        assert column_to_list(dates, iso_datetime=True) == ["2024-01-01", "2024-01-02"]
+
+    def test_object_timestamps_become_iso_string(self):
+        stamps = pd.Series(pd.to_datetime(["2024-01-01 10:00", None])).dt.tz_localize("Asia/Tokyo")
+        assert column_to_list(stamps.to_numpy(), iso_datetime=True) == \
+            ["2024-01-01T10:00:00+09:00", None]
+        dates = np.array([datetime.date(2024, 1, 1), None], dtype=object)
+        assert column_to_list(dates, iso_datetime=True) == ["2024-01-01", None]
+
+    def test_masked_datetime_becomes_iso_string(self):
+        arr = np.ma.masked_array(
+            np.array(["2024-01-02", "2024-01-03"], dtype="datetime64[us]"), mask=[False, True])
+        assert column_to_list(arr, iso_datetime=True) == ["2024-01-02", None]
+
+    def test_duckdb_null_date(self, tmp_path):
+        duckdb = pytest.importorskip("duckdb")
+        path = tmp_path / "t.duckdb"
+        conn = duckdb.connect(str(path))
+        conn.execute("CREATE TABLE t AS SELECT * FROM (VALUES "
+                     "(DATE '2024-01-02', TIMESTAMP '2024-01-02 10:00:00'), (NULL, NULL)) v(d, ts)")
+        conn.close()
+        with patch.dict(os.environ, {"DB_TYPE": "duckdb", "DB_PATH": str(path)}):
+            with DatabaseConnection() as db:
+                arrays = db.execute_safe_query_arrays("SELECT d, ts FROM t ORDER BY d")
+        assert encode_rows(arrays, "columnar")["data"] == {
+            "d": ["2024-01-02", None], "ts": ["2024-01-02T10:00:00", None],
+        }
+
+    def test_encode_rows(self):
+        df = pd.DataFrame({"a": [1, 2, 3], "b": [1.5, np.nan, 2.0],
+                           "d": pd.to_datetime(["2024-01-01", None, "2024-01-03"])})
+        arrays = frame_to_arrays(df)
+        assert encode_rows(arrays, "columnar", limit=2) == {
+            "format": "columnar",
+            "columns": ["a", "b", "d"],
+            "data": {"a": [1, 2], "b": [1.5, None], "d": ["2024-01-01", None]},
+        }
+        records = encode_rows(arrays)
+        assert "format" not in records
+        assert records["data"][1] == {"a": 2, "b": None, "d": None}
+
+    def test_invalid_format(self):
+        assert validate_response_format(None) == "records"
+        assert validate_response_format(" Columnar ") == "columnar"
+        with pytest.raises(ValueError, match="response_format"):
+            validate_response_format("csv")
+
+
+def test_tools_return_columnar(tmp_path):
+    import sqlite3
+
+    from jvlink_mcp_server.server import execute_safe_query, execute_safe_query_next
+
+    path = tmp_path / "t.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE NL_SE (Year INTEGER, Bamei TEXT, Time REAL)")
+    conn.executemany("INSERT INTO NL_SE VALUES (?,?,?)",
+                     [(2024, "テスト馬", 95.3), (2023, None, None), (2022, "馬", 100.0)])
+    conn.commit()
+    conn.close()
+    search = execute_safe_query.__wrapped__
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path),
+                                 "DB_COST_GUARD": "off"}):
+        result = search("SELECT Year, Bamei, Time FROM NL_SE ORDER BY Year DESC",
+                        response_format="columnar")
+        paged = search("SELECT Year, Bamei FROM NL_SE ORDER BY Year DESC", page_size=2,
+                       response_format="columnar")
+        page2 = execute_safe_query_next.__wrapped__(paged["next_token"], response_format="columnar")
+        invalid = search("SELECT Year FROM NL_SE", response_format="xml")
+    assert result["rows"] == 3
+    assert result["data"] == {"Year": [2024, 2023, 2022], "Bamei": ["テスト馬", None, "馬"],
+                              "Time": [95.3, None, 100.0]}
+    assert paged["data"] == {"Year": [2024, 2023], "Bamei": ["テスト馬", None]}
+    assert page2["data"] == {"Year": [2022], "Bamei": ["馬"]}
+    assert not invalid["success"] and "response_format" in invalid["error"]
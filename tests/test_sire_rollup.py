@@ -0,0 +1,242 @@
+"""Tests for the precomputed sire / broodmare-sire rollups"""
+
+import itertools
+import os
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from jvlink_mcp_server.database import aggregate_cube
+from jvlink_mcp_server.database.aggregate_cube import (
+    clear_cubes,
+    cube_stats,
+    refresh_cubes,
+    wait_for_builds,
+)
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.high_level_api import (
+    get_broodmare_sire_stats,
+    get_sire_stats,
+)
+from jvlink_mcp_server.database.query_control import QueryControl, query_control
+from jvlink_mcp_server.database.sire_rollup import get_sire_rollup, register_sire_rollups
+
+RACE_COLUMNS = "Year INTEGER, MonthDay TEXT, JyoCD TEXT, Kaiji TEXT, Nichiji TEXT, RaceNum TEXT"
+STAT_KEYS = ("total_runs", "wins", "places_2", "places_3",
+             "win_rate", "place_rate_2", "place_rate_3")
+
+# (血統登録番号, 父, 母の父)
+HORSES = [
+    ("2017101111", "ディープインパクト", "キングカメハメハ"),
+    ("2018101222", "ディープインパクト", "サンデーサイレンス"),
+    ("2019101333", "キタサンブラック", "サクラバクシンオー"),
+    ("2019101444", "キングカメハメハ", "サンデーサイレンス"),
+    ("2020101555", "ロードカナロア", "ディープインパクト"),
+]
+
+# (年, 競馬場, 距離, TrackCD)
+RACES = [
+    (2021, "05", 1600, "11"),
+    (2022, "06", 2000, "17"),
+    (2023, "05", 1600, "23"),
+    (2023, "09", 1400, "24"),
+    (2024, "05", 2400, "11"),
+]
+
+
+def _cubes():
+    """cube_stats() をキューブ名 → 状態に平らにする（テストの接続先は1つ）"""
+    (stats,) = cube_stats().values()
+    return stats
+
+
+def _insert_race(conn, n, race):
+    year, jyo, kyori, track = race
+    key = (year, "0101", jyo, "01", "01", f"{n:02d}")
+    made = f"{year}0101"
+    conn.execute("INSERT INTO NL_RA VALUES (?,?,?,?,?,?,?,?,?)", key + (kyori, track, made))
+    for i, (ketto, _, _) in enumerate(HORSES):
+        jyuni = (i + n) % len(HORSES) + 1
+        conn.execute("INSERT INTO NL_SE VALUES (?,?,?,?,?,?,?,?,?)",
+                     key + (ketto, jyuni, made))
+
+
+@pytest.fixture
+def keiba_db(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"CREATE TABLE NL_SE ({RACE_COLUMNS}, KettoNum TEXT, "
+                 "KakuteiJyuni INTEGER, MakeDate TEXT)")
+    conn.execute(f"CREATE TABLE NL_RA ({RACE_COLUMNS}, Kyori INTEGER, TrackCD TEXT, "
+                 "MakeDate TEXT)")
+    conn.execute("CREATE TABLE NL_UM (KettoNum TEXT, Ketto3InfoBamei1 TEXT, "
+                 "Ketto3InfoBamei5 TEXT, MakeDate TEXT)")
+    conn.executemany("INSERT INTO NL_UM VALUES (?,?,?,'20200101')", HORSES)
+    # 最新の登録は未出走馬（マスタの高水位点が既存の出走馬を指さないようにする）
+    conn.execute("INSERT INTO NL_UM VALUES ('2022101666', 'イクイノックス', "
+                 "'キングヘイロー', '20220101')")
+    for n, race in enumerate(RACES, start=1):
+        _insert_race(conn, n, race)
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        yield path
+
+
+def _first_call(func=get_sire_stats, name="ディープ"):
+    """ロールアップがない間はSQLで答え、ロールアップはバックグラウンドで作られる"""
+    with DatabaseConnection() as db:
+        result = func(db, name)
+    assert "answered_from" not in result
+    assert wait_for_builds(10)
+    return result
+
+
+def _live(func, *args, **kwargs):
+    with patch.dict(os.environ, {"DB_FAVORITE_CUBE": "0"}):
+        with DatabaseConnection() as db:
+            return func(db, *args, **kwargs)
+
+
+FILTERS = {
+    "venue": [None, "東京"],
+    "year_from": [None, "2023"],
+    "distance": [None, 1600],
+    "track": [None, "芝", "ダート"],
+}
+
+
+@pytest.mark.parametrize("func,name", [
+    (get_sire_stats, "ディープ"),
+    (get_sire_stats, "キング"),
+    (get_broodmare_sire_stats, "サンデー"),
+    (get_broodmare_sire_stats, "存在しない"),
+])
+def test_rollup_matches_live_sql(keiba_db, func, name):
+    _first_call(func, name)
+    names = list(FILTERS)
+    for values in itertools.product(*FILTERS.values()):
+        kwargs = dict(zip(names, values))
+        with DatabaseConnection() as db:
+            rolled = func(db, name, **kwargs)
+        live = _live(func, name, **kwargs)
+        assert rolled["answered_from"] == "aggregate_cube"
+        assert "answered_from" not in live
+        assert {k: rolled[k] for k in STAT_KEYS} == {k: live[k] for k in STAT_KEYS}, kwargs
+
+
+def test_matched_names(keiba_db):
+    _first_call(get_broodmare_sire_stats, "サンデー")
+    _first_call(get_sire_stats, "ン")
+    with DatabaseConnection() as db:
+        result = get_broodmare_sire_stats(db, "サンデー")
+    assert result["broodmare_sire_name"] == "サンデーサイレンス"
+    assert result["matched_broodmare_sires"] == ["サンデーサイレンス"]
+    assert "u.Ketto3InfoBamei5 IN (?)" in result["query"]
+
+    with DatabaseConnection() as db:
+        result = get_sire_stats(db, "ン")
+    assert result["matched_sires"][0] == "ディープインパクト"  # 出走数の多い順
+    assert sorted(result["matched_sires"]) == ["キタサンブラック", "キングカメハメハ",
+                                               "ディープインパクト"]
+
+
+def test_sidecar_and_stats(keiba_db):
+    _first_call()
+    stats = _cubes()["sire_rollup"]
+    assert stats["origin"] == "built"
+    assert stats["names"] == 4
+    assert set(stats["watermarks"]) == {"NL_SE", "NL_RA", "NL_UM"}
+
+    clear_cubes()
+    with DatabaseConnection() as db:
+        assert get_sire_stats(db, "ディープ")["answered_from"] == "aggregate_cube"
+    assert _cubes()["sire_rollup"]["origin"] == "sidecar"
+
+
+def test_pedigree_correction_refreshes_affected_years(keiba_db):
+    _first_call()
+    conn = sqlite3.connect(str(keiba_db))
+    # 父馬名の訂正（NL_UMの再送）
+    conn.execute("UPDATE NL_UM SET Ketto3InfoBamei1 = 'ドゥラメンテ', MakeDate = '20250101' "
+                 "WHERE KettoNum = '2019101333'")
+    conn.commit()
+    conn.close()
+
+    _first_call()
+    for name in ("ドゥラメンテ", "キタサン", "ディープ"):
+        with DatabaseConnection() as db:
+            rolled = get_sire_stats(db, name)
+        assert rolled["answered_from"] == "aggregate_cube"
+        live = _live(get_sire_stats, name)
+        assert {k: rolled[k] for k in STAT_KEYS} == {k: live[k] for k in STAT_KEYS}, name
+    stats = _cubes()["sire_rollup"]
+    assert stats["origin"] == "incremental"
+    assert stats["refreshed_years"]  # 訂正馬が出走した年（と最新作成日の年）だけ
+
+
+def test_slow_build_serves_live_sql(keiba_db):
+    release = threading.Event()
+    aggregate = aggregate_cube._aggregate
+
+    def slow_aggregate(*args, **kwargs):
+        release.wait(10)
+        return aggregate(*args, **kwargs)
+
+    with patch.object(aggregate_cube, "_aggregate", side_effect=slow_aggregate):
+        with query_control(QueryControl(timeout=1.0)), DatabaseConnection() as db:
+            result = get_sire_stats(db, "ディープ")
+        assert "answered_from" not in result
+        release.set()
+        assert wait_for_builds(10)
+    assert {k: result[k] for k in STAT_KEYS} == \
+        {k: v for k, v in _live(get_sire_stats, "ディープ").items() if k in STAT_KEYS}
+    assert _cubes()["sire_rollup"]["origin"] == "built"
+
+
+def test_scheduler_job_refreshes_rollups(keiba_db):
+    from jvlink_mcp_server import server
+    result = server._refresh_aggregates()
+    assert result["sire_rollup"] == result["broodmare_sire_rollup"] == "built"
+
+
+def test_new_races_refresh_incrementally(keiba_db):
+    register_sire_rollups()
+    assert refresh_cubes()["sire_rollup"] == "built"
+    conn = sqlite3.connect(str(keiba_db))
+    _insert_race(conn, 6, (2025, "05", 1600, "11"))
+    conn.commit()
+    conn.close()
+
+    result = refresh_cubes()
+    assert result["sire_rollup"] == "incremental"
+    assert result["broodmare_sire_rollup"] == "incremental"
+    assert sorted(_cubes()["sire_rollup"]["refreshed_years"]) == ["2024", "2025"]
+    with DatabaseConnection() as db:
+        rolled = get_sire_stats(db, "ディープ", year_from="2025")
+    assert rolled["total_runs"] == 2
+
+
+def test_without_broodmare_column_falls_back(tmp_path, reset_caches):
+    path = tmp_path / "keiba.db"
+    conn = sqlite3.connect(str(path))
+    conn.execute(f"CREATE TABLE NL_SE ({RACE_COLUMNS}, KettoNum TEXT, KakuteiJyuni INTEGER)")
+    conn.execute("CREATE TABLE NL_UM (KettoNum TEXT, Ketto3InfoBamei1 TEXT)")
+    conn.execute("INSERT INTO NL_UM VALUES ('1', 'ディープインパクト')")
+    conn.execute("INSERT INTO NL_SE VALUES (2023,'0101','05','01','01','01','1',1)")
+    conn.commit()
+    conn.close()
+    with patch.dict(os.environ, {"DB_TYPE": "sqlite", "DB_PATH": str(path)}):
+        with DatabaseConnection() as db:
+            get_sire_rollup(db, "broodmare_sire")
+        _first_call()
+        assert _cubes()["broodmare_sire_rollup"]["origin"] == "failed"
+        with DatabaseConnection() as db:
+            assert get_sire_rollup(db, "broodmare_sire") is None
+            result = get_sire_stats(db, "ディープ")
+            assert result["answered_from"] == "aggregate_cube"
+            assert result["total_runs"] == 1
+            # NL_RAがないので距離の絞り込みはロールアップでは扱えない
+            assert not get_sire_rollup(db).covers(Kyori=1600)
@@ -0,0 +1,87 @@
+"""Tests for the shared SQL lexer"""
+
+import pytest
+
+from jvlink_mcp_server.database.connection import DatabaseConnection
+from jvlink_mcp_server.database.query_corrector import correct_query
+from jvlink_mcp_server.database.sql_lexer import lex, render, tokenize
+from jvlink_mcp_server.server import validate_sql_query
+
+
+class TestTokenize:
+    @pytest.mark.parametrize("sql", [
+        "SELECT * FROM NL_SE WHERE JyoCD = '05' -- comment\nAND Ninki <= 3;",
+        "SELECT \"Bamei\", 'it''s', E'a\\'b' /* block */ FROM NL_UM",
+        "SELECT 1.5e3, .5, x::TEXT FROM t WHERE a <> b",
+        "SELECT '未終端",
+    ])
+    def test_round_trip(self, sql):
+        assert render(tokenize(sql)) == sql
+
+    def test_literals_and_comments_are_single_tokens(self):
+        kinds = [t.kind for t in tokenize("'DROP' -- DELETE\n/* UPDATE */") if not t.is_trivia]
+        assert kinds == ["string"]
+
+    def test_keywords_classified(self):
+        tokens = [t for t in tokenize("SELECT CREATED_AT FROM t") if not t.is_trivia]
+        assert [t.kind for t in tokens] == ["keyword", "ident", "keyword", "ident"]
+
+    def test_lex_is_cached_by_raw_text(self):
+        sql = "SELECT Year FROM NL_RA WHERE Year = '2024'"
+        assert lex(sql) is lex(sql)
+
+
+class TestLexedQuery:
+    def test_dangerous_keywords_outside_literals(self):
+        assert lex("SELECT * FROM NL_UM WHERE Bamei LIKE '%UPDATE%'").dangerous_keywords == ()
+        assert lex("SELECT 1 -- DROP TABLE x").dangerous_keywords == ()
+        assert lex("DELETE FROM t WHERE x IN (SELECT 1)").dangerous_keywords == ("DELETE",)
+
+    def test_statement_count(self):
+        assert lex("SELECT 1;").statement_count == 1
+        assert lex("SELECT ';' AS v").statement_count == 1
+        assert lex("SELECT 1; SELECT 2").statement_count == 2
+
+    def test_escape_string_does_not_hide_statements(self):
+        # PostgreSQL の E'\'' はクォート1文字の文字列
+        lexed = lex("SELECT E'\\'' AS q; DROP TABLE t; --'")
+        assert lexed.statement_count == 2
+        assert lexed.dangerous_keywords == ("DROP",)
+
+    def test_is_select(self):
+        assert lex("WITH x AS (SELECT 1) SELECT * FROM x").is_select
+        assert lex("(SELECT 1)").is_select
+        assert not lex("PRAGMA table_info(NL_SE)").is_select
+
+
+class TestSharedStages:
+    def test_validate_sql_query_agrees_with_safety_check(self):
+        assert validate_sql_query("SELECT CREATED_AT FROM t")["is_safe"]
+        assert validate_sql_query("SELECT * FROM NL_UM WHERE Bamei LIKE '%DELETE%'")["is_safe"]
+        result = validate_sql_query("SELECT 1; SELECT 2")
+        assert not result["is_safe"]
+        assert result["multiple_statements"]
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT 1", "WITH x AS (SELECT 1) SELECT * FROM x", "(SELECT 1)",
+        "PRAGMA table_info(NL_SE)", "VALUES (1)", "EXPLAIN SELECT 1", "SHOW TABLES",
+        "DESCRIBE NL_SE", "SELECT 1; SELECT 2", "DELETE FROM NL_SE", "", "-- SELECT",
+    ])
+    def test_validate_sql_query_parity(self, sql):
+        """validate_sql_query が安全とする文だけが check_query_safety を通る"""
+        try:
+            DatabaseConnection().check_query_safety(sql)
+            executes = True
+        except ValueError:
+            executes = False
+        assert validate_sql_query(sql)["is_safe"] == executes == lex(sql).is_safe
+
+    def test_corrector_ignores_literals_and_comments(self):
+        sql = "SELECT 'Ninki = ''1''' AS s FROM NL_SE -- JyoCD = '5'\nWHERE s.Ninki = '1'"
+        corrected, corrections = correct_query(sql)
+        assert corrected == sql.replace("s.Ninki = '1'", "s.Ninki = 1")
+        assert corrections == ["Ninki: '1' → 1 (INTEGER型)"]
+
+    def test_corrector_requires_whole_identifier(self):
+        sql = "SELECT * FROM NL_SE WHERE TanNinki = '1'"
+        assert correct_query(sql) == (sql, [])
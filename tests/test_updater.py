@@ -1,6 +1,10 @@
 """Tests for the auto-updater module."""
 
 import json
+import os
+import subprocess
+import sys
+import threading
 import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -15,6 +19,7 @@ from jvlink_mcp_server.updater import (
     should_check_updates,
     save_update_check_time,
     perform_update,
+    start_update_check,
     startup_update_check,
     UPDATE_CHECK_FILE,
 )
@@ -134,3 +139,55 @@ class TestStartupCheck:
         notice = startup_update_check()
         assert notice is not None
         assert "アップデート" in notice
+
+
+class TestBackgroundCheck:
+    @patch("jvlink_mcp_server.updater.startup_update_check")
+    def test_disabled_by_env(self, mock_check):
+        with patch.dict(os.environ, {"MCP_UPDATE_CHECK": "0"}):
+            assert start_update_check() is None
+        mock_check.assert_not_called()
+
+    def test_does_not_block_caller(self):
+        release = threading.Event()
+        notices = []
+
+        def slow_check():
+            release.wait(5)
+            return "notice"
+
+        with patch("jvlink_mcp_server.updater.startup_update_check", side_effect=slow_check), \
+                patch.dict(os.environ, {"MCP_UPDATE_CHECK": "1"}):
+            thread = start_update_check(notices.append)
+            assert thread.daemon and thread.is_alive()
+            release.set()
+            thread.join(5)
+        assert notices == ["notice"]
+
+
+def test_server_import_is_lazy():
+    """server の import で pandas を読み込まず、アップデート確認を待たない"""
+    code = (
+        "import sys, jvlink_mcp_server.server as s; "
+        "print('pandas' in sys.modules, s._update_thread is None)"
+    )
+    env = {**os.environ, "MCP_UPDATE_CHECK": "0", "DB_INDEX_AUDIT": "0"}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env=env, timeout=60)
+    assert result.stdout.split() == ["False", "True"], result.stderr
+
+
+def test_server_import_starts_no_background_jobs():
+    """インデックス監査と集約キューブの定期更新はサーバー起動時に始める（importでは始めない）"""
+    code = (
+        "import threading, jvlink_mcp_server.server as s; "
+        "names = lambda: sorted(t.name for t in threading.enumerate() if t.name != 'MainThread'); "
+        "print(names()); s.start_background_jobs(); s.start_background_jobs(); print(names())"
+    )
+    env = {**os.environ, "MCP_UPDATE_CHECK": "0", "DB_INDEX_AUDIT": "0",
+           "DB_AGGREGATE_REFRESH_INTERVAL": "3600"}
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            env=env, timeout=60)
+    assert result.stdout.splitlines() == [
+        "[]", "['aggregate-refresh', 'jvlink-index-audit']"
+    ], result.stderr